@@ -114,13 +114,16 @@ class _ClusterCacheEntry:
         cached_at: float,
         nodes: list[NodeSnapshot],
         resources: list[ResourceSnapshot],
+        generation: int = 0,
     ) -> None:
         self.cached_at = cached_at
         self.nodes = nodes
         self.resources = resources
+        self.generation = generation
 
 
 _cluster_cache: _ClusterCacheEntry | None = None
+_cluster_cache_generation = 0
 _cluster_cache_lock = threading.Lock()
 
 
@@ -895,6 +898,12 @@ def _get_cached_cluster_state() -> _ClusterCacheEntry | None:
         return _cluster_cache
 
 
+# 每次重新載入快照都會遞增；沒有有效快取時為 None
+def _cluster_state_generation() -> int | None:
+    cached = _get_cached_cluster_state()
+    return cached.generation if cached is not None else None
+
+
 def _set_cached_cluster_state(
     *,
     nodes: list[NodeSnapshot],
@@ -904,11 +913,13 @@ def _set_cached_cluster_state(
         return
 
     with _cluster_cache_lock:
-        global _cluster_cache
+        global _cluster_cache, _cluster_cache_generation
+        _cluster_cache_generation += 1
         _cluster_cache = _ClusterCacheEntry(
             cached_at=time.monotonic(),
             nodes=nodes,
             resources=resources,
+            generation=_cluster_cache_generation,
         )
 
 
@@ -9,7 +9,8 @@
   4. 回傳 ChatResponse
 
 設計重點：
-  - 一次 chat 請求只收集一次 PVE 快照（lazy），多個 tool_calls 共用同一份快照。
+  - 一次 chat 請求只取一次 PVE 快照（lazy），多個 tool_calls 共用同一份快照；
+    快照來自行程內共用的 snapshot_service，同時進行的對話不會各自重新收集。
   - ssh_exec 在 AI Tool 呼叫時直接執行（不走 pending 確認），黑名單仍有效。
   - Gemma-4/Qwen3 的 <think> 與 tool call 標記會在第二次請求前清除，
     避免 message history 污染導致 LLM 無法正確總結。
@@ -25,9 +26,9 @@ from typing import Any
 import httpx
 from sqlmodel import Session
 
-from app.ai.pve_log.collector import collect_snapshot
 from app.ai.pve_log.config import settings
 from app.ai.pve_log.schemas import ChatResponse, ToolCallRecord
+from app.ai.pve_log.snapshot import snapshot_service
 
 logger = logging.getLogger(__name__)
 
@@ -456,7 +457,7 @@ async def chat(
             needs_snapshot = any(tc["function"]["name"] != "ssh_exec" for tc in tool_calls)
             if needs_snapshot:
                 try:
-                    _snapshot = await asyncio.to_thread(collect_snapshot)
+                    _snapshot = await asyncio.to_thread(snapshot_service.get)
                 except Exception as exc:
                     logger.error("收集 PVE 快照失敗：%s", exc)
                     return ChatResponse(reply="", error=f"收集 PVE 資料失敗：{exc}")
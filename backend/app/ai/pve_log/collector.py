@@ -306,11 +306,14 @@ def _collect_lxc_interfaces(proxmox: ProxmoxAPI, node: str, vmid: int) -> list[N
         return []
 
 
-def collect_snapshot() -> SystemSnapshot:
-    started = time.monotonic()
-    errors: list[str] = []
-    proxmox = _get_proxmox()
-
+def _collect_inventory(
+    proxmox: ProxmoxAPI, errors: list[str]
+) -> tuple[ClusterInfo, list[NodeInfo], list[StorageInfo], list[tuple[dict, ResourceSummary]]]:
+    """收集清單類資料（叢集、節點、儲存空間、VM/LXC 摘要）。
+
+    這些都是叢集層級的少量 API 呼叫；VM/LXC 摘要同時回傳原始項目，
+    供快照快取比對資源是否變更。
+    """
     logger.info("收集叢集資訊...")
     try:
         cluster = _retry(_collect_cluster_info, proxmox)
@@ -357,25 +360,26 @@ def collect_snapshot() -> SystemSnapshot:
         errors.append(f"cluster.resources：{exc}")
         raw_resources = []
 
-    all_resources: list[ResourceSummary] = []
-    running_resources: list[tuple[str, int, str]] = []
-
-    for item in raw_resources:
-        if _safe_bool(item.get("template", 0)):
-            continue
-        summary = _collect_resource_summary(item)
-        all_resources.append(summary)
-        if summary.status == "running":
-            running_resources.append((summary.node, summary.vmid, summary.resource_type))
-
-    logger.info("共 %d 個資源（VM/LXC），%d 個運行中", len(all_resources), len(running_resources))
-
-    logger.info("收集即時狀態（%d 個 running 資源）...", len(running_resources))
+    resources = [
+        (item, _collect_resource_summary(item))
+        for item in raw_resources
+        if not _safe_bool(item.get("template", 0))
+    ]
+    return cluster, nodes, storages, resources
+
+
+def _collect_statuses(
+    proxmox: ProxmoxAPI, resources: list[ResourceSummary], errors: list[str]
+) -> list[ResourceStatus]:
+    running = [
+        (r.node, r.vmid, r.resource_type) for r in resources if r.status == "running"
+    ]
+    logger.info("收集即時狀態（%d 個 running 資源）...", len(running))
     resource_statuses: list[ResourceStatus] = []
     with ThreadPoolExecutor(max_workers=settings.collector_max_workers) as pool:
         futures_status = {
             pool.submit(_retry, _collect_resource_status, proxmox, node, vmid, rtype): (node, vmid, rtype)
-            for node, vmid, rtype in running_resources
+            for node, vmid, rtype in running
         }
         for future in as_completed(futures_status):
             try:
@@ -385,49 +389,71 @@ def collect_snapshot() -> SystemSnapshot:
             except Exception as exc:
                 node, vmid, rtype = futures_status[future]
                 errors.append(f"{rtype} {vmid} 狀態：{exc}")
+    return resource_statuses
 
-    resource_configs: list[ResourceConfig] = []
-    if settings.collector_fetch_config:
-        all_vmid_list = [(r.node, r.vmid, r.resource_type) for r in all_resources]
-        logger.info("收集設定檔（%d 個資源）...", len(all_vmid_list))
-        with ThreadPoolExecutor(max_workers=settings.collector_max_workers) as pool:
-            futures_cfg = {
-                pool.submit(_retry, _collect_resource_config, proxmox, node, vmid, rtype): (node, vmid, rtype)
-                for node, vmid, rtype in all_vmid_list
-            }
-            for future in as_completed(futures_cfg):
-                try:
-                    result = future.result()
-                    if result is not None:
-                        resource_configs.append(result)
-                except Exception as exc:
-                    node, vmid, rtype = futures_cfg[future]
-                    errors.append(f"{rtype} {vmid} 設定：{exc}")
 
+def _collect_configs(
+    proxmox: ProxmoxAPI, resources: list[ResourceSummary], errors: list[str]
+) -> list[ResourceConfig]:
+    logger.info("收集設定檔（%d 個資源）...", len(resources))
+    resource_configs: list[ResourceConfig] = []
+    with ThreadPoolExecutor(max_workers=settings.collector_max_workers) as pool:
+        futures_cfg = {
+            pool.submit(_retry, _collect_resource_config, proxmox, r.node, r.vmid, r.resource_type): r
+            for r in resources
+        }
+        for future in as_completed(futures_cfg):
+            try:
+                result = future.result()
+                if result is not None:
+                    resource_configs.append(result)
+            except Exception as exc:
+                r = futures_cfg[future]
+                errors.append(f"{r.resource_type} {r.vmid} 設定：{exc}")
+    return resource_configs
+
+
+def _collect_interfaces(
+    proxmox: ProxmoxAPI, resources: list[ResourceSummary], errors: list[str]
+) -> list[NetworkInterface]:
+    """收集 running LXC 的網路介面；``resources`` 中其他資源會被略過。"""
+    lxc_list = [
+        (r.node, r.vmid)
+        for r in resources
+        if r.resource_type == "lxc" and r.status == "running"
+    ]
+    logger.info("收集 LXC 網路介面（%d 個容器）...", len(lxc_list))
     network_interfaces: list[NetworkInterface] = []
-    if settings.collector_fetch_lxc_interfaces:
-        lxc_list = [
-            (r.node, r.vmid)
-            for r in all_resources
-            if r.resource_type == "lxc" and r.status == "running"
-        ]
-        logger.info("收集 LXC 網路介面（%d 個容器）...", len(lxc_list))
-        with ThreadPoolExecutor(max_workers=settings.collector_max_workers) as pool:
-            futures_iface = {
-                pool.submit(_retry, _collect_lxc_interfaces, proxmox, node, vmid): (node, vmid)
-                for node, vmid in lxc_list
-            }
-            for future in as_completed(futures_iface):
-                try:
-                    network_interfaces.extend(future.result())
-                except Exception as exc:
-                    node, vmid = futures_iface[future]
-                    errors.append(f"LXC {vmid} 網路介面：{exc}")
-
-    total_vms = sum(1 for r in all_resources if r.resource_type == "qemu")
-    total_lxc = sum(1 for r in all_resources if r.resource_type == "lxc")
-    running_vms = sum(1 for r in all_resources if r.resource_type == "qemu" and r.status == "running")
-    running_lxc = sum(1 for r in all_resources if r.resource_type == "lxc" and r.status == "running")
+    with ThreadPoolExecutor(max_workers=settings.collector_max_workers) as pool:
+        futures_iface = {
+            pool.submit(_retry, _collect_lxc_interfaces, proxmox, node, vmid): (node, vmid)
+            for node, vmid in lxc_list
+        }
+        for future in as_completed(futures_iface):
+            try:
+                network_interfaces.extend(future.result())
+            except Exception as exc:
+                node, vmid = futures_iface[future]
+                errors.append(f"LXC {vmid} 網路介面：{exc}")
+    return network_interfaces
+
+
+def _build_snapshot(
+    *,
+    started: float,
+    cluster: ClusterInfo,
+    nodes: list[NodeInfo],
+    storages: list[StorageInfo],
+    resources: list[ResourceSummary],
+    resource_statuses: list[ResourceStatus],
+    resource_configs: list[ResourceConfig],
+    network_interfaces: list[NetworkInterface],
+    errors: list[str],
+) -> SystemSnapshot:
+    total_vms = sum(1 for r in resources if r.resource_type == "qemu")
+    total_lxc = sum(1 for r in resources if r.resource_type == "lxc")
+    running_vms = sum(1 for r in resources if r.resource_type == "qemu" and r.status == "running")
+    running_lxc = sum(1 for r in resources if r.resource_type == "lxc" and r.status == "running")
     online_nodes = sum(1 for n in nodes if n.status == "online")
 
     duration = round(time.monotonic() - started, 3)
@@ -446,7 +472,7 @@ def collect_snapshot() -> SystemSnapshot:
         cluster=cluster,
         nodes=nodes,
         storages=storages,
-        resources=all_resources,
+        resources=resources,
         resource_statuses=resource_statuses,
         resource_configs=resource_configs,
         network_interfaces=network_interfaces,
@@ -458,3 +484,42 @@ def collect_snapshot() -> SystemSnapshot:
         running_vms=running_vms,
         running_lxc=running_lxc,
     )
+
+
+def collect_snapshot() -> SystemSnapshot:
+    """從頭收集一份完整快照（不經快取）。
+
+    對話與 API 路由請改用 :data:`app.ai.pve_log.snapshot.snapshot_service`，
+    多個請求共用同一份快照並只增量更新各 VM 的設定。
+    """
+    started = time.monotonic()
+    errors: list[str] = []
+    proxmox = _get_proxmox()
+
+    cluster, nodes, storages, pairs = _collect_inventory(proxmox, errors)
+    all_resources = [summary for _, summary in pairs]
+    logger.info(
+        "共 %d 個資源（VM/LXC），%d 個運行中",
+        len(all_resources),
+        sum(1 for r in all_resources if r.status == "running"),
+    )
+
+    resource_statuses = _collect_statuses(proxmox, all_resources, errors)
+    resource_configs: list[ResourceConfig] = []
+    if settings.collector_fetch_config:
+        resource_configs = _collect_configs(proxmox, all_resources, errors)
+    network_interfaces: list[NetworkInterface] = []
+    if settings.collector_fetch_lxc_interfaces:
+        network_interfaces = _collect_interfaces(proxmox, all_resources, errors)
+
+    return _build_snapshot(
+        started=started,
+        cluster=cluster,
+        nodes=nodes,
+        storages=storages,
+        resources=all_resources,
+        resource_statuses=resource_statuses,
+        resource_configs=resource_configs,
+        network_interfaces=network_interfaces,
+        errors=errors,
+    )
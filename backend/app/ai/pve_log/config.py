@@ -31,6 +31,11 @@ class Settings(BaseSettings):
     collector_retry_attempts: int = Field(default=3, ge=1, le=10)
     collector_retry_backoff: float = Field(default=0.3, ge=0.0, le=10.0)
 
+    # 共用快照：清單與即時狀態超過此秒數才重新收集；
+    # 各 VM 設定 / LXC 介面只在資源變更或超過 detail 秒數時重抓
+    snapshot_max_age_seconds: float = Field(default=15.0, ge=0.0, le=600.0)
+    snapshot_detail_max_age_seconds: float = Field(default=600.0, ge=0.0, le=86400.0)
+
     campus_cloud_api_public_base: str = Field(
         default="http://localhost:8000",
         alias="ai_api_public_base_url",
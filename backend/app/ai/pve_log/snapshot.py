@@ -0,0 +1,202 @@
+"""行程內共用的 PVE 快照 — 取代每次對話都從頭呼叫 ``collect_snapshot``。
+
+- 快照在 ``snapshot_max_age_seconds`` 內直接共用；過期後同一時間只有一個
+  請求重新收集，其餘等待並取用同一份結果（single-flight）。
+- 每次重新收集只抓清單與即時狀態：叢集、節點、儲存空間、VM/LXC 摘要，
+  以及 running 資源的 status。
+- 各 VM 設定與 LXC 網路介面是逐台呼叫、成本最高的部分，改為增量更新：
+  只有摘要指紋（節點、狀態、名稱、CPU/記憶體/磁碟上限、tags、lock）
+  變更的資源，或上次抓取已超過 ``snapshot_detail_max_age_seconds`` 的資源才重抓。
+  ``cluster.resources`` 不含設定 digest，指紋由這些欄位組成；不影響指紋的
+  修改（例如 description）最晚在 detail 期限後反映。
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+from proxmoxer import ProxmoxAPI
+
+from app.ai.pve_log.collector import (
+    _build_snapshot,
+    _collect_configs,
+    _collect_interfaces,
+    _collect_inventory,
+    _collect_statuses,
+    _get_proxmox,
+)
+from app.ai.pve_log.config import settings
+from app.ai.pve_log.schemas import (
+    NetworkInterface,
+    ResourceConfig,
+    ResourceSummary,
+    SystemSnapshot,
+)
+
+logger = logging.getLogger(__name__)
+
+_FINGERPRINT_KEYS = ("node", "type", "status", "name", "maxcpu", "maxmem", "maxdisk", "tags", "lock")
+
+
+def _fingerprint(item: dict) -> tuple[Any, ...]:
+    return tuple(item.get(key) for key in _FINGERPRINT_KEYS)
+
+
+@dataclass(frozen=True)
+class _Details:
+    # None 表示上次抓取失敗，下一輪一定重抓
+    fingerprint: tuple[Any, ...] | None
+    fetched_at: float
+    config: ResourceConfig | None
+    interfaces: tuple[NetworkInterface, ...]
+
+
+class SnapshotService:
+    def __init__(
+        self,
+        *,
+        get_client: Callable[[], ProxmoxAPI] = _get_proxmox,
+        max_age: Callable[[], float] = lambda: settings.snapshot_max_age_seconds,
+        detail_max_age: Callable[[], float] = lambda: settings.snapshot_detail_max_age_seconds,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._get_client = get_client
+        self._max_age = max_age
+        self._detail_max_age = detail_max_age
+        self._clock = clock
+        self._lock = threading.Lock()
+        # 同一時間只跑一次收集；等待中的請求取用該次結果
+        self._refresh_lock = threading.Lock()
+        self._snapshot: SystemSnapshot | None = None
+        self._refreshed_at: float | None = None
+        self._generation = 0
+        self._details: dict[int, _Details] = {}
+
+    def get(self) -> SystemSnapshot:
+        """回傳不超過快取期限的快照，必要時在目前執行緒重新收集。"""
+        with self._lock:
+            if self._is_fresh():
+                return self._snapshot  # type: ignore[return-value]
+            generation = self._generation
+
+        with self._refresh_lock:
+            with self._lock:
+                if self._generation != generation and self._snapshot is not None:
+                    return self._snapshot  # 等待期間已由其他請求收集完成
+            snapshot = self._refresh()
+            with self._lock:
+                self._snapshot = snapshot
+                self._refreshed_at = self._clock()
+                self._generation += 1
+            return snapshot
+
+    def invalidate(self) -> None:
+        """下次 :meth:`get` 重新收集清單；各 VM 設定仍依指紋判斷是否重抓。"""
+        with self._lock:
+            self._refreshed_at = None
+
+    def _is_fresh(self) -> bool:
+        # 呼叫端持有 self._lock
+        return (
+            self._snapshot is not None
+            and self._refreshed_at is not None
+            and self._clock() - self._refreshed_at < self._max_age()
+        )
+
+    # ── 收集 ─────────────────────────────────────────────────────────────
+
+    def _refresh(self) -> SystemSnapshot:
+        started = time.monotonic()
+        errors: list[str] = []
+        proxmox = self._get_client()
+
+        cluster, nodes, storages, pairs = _collect_inventory(proxmox, errors)
+        resources = [summary for _, summary in pairs]
+        statuses = _collect_statuses(proxmox, resources, errors)
+        details = self._refresh_details(proxmox, pairs, errors)
+
+        configs: list[ResourceConfig] = []
+        interfaces: list[NetworkInterface] = []
+        for r in resources:
+            entry = details.get(r.vmid)
+            if entry is None:
+                continue
+            if entry.config is not None:
+                configs.append(entry.config)
+            interfaces.extend(entry.interfaces)
+
+        return _build_snapshot(
+            started=started,
+            cluster=cluster,
+            nodes=nodes,
+            storages=storages,
+            resources=resources,
+            resource_statuses=statuses,
+            resource_configs=configs,
+            network_interfaces=interfaces,
+            errors=errors,
+        )
+
+    def _refresh_details(
+        self,
+        proxmox: ProxmoxAPI,
+        pairs: list[tuple[dict, ResourceSummary]],
+        errors: list[str],
+    ) -> dict[int, _Details]:
+        fetch_config = settings.collector_fetch_config
+        fetch_interfaces = settings.collector_fetch_lxc_interfaces
+        now = self._clock()
+        max_age = self._detail_max_age()
+        previous = self._details
+
+        changed: list[tuple[tuple[Any, ...], ResourceSummary]] = []
+        current: dict[int, _Details] = {}
+        for item, summary in pairs:
+            fingerprint = _fingerprint(item)
+            entry = previous.get(summary.vmid)
+            if (
+                entry is not None
+                and entry.fingerprint == fingerprint
+                and now - entry.fetched_at < max_age
+            ):
+                current[summary.vmid] = entry
+            else:
+                changed.append((fingerprint, summary))
+
+        if changed:
+            targets = [summary for _, summary in changed]
+            logger.info("更新 %d / %d 個資源的設定與網路介面", len(targets), len(pairs))
+            configs = (
+                {c.vmid: c for c in _collect_configs(proxmox, targets, errors)}
+                if fetch_config
+                else {}
+            )
+            by_vmid: dict[int, list[NetworkInterface]] = {}
+            if fetch_interfaces:
+                for iface in _collect_interfaces(proxmox, targets, errors):
+                    by_vmid.setdefault(iface.vmid, []).append(iface)
+
+            for fingerprint, summary in changed:
+                config = configs.get(summary.vmid)
+                failed = fetch_config and config is None
+                current[summary.vmid] = _Details(
+                    fingerprint=None if failed else fingerprint,
+                    fetched_at=now,
+                    config=config,
+                    interfaces=tuple(by_vmid.get(summary.vmid, ())),
+                )
+
+        # 已刪除的資源隨著這次結果一併移除
+        self._details = current
+        return current
+
+
+snapshot_service = SnapshotService()
+
+
+__all__ = ["SnapshotService", "snapshot_service"]
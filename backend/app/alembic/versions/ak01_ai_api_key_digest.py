@@ -0,0 +1,37 @@
+"""Store an HMAC digest of each AI API key for indexed lookup.
+
+Revision ID: ak01_ai_api_key_digest
+Revises: ip01_subnet_allocation_bitmap
+Create Date: 2026-10-17 18:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "ak01_ai_api_key_digest"
+down_revision = "ip01_subnet_allocation_bitmap"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # 既有憑證不回填（需要 SECRET_KEY 解密）：第一次驗證成功時補寫 digest
+    op.add_column(
+        "ai_api_credentials",
+        sa.Column("api_key_digest", sa.String(length=64), nullable=True),
+    )
+    op.create_index(
+        "ix_ai_api_credentials_api_key_digest",
+        "ai_api_credentials",
+        ["api_key_digest"],
+        unique=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        "ix_ai_api_credentials_api_key_digest", table_name="ai_api_credentials"
+    )
+    op.drop_column("ai_api_credentials", "api_key_digest")
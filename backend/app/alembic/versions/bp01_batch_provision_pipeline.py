@@ -0,0 +1,37 @@
+"""Track batch provisioning attempts and job throughput.
+
+Revision ID: bp01_batch_provision_pipeline
+Revises: 59a23c4591c7
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "bp01_batch_provision_pipeline"
+down_revision = "59a23c4591c7"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "batch_provision_jobs",
+        sa.Column("started_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.add_column(
+        "batch_provision_jobs",
+        sa.Column("throughput_per_minute", sa.Float(), nullable=True),
+    )
+    op.add_column(
+        "batch_provision_tasks",
+        sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("batch_provision_tasks", "attempts")
+    op.drop_column("batch_provision_jobs", "throughput_per_minute")
+    op.drop_column("batch_provision_jobs", "started_at")
@@ -0,0 +1,63 @@
+"""Add firewall sync jobs and per-resource block rule fingerprints.
+
+Revision ID: fw01_firewall_sync_jobs
+Revises: bp01_batch_provision_pipeline
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "fw01_firewall_sync_jobs"
+down_revision = "bp01_batch_provision_pipeline"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    firewall_sync_status = sa.Enum(
+        "pending", "running", "completed", "failed", name="firewallsyncjobstatus"
+    )
+    op.create_table(
+        "firewall_sync_jobs",
+        sa.Column("id", sa.Uuid(), nullable=False),
+        sa.Column("initiated_by", sa.Uuid(), nullable=True),
+        sa.Column("status", firewall_sync_status, nullable=False),
+        sa.Column("targets", sa.Text(), nullable=False),
+        sa.Column("total", sa.Integer(), nullable=False),
+        sa.Column("done", sa.Integer(), nullable=False),
+        sa.Column("skipped", sa.Integer(), nullable=False),
+        sa.Column("failed_count", sa.Integer(), nullable=False),
+        sa.Column("summary", sa.Text(), nullable=True),
+        sa.Column("error", sa.String(length=2000), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("started_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("finished_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(["initiated_by"], ["user.id"], ondelete="SET NULL"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_firewall_sync_jobs_initiated_by", "firewall_sync_jobs", ["initiated_by"]
+    )
+    op.create_index(
+        "ix_firewall_sync_jobs_created_at", "firewall_sync_jobs", ["created_at"]
+    )
+    op.create_index(
+        "ix_firewall_sync_jobs_updated_at", "firewall_sync_jobs", ["updated_at"]
+    )
+    op.add_column(
+        "resources",
+        sa.Column("block_rules_fingerprint", sa.String(length=64), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("resources", "block_rules_fingerprint")
+    op.drop_index("ix_firewall_sync_jobs_updated_at", table_name="firewall_sync_jobs")
+    op.drop_index("ix_firewall_sync_jobs_created_at", table_name="firewall_sync_jobs")
+    op.drop_index("ix_firewall_sync_jobs_initiated_by", table_name="firewall_sync_jobs")
+    op.drop_table("firewall_sync_jobs")
+    sa.Enum(name="firewallsyncjobstatus").drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,41 @@
+"""Allow only one running firewall sync job across all workers.
+
+Revision ID: fw02_firewall_sync_one_running
+Revises: gu01_gpu_usage_index
+Create Date: 2026-10-17 23:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "fw02_firewall_sync_one_running"
+down_revision = "gu01_gpu_usage_index"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # 升級時沒有行程在跑同步；殘留的 running 工作都是重啟前中斷的
+    op.execute(
+        """
+        UPDATE firewall_sync_jobs
+        SET status = 'failed',
+            error = 'Interrupted by a server restart',
+            finished_at = now(),
+            updated_at = now()
+        WHERE status = 'running'
+        """
+    )
+    op.create_index(
+        "uq_firewall_sync_jobs_running",
+        "firewall_sync_jobs",
+        ["status"],
+        unique=True,
+        postgresql_where=sa.text("status = 'running'"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("uq_firewall_sync_jobs_running", table_name="firewall_sync_jobs")
@@ -0,0 +1,41 @@
+"""Persist the GPU usage index so every worker shares one copy.
+
+Revision ID: gu01_gpu_usage_index
+Revises: rw01_recurrence_due_queue
+Create Date: 2026-10-17 22:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "gu01_gpu_usage_index"
+down_revision = "rw01_recurrence_due_queue"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "gpu_usage_entry",
+        sa.Column("vmid", sa.Integer(), nullable=False),
+        sa.Column("node", sa.String(length=64), nullable=False),
+        sa.Column("digest", sa.String(length=64), nullable=True),
+        sa.Column("mappings", sa.JSON(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("vmid"),
+    )
+    op.create_table(
+        "gpu_usage_index_state",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("reconciled_at", sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    # 第一次讀取時 reconciled_at 為 NULL，由取得鎖的 worker 建立索引
+    op.execute("INSERT INTO gpu_usage_index_state (id) VALUES (1)")
+
+
+def downgrade() -> None:
+    op.drop_table("gpu_usage_index_state")
+    op.drop_table("gpu_usage_entry")
@@ -0,0 +1,35 @@
+"""Persist the IP allocation bitmap with the subnet config.
+
+Revision ID: ip01_subnet_allocation_bitmap
+Revises: fw01_firewall_sync_jobs
+Create Date: 2026-10-17 15:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "ip01_subnet_allocation_bitmap"
+down_revision = "fw01_firewall_sync_jobs"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # 既有資料不回填：bitmap 為 NULL 時，第一次分配會從 ip_allocation 重建
+    op.add_column(
+        "subnet_config",
+        sa.Column("allocation_bitmap", sa.LargeBinary(), nullable=True),
+    )
+    op.add_column(
+        "subnet_config",
+        sa.Column(
+            "allocation_hint", sa.Integer(), nullable=False, server_default="0"
+        ),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("subnet_config", "allocation_hint")
+    op.drop_column("subnet_config", "allocation_bitmap")
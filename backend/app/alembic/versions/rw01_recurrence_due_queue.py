@@ -0,0 +1,37 @@
+"""Index recurring VM requests by next_window_end for the window tick.
+
+Revision ID: rw01_recurrence_due_queue
+Revises: ak01_ai_api_key_digest
+Create Date: 2026-10-17 20:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "rw01_recurrence_due_queue"
+down_revision = "ak01_ai_api_key_digest"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # 已結束的規則不回填：下一次 tick 算不出新視窗時會補寫
+    op.add_column(
+        "vm_requests",
+        sa.Column("recurrence_exhausted_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index(
+        "ix_vm_requests_recurrence_due",
+        "vm_requests",
+        ["next_window_end"],
+        postgresql_where=sa.text(
+            "recurrence_rule IS NOT NULL AND recurrence_exhausted_at IS NULL"
+        ),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_vm_requests_recurrence_due", table_name="vm_requests")
+    op.drop_column("vm_requests", "recurrence_exhausted_at")
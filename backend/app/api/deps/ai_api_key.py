@@ -5,11 +5,44 @@ AI API Key 认证依赖
 from typing import Annotated
 
 from fastapi import Depends, Header, HTTPException, status
-from sqlmodel import select
+from sqlmodel import Session, select
 
 from app.api.deps.database import SessionDep
-from app.core.security import decrypt_value
+from app.core.security import decrypt_value, hash_api_key
 from app.models import AIAPICredential, User, get_datetime_utc
+from app.services.llm_gateway.api_key_cache import api_key_auth_cache
+
+
+def _match_legacy_credential(
+    session: Session, api_key: str, digest: str
+) -> AIAPICredential | None:
+    """尚未寫入 digest 的舊憑證：以 prefix 縮小範圍後解密比對，成功時補寫 digest。"""
+    candidates = session.exec(
+        select(AIAPICredential)
+        .where(AIAPICredential.api_key_prefix == api_key[: min(8, len(api_key))])
+        .where(AIAPICredential.api_key_digest.is_(None))
+        .where(AIAPICredential.revoked_at.is_(None))
+    ).all()
+    for cand in candidates:
+        try:
+            if decrypt_value(cand.api_key_encrypted) != api_key:
+                continue
+        except Exception:
+            continue
+        cand.api_key_digest = digest
+        session.add(cand)
+        session.commit()
+        session.refresh(cand)
+        return cand
+    return None
+
+
+def _ensure_not_expired(credential: AIAPICredential) -> None:
+    if credential.expires_at and credential.expires_at < get_datetime_utc():
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="API key has expired",
+        )
 
 
 def get_current_user_by_ai_api_key(
@@ -40,38 +73,27 @@ def get_current_user_by_ai_api_key(
             detail="API key is required",
         )
 
-    # 2. 用 prefix 縮小查詢範圍（前 8 字元）
-    api_key_prefix = api_key[: min(8, len(api_key))]
-
-    candidates = session.exec(
-        select(AIAPICredential)
-        .where(AIAPICredential.api_key_prefix == api_key_prefix)
-        .where(AIAPICredential.revoked_at.is_(None))
-    ).all()
-
-    # 3. 逐一解密比對，找到真正匹配的憑證
-    credential = None
-    for cand in candidates:
-        try:
-            decrypted_key = decrypt_value(cand.api_key_encrypted)
-            if decrypted_key == api_key:
-                credential = cand
-                break
-        except Exception:
-            continue
-
-    if not credential:
+    # 2. 以 HMAC digest 查快取，命中時不碰 DB（過期時間仍每次檢查）
+    digest = hash_api_key(api_key)
+    cached = api_key_auth_cache.get(digest)
+    if cached is not None:
+        _ensure_not_expired(cached[1])
+        return cached
+
+    # 3. 以 digest 索引等值查詢；尚無 digest 的舊憑證退回解密比對
+    credential = session.exec(
+        select(AIAPICredential).where(AIAPICredential.api_key_digest == digest)
+    ).first()
+    if credential is None:
+        credential = _match_legacy_credential(session, api_key, digest)
+    if credential is None or credential.revoked_at is not None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid or revoked API key",
         )
 
     # 4. 检查过期
-    if credential.expires_at and credential.expires_at < get_datetime_utc():
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="API key has expired",
-        )
+    _ensure_not_expired(credential)
 
     # 5. 获取用户并检查状态
     user = session.get(User, credential.user_id)
@@ -87,6 +109,7 @@ def get_current_user_by_ai_api_key(
             detail="User account is inactive",
         )
 
+    api_key_auth_cache.put(digest, user, credential)
     return user, credential
 
 
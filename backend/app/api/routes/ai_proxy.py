@@ -127,7 +127,6 @@ async def chat_completions(
                     duration_ms = int((time.time() - start_time) * 1000)
                     try:
                         ai_gateway_service.record_usage(
-                            session=session,
                             user_id=user.id,
                             credential_id=credential.id,
                             model_name=model_name,
@@ -156,7 +155,6 @@ async def chat_completions(
             usage = result.get("usage", {})
             try:
                 ai_gateway_service.record_usage(
-                    session=session,
                     user_id=user.id,
                     credential_id=credential.id,
                     model_name=model_name,
@@ -181,7 +179,6 @@ async def chat_completions(
         # 記錄失敗
         try:
             ai_gateway_service.record_usage(
-                session=session,
                 user_id=user.id,
                 credential_id=credential.id,
                 model_name=model_name,
@@ -200,7 +197,6 @@ async def chat_completions(
         logger.error("VLLM connection error for user %s: %s", user.email, str(e))
         try:
             ai_gateway_service.record_usage(
-                session=session,
                 user_id=user.id,
                 credential_id=credential.id,
                 model_name=model_name,
@@ -219,7 +215,6 @@ async def chat_completions(
         logger.exception("Unexpected error for user %s: %s", user.email, str(e))
         try:
             ai_gateway_service.record_usage(
-                session=session,
                 user_id=user.id,
                 credential_id=credential.id,
                 model_name=model_name,
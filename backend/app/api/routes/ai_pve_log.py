@@ -6,7 +6,6 @@ import logging
 from fastapi import APIRouter, HTTPException, Query
 
 from app.ai.pve_log.chat import chat as pve_chat
-from app.ai.pve_log.collector import collect_snapshot
 from app.ai.pve_log.schemas import (
     ChatRequest,
     ChatResponse,
@@ -21,6 +20,7 @@ from app.ai.pve_log.schemas import (
     StorageInfo,
     SystemSnapshot,
 )
+from app.ai.pve_log.snapshot import snapshot_service
 from app.api.deps import InstructorUser, SessionDep
 
 logger = logging.getLogger(__name__)
@@ -30,7 +30,7 @@ router = APIRouter(prefix="/ai/pve-log", tags=["ai-pve-log"])
 
 async def _snapshot_or_500() -> SystemSnapshot:
     try:
-        return await asyncio.to_thread(collect_snapshot)
+        return await asyncio.to_thread(snapshot_service.get)
     except Exception:
         logger.exception("收集 PVE 系統快照失敗")
         raise HTTPException(status_code=500, detail="收集 PVE 資料失敗，請稍後再試")
@@ -220,7 +220,6 @@ async def chat(
         # 記錄 template chat 呼叫
         try:
             ai_gateway_service.record_template_call(
-                session=session,
                 user_id=current_user.id,
                 call_type="chat",
                 model_name=model_name,
@@ -246,7 +245,6 @@ async def chat(
         # 記錄失敗
         try:
             ai_gateway_service.record_template_call(
-                session=session,
                 user_id=current_user.id,
                 call_type="chat",
                 model_name=model_name,
@@ -260,7 +258,7 @@ async def chat(
 
 @router.post("/recommend", response_model=dict[str, Any])
 async def recommend(
-    request: ChatRequest, current_user: CurrentUser, session: SessionDep
+    request: ChatRequest, current_user: CurrentUser
 ) -> dict[str, Any]:
     model_name = settings.resolved_vllm_model_name or "unknown"
     started_at = perf_counter()
@@ -313,7 +311,6 @@ async def recommend(
         # 記錄 template recommend 呼叫
         try:
             ai_gateway_service.record_template_call(
-                session=session,
                 user_id=current_user.id,
                 call_type="recommend",
                 model_name=model_name,
@@ -331,7 +328,6 @@ async def recommend(
         elapsed_seconds = max(perf_counter() - started_at, 0.0)
         try:
             ai_gateway_service.record_template_call(
-                session=session,
                 user_id=current_user.id,
                 call_type="recommend",
                 model_name=model_name,
@@ -68,6 +68,7 @@ class BatchProvisionTaskPublic(BaseModel):
     vmid: int | None
     status: str
     error: str | None
+    attempts: int = 0
     started_at: datetime | None
     finished_at: datetime | None
 
@@ -99,7 +100,9 @@ class BatchProvisionJobPublic(BaseModel):
     done: int
     failed_count: int
     created_at: datetime
+    started_at: datetime | None = None
     finished_at: datetime | None
+    throughput_per_minute: float | None = None
     initiated_by: uuid.UUID | None = None
     initiated_by_email: str | None = None
     initiated_by_name: str | None = None
@@ -185,6 +188,7 @@ def _build_job_public(session: SessionDep, job) -> BatchProvisionJobPublic:
             vmid=task.vmid,
             status=task.status,
             error=task.error,
+            attempts=task.attempts,
             started_at=task.started_at,
             finished_at=task.finished_at,
         )
@@ -205,7 +209,9 @@ def _build_job_public(session: SessionDep, job) -> BatchProvisionJobPublic:
         done=job.done,
         failed_count=job.failed_count,
         created_at=job.created_at,
+        started_at=job.started_at,
         finished_at=job.finished_at,
+        throughput_per_minute=job.throughput_per_minute,
         initiated_by=job.initiated_by,
         initiated_by_email=initiator.email if initiator else None,
         initiated_by_name=initiator.full_name if initiator else None,
@@ -47,7 +47,7 @@ def get_subnet_config(session: SessionDep, _: AdminUser):
 @router.put("/subnet", response_model=SubnetConfigPublic)
 def upsert_subnet_config(
     session: SessionDep,
-    _: AdminUser,
+    current_user: AdminUser,
     body: SubnetConfigCreate,
 ):
     """設定或更新子網配置"""
@@ -60,10 +60,10 @@ def upsert_subnet_config(
         dns_servers=body.dns_servers,
         extra_blocked_subnets=body.extra_blocked_subnets,
     )
-    # 同步所有 VM/LXC 的封鎖規則 dest 為新子網與額外封鎖網段
+    # 以背景工作同步所有 VM/LXC 的額外封鎖網段規則（進度見 Jobs）
     try:
         from app.services.network import firewall_service  # noqa: PLC0415
-        firewall_service.sync_block_local_subnet_rules()
+        firewall_service.sync_block_local_subnet_rules(initiated_by=current_user.id)
     except Exception as e:
         import logging  # noqa: PLC0415
         logging.getLogger(__name__).warning(
@@ -1,7 +1,7 @@
 """統一 Jobs API 路由。
 
 提供 Job 中心使用的彙整查詢端點：
-- GET /jobs/             清單（支援 kinds / statuses / active_only / 分頁）
+- GET /jobs/             清單（支援 kinds / statuses / active_only / cursor 分頁）
 - GET /jobs/recent       Banner popover 用：最近 N 筆 + active_count
 """
 
@@ -13,6 +13,7 @@ from app.api.deps import CurrentUser, SessionDep
 from app.schemas.jobs import JobDetail, JobKind, JobsListResponse, JobStatus
 from app.services.jobs import jobs_service
 from app.services.jobs.jobs_service import (
+    InvalidJobCursorError,
     JobAccessDeniedError,
     JobNotFoundError,
 )
@@ -43,6 +44,10 @@ def list_unified_jobs(
     limit: int = Query(default=50, ge=1, le=200),
     offset: int = Query(default=0, ge=0),
     history_days: int = Query(default=30, ge=1, le=365),
+    cursor: str | None = Query(
+        default=None,
+        description="上一頁回傳的 next_cursor；帶入時從該筆之後接續並忽略 offset",
+    ),
 ) -> JobsListResponse:
     parsed_kinds: list[JobKind] | None = None
     if csv := _parse_csv(kinds):
@@ -62,16 +67,20 @@ def list_unified_jobs(
             except ValueError:
                 continue
 
-    return jobs_service.list_jobs(
-        session=session,
-        user=current_user,
-        kinds=parsed_kinds,
-        statuses=parsed_statuses,
-        active_only=active_only,
-        limit=limit,
-        offset=offset,
-        history_days=history_days,
-    )
+    try:
+        return jobs_service.list_jobs(
+            session=session,
+            user=current_user,
+            kinds=parsed_kinds,
+            statuses=parsed_statuses,
+            active_only=active_only,
+            limit=limit,
+            offset=offset,
+            history_days=history_days,
+            cursor=cursor,
+        )
+    except InvalidJobCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
 
 
 @router.get("/recent", response_model=JobsListResponse)
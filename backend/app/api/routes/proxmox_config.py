@@ -14,10 +14,10 @@ from app.domain.placement.constants import DEFAULT_PLACEMENT_STRATEGY
 from app.exceptions import BadRequestError
 from app.infrastructure.proxmox import (
     DEFAULT_PROXMOX_POOL_NAME,
-    _tcp_ping,
     _verify_server_with_ca,
     fetch_cluster_nodes,
     invalidate_proxmox_client,
+    node_health_monitor,
 )
 from app.models import AuditAction
 from app.repositories import proxmox_config as proxmox_config_repo
@@ -435,11 +435,8 @@ def check_nodes(session: SessionDep, current_user: AdminUser) -> list[ProxmoxNod
     對所有已儲存的節點做 TCP ping 健康檢查，更新 is_online 狀態後回傳最新清單。
     前端開啟 Proxmox 設定頁面時呼叫。
     """
-    nodes = proxmox_node_repo.get_all_nodes(session)
-    for node in nodes:
-        is_online = _tcp_ping(node.host, node.port)
-        if node.id is not None:
-            proxmox_node_repo.update_node_status(session, node.id, is_online)
+    # 所有節點並行探測，結果一次寫回，同時更新連線挑選用的排序
+    node_health_monitor.probe_all()
 
     # 重新讀取以取得更新後的 last_checked
     nodes = proxmox_node_repo.get_all_nodes(session)
@@ -463,6 +460,7 @@ def update_node(
     )
     if node is None:
         raise HTTPException(status_code=404, detail="Node not found")
+    node_health_monitor.invalidate()
     audit_service.log_action(
         session=session,
         user_id=current_user.id,
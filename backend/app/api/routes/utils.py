@@ -102,15 +102,12 @@ async def _check_proxmox() -> DependencyStatus:
     loop = asyncio.get_running_loop()
     start = loop.time()
 
-    def _ping_nodes() -> int:
-        # Lazy import to avoid circular dependencies at module load time.
-        from app.infrastructure.proxmox.operations import list_nodes
-
-        return len(list_nodes())
+    # Lazy import to avoid circular dependencies at module load time.
+    from app.infrastructure.proxmox.async_operations import list_nodes
 
     try:
-        node_count = await asyncio.wait_for(
-            asyncio.to_thread(_ping_nodes), timeout=_HEALTH_CHECK_TIMEOUT_SECONDS
+        nodes = await asyncio.wait_for(
+            list_nodes(), timeout=_HEALTH_CHECK_TIMEOUT_SECONDS
         )
     except asyncio.TimeoutError:
         return DependencyStatus(status="error", detail="timeout")
@@ -120,7 +117,7 @@ async def _check_proxmox() -> DependencyStatus:
 
     return DependencyStatus(
         status="ok",
-        detail=f"{node_count} node(s)",
+        detail=f"{len(nodes)} node(s)",
         latency_ms=round((loop.time() - start) * 1000, 2),
     )
 
@@ -1,61 +1,172 @@
 """WebSocket: /ws/jobs
 
-每 N 秒推送一份「該使用者可見」的 jobs 快照給已連線的客戶端。
-- 採用伺服器端輪詢 DB → 推送，避免改造各個 mutation 點。
-- 透過 query string token 認證。
+推送「該使用者可見」的 jobs 給已連線的客戶端。
+- 連線時送一次完整快照（``type: snapshot``），之後只送差異
+  （``type: patch``：``upsert`` 變更的 job、``remove`` 離開清單的 id、
+  ``order`` 目前清單順序）。
+- 變更來源為 :data:`app.services.jobs.job_feed`，只重查受影響的 job；
+  另每 ``_RESYNC_INTERVAL_SECONDS`` 重算一次完整視窗，補上逾時訊息等
+  與 DB 寫入無關的變化。
+- 透過 query string token 認證；認證完即關閉 DB session，之後每次查詢
+  各自開短命 session。
 """
 
 from __future__ import annotations
 
 import asyncio
+import json
 import logging
 
 from fastapi import WebSocket, WebSocketDisconnect
+from sqlmodel import Session
 
 from app.api.deps.auth import get_ws_current_user
+from app.core.db import engine
+from app.models import User
+from app.schemas.jobs import ACTIVE_JOB_STATUSES, JobItem
 from app.services.jobs import jobs_service
+from app.services.jobs.job_feed import job_feed
 
 logger = logging.getLogger(__name__)
 
 
-_SNAPSHOT_INTERVAL_SECONDS = 3.0
+_PAGE_LIMIT = 20
+_RESYNC_INTERVAL_SECONDS = 60.0
+# 短時間內連續 commit（例如批次建立）合併成一次推送。
+_COALESCE_SECONDS = 0.25
+
+
+class _JobsView:
+    """單一連線目前看到的 jobs；套用變更後算出要送出的 patch。"""
+
+    def __init__(self, window: list[JobItem], *, limit: int) -> None:
+        self._limit = limit
+        self._window = {item.id: item for item in window}
+        self._page = self._current_page()
+        self._last_counts = self._counts()
+
+    def _current_page(self) -> dict[str, JobItem]:
+        ordered = sorted(self._window.values(), key=lambda j: j.updated_at, reverse=True)
+        return {item.id: item for item in jobs_service.recent_page(ordered, limit=self._limit)}
+
+    def _counts(self) -> dict:
+        return {
+            "total": len(self._window),
+            "active_count": sum(
+                1 for j in self._window.values() if j.status in ACTIVE_JOB_STATUSES
+            ),
+        }
+
+    def snapshot(self) -> str:
+        return json.dumps(
+            {
+                "type": "snapshot",
+                "items": [item.model_dump(mode="json") for item in self._page.values()],
+                **self._counts(),
+            }
+        )
+
+    def apply(self, changes: dict[str, JobItem | None]) -> str | None:
+        for job_id, item in changes.items():
+            if item is None:
+                self._window.pop(job_id, None)
+            else:
+                self._window[job_id] = item
+        return self._diff()
+
+    def replace(self, window: list[JobItem]) -> str | None:
+        self._window = {item.id: item for item in window}
+        return self._diff()
+
+    def _diff(self) -> str | None:
+        previous, self._page = self._page, self._current_page()
+        previous_counts, self._last_counts = self._last_counts, self._counts()
+        upsert = [
+            item for job_id, item in self._page.items() if previous.get(job_id) != item
+        ]
+        remove = [job_id for job_id in previous if job_id not in self._page]
+        if (
+            not upsert
+            and not remove
+            and list(previous) == list(self._page)
+            and previous_counts == self._last_counts
+        ):
+            return None
+        return json.dumps(
+            {
+                "type": "patch",
+                "upsert": [item.model_dump(mode="json") for item in upsert],
+                "remove": remove,
+                "order": list(self._page),
+                **self._last_counts,
+            }
+        )
+
+
+def _load_window(user: User) -> list[JobItem]:
+    with Session(engine) as session:
+        return jobs_service.list_recent_window(session=session, user=user)
+
+
+def _load_items(user: User, job_ids: set[str]) -> dict[str, JobItem | None]:
+    with Session(engine) as session:
+        return {
+            job_id: jobs_service.get_recent_job_item(session=session, user=user, job_id=job_id)
+            for job_id in job_ids
+        }
+
+
+async def _wait_for_close(websocket: WebSocket) -> None:
+    """吃掉 client 送來的訊息，直到斷線。"""
+    while True:
+        message = await websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            return
+
+
+def _on_closed(task: asyncio.Task[None], subscription) -> None:
+    if not task.cancelled() and task.exception() is not None:
+        logger.debug("Jobs WS receive loop ended: %s", task.exception())
+    subscription.close()
 
 
 async def jobs_ws_proxy(websocket: WebSocket, token: str) -> None:
     user, session = await get_ws_current_user(websocket, token=token)
+    try:
+        # 之後只讀取已載入的欄位；連線期間不佔用 DB 連線
+        is_admin = bool(user.is_superuser or getattr(user, "role", None) == "admin")
+        session.expunge(user)
+    finally:
+        session.close()
+
     await websocket.accept()
     logger.info("Jobs WS connected: user=%s", user.email)
 
-    last_payload: str | None = None
-
+    subscription = job_feed.subscribe(user_id=user.id, is_admin=is_admin)
+    closer = asyncio.create_task(_wait_for_close(websocket))
+    closer.add_done_callback(lambda task: _on_closed(task, subscription))
     try:
+        view = _JobsView(await asyncio.to_thread(_load_window, user), limit=_PAGE_LIMIT)
+        await websocket.send_text(view.snapshot())
+
         while True:
+            job_ids = await subscription.next(timeout=_RESYNC_INTERVAL_SECONDS)
+            if job_ids is None:
+                break
             try:
-                snapshot = await asyncio.to_thread(
-                    jobs_service.list_recent_for_user,
-                    session=session,
-                    user=user,
-                    limit=20,
-                )
+                if job_ids:
+                    await asyncio.sleep(_COALESCE_SECONDS)
+                    job_ids |= await subscription.next(timeout=0) or set()
+                    patch = view.apply(await asyncio.to_thread(_load_items, user, job_ids))
+                else:
+                    patch = view.replace(await asyncio.to_thread(_load_window, user))
             except Exception:  # noqa: BLE001 — 單次失敗不應斷線
-                logger.exception("Jobs WS snapshot fetch failed")
-                await asyncio.sleep(_SNAPSHOT_INTERVAL_SECONDS)
+                logger.exception("Jobs WS refresh failed")
                 continue
-
-            payload = snapshot.model_dump_json()
-            if payload != last_payload:
-                await websocket.send_text(payload)
-                last_payload = payload
-
-            try:
-                # 利用 wait_for 同時偵測 client 主動 close
-                await asyncio.wait_for(
-                    websocket.receive_text(), timeout=_SNAPSHOT_INTERVAL_SECONDS
-                )
-            except asyncio.TimeoutError:
-                pass
+            if patch is not None:
+                await websocket.send_text(patch)
     except WebSocketDisconnect:
-        logger.info("Jobs WS disconnected: user=%s", user.email)
+        pass
     except Exception:
         logger.exception("Jobs WS error: user=%s", user.email)
         try:
@@ -63,10 +174,9 @@ async def jobs_ws_proxy(websocket: WebSocket, token: str) -> None:
         except Exception:
             pass
     finally:
-        try:
-            session.close()
-        except Exception:
-            pass
+        subscription.close()
+        closer.cancel()
+        logger.info("Jobs WS disconnected: user=%s", user.email)
 
 
 __all__ = ["jobs_ws_proxy"]
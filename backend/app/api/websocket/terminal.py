@@ -8,12 +8,8 @@ from fastapi import WebSocket, WebSocketDisconnect
 from app.api.deps.auth import get_ws_current_user
 from app.api.deps.proxmox import check_resource_ownership
 from app.exceptions import NotFoundError, ProxmoxError
-from app.infrastructure.proxmox import (
-    build_ws_ssl_context,
-    get_active_host,
-    get_proxmox_settings,
-)
-from app.services.proxmox import proxmox_service
+from app.infrastructure.proxmox import build_ws_ssl_context, get_async_proxmox_api
+from app.services.proxmox import async_proxmox_service
 
 logger = logging.getLogger(__name__)
 
@@ -37,7 +33,7 @@ async def terminal_proxy(websocket: WebSocket, vmid: int, token: str):
     try:
         # Get session ticket (password-based, required for PVE WebSocket)
         try:
-            pve_auth_cookie, _ = await proxmox_service.get_session_ticket()
+            pve_auth_cookie, _ = await async_proxmox_service.get_session_ticket()
         except ProxmoxError:
             logger.error("Proxmox session authentication failed")
             await websocket.close(code=1008, reason="Authentication failed")
@@ -47,7 +43,7 @@ async def terminal_proxy(websocket: WebSocket, vmid: int, token: str):
 
         # Find LXC container in cluster resources
         try:
-            container_info = await asyncio.to_thread(proxmox_service.find_lxc, vmid)
+            container_info = await async_proxmox_service.find_lxc(vmid)
         except NotFoundError:
             logger.error(f"LXC container {vmid} not found in cluster")
             await websocket.close(code=1008, reason="LXC container not found")
@@ -59,19 +55,15 @@ async def terminal_proxy(websocket: WebSocket, vmid: int, token: str):
         )
 
         # Get terminal proxy ticket
-        console_data = await asyncio.to_thread(
-            proxmox_service.get_terminal_ticket,
-            node,
-            vmid,
-        )
+        console_data = await async_proxmox_service.get_terminal_ticket(node, vmid)
         terminal_port = console_data["port"]
         terminal_ticket = console_data["ticket"]
 
         encoded_terminal_ticket = quote(terminal_ticket, safe="")
 
-        # WebSocket URL for terminal — 使用 get_active_host() 確保 HA 切換後跟著用正確的節點
-        _cfg = get_proxmox_settings()
-        active_host = get_active_host()
+        # WebSocket URL for terminal — 與取得 ticket 的連線同一節點，HA 切換後也一致
+        _cfg = (await get_async_proxmox_api()).settings
+        active_host = await async_proxmox_service.get_active_host()
         pve_ws_url = (
             f"wss://{active_host}:8006"
             f"/api2/json/nodes/{node}/lxc/{vmid}/vncwebsocket"
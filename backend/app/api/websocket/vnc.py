@@ -8,12 +8,8 @@ from fastapi import WebSocket, WebSocketDisconnect
 from app.api.deps.auth import get_ws_current_user
 from app.api.deps.proxmox import check_resource_ownership
 from app.exceptions import NotFoundError, ProxmoxError
-from app.infrastructure.proxmox import (
-    build_ws_ssl_context,
-    get_active_host,
-    get_proxmox_settings,
-)
-from app.services.proxmox import proxmox_service
+from app.infrastructure.proxmox import build_ws_ssl_context, get_async_proxmox_api
+from app.services.proxmox import async_proxmox_service
 
 logger = logging.getLogger(__name__)
 
@@ -49,7 +45,7 @@ async def vnc_proxy(
     try:
         # Get session ticket (password-based, required for PVE WebSocket)
         try:
-            pve_auth_cookie, _ = await proxmox_service.get_session_ticket()
+            pve_auth_cookie, _ = await async_proxmox_service.get_session_ticket()
         except ProxmoxError:
             logger.error("Proxmox session authentication failed")
             await websocket.close(code=1008, reason="Authentication failed")
@@ -57,7 +53,7 @@ async def vnc_proxy(
 
         # Find VM in cluster resources
         try:
-            vm_info = await asyncio.to_thread(proxmox_service.find_resource, vmid)
+            vm_info = await async_proxmox_service.find_resource(vmid)
         except NotFoundError:
             logger.error(f"VM {vmid} not found in cluster")
             await websocket.close(code=1008, reason="VM not found")
@@ -68,19 +64,15 @@ async def vnc_proxy(
         # Re-use the ticket/port from the REST endpoint when available,
         # so the noVNC client authenticates with the same ticket.
         if not (vnc_ticket and vnc_port):
-            console_data = await asyncio.to_thread(
-                proxmox_service.get_vnc_ticket,
-                node,
-                vmid,
-            )
+            console_data = await async_proxmox_service.get_vnc_ticket(node, vmid)
             vnc_port = console_data["port"]
             vnc_ticket = console_data["ticket"]
 
         encoded_vnc_ticket = quote(vnc_ticket, safe="")
 
-        # WebSocket URL for VNC — 使用 get_active_host() 確保 HA 切換後跟著用正確的節點
-        _cfg = get_proxmox_settings()
-        active_host = get_active_host()
+        # WebSocket URL for VNC — 與取得 ticket 的連線同一節點，HA 切換後也一致
+        _cfg = (await get_async_proxmox_api()).settings
+        active_host = await async_proxmox_service.get_active_host()
         pve_ws_url = (
             f"wss://{active_host}:8006"
             f"/api2/json/nodes/{node}/qemu/{vmid}/vncwebsocket"
@@ -47,6 +47,19 @@ class Settings(BaseSettings):
     # Set to false in CI/test environments that cannot reach Proxmox,
     # so scheduler ticks don't block test startup on connection timeouts.
     SCHEDULER_ENABLED: bool = True
+    # Scheduled boot / auto-stop send start and shutdown calls in parallel,
+    # bounded per PVE node.
+    SCHEDULER_POWER_ACTIONS_PER_NODE: int = 4
+    # Per-task intervals (tasks not listed here poll every 60s) and timeouts.
+    # A run past its timeout is logged and keeps its lane until it finishes.
+    SCHEDULER_DELETIONS_INTERVAL_SECONDS: float = 15.0
+    SCHEDULER_AUTO_STOPS_INTERVAL_SECONDS: float = 30.0
+    SCHEDULER_REQUEST_STARTS_TIMEOUT_SECONDS: float = 900.0
+    SCHEDULER_REQUEST_STOPS_TIMEOUT_SECONDS: float = 600.0
+    SCHEDULER_DELETIONS_TIMEOUT_SECONDS: float = 900.0
+    SCHEDULER_RECURRENCE_WINDOWS_TIMEOUT_SECONDS: float = 120.0
+    SCHEDULER_BOOT_TIMEOUT_SECONDS: float = 1800.0
+    SCHEDULER_AUTO_STOPS_TIMEOUT_SECONDS: float = 300.0
 
     BACKEND_CORS_ORIGINS: Annotated[
         list[AnyUrl] | str, BeforeValidator(parse_cors)
@@ -121,6 +134,65 @@ class Settings(BaseSettings):
     PROXMOX_DATA_STORAGE: str = "local-lvm"
     PROXMOX_API_TIMEOUT: int = 30  # API request timeout in seconds
     PROXMOX_TASK_CHECK_INTERVAL: int = 1  # Seconds between task status checks
+    PROXMOX_RESOURCE_CACHE_TTL: float = 5.0  # Seconds a cluster resource snapshot is reused
+    PROXMOX_ASYNC_MAX_CONNECTIONS: int = 20  # Async client connection pool size
+    PROXMOX_ASYNC_MAX_KEEPALIVE: int = 10  # Idle connections kept open for reuse
+    PROXMOX_HEALTH_CHECK_INTERVAL: float = 15.0  # Seconds between background node probe rounds
+    PROXMOX_HEALTH_CHECK_CONCURRENCY: int = 8  # Nodes probed in parallel per round
+
+    # Resource listings resolve guest IPs concurrently; a cached IP younger
+    # than the TTL is served without asking the guest agent again.
+    RESOURCE_IP_LOOKUP_CONCURRENCY: int = 16
+    RESOURCE_IP_LOOKUP_TIMEOUT: float = 3.0  # Seconds before falling back to the cached IP
+    RESOURCE_IP_CACHE_TTL: int = 300  # Seconds a cached IP (or failed lookup) is trusted
+
+    # Firewall topology fans per-VM option/rule/IP lookups out to a thread pool.
+    FIREWALL_TOPOLOGY_CONCURRENCY: int = 16
+
+    # GPU mapping usage is served from a database index that one worker at a
+    # time reconciles against VM config digests in the background.
+    GPU_USAGE_RECONCILE_SECONDS: float = 300.0
+    GPU_USAGE_SCAN_CONCURRENCY: int = 8
+
+    # Fleet-wide block-subnet sync runs as a background job with a bounded
+    # worker pool per PVE node.
+    FIREWALL_SYNC_WORKERS_PER_NODE: int = 4
+
+    # Gateway config syncs reuse pooled SSH connections per host/user/key.
+    SSH_POOL_MAX_IDLE_PER_HOST: int = 4
+    SSH_POOL_IDLE_TIMEOUT: float = 300.0  # Seconds an unused connection is kept open
+    SSH_POOL_HEALTHCHECK_AFTER: float = 30.0  # Idle seconds before a reused connection is probed
+    SSH_POOL_KEEPALIVE_INTERVAL: int = 30  # Seconds between transport keepalives
+
+    # Rule edits mark a gateway target dirty; bursts collapse into one write.
+    GATEWAY_SYNC_DEBOUNCE_SECONDS: float = 1.0  # Quiet time before a dirty target is written
+    GATEWAY_SYNC_MAX_DELAY_SECONDS: float = 5.0  # Upper bound while edits keep arriving
+    GATEWAY_SYNC_RETRY_SECONDS: float = 10.0  # First retry after a failed sync (doubles, max 5 min)
+
+    # Reservation preview solves one cohort per candidate node; large previews
+    # fan the candidates out to a process pool.
+    PLACEMENT_PREVIEW_WORKERS: int = 4
+    PLACEMENT_PREVIEW_PARALLEL_MIN_CANDIDATES: int = 4
+
+    # Availability calendars are cached per request shape and cluster-state
+    # fingerprint, so repeated wizard calls for the same form are immediate.
+    VM_REQUEST_AVAILABILITY_CACHE_TTL: float = 60.0
+    VM_REQUEST_AVAILABILITY_CACHE_MAX_ENTRIES: int = 128
+
+    # Batch provisioning runs members concurrently, throttled per target node
+    # and per storage; failed members are retried with exponential backoff.
+    BATCH_PROVISION_MAX_CONCURRENCY: int = 8
+    BATCH_PROVISION_PER_NODE_LIMIT: int = 4
+    BATCH_PROVISION_PER_STORAGE_LIMIT: int = 2
+    BATCH_PROVISION_MAX_ATTEMPTS: int = 3
+    BATCH_PROVISION_RETRY_BACKOFF_SECONDS: float = 10.0
+
+    # AI usage / template call rows are buffered and written in batches off
+    # the request path; rows that cannot reach the DB go to a spool file.
+    AI_USAGE_FLUSH_INTERVAL_MS: int = 500
+    AI_USAGE_FLUSH_BATCH_SIZE: int = 200
+    AI_USAGE_QUEUE_MAX: int = 10000  # Beyond this, rows are spooled directly
+    AI_USAGE_SPOOL_PATH: str = "/tmp/campus-cloud/ai_usage_spool.jsonl"
 
     TRAEFIK_API_BASE_URL: str = "http://127.0.0.1:8080"
     TRAEFIK_API_TIMEOUT: int = 10
@@ -21,6 +21,7 @@ try:  # pragma: no cover - optional dep
         CONTENT_TYPE_LATEST,
         CollectorRegistry,
         Counter,
+        Gauge,
         Histogram,
         generate_latest,
     )
@@ -35,8 +36,9 @@ except ImportError:  # pragma: no cover - optional dep
         def labels(self, *_: Any, **__: Any) -> _Stub: return self
         def inc(self, *_: Any, **__: Any) -> None: ...
         def observe(self, *_: Any, **__: Any) -> None: ...
+        def set(self, *_: Any, **__: Any) -> None: ...
 
-    Counter = Histogram = _Stub  # type: ignore[misc, assignment]
+    Counter = Gauge = Histogram = _Stub  # type: ignore[misc, assignment]
     CollectorRegistry = _Stub  # type: ignore[misc, assignment]
 
     def generate_latest(*_: Any, **__: Any) -> bytes:  # type: ignore[misc]
@@ -58,6 +60,73 @@ REQUEST_LATENCY = Histogram(
     registry=REGISTRY,
     buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
 )
+PROXMOX_RESOURCE_CACHE_LOOKUPS = Counter(
+    "proxmox_resource_cache_lookups_total",
+    "Cluster resource snapshot lookups by cache result",
+    labelnames=("result",),
+    registry=REGISTRY,
+)
+PROXMOX_RESOURCE_CACHE_HIT_RATIO = Gauge(
+    "proxmox_resource_cache_hit_ratio",
+    "Share of cluster resource snapshot lookups served from cache",
+    registry=REGISTRY,
+)
+BATCH_PROVISION_THROUGHPUT = Gauge(
+    "batch_provision_vms_per_minute",
+    "Resources provisioned per minute by the last finished batch job",
+    labelnames=("resource_type",),
+    registry=REGISTRY,
+)
+SSH_OPERATION_LATENCY = Histogram(
+    "ssh_operation_duration_seconds",
+    "Latency of SSH exec and SFTP transfers to managed hosts",
+    labelnames=("operation",),
+    registry=REGISTRY,
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+SSH_POOL_CHECKOUTS = Counter(
+    "ssh_pool_checkouts_total",
+    "SSH pool checkouts by outcome (reused, created, stale)",
+    labelnames=("result",),
+    registry=REGISTRY,
+)
+
+AI_USAGE_QUEUE_DEPTH = Gauge(
+    "ai_usage_write_queue_depth",
+    "AI usage rows waiting in the write-behind buffer",
+    registry=REGISTRY,
+)
+AI_USAGE_FLUSH_LATENCY = Histogram(
+    "ai_usage_flush_duration_seconds",
+    "Latency of one batched AI usage insert",
+    registry=REGISTRY,
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+AI_USAGE_SPOOLED_ROWS = Counter(
+    "ai_usage_spooled_rows_total",
+    "AI usage rows written to the local spool file instead of the DB",
+    registry=REGISTRY,
+)
+
+SCHEDULER_TICK_DURATION = Histogram(
+    "scheduler_tick_duration_seconds",
+    "Wall time of one scheduled task run",
+    labelnames=("task",),
+    registry=REGISTRY,
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0),
+)
+SCHEDULER_TICK_LAG = Gauge(
+    "scheduler_tick_lag_seconds",
+    "How late the last run of a scheduled task started versus its due time",
+    labelnames=("task",),
+    registry=REGISTRY,
+)
+SCHEDULER_TICK_TIMEOUTS = Counter(
+    "scheduler_tick_timeouts_total",
+    "Scheduled task runs that exceeded their timeout",
+    labelnames=("task",),
+    registry=REGISTRY,
+)
 
 
 def _route_template(scope: Scope) -> str:
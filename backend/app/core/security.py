@@ -1,4 +1,6 @@
 import base64
+import hashlib
+import hmac
 from datetime import datetime, timedelta, timezone
 from functools import lru_cache
 from typing import Any
@@ -45,6 +47,16 @@ def decrypt_value(encrypted_text: str) -> str:
     return _get_fernet().decrypt(encrypted_text.encode()).decode()
 
 
+@lru_cache(maxsize=1)
+def _get_api_key_hmac_key() -> bytes:
+    return hashlib.sha256(b"campus-cloud-api-key-v1:" + settings.SECRET_KEY.encode()).digest()
+
+
+def hash_api_key(api_key: str) -> str:
+    """Keyed digest (HMAC-SHA256) of an API key, stored for indexed lookup."""
+    return hmac.new(_get_api_key_hmac_key(), api_key.encode(), hashlib.sha256).hexdigest()
+
+
 ALGORITHM = "HS256"
 
 
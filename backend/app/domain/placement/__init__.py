@@ -1,15 +1,25 @@
 from .models import (
     AssignmentEvaluation,
+    CohortRequest,
     NodeScoreBreakdown,
+    PlacementContext,
     PlacementTuning,
+    PreviewCohort,
+    RequestRequirements,
     StorageSelection,
+    StorageSnapshot,
     WorkingStoragePool,
 )
 
 __all__ = [
     "AssignmentEvaluation",
+    "CohortRequest",
     "NodeScoreBreakdown",
+    "PlacementContext",
     "PlacementTuning",
+    "PreviewCohort",
+    "RequestRequirements",
     "StorageSelection",
+    "StorageSnapshot",
     "WorkingStoragePool",
 ]
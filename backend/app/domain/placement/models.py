@@ -1,6 +1,13 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+import uuid
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from app.ai.pve_advisor.schemas import NodeCapacity
 
 DEFAULT_CPU_PEAK_WARN_SHARE = 0.7
 DEFAULT_CPU_PEAK_HIGH_SHARE = 1.2
@@ -24,6 +31,21 @@ class WorkingStoragePool:
     overcommit_placed_count: int = 0
 
 
+@dataclass(frozen=True)
+class StorageSnapshot:
+    node_name: str
+    storage: str
+    total_gb: float
+    avail_gb: float
+    active: bool
+    enabled: bool
+    can_vm: bool
+    can_lxc: bool
+    is_shared: bool
+    speed_tier: str
+    user_priority: int
+
+
 @dataclass
 class StorageSelection:
     pool: WorkingStoragePool
@@ -58,6 +80,89 @@ class PlacementTuning:
     memory_overflow_weight: float = 5.0
 
 
+@dataclass(frozen=True)
+class RequestRequirements:
+    resource_type: str
+    effective_resource_type: str
+    cpu_cores: float
+    memory_bytes: int
+    disk_bytes: int
+    disk_gb: int
+    gpu_required: int
+    reserved_cpu_cores: float
+    reserved_memory_bytes: int
+    reserved_disk_bytes: int
+
+
+@dataclass(frozen=True)
+class PlacementContext:
+    """Session-free inputs shared by every evaluation of one placement solve."""
+
+    strategy: str
+    tuning: PlacementTuning
+    cpu_overcommit_ratio: float
+    disk_overcommit_ratio: float
+    priorities: Mapping[str, int]
+    storages: tuple[StorageSnapshot, ...]
+    requirements: Mapping[uuid.UUID, RequestRequirements] = field(default_factory=dict)
+
+    def __reduce__(self):
+        # Mapping proxies cannot be pickled; ship plain dicts to pool workers.
+        return (
+            _restore_placement_context,
+            (
+                self.strategy,
+                self.tuning,
+                self.cpu_overcommit_ratio,
+                self.disk_overcommit_ratio,
+                dict(self.priorities),
+                self.storages,
+                dict(self.requirements),
+            ),
+        )
+
+
+def _restore_placement_context(
+    strategy: str,
+    tuning: PlacementTuning,
+    cpu_overcommit_ratio: float,
+    disk_overcommit_ratio: float,
+    priorities: dict[str, int],
+    storages: tuple[StorageSnapshot, ...],
+    requirements: dict[uuid.UUID, RequestRequirements],
+) -> PlacementContext:
+    return PlacementContext(
+        strategy=strategy,
+        tuning=tuning,
+        cpu_overcommit_ratio=cpu_overcommit_ratio,
+        disk_overcommit_ratio=disk_overcommit_ratio,
+        priorities=MappingProxyType(priorities),
+        storages=storages,
+        requirements=MappingProxyType(requirements),
+    )
+
+
+@dataclass(frozen=True)
+class CohortRequest:
+    """The request fields a rebalance solve reads, detached from the ORM row."""
+
+    id: uuid.UUID
+    vmid: int | None
+    actual_node: str | None
+    assigned_node: str | None
+    migration_pinned: bool = False
+
+
+@dataclass(frozen=True)
+class PreviewCohort:
+    """Picklable input for solving one reservation preview on a pool worker."""
+
+    context: PlacementContext
+    requests: tuple[CohortRequest, ...]
+    baseline_nodes: tuple[NodeCapacity, ...]
+    preview_request_id: uuid.UUID
+
+
 @dataclass(frozen=True)
 class AssignmentEvaluation:
     feasible: bool
@@ -1,5 +1,8 @@
 from __future__ import annotations
 
+from collections.abc import Iterable
+from typing import Any
+
 from app.ai.pve_advisor.schemas import ResourceType
 from app.domain.placement.models import (
     PlacementTuning,
@@ -11,6 +14,57 @@ from app.domain.placement.scorer import projected_share, storage_contention_pena
 STORAGE_SPEED_RANK = {"nvme": 0, "ssd": 1, "hdd": 2, "unknown": 3}
 
 
+def _working_pool(storage: Any) -> WorkingStoragePool:
+    return WorkingStoragePool(
+        storage=storage.storage,
+        total_gb=float(storage.total_gb or 0.0),
+        avail_gb=float(storage.avail_gb or 0.0),
+        active=bool(storage.active),
+        enabled=bool(storage.enabled),
+        can_vm=bool(storage.can_vm),
+        can_lxc=bool(storage.can_lxc),
+        is_shared=bool(storage.is_shared),
+        speed_tier=str(storage.speed_tier or "unknown"),
+        user_priority=int(storage.user_priority or 5),
+    )
+
+
+def build_working_storage_pools(
+    *,
+    storages: Iterable[Any],
+    node_names: list[str],
+) -> tuple[dict[str, list[WorkingStoragePool]], bool]:
+    """Build mutable per-node pool state; shared storages map to one object.
+
+    ``storages`` may be ``ProxmoxStorage`` rows or ``StorageSnapshot`` values.
+    """
+    storages = list(storages)
+    if not storages:
+        return {node_name: [] for node_name in node_names}, False
+
+    shared_registry: dict[str, WorkingStoragePool] = {}
+    by_node: dict[str, list[WorkingStoragePool]] = {node_name: [] for node_name in node_names}
+    node_set = set(node_names)
+
+    for storage in storages:
+        node_name = str(storage.node_name or "")
+        if node_name not in node_set:
+            continue
+
+        if storage.is_shared:
+            pool = shared_registry.get(storage.storage)
+            if pool is None:
+                pool = _working_pool(storage)
+                shared_registry[storage.storage] = pool
+            by_node[node_name].append(pool)
+            continue
+
+        by_node[node_name].append(_working_pool(storage))
+
+    has_managed_storage = any(pools for pools in by_node.values())
+    return by_node, has_managed_storage
+
+
 def select_best_storage_for_request(
     *,
     storage_pools: list[WorkingStoragePool],
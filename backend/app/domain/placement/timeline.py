@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+from bisect import bisect_left, bisect_right
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import datetime
+
+from app.ai.pve_advisor.schemas import NodeCapacity
+
+
+@dataclass(frozen=True)
+class Reservation:
+    node: str
+    start_at: datetime
+    end_at: datetime
+    cpu_cores: float
+    memory_bytes: int
+    disk_bytes: int
+
+
+class _RangeMax:
+    """Sparse table answering ``max(values[lo:hi])`` in constant time."""
+
+    def __init__(self, values: list[float]) -> None:
+        self._levels = [values]
+        width = 1
+        while width * 2 <= len(values):
+            previous = self._levels[-1]
+            self._levels.append(
+                [
+                    max(previous[index], previous[index + width])
+                    for index in range(len(values) - width * 2 + 1)
+                ]
+            )
+            width *= 2
+
+    def query(self, lo: int, hi: int) -> float:
+        level = (hi - lo).bit_length() - 1
+        row = self._levels[level]
+        return max(row[lo], row[hi - (1 << level)])
+
+
+class _NodeTimeline:
+    def __init__(self, deltas: dict[datetime, list[float]]) -> None:
+        self.times = sorted(deltas)
+        # Index 0 is the usage before the first event; index i + 1 is the
+        # usage from ``times[i]`` until the next event.
+        self.usage: list[tuple[float, float, float, float]] = [(0.0, 0.0, 0.0, 0.0)]
+        running = [0.0, 0.0, 0.0, 0.0]
+        for moment in self.times:
+            running = [total + delta for total, delta in zip(running, deltas[moment], strict=True)]
+            self.usage.append(tuple(running))  # type: ignore[arg-type]
+        self.peaks = [
+            _RangeMax([usage[resource] for usage in self.usage]) for resource in range(3)
+        ]
+
+    def segment(self, moment: datetime) -> int:
+        return bisect_right(self.times, moment)
+
+    def at(self, moment: datetime) -> tuple[float, float, float, float]:
+        return self.usage[self.segment(moment)]
+
+    def peak(self, start_at: datetime, end_at: datetime) -> tuple[float, float, float]:
+        lo = bisect_right(self.times, start_at)
+        hi = max(bisect_left(self.times, end_at), lo) + 1
+        cpu, memory, disk = (item.query(lo, hi) for item in self.peaks)
+        return cpu, memory, disk
+
+
+class CapacityTimeline:
+    """Reserved usage per node over time, built once from reserved windows.
+
+    Each reservation is active on ``[start_at, end_at)``. Start and end events
+    are sorted per node into prefix sums, so the usage at an instant and the
+    peak usage over a window are answered in logarithmic time.
+    """
+
+    def __init__(self, reservations: Iterable[Reservation]) -> None:
+        deltas: dict[str, dict[datetime, list[float]]] = {}
+        for item in reservations:
+            if item.end_at <= item.start_at:
+                continue
+            node_deltas = deltas.setdefault(item.node, {})
+            amounts = (item.cpu_cores, item.memory_bytes, item.disk_bytes, 1)
+            for moment, sign in ((item.start_at, 1), (item.end_at, -1)):
+                current = node_deltas.setdefault(moment, [0.0, 0.0, 0.0, 0.0])
+                for resource, amount in enumerate(amounts):
+                    current[resource] += sign * amount
+        self._nodes = {node: _NodeTimeline(events) for node, events in deltas.items()}
+
+    def segment_key(self, at_time: datetime) -> tuple[int, ...]:
+        """Position of ``at_time`` between reservation events, for every node.
+
+        Instants with equal keys see identical reserved usage, so
+        :meth:`capacities_at` returns the same capacities for both.
+        """
+        return tuple(self._nodes[node].segment(at_time) for node in sorted(self._nodes))
+
+    def reserved_at(self, node: str, at_time: datetime) -> tuple[float, int, int]:
+        timeline = self._nodes.get(node)
+        if timeline is None:
+            return 0.0, 0, 0
+        cpu, memory, disk, _ = timeline.at(at_time)
+        return cpu, int(memory), int(disk)
+
+    def peak_reserved(
+        self,
+        node: str,
+        start_at: datetime,
+        end_at: datetime,
+    ) -> tuple[float, int, int]:
+        timeline = self._nodes.get(node)
+        if timeline is None:
+            return 0.0, 0, 0
+        cpu, memory, disk = timeline.peak(start_at, end_at)
+        return cpu, int(memory), int(disk)
+
+    def free_at(self, node: NodeCapacity, at_time: datetime) -> tuple[float, int, int]:
+        """Free cores, memory and disk on ``node`` at ``at_time``."""
+        return _headroom(node, self.reserved_at(node.node, at_time))
+
+    def min_headroom(
+        self,
+        node: NodeCapacity,
+        start_at: datetime,
+        end_at: datetime,
+    ) -> tuple[float, int, int]:
+        """Smallest free cores, memory and disk on ``node`` over ``[start_at, end_at)``."""
+        return _headroom(node, self.peak_reserved(node.node, start_at, end_at))
+
+    def capacities_at(
+        self,
+        baseline_capacities: list[NodeCapacity],
+        at_time: datetime,
+    ) -> list[NodeCapacity]:
+        adjusted = [item.model_copy(deep=True) for item in baseline_capacities]
+        for node in adjusted:
+            timeline = self._nodes.get(node.node)
+            if timeline is None or timeline.at(at_time)[3] <= 0:
+                continue
+            (
+                node.allocatable_cpu_cores,
+                node.allocatable_memory_bytes,
+                node.allocatable_disk_bytes,
+            ) = self.free_at(node, at_time)
+            node.candidate = (
+                node.status == "online"
+                and node.allocatable_cpu_cores > 0
+                and node.allocatable_memory_bytes > 0
+                and node.allocatable_disk_bytes > 0
+            )
+        return adjusted
+
+
+def _headroom(
+    node: NodeCapacity,
+    reserved: tuple[float, int, int],
+) -> tuple[float, int, int]:
+    cpu, memory, disk = reserved
+    return (
+        max(node.allocatable_cpu_cores - cpu, 0.0),
+        max(node.allocatable_memory_bytes - memory, 0),
+        max(node.allocatable_disk_bytes - disk, 0),
+    )
@@ -1,5 +1,5 @@
 from .models import ScheduledTask
 from .runner import run_polling_scheduler
-from .tasks import run_sync_task
+from .tasks import run_sync_task, run_task
 
-__all__ = ["ScheduledTask", "run_polling_scheduler", "run_sync_task"]
+__all__ = ["ScheduledTask", "run_polling_scheduler", "run_sync_task", "run_task"]
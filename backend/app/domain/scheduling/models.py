@@ -7,4 +7,11 @@ from dataclasses import dataclass
 @dataclass(frozen=True)
 class ScheduledTask:
     name: str
+    # 同步函式在 worker thread 執行；async 函式直接在事件迴圈上 await
     handler: Callable[[], object]
+    # None 表示使用 runner 的預設間隔
+    interval_seconds: float | None = None
+    # 超時只結束本輪等待，該任務在上一輪結束前不會再次執行
+    timeout_seconds: float | None = None
+    # 相同 lane 的任務不會同時執行；None 表示獨立 lane
+    lane: str | None = None
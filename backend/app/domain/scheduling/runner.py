@@ -2,44 +2,156 @@ from __future__ import annotations
 
 import asyncio
 import logging
+from collections.abc import Mapping
 
 from sqlalchemy.exc import OperationalError
 
+from app.core.metrics import (
+    SCHEDULER_TICK_DURATION,
+    SCHEDULER_TICK_LAG,
+    SCHEDULER_TICK_TIMEOUTS,
+)
 from app.domain.scheduling.models import ScheduledTask
-from app.domain.scheduling.tasks import run_sync_task
+from app.domain.scheduling.tasks import run_task
 
 logger = logging.getLogger(__name__)
 
 
-async def run_polling_scheduler(
+class _DatabaseState:
+    """Logs one warning per outage, shared by all task loops."""
+
+    def __init__(self) -> None:
+        self.unavailable = False
+
+    def failed(self, exc: OperationalError) -> None:
+        if not self.unavailable:
+            logger.warning(
+                "Scheduler paused because the database is unavailable: %s",
+                exc,
+            )
+            self.unavailable = True
+
+    def succeeded(self) -> None:
+        if self.unavailable:
+            logger.info(
+                "Scheduler database connection recovered; resuming scheduled tasks"
+            )
+            self.unavailable = False
+
+
+def _log_late_failure(name: str, fut: asyncio.Future[object]) -> None:
+    if not fut.cancelled() and fut.exception() is not None:
+        logger.error(
+            "Scheduled task '%s' failed after its timeout",
+            name,
+            exc_info=fut.exception(),
+        )
+
+
+async def _run_task_forever(
+    task: ScheduledTask,
     *,
     stop_event: asyncio.Event,
-    interval_seconds: int,
-    tasks: list[ScheduledTask],
+    interval_seconds: float,
+    lane: asyncio.Semaphore | None,
+    database: _DatabaseState,
 ) -> None:
-    database_unavailable = False
+    loop = asyncio.get_running_loop()
+    due = loop.time()
+    # A run that timed out keeps going in its thread; never start a second one beside it.
+    inflight: asyncio.Future[object] | None = None
 
     while not stop_event.is_set():
-        for task in tasks:
+        if inflight is not None and not inflight.done():
+            logger.warning(
+                "Scheduled task '%s' is still running from a timed-out tick; skipping",
+                task.name,
+            )
+        else:
+            if lane is not None:
+                await lane.acquire()
+            # A timed-out run still holds its lane until it actually finishes.
+            lane_handed_off = False
             try:
-                await run_sync_task(task)
-                if database_unavailable:
-                    logger.info(
-                        "Scheduler database connection recovered; resuming scheduled tasks"
+                started = loop.time()
+                SCHEDULER_TICK_LAG.labels(task=task.name).set(max(started - due, 0.0))
+                inflight = asyncio.ensure_future(run_task(task))
+                try:
+                    await asyncio.wait_for(
+                        asyncio.shield(inflight), timeout=task.timeout_seconds
                     )
-                    database_unavailable = False
-            except OperationalError as exc:
-                if not database_unavailable:
+                    database.succeeded()
+                except TimeoutError:
+                    SCHEDULER_TICK_TIMEOUTS.labels(task=task.name).inc()
                     logger.warning(
-                        "Scheduler paused because the database is unavailable: %s",
-                        exc,
+                        "Scheduled task '%s' exceeded its %ss timeout",
+                        task.name,
+                        task.timeout_seconds,
+                    )
+                    inflight.add_done_callback(
+                        lambda fut, name=task.name: _log_late_failure(name, fut)
                     )
-                    database_unavailable = True
-                break
-            except Exception:
-                logger.exception("Scheduled task '%s' failed", task.name)
+                    if lane is not None:
+                        inflight.add_done_callback(
+                            lambda _fut, lane=lane: lane.release()
+                        )
+                        lane_handed_off = True
+                except OperationalError as exc:
+                    database.failed(exc)
+                except Exception:
+                    logger.exception("Scheduled task '%s' failed", task.name)
+                finally:
+                    SCHEDULER_TICK_DURATION.labels(task=task.name).observe(
+                        loop.time() - started
+                    )
+            finally:
+                if lane is not None and not lane_handed_off:
+                    lane.release()
 
+        due += interval_seconds
+        # A run longer than the interval collapses the missed ticks into one.
+        due = max(due, loop.time())
         try:
-            await asyncio.wait_for(stop_event.wait(), timeout=interval_seconds)
+            await asyncio.wait_for(stop_event.wait(), timeout=due - loop.time())
         except TimeoutError:
             continue
+
+    if inflight is not None and not inflight.done():
+        # Stops waiting for an abandoned run; a thread-backed handler still finishes.
+        inflight.cancel()
+        await asyncio.gather(inflight, return_exceptions=True)
+
+
+async def run_polling_scheduler(
+    *,
+    stop_event: asyncio.Event,
+    interval_seconds: int,
+    tasks: list[ScheduledTask],
+    lane_limits: Mapping[str, int] | None = None,
+) -> None:
+    """Run every task in its own loop until ``stop_event`` is set.
+
+    Each task runs at its own ``interval_seconds`` (``interval_seconds`` here
+    is the default), so a slow task only delays itself and the tasks sharing
+    its lane. Lanes allow one run at a time unless ``lane_limits`` says
+    otherwise.
+    """
+    limits = lane_limits or {}
+    lanes = {
+        task.lane: asyncio.Semaphore(max(limits.get(task.lane, 1), 1))
+        for task in tasks
+        if task.lane is not None
+    }
+    database = _DatabaseState()
+    await asyncio.gather(
+        *(
+            _run_task_forever(
+                task,
+                stop_event=stop_event,
+                interval_seconds=task.interval_seconds or interval_seconds,
+                lane=lanes.get(task.lane) if task.lane is not None else None,
+                database=database,
+            )
+            for task in tasks
+        )
+    )
@@ -1,9 +1,16 @@
 from __future__ import annotations
 
 import asyncio
+import inspect
 
 from app.domain.scheduling.models import ScheduledTask
 
 
 async def run_sync_task(task: ScheduledTask) -> object:
     return await asyncio.to_thread(task.handler)
+
+
+async def run_task(task: ScheduledTask) -> object:
+    if inspect.iscoroutinefunction(task.handler):
+        return await task.handler()
+    return await run_sync_task(task)
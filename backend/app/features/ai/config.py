@@ -22,6 +22,8 @@ class AIAPIEnvSettings(BaseSettings):
 
     ai_api_rate_limit_per_minute: int = 20
     ai_api_rate_limit_window_seconds: int = 60
+    # 通過驗證的 API key 在此秒數內不再查 DB；輪替 / 刪除時立即失效
+    ai_api_key_auth_cache_ttl_seconds: float = 30.0
 
     redis_enabled: bool = False
     redis_url: str = "redis://localhost:6379/0"
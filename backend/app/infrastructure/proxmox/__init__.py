@@ -1,27 +1,53 @@
+from .async_client import (
+    AsyncProxmoxClient,
+    close_async_proxmox_api,
+    get_async_proxmox_api,
+    invalidate_async_proxmox_client,
+)
 from .client import (
     PROXMOX_TICKET_TTL,
     basic_blocking_task_status,
     get_active_host,
     get_proxmox_api,
+    get_task_watcher,
     invalidate_proxmox_client,
     wait_for_task_status,
 )
+from .health import NodeHealth, NodeHealthMonitor, node_health_monitor
+from .resource_cache import (
+    cluster_resource_cache_stats,
+    get_cluster_resources,
+    get_cluster_resources_async,
+    invalidate_cluster_resources,
+)
 from .router import fetch_cluster_nodes
 from .settings import DEFAULT_PROXMOX_POOL_NAME, ProxmoxSettings, get_proxmox_settings
 from .tls import _tcp_ping, _verify_server_with_ca, build_ws_ssl_context
 
 __all__ = [
+    "AsyncProxmoxClient",
     "PROXMOX_TICKET_TTL",
     "DEFAULT_PROXMOX_POOL_NAME",
+    "NodeHealth",
+    "NodeHealthMonitor",
     "ProxmoxSettings",
     "_tcp_ping",
     "_verify_server_with_ca",
     "basic_blocking_task_status",
     "build_ws_ssl_context",
+    "close_async_proxmox_api",
+    "cluster_resource_cache_stats",
     "fetch_cluster_nodes",
     "get_active_host",
+    "get_async_proxmox_api",
+    "get_cluster_resources",
+    "get_cluster_resources_async",
     "get_proxmox_api",
     "get_proxmox_settings",
+    "get_task_watcher",
+    "invalidate_async_proxmox_client",
+    "invalidate_cluster_resources",
     "invalidate_proxmox_client",
+    "node_health_monitor",
     "wait_for_task_status",
 ]
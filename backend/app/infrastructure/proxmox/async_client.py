@@ -0,0 +1,282 @@
+"""Async Proxmox VE client on a pooled httpx connection.
+
+The synchronous proxmoxer client forces async routes through
+``asyncio.to_thread``. This client speaks the PVE JSON API directly over one
+``httpx.AsyncClient`` per event loop: connections are kept alive in a bounded
+pool, the password ticket is reused until ``PROXMOX_TICKET_TTL``, and hosts are
+tried in the same health-monitor ranking as :func:`get_proxmox_api`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+import httpx
+
+from app.core.config import settings
+from app.exceptions import ProxmoxError
+from app.infrastructure.proxmox.health import node_health_monitor
+from app.infrastructure.proxmox.settings import (
+    PROXMOX_TICKET_TTL,
+    ProxmoxSettings,
+    get_proxmox_settings,
+)
+from app.infrastructure.proxmox.tls import build_ws_ssl_context
+
+logger = logging.getLogger(__name__)
+
+# Failing over is only safe when the request never left this process.
+_FAILOVER_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout)
+# Same budget as the TCP ping the sync client uses to skip dead nodes.
+_CONNECT_TIMEOUT = 2.0
+
+
+@dataclass(frozen=True)
+class _Host:
+    host: str
+    port: int = 8006
+    name: str | None = None
+    node_id: int | None = None
+
+
+def _load_hosts(cfg: ProxmoxSettings) -> list[_Host]:
+    nodes = node_health_monitor.ranked_nodes()
+    if not nodes:
+        return [_Host(cfg.host)]
+    online = [node for node in nodes if node.online]
+    if not online:
+        # Every node failed its last probe; check again before giving up.
+        online = [node for node in node_health_monitor.probe_all() if node.online]
+    return [_Host(node.host, node.port, node.name, node.node_id) for node in online]
+
+
+class AsyncProxmoxClient:
+    def __init__(
+        self,
+        cfg: ProxmoxSettings,
+        *,
+        load_hosts: Callable[[ProxmoxSettings], list[_Host]] = _load_hosts,
+        mark_online: Callable[[int, bool], None] = node_health_monitor.report,
+        transport: httpx.AsyncBaseTransport | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._cfg = cfg
+        self._load_hosts = load_hosts
+        self._mark_online = mark_online
+        self._clock = clock
+        self._http = httpx.AsyncClient(
+            verify=build_ws_ssl_context(cfg),
+            timeout=httpx.Timeout(cfg.api_timeout, connect=_CONNECT_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=settings.PROXMOX_ASYNC_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.PROXMOX_ASYNC_MAX_KEEPALIVE,
+            ),
+            transport=transport,
+            trust_env=False,
+        )
+        self._auth_lock = asyncio.Lock()
+        self._active: _Host | None = None
+        self._host_count = 1
+        self._ticket: str | None = None
+        self._csrf_token = ""
+        self._ticket_at = 0.0
+
+    @property
+    def settings(self) -> ProxmoxSettings:
+        return self._cfg
+
+    @property
+    def active_host(self) -> str:
+        return self._active.host if self._active is not None else self._cfg.host
+
+    async def aclose(self) -> None:
+        await self._http.aclose()
+
+    async def ticket(self) -> tuple[str, str]:
+        """Return the current ``(PVEAuthCookie, CSRFPreventionToken)`` pair."""
+        await self._ensure_ticket()
+        return self._ticket or "", self._csrf_token
+
+    def _ticket_valid(self) -> bool:
+        return (
+            self._ticket is not None
+            and self._clock() - self._ticket_at < PROXMOX_TICKET_TTL
+        )
+
+    async def _ensure_ticket(self) -> None:
+        if self._ticket_valid():
+            return
+        async with self._auth_lock:
+            if self._ticket_valid():
+                return
+            await self._login()
+
+    async def _login(self) -> None:
+        hosts = await asyncio.to_thread(self._load_hosts, self._cfg)
+        self._host_count = len(hosts)
+        last_error: Exception | None = None
+        for host in hosts:
+            try:
+                response = await self._http.post(
+                    self._url(host, "/access/ticket"),
+                    data={"username": self._cfg.user, "password": self._cfg.password},
+                )
+            except httpx.TransportError as exc:
+                last_error = exc
+                logger.warning(
+                    "Failed to connect Proxmox node %s (%s): %s",
+                    host.name or host.host,
+                    host.host,
+                    exc,
+                )
+                await self._set_online(host, False)
+                continue
+            if response.status_code != 200:
+                last_error = ProxmoxError(
+                    f"Proxmox session authentication failed: HTTP {response.status_code}"
+                )
+                await self._set_online(host, False)
+                continue
+
+            data = response.json()["data"]
+            self._ticket = data["ticket"]
+            self._csrf_token = data.get("CSRFPreventionToken", "")
+            self._ticket_at = self._clock()
+            self._active = host
+            await self._set_online(host, True)
+            logger.info("Async Proxmox client using %s", host.host)
+            return
+
+        raise ProxmoxError(f"All Proxmox nodes are unavailable. Last error: {last_error}")
+
+    async def _set_online(self, host: _Host, is_online: bool) -> None:
+        if host.node_id is not None:
+            await asyncio.to_thread(self._mark_online, host.node_id, is_online)
+
+    @staticmethod
+    def _url(host: _Host, path: str) -> str:
+        return f"https://{host.host}:{host.port}/api2/json/{path.lstrip('/')}"
+
+    async def request(self, method: str, path: str, **params: Any) -> Any:
+        """Call ``/api2/json/{path}`` and return the ``data`` member.
+
+        A connect failure drops the ticket so the next login walks the HA order
+        again; a 401 re-authenticates once. Anything else is a ProxmoxError.
+        """
+        method = method.upper()
+        reauthenticated = False
+        attempts = 0
+        while True:
+            await self._ensure_ticket()
+            host = self._active
+            ticket = self._ticket
+            assert host is not None and ticket is not None
+            headers = {"Cookie": f"PVEAuthCookie={ticket}"}
+            if method != "GET":
+                headers["CSRFPreventionToken"] = self._csrf_token
+            body = params if method in ("POST", "PUT") else None
+            query = None if body is not None else params or None
+            try:
+                response = await self._http.request(
+                    method,
+                    self._url(host, path),
+                    params=query,
+                    data=body,
+                    headers=headers,
+                )
+            except _FAILOVER_ERRORS as exc:
+                attempts += 1
+                logger.warning("Proxmox host %s unreachable: %s", host.host, exc)
+                await self._set_online(host, False)
+                if attempts >= self._host_count:
+                    raise ProxmoxError(f"Proxmox request failed: {exc}") from exc
+                self._drop_ticket(ticket)
+                continue
+            except httpx.HTTPError as exc:
+                raise ProxmoxError(f"Proxmox request failed: {exc}") from exc
+
+            if response.status_code == 401 and not reauthenticated:
+                reauthenticated = True
+                self._drop_ticket(ticket)
+                continue
+            if response.status_code >= 400:
+                raise ProxmoxError(
+                    f"Proxmox API {method} {path} failed: "
+                    f"HTTP {response.status_code} {response.reason_phrase}"
+                )
+            return response.json().get("data")
+
+    def _drop_ticket(self, ticket: str) -> None:
+        if self._ticket == ticket:
+            self._ticket = None
+            self._active = None
+
+    async def get(self, path: str, **params: Any) -> Any:
+        return await self.request("GET", path, **params)
+
+    async def post(self, path: str, **params: Any) -> Any:
+        return await self.request("POST", path, **params)
+
+    async def put(self, path: str, **params: Any) -> Any:
+        return await self.request("PUT", path, **params)
+
+    async def delete(self, path: str, **params: Any) -> Any:
+        return await self.request("DELETE", path, **params)
+
+
+_async_client: AsyncProxmoxClient | None = None
+_async_client_loop: asyncio.AbstractEventLoop | None = None
+
+
+async def get_async_proxmox_api() -> AsyncProxmoxClient:
+    """Return the pooled client bound to the running event loop."""
+    global _async_client, _async_client_loop
+
+    loop = asyncio.get_running_loop()
+    if _async_client is not None and _async_client_loop is loop:
+        return _async_client
+
+    cfg = await asyncio.to_thread(get_proxmox_settings)
+    if _async_client is not None and _async_client_loop is loop:
+        return _async_client
+    invalidate_async_proxmox_client()
+    _async_client = AsyncProxmoxClient(cfg)
+    _async_client_loop = loop
+    return _async_client
+
+
+def invalidate_async_proxmox_client() -> None:
+    """Forget the pooled client; its connections are closed on its own loop."""
+    global _async_client, _async_client_loop
+
+    client, loop = _async_client, _async_client_loop
+    _async_client = None
+    _async_client_loop = None
+    if client is None or loop is None or loop.is_closed():
+        return
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is loop:
+        loop.create_task(client.aclose())
+    else:
+        try:
+            loop.call_soon_threadsafe(lambda: loop.create_task(client.aclose()))
+        except RuntimeError:
+            pass
+
+
+async def close_async_proxmox_api() -> None:
+    global _async_client, _async_client_loop
+
+    client = _async_client
+    if client is not None and _async_client_loop is asyncio.get_running_loop():
+        _async_client = None
+        _async_client_loop = None
+        await client.aclose()
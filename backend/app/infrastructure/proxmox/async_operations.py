@@ -0,0 +1,232 @@
+"""Awaitable counterparts of :mod:`app.infrastructure.proxmox.operations`.
+
+Same names, arguments and results as the synchronous module, backed by the
+pooled :class:`AsyncProxmoxClient` so async routes do not park a thread on
+every PVE call. Long-running provisioning flows stay in ``operations``.
+"""
+
+import logging
+
+from app.exceptions import NotFoundError
+from app.infrastructure.proxmox.async_client import get_async_proxmox_api
+from app.infrastructure.proxmox.client import wait_for_task_status
+from app.infrastructure.proxmox.operations import (
+    ResourceType,
+    _is_usable_ipv4,
+)
+from app.infrastructure.proxmox.resource_cache import (
+    ClusterResourceSnapshot,
+    get_cluster_resources_async,
+    invalidate_cluster_resources,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _resource_path(node: str, vmid: int, resource_type: ResourceType) -> str:
+    return f"nodes/{node}/{resource_type}/{vmid}"
+
+
+# ---------------------------------------------------------------------------
+# Resource lookup
+# ---------------------------------------------------------------------------
+
+async def _cluster_resources() -> ClusterResourceSnapshot:
+    proxmox = await get_async_proxmox_api()
+    return await get_cluster_resources_async(
+        lambda: proxmox.get("cluster/resources", type="vm")
+    )
+
+
+async def _pool_name() -> str:
+    return (await get_async_proxmox_api()).settings.pool_name
+
+
+async def find_resource(vmid: int) -> dict:
+    """Find any resource (qemu or lxc) by VMID in the configured pool."""
+    pool = await _pool_name()
+    r = (await _cluster_resources()).by_vmid.get(vmid)
+    if r is not None and r.get("pool") == pool:
+        return dict(r)
+    raise NotFoundError(f"Resource {vmid} not found")
+
+
+async def find_lxc(vmid: int) -> dict:
+    """Find an LXC container by VMID in the configured pool."""
+    pool = await _pool_name()
+    r = (await _cluster_resources()).by_vmid.get(vmid)
+    if r is not None and r["type"] == "lxc" and r.get("pool") == pool:
+        return dict(r)
+    raise NotFoundError(f"LXC container {vmid} not found")
+
+
+async def list_all_resources() -> list[dict]:
+    """Return all cluster resources of type vm in the configured pool."""
+    pool = await _pool_name()
+    return [
+        dict(r) for r in (await _cluster_resources()).resources if r.get("pool") == pool
+    ]
+
+
+async def list_nodes() -> list[dict]:
+    """Return all cluster nodes."""
+    return await (await get_async_proxmox_api()).get("nodes")
+
+
+async def get_available_nodes() -> list[dict]:
+    """Return online nodes first, or all nodes if status data is unavailable."""
+    nodes = await list_nodes()
+    online_nodes = [node for node in nodes if node.get("status") == "online"]
+    return online_nodes or nodes
+
+
+async def list_node_storages(node: str) -> list[dict]:
+    """Return storages visible on a node."""
+    return await (await get_async_proxmox_api()).get(f"nodes/{node}/storage")
+
+
+# ---------------------------------------------------------------------------
+# Config
+# ---------------------------------------------------------------------------
+
+async def get_config(node: str, vmid: int, resource_type: ResourceType) -> dict:
+    """GET /nodes/{node}/{type}/{vmid}/config"""
+    proxmox = await get_async_proxmox_api()
+    return await proxmox.get(f"{_resource_path(node, vmid, resource_type)}/config")
+
+
+async def update_config(
+    node: str, vmid: int, resource_type: ResourceType, **params
+) -> None:
+    """PUT /nodes/{node}/{type}/{vmid}/config"""
+    proxmox = await get_async_proxmox_api()
+    try:
+        await proxmox.put(f"{_resource_path(node, vmid, resource_type)}/config", **params)
+    finally:
+        invalidate_cluster_resources()
+
+
+# ---------------------------------------------------------------------------
+# Control (start / stop / reboot / shutdown / reset)
+# ---------------------------------------------------------------------------
+
+async def control(
+    node: str, vmid: int, resource_type: ResourceType, action: str
+) -> None:
+    """Execute a power action on a resource."""
+    proxmox = await get_async_proxmox_api()
+    try:
+        await proxmox.post(f"{_resource_path(node, vmid, resource_type)}/status/{action}")
+    finally:
+        invalidate_cluster_resources()
+
+
+async def get_status(node: str, vmid: int, resource_type: ResourceType) -> dict:
+    """GET /nodes/{node}/{type}/{vmid}/status/current"""
+    proxmox = await get_async_proxmox_api()
+    return await proxmox.get(f"{_resource_path(node, vmid, resource_type)}/status/current")
+
+
+# ---------------------------------------------------------------------------
+# Snapshots / RRD stats
+# ---------------------------------------------------------------------------
+
+async def list_snapshots(node: str, vmid: int, resource_type: ResourceType) -> list:
+    proxmox = await get_async_proxmox_api()
+    return await proxmox.get(f"{_resource_path(node, vmid, resource_type)}/snapshot")
+
+
+async def get_rrd_data(
+    node: str, vmid: int, resource_type: ResourceType, timeframe: str
+) -> list[dict]:
+    proxmox = await get_async_proxmox_api()
+    return await proxmox.get(
+        f"{_resource_path(node, vmid, resource_type)}/rrddata",
+        timeframe=timeframe,
+    )
+
+
+# ---------------------------------------------------------------------------
+# IP address
+# ---------------------------------------------------------------------------
+
+async def get_ip_address(node: str, vmid: int, resource_type: ResourceType) -> str | None:
+    """取得 VM 的 IP 位址，掃描全部網卡（跳過 loopback / link-local）。"""
+    proxmox = await get_async_proxmox_api()
+    path = _resource_path(node, vmid, resource_type)
+    try:
+        if resource_type == "lxc":
+            for iface in await proxmox.get(f"{path}/interfaces") or []:
+                if iface.get("name") == "lo":
+                    continue
+                inet = iface.get("inet")
+                if inet:
+                    ip = inet.split("/")[0]
+                    if _is_usable_ipv4(ip):
+                        return ip
+        else:
+            network_info = await proxmox.get(f"{path}/agent/network-get-interfaces")
+            for iface in (network_info or {}).get("result", []):
+                if iface.get("name") == "lo":
+                    continue
+                for ip_entry in iface.get("ip-addresses", []):
+                    if ip_entry.get("ip-address-type") == "ipv4":
+                        ip = ip_entry.get("ip-address", "")
+                        if _is_usable_ipv4(ip):
+                            return ip
+    except Exception as e:
+        logger.debug(f"Failed to get IP for VMID {vmid}: {e}")
+    return None
+
+
+# ---------------------------------------------------------------------------
+# Session ticket (for WebSocket auth — password-based, not API token)
+# ---------------------------------------------------------------------------
+
+async def get_session_ticket() -> tuple[str, str]:
+    """Return the pooled client's (pve_auth_cookie, csrf_token).
+
+    Proxmox WebSocket endpoints (termproxy, vncproxy) require a session
+    ticket obtained via password auth; API tokens are not accepted.
+    """
+    return await (await get_async_proxmox_api()).ticket()
+
+
+async def get_active_host() -> str:
+    """Host the pooled client is talking to after HA failover."""
+    proxmox = await get_async_proxmox_api()
+    await proxmox.ticket()
+    return proxmox.active_host
+
+
+# ---------------------------------------------------------------------------
+# Tasks
+# ---------------------------------------------------------------------------
+
+async def get_task_status(node_name: str, task_id: str) -> dict:
+    proxmox = await get_async_proxmox_api()
+    return await proxmox.get(f"nodes/{node_name}/tasks/{task_id}/status")
+
+
+async def wait_task(task_id: str, node: str, check_interval: int | None = None) -> dict:
+    return await wait_for_task_status(
+        node_name=node,
+        task_id=task_id,
+        check_interval=check_interval,
+    )
+
+
+# ---------------------------------------------------------------------------
+# Console tickets
+# ---------------------------------------------------------------------------
+
+async def get_terminal_ticket(node: str, vmid: int) -> dict:
+    """Get termproxy ticket for an LXC container (port + ticket)."""
+    proxmox = await get_async_proxmox_api()
+    return await proxmox.post(f"nodes/{node}/lxc/{vmid}/termproxy")
+
+
+async def get_vnc_ticket(node: str, vmid: int) -> dict:
+    """Get VNC proxy ticket for a VM (port + ticket)."""
+    proxmox = await get_async_proxmox_api()
+    return await proxmox.post(f"nodes/{node}/qemu/{vmid}/vncproxy", websocket=1)
@@ -1,7 +1,9 @@
 from __future__ import annotations
 
 import asyncio
+import functools
 import logging
+import queue
 import threading
 import time
 from collections.abc import Callable
@@ -9,18 +11,18 @@ from collections.abc import Callable
 from proxmoxer import ProxmoxAPI
 
 from app.exceptions import ProxmoxError
-from app.infrastructure.proxmox.router import (
-    get_nodes_for_ha,
-    try_connect,
-    update_node_online,
+from app.infrastructure.proxmox.async_client import invalidate_async_proxmox_client
+from app.infrastructure.proxmox.health import node_health_monitor
+from app.infrastructure.proxmox.resource_cache import invalidate_cluster_resources
+from app.infrastructure.proxmox.router import try_connect
+from app.infrastructure.proxmox.settings import (
+    PROXMOX_TICKET_TTL,
+    get_proxmox_settings,
 )
-from app.infrastructure.proxmox.settings import get_proxmox_settings
-from app.infrastructure.proxmox.tls import _tcp_ping
+from app.infrastructure.proxmox.task_watcher import TaskWatcher
 
 logger = logging.getLogger(__name__)
 
-PROXMOX_TICKET_TTL = 7000
-
 _proxmox_client: ProxmoxAPI | None = None
 _proxmox_created_at = 0.0
 _proxmox_active_host: str | None = None
@@ -33,6 +35,9 @@ def invalidate_proxmox_client() -> None:
         _proxmox_client = None
         _proxmox_created_at = 0.0
         _proxmox_active_host = None
+    node_health_monitor.invalidate()
+    invalidate_async_proxmox_client()
+    invalidate_cluster_resources()
 
 
 def get_proxmox_api() -> ProxmoxAPI:
@@ -47,23 +52,18 @@ def get_proxmox_api() -> ProxmoxAPI:
             return _proxmox_client
 
         cfg = get_proxmox_settings()
-        nodes = get_nodes_for_ha()
+        nodes = node_health_monitor.ranked_nodes()
 
         if nodes:
+            candidates = [node for node in nodes if node.online]
+            if not candidates:
+                # Every node failed its last probe; check again before giving up.
+                candidates = [node for node in node_health_monitor.probe_all() if node.online]
             last_error: Exception | None = None
-            for node in nodes:
-                if not _tcp_ping(node.host, node.port):
-                    logger.info(
-                        "Skipping unreachable Proxmox node %s (%s)",
-                        node.name,
-                        node.host,
-                    )
-                    update_node_online(node.id, False)
-                    continue
-
+            for node in candidates:
                 try:
                     client = try_connect(node.host, cfg)
-                    update_node_online(node.id, True)
+                    node_health_monitor.report(node.node_id, True)
                     _proxmox_client = client
                     _proxmox_created_at = time.monotonic()
                     _proxmox_active_host = node.host
@@ -81,7 +81,7 @@ def get_proxmox_api() -> ProxmoxAPI:
                         node.host,
                         exc,
                     )
-                    update_node_online(node.id, False)
+                    node_health_monitor.report(node.node_id, False)
 
             raise ProxmoxError(
                 f"All Proxmox nodes are unavailable. Last error: {last_error}"
@@ -131,6 +131,35 @@ def _task_log_tail(
     return lines
 
 
+_task_watcher = TaskWatcher(
+    # Looked up per poll so the active (possibly failed-over) client is used.
+    api=lambda: get_proxmox_api(),
+    log_tail=lambda proxmox, **kwargs: _task_log_tail(proxmox, **kwargs),
+)
+
+
+def get_task_watcher() -> TaskWatcher:
+    return _task_watcher
+
+
+def _run_progress_callback(
+    progress_callback: Callable[[dict], None],
+    data: dict,
+    *,
+    node_name: str,
+    task_id: str,
+) -> None:
+    try:
+        progress_callback(data)
+    except Exception as exc:
+        logger.warning(
+            "Task progress callback failed for %s on %s: %s",
+            task_id,
+            node_name,
+            exc,
+        )
+
+
 def basic_blocking_task_status(
     node_name: str,
     task_id: str,
@@ -141,60 +170,24 @@ def basic_blocking_task_status(
     if check_interval is None:
         check_interval = get_proxmox_settings().task_check_interval
 
-    proxmox = get_proxmox_api()
     logger.info("Waiting for task %s on node %s", task_id, node_name)
-
-    while True:
-        data = proxmox.nodes(node_name).tasks(task_id).status.get()
-
-        status = data.get("status", "")
-        exitstatus = data.get("exitstatus")
-
-        logger.debug(
-            "Task %s status=%s exitstatus=%s",
-            task_id,
-            status,
-            exitstatus,
-        )
-
-        if progress_callback is not None:
-            try:
-                progress_callback(data)
-            except Exception as exc:
-                logger.warning(
-                    "Task progress callback failed for %s on %s: %s",
-                    task_id,
-                    node_name,
-                    exc,
-                )
-
-        if status == "stopped":
-            if exitstatus == "OK" or (
-                isinstance(exitstatus, str) and exitstatus.startswith("WARNINGS")
-            ):
-                if exitstatus != "OK":
-                    logger.warning(
-                        "Task %s completed with warnings: %s",
-                        task_id,
-                        exitstatus,
-                    )
-                else:
-                    logger.info("Task %s completed successfully", task_id)
-                return data
-
-            error_msg = f"Task {task_id} failed with exitstatus: {exitstatus}"
-            log_tail = _task_log_tail(
-                proxmox,
-                node_name=node_name,
-                task_id=task_id,
-                limit=task_log_tail_lines,
+    updates: queue.SimpleQueue[dict | None] | None = (
+        queue.SimpleQueue() if progress_callback is not None else None
+    )
+    future = _task_watcher.watch(
+        node_name,
+        task_id,
+        interval=check_interval,
+        log_tail_lines=task_log_tail_lines,
+        on_update=updates.put if updates is not None else None,
+    )
+    if updates is not None and progress_callback is not None:
+        # Callbacks stay on the caller's thread, as they did when it polled.
+        while (data := updates.get()) is not None:
+            _run_progress_callback(
+                progress_callback, data, node_name=node_name, task_id=task_id
             )
-            if log_tail:
-                error_msg = f"{error_msg}. Task log tail: {' | '.join(log_tail)}"
-            logger.error(error_msg)
-            raise ProxmoxError(error_msg)
-
-        time.sleep(check_interval)
+    return future.result()
 
 
 async def wait_for_task_status(
@@ -204,11 +197,34 @@ async def wait_for_task_status(
     progress_callback: Callable[[dict], None] | None = None,
     task_log_tail_lines: int = 8,
 ) -> dict:
-    return await asyncio.to_thread(
-        basic_blocking_task_status,
+    if check_interval is None:
+        check_interval = (await asyncio.to_thread(get_proxmox_settings)).task_check_interval
+
+    logger.info("Waiting for task %s on node %s", task_id, node_name)
+    loop = asyncio.get_running_loop()
+
+    def on_update(data: dict | None) -> None:
+        if data is None or progress_callback is None:
+            return
+        try:
+            loop.call_soon_threadsafe(
+                functools.partial(
+                    _run_progress_callback,
+                    progress_callback,
+                    data,
+                    node_name=node_name,
+                    task_id=task_id,
+                )
+            )
+        except RuntimeError:
+            # The waiting loop has closed; nobody is listening any more.
+            pass
+
+    future = _task_watcher.watch(
         node_name,
         task_id,
-        check_interval,
-        progress_callback,
-        task_log_tail_lines,
+        interval=check_interval,
+        log_tail_lines=task_log_tail_lines,
+        on_update=on_update if progress_callback is not None else None,
     )
+    return await asyncio.wrap_future(future)
@@ -0,0 +1,186 @@
+"""Background health monitor for the stored Proxmox HA nodes.
+
+Picking a node used to TCP-ping every stored node in turn on the request
+thread, so a dead primary cost one ping timeout per dead node on the first
+call after ticket expiry. The monitor instead:
+
+- probes all nodes concurrently every ``PROXMOX_HEALTH_CHECK_INTERVAL``
+  seconds and writes every status back in one statement;
+- keeps the last round in memory, ranked online-first in the stored node
+  order, for :func:`get_proxmox_api` and the async client to read;
+- takes connect results from those clients, so a node that stops accepting
+  logins drops out of the ranking before the next round.
+
+Only the very first read, or the first read after :meth:`invalidate`
+(node list edited, client reset), runs a round on the caller's thread; with
+concurrent probes that costs at most one ping timeout.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
+
+from app.core.config import settings
+from app.infrastructure.proxmox.router import get_nodes_for_ha, update_nodes_online
+from app.infrastructure.proxmox.tls import _tcp_ping
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class NodeHealth:
+    node_id: int | None
+    name: str
+    host: str
+    port: int
+    online: bool
+    latency_ms: float | None = None
+
+
+class NodeHealthMonitor:
+    def __init__(
+        self,
+        *,
+        load_nodes: Callable[[], list] = get_nodes_for_ha,
+        probe: Callable[[str, int], bool] = _tcp_ping,
+        save_statuses: Callable[[dict[int, bool]], None] = update_nodes_online,
+        interval: Callable[[], float] = lambda: settings.PROXMOX_HEALTH_CHECK_INTERVAL,
+        concurrency: Callable[[], int] = lambda: settings.PROXMOX_HEALTH_CHECK_CONCURRENCY,
+    ) -> None:
+        self._load_nodes = load_nodes
+        self._probe = probe
+        self._save_statuses = save_statuses
+        self._interval = interval
+        self._concurrency = concurrency
+        self._lock = threading.Lock()
+        # One round at a time; concurrent stale readers share it.
+        self._round_lock = threading.Lock()
+        self._nodes: list[NodeHealth] = []
+        self._stale = True
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._worker: threading.Thread | None = None
+
+    # ─── Reads ────────────────────────────────────────────────────────────────
+
+    def ranked_nodes(self) -> list[NodeHealth]:
+        """Nodes from the last round, online first, in stored order within each group.
+
+        Returns an empty list when no HA nodes are stored.
+        """
+        if self._stale:
+            with self._round_lock:
+                if self._stale:
+                    self._run_round()
+        with self._lock:
+            return self._ranked()
+
+    def _ranked(self) -> list[NodeHealth]:
+        return [n for n in self._nodes if n.online] + [n for n in self._nodes if not n.online]
+
+    # ─── Updates ──────────────────────────────────────────────────────────────
+
+    def probe_all(self) -> list[NodeHealth]:
+        """Run a round now on the caller's thread and return the new ranking."""
+        with self._round_lock:
+            self._run_round()
+        with self._lock:
+            return self._ranked()
+
+    def report(self, node_id: int | None, online: bool) -> None:
+        """Record the outcome of a real connect attempt to ``node_id``."""
+        if node_id is None:
+            return
+        changed = False
+        with self._lock:
+            for i, node in enumerate(self._nodes):
+                if node.node_id == node_id and node.online != online:
+                    self._nodes[i] = replace(node, online=online, latency_ms=None)
+                    changed = True
+        if changed:
+            self._save({node_id: online})
+
+    def invalidate(self) -> None:
+        """Reload and re-probe the node list on the next read (and wake the worker)."""
+        self._stale = True
+        self._wake.set()
+
+    def _run_round(self) -> None:
+        nodes = self._load_nodes()
+        results = self._probe_nodes(nodes)
+        with self._lock:
+            self._nodes = results
+            self._stale = False
+        self._save({n.node_id: n.online for n in results if n.node_id is not None})
+
+    def _probe_nodes(self, nodes: list) -> list[NodeHealth]:
+        def probe(node) -> NodeHealth:
+            port = node.port or 8006
+            started = time.perf_counter()
+            try:
+                online = bool(self._probe(node.host, port))
+            except Exception:
+                online = False
+            return NodeHealth(
+                node_id=node.id,
+                name=node.name,
+                host=node.host,
+                port=port,
+                online=online,
+                latency_ms=(time.perf_counter() - started) * 1000 if online else None,
+            )
+
+        if not nodes:
+            return []
+        workers = max(1, min(self._concurrency(), len(nodes)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pve-health") as pool:
+            return list(pool.map(probe, nodes))
+
+    def _save(self, statuses: dict[int, bool]) -> None:
+        if not statuses:
+            return
+        try:
+            self._save_statuses(statuses)
+        except Exception as exc:
+            logger.warning("Failed to store Proxmox node statuses: %s", exc)
+
+    # ─── Background worker ────────────────────────────────────────────────────
+
+    def start(self) -> None:
+        with self._lock:
+            if self._worker is not None:
+                return
+            self._stopping.clear()
+            self._worker = threading.Thread(
+                target=self._work_forever, name="pve-health-monitor", daemon=True
+            )
+            self._worker.start()
+
+    def stop(self, timeout: float | None = None) -> None:
+        with self._lock:
+            worker, self._worker = self._worker, None
+        self._stopping.set()
+        self._wake.set()
+        if worker is not None:
+            worker.join(timeout)
+
+    def _work_forever(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                with self._round_lock:
+                    self._run_round()
+            except Exception:
+                logger.exception("Proxmox node health round failed")
+            self._wake.wait(self._interval())
+            self._wake.clear()
+
+
+node_health_monitor = NodeHealthMonitor()
+
+
+__all__ = ["NodeHealth", "NodeHealthMonitor", "node_health_monitor"]
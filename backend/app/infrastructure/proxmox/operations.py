@@ -6,17 +6,18 @@ duplicate the same cluster.resources iteration or qemu/lxc dispatch logic.
 """
 
 import logging
+import threading
 from collections.abc import Callable
 from typing import Literal
 
-import httpx
-
 from app.exceptions import BadRequestError, NotFoundError, ProxmoxError
 from app.infrastructure.proxmox import (
     basic_blocking_task_status,
-    get_active_host,
+    get_async_proxmox_api,
+    get_cluster_resources,
     get_proxmox_api,
     get_proxmox_settings,
+    invalidate_cluster_resources,
     wait_for_task_status,
 )
 
@@ -31,25 +32,30 @@ ResourceType = Literal["qemu", "lxc"]
 
 def _raw_vms() -> list[dict]:
     """Return all cluster resources of type vm without pool filtering."""
-    proxmox = get_proxmox_api()
-    return proxmox.cluster.resources.get(type="vm")
+    return [dict(r) for r in get_cluster_resources().resources]
+
+
+def _cached_resource(vmid: int) -> dict | None:
+    """O(1) VMID lookup in the shared cluster resource snapshot."""
+    r = get_cluster_resources().by_vmid.get(vmid)
+    return dict(r) if r is not None else None
 
 
 def find_resource(vmid: int) -> dict:
     """Find any resource (qemu or lxc) by VMID in the configured pool."""
     pool = get_proxmox_settings().pool_name
-    for r in _raw_vms():
-        if r["vmid"] == vmid and r.get("pool") == pool:
-            return r
+    r = _cached_resource(vmid)
+    if r is not None and r.get("pool") == pool:
+        return r
     raise NotFoundError(f"Resource {vmid} not found")
 
 
 def find_lxc(vmid: int) -> dict:
     """Find an LXC container by VMID in the configured pool."""
     pool = get_proxmox_settings().pool_name
-    for r in _raw_vms():
-        if r["vmid"] == vmid and r["type"] == "lxc" and r.get("pool") == pool:
-            return r
+    r = _cached_resource(vmid)
+    if r is not None and r["type"] == "lxc" and r.get("pool") == pool:
+        return r
     raise NotFoundError(f"LXC container {vmid} not found")
 
 
@@ -179,13 +185,9 @@ def resolve_target_storage(
 def find_vm_template(template_id: int) -> dict:
     """Find a VM template by VMID in the configured pool."""
     pool = get_proxmox_settings().pool_name
-    for vm in _raw_vms():
-        if (
-            vm["vmid"] == template_id
-            and vm.get("template") == 1
-            and vm.get("pool") == pool
-        ):
-            return vm
+    vm = _cached_resource(template_id)
+    if vm is not None and vm.get("template") == 1 and vm.get("pool") == pool:
+        return vm
     raise NotFoundError(f"VM template {template_id} not found")
 
 
@@ -214,7 +216,10 @@ def update_config(
     node: str, vmid: int, resource_type: ResourceType, **params
 ) -> None:
     """PUT /nodes/{node}/{type}/{vmid}/config"""
-    _resource_api(node, vmid, resource_type).config.put(**params)
+    try:
+        _resource_api(node, vmid, resource_type).config.put(**params)
+    finally:
+        invalidate_cluster_resources()
 
 
 # ---------------------------------------------------------------------------
@@ -225,7 +230,10 @@ def control(
     node: str, vmid: int, resource_type: ResourceType, action: str
 ) -> None:
     """Execute a power action on a resource."""
-    getattr(_resource_api(node, vmid, resource_type).status, action).post()
+    try:
+        getattr(_resource_api(node, vmid, resource_type).status, action).post()
+    finally:
+        invalidate_cluster_resources()
 
 
 def get_status(node: str, vmid: int, resource_type: ResourceType) -> dict:
@@ -245,7 +253,10 @@ def resize_disk(
     size: str,
 ) -> None:
     """PUT /nodes/{node}/{type}/{vmid}/resize"""
-    _resource_api(node, vmid, resource_type).resize.put(disk=disk, size=size)
+    try:
+        _resource_api(node, vmid, resource_type).resize.put(disk=disk, size=size)
+    finally:
+        invalidate_cluster_resources()
 
 
 # ---------------------------------------------------------------------------
@@ -297,8 +308,11 @@ def get_rrd_data(
 def delete_resource(
     node: str, vmid: int, resource_type: ResourceType, **params
 ) -> str:
-    task = _resource_api(node, vmid, resource_type).delete(**params)
-    basic_blocking_task_status(node, task)
+    try:
+        task = _resource_api(node, vmid, resource_type).delete(**params)
+        basic_blocking_task_status(node, task)
+    finally:
+        invalidate_cluster_resources()
     return task
 
 
@@ -325,12 +339,15 @@ def migrate_resource(
         if online:
             params["restart"] = 1
 
-    task = _resource_api(source_node, vmid, resource_type).migrate.post(**params)
-    basic_blocking_task_status(
-        source_node,
-        task,
-        progress_callback=progress_callback,
-    )
+    try:
+        task = _resource_api(source_node, vmid, resource_type).migrate.post(**params)
+        basic_blocking_task_status(
+            source_node,
+            task,
+            progress_callback=progress_callback,
+        )
+    finally:
+        invalidate_cluster_resources()
     return task
 
 
@@ -420,8 +437,11 @@ def get_current_specs(node: str, vmid: int, resource_type: ResourceType) -> dict
 def create_lxc(node: str, **config) -> str:
     """Create an LXC container and wait for the task to finish. Returns UPID."""
     proxmox = get_proxmox_api()
-    task = proxmox.nodes(node).lxc.create(**config)
-    basic_blocking_task_status(node, task)
+    try:
+        task = proxmox.nodes(node).lxc.create(**config)
+        basic_blocking_task_status(node, task)
+    finally:
+        invalidate_cluster_resources()
     return task
 
 
@@ -432,8 +452,11 @@ def create_lxc(node: str, **config) -> str:
 def clone_vm(node: str, template_id: int, **clone_config) -> str:
     """Clone a VM template and wait. Returns UPID."""
     proxmox = get_proxmox_api()
-    task = proxmox.nodes(node).qemu(template_id).clone.post(**clone_config)
-    basic_blocking_task_status(node, task)
+    try:
+        task = proxmox.nodes(node).qemu(template_id).clone.post(**clone_config)
+        basic_blocking_task_status(node, task)
+    finally:
+        invalidate_cluster_resources()
     return task
 
 
@@ -442,6 +465,38 @@ def next_vmid() -> int:
     return proxmox.cluster.nextid.get()
 
 
+_vmid_lock = threading.Lock()
+_reserved_vmids: set[int] = set()
+
+
+def reserve_vmid() -> int:
+    """Return a free VMID that no other in-flight create in this process holds.
+
+    ``cluster/nextid`` keeps answering the same id until a create lands, so
+    concurrent creates step past ids already handed out; PVE confirms each
+    stepped-to id is unused. Pair with :func:`release_vmid`.
+    """
+    with _vmid_lock:
+        first = vmid = int(next_vmid())
+        while vmid in _reserved_vmids or (vmid != first and not _vmid_unused(vmid)):
+            vmid += 1
+        _reserved_vmids.add(vmid)
+        return vmid
+
+
+def _vmid_unused(vmid: int) -> bool:
+    try:
+        get_proxmox_api().cluster.nextid.get(vmid=vmid)
+    except Exception:
+        return False
+    return True
+
+
+def release_vmid(vmid: int) -> None:
+    with _vmid_lock:
+        _reserved_vmids.discard(vmid)
+
+
 # ---------------------------------------------------------------------------
 # Templates
 # ---------------------------------------------------------------------------
@@ -469,37 +524,11 @@ async def get_session_ticket() -> tuple[str, str]:
     """Authenticate via password and return (pve_auth_cookie, csrf_token).
 
     Proxmox WebSocket endpoints (termproxy, vncproxy) require a session
-    ticket obtained via password auth; API tokens are not accepted.
+    ticket obtained via password auth; API tokens are not accepted. The
+    ticket is the pooled async client's, reused until it expires.
     """
-    import ssl as _ssl
-
-    cfg = get_proxmox_settings()
-    if cfg.ca_cert:
-        # Build a custom SSL context that accepts the PVE self-signed CA cert
-        _ctx = _ssl.SSLContext(_ssl.PROTOCOL_TLS_CLIENT)
-        _ctx.check_hostname = False
-        _ctx.verify_mode = _ssl.CERT_REQUIRED
-        _ctx.load_verify_locations(cadata=cfg.ca_cert)
-        if hasattr(_ssl, "VERIFY_X509_STRICT"):
-            _ctx.verify_flags &= ~_ssl.VERIFY_X509_STRICT
-        verify: bool | _ssl.SSLContext = _ctx
-    else:
-        verify = cfg.verify_ssl
-
-    async with httpx.AsyncClient(verify=verify) as client:
-        resp = await client.post(
-            f"https://{get_active_host()}:8006/api2/json/access/ticket",
-            data={
-                "username": cfg.user,
-                "password": cfg.password,
-            },
-        )
-        if resp.status_code != 200:
-            raise ProxmoxError(
-                f"Proxmox session authentication failed: HTTP {resp.status_code}"
-            )
-        data = resp.json()["data"]
-        return data["ticket"], data.get("CSRFPreventionToken", "")
+    proxmox = await get_async_proxmox_api()
+    return await proxmox.ticket()
 
 
 async def wait_task(task_id: str, node: str, check_interval: int | None = None) -> dict:
@@ -0,0 +1,210 @@
+"""Short-lived snapshot of ``cluster/resources?type=vm`` shared by all lookups.
+
+Every VMID lookup used to fetch and scan the full cluster resource list. The
+snapshot is fetched at most once per TTL, indexed by VMID, and concurrent
+callers that find it stale wait on the same in-flight fetch instead of each
+hitting the PVE API. Operations that change the resource list (clone, create,
+migrate, delete, power actions) call :func:`invalidate_cluster_resources`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+import time
+from collections.abc import Awaitable, Callable
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from types import MappingProxyType
+
+from app.core.config import settings
+from app.core.metrics import (
+    PROXMOX_RESOURCE_CACHE_HIT_RATIO,
+    PROXMOX_RESOURCE_CACHE_LOOKUPS,
+)
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ClusterResourceSnapshot:
+    resources: tuple[dict, ...]
+    by_vmid: MappingProxyType[int, dict] = field(repr=False)
+    fetched_at: float
+
+    @classmethod
+    def build(cls, resources: list[dict], *, fetched_at: float) -> ClusterResourceSnapshot:
+        return cls(
+            resources=tuple(resources),
+            by_vmid=MappingProxyType(
+                {int(item["vmid"]): item for item in resources if "vmid" in item}
+            ),
+            fetched_at=fetched_at,
+        )
+
+
+class ClusterResourceCache:
+    def __init__(
+        self,
+        *,
+        fetch: Callable[[], list[dict]],
+        ttl_seconds: Callable[[], float],
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._fetch = fetch
+        self._ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._snapshot: ClusterResourceSnapshot | None = None
+        self._inflight: Future[ClusterResourceSnapshot] | None = None
+        self._async_inflight: asyncio.Future[ClusterResourceSnapshot] | None = None
+        self._generation = 0
+        self._hits = 0
+        self._misses = 0
+
+    def get(self) -> ClusterResourceSnapshot:
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is not None and self._clock() - snapshot.fetched_at < self._ttl_seconds():
+                self._record(hit=True)
+                return snapshot
+            self._record(hit=False)
+            inflight = self._inflight
+            if inflight is None:
+                inflight = self._inflight = Future()
+                generation = self._generation
+                leader = True
+            else:
+                leader = False
+
+        if not leader:
+            return inflight.result()
+
+        try:
+            snapshot = ClusterResourceSnapshot.build(
+                self._fetch() or [],
+                fetched_at=self._clock(),
+            )
+        except BaseException as exc:
+            with self._lock:
+                if self._inflight is inflight:
+                    self._inflight = None
+            inflight.set_exception(exc)
+            raise
+
+        with self._lock:
+            if self._inflight is inflight:
+                self._inflight = None
+            # A fetch that raced an invalidation may predate the change; hand
+            # it to its waiters but never keep it.
+            if generation == self._generation:
+                self._snapshot = snapshot
+        inflight.set_result(snapshot)
+        return snapshot
+
+    async def get_async(
+        self,
+        fetch: Callable[[], Awaitable[list[dict]]],
+    ) -> ClusterResourceSnapshot:
+        """Like :meth:`get`, but refreshes through an awaitable ``fetch``.
+
+        Coroutines on the same loop share one in-flight refresh; the result is
+        stored in the same snapshot slot the synchronous path reads.
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is not None and self._clock() - snapshot.fetched_at < self._ttl_seconds():
+                self._record(hit=True)
+                return snapshot
+            self._record(hit=False)
+            inflight = self._async_inflight
+            if inflight is None or inflight.done() or inflight.get_loop() is not loop:
+                inflight = self._async_inflight = loop.create_future()
+                generation = self._generation
+                leader = True
+            else:
+                leader = False
+
+        if not leader:
+            return await asyncio.shield(inflight)
+
+        try:
+            snapshot = ClusterResourceSnapshot.build(
+                await fetch() or [],
+                fetched_at=self._clock(),
+            )
+        except BaseException as exc:
+            with self._lock:
+                if self._async_inflight is inflight:
+                    self._async_inflight = None
+            if isinstance(exc, asyncio.CancelledError):
+                inflight.cancel()
+            else:
+                inflight.set_exception(exc)
+                # Retrieved here so a refresh without waiters does not log noise.
+                inflight.exception()
+            raise
+
+        with self._lock:
+            if self._async_inflight is inflight:
+                self._async_inflight = None
+            if generation == self._generation:
+                self._snapshot = snapshot
+        inflight.set_result(snapshot)
+        return snapshot
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._snapshot = None
+            self._inflight = None
+            self._async_inflight = None
+
+    def stats(self) -> dict[str, float]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_ratio": self._hits / lookups if lookups else 0.0,
+            }
+
+    def _record(self, *, hit: bool) -> None:
+        if hit:
+            self._hits += 1
+        else:
+            self._misses += 1
+        PROXMOX_RESOURCE_CACHE_LOOKUPS.labels(result="hit" if hit else "miss").inc()
+        PROXMOX_RESOURCE_CACHE_HIT_RATIO.set(self._hits / (self._hits + self._misses))
+
+
+def _fetch_cluster_vms() -> list[dict]:
+    from app.infrastructure.proxmox.client import get_proxmox_api
+
+    return get_proxmox_api().cluster.resources.get(type="vm")
+
+
+_cache = ClusterResourceCache(
+    fetch=_fetch_cluster_vms,
+    ttl_seconds=lambda: settings.PROXMOX_RESOURCE_CACHE_TTL,
+)
+
+
+def get_cluster_resources() -> ClusterResourceSnapshot:
+    return _cache.get()
+
+
+async def get_cluster_resources_async(
+    fetch: Callable[[], Awaitable[list[dict]]],
+) -> ClusterResourceSnapshot:
+    return await _cache.get_async(fetch)
+
+
+def invalidate_cluster_resources() -> None:
+    _cache.invalidate()
+
+
+def cluster_resource_cache_stats() -> dict[str, float]:
+    return _cache.stats()
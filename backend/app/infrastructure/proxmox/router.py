@@ -25,18 +25,15 @@ def get_nodes_for_ha() -> list:
         return []
 
 
-def update_node_online(node_id: int, is_online: bool) -> None:
-    """Best-effort status update; failures must not block client routing."""
-    try:
-        from sqlmodel import Session
+def update_nodes_online(statuses: dict[int, bool]) -> None:
+    """Store a whole probe round in one statement."""
+    from sqlmodel import Session
 
-        from app.core.db import engine
-        from app.repositories.proxmox_node import update_node_status
+    from app.core.db import engine
+    from app.repositories.proxmox_node import update_node_statuses
 
-        with Session(engine) as session:
-            update_node_status(session, node_id, is_online)
-    except Exception:
-        return
+    with Session(engine) as session:
+        update_node_statuses(session, statuses)
 
 
 def try_connect(host: str, cfg: ProxmoxSettings) -> ProxmoxAPI:
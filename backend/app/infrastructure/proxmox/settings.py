@@ -9,6 +9,9 @@ logger = logging.getLogger(__name__)
 
 DEFAULT_PROXMOX_POOL_NAME = "CampusCloud"
 
+# PVE tickets are valid for two hours; clients re-authenticate a little earlier.
+PROXMOX_TICKET_TTL = 7000
+
 
 @dataclass
 class ProxmoxSettings:
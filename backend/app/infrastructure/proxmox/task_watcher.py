@@ -0,0 +1,224 @@
+"""One poller for every outstanding PVE task.
+
+Waiting on a task used to mean one thread calling ``tasks/{upid}/status`` per
+task every ``task_check_interval``. The watcher instead lists
+``/nodes/{node}/tasks`` once per node per interval for all pending UPIDs and
+resolves a future per waiter, so API calls scale with nodes, not tasks. UPIDs
+the listing does not return fall back to a direct status read.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+from collections.abc import Callable
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any
+
+from app.exceptions import ProxmoxError
+
+logger = logging.getLogger(__name__)
+
+# Listing size per node; UPIDs pushed out of the window are read directly.
+_MIN_LIST_LIMIT = 50
+
+TaskUpdateFn = Callable[[dict | None], None]
+
+
+@dataclass(eq=False)
+class _Watch:
+    node: str
+    upid: str
+    interval: float
+    log_tail_lines: int
+    on_update: TaskUpdateFn | None
+    future: Future[dict] = field(default_factory=Future)
+
+
+def upid_start_time(upid: str) -> int | None:
+    """Start epoch encoded in ``UPID:node:pid:pstart:starttime:type:id:user:``."""
+    parts = upid.split(":")
+    if len(parts) < 5 or parts[0] != "UPID":
+        return None
+    try:
+        return int(parts[4], 16)
+    except ValueError:
+        return None
+
+
+def _status_from_listing(entry: dict) -> dict:
+    """Shape a ``/nodes/{node}/tasks`` row like ``tasks/{upid}/status``."""
+    data = dict(entry)
+    if entry.get("endtime"):
+        data["status"] = "stopped"
+        data["exitstatus"] = entry.get("status")
+    else:
+        data["status"] = "running"
+        data.pop("exitstatus", None)
+    return data
+
+
+def _succeeded(exitstatus: Any) -> bool:
+    return exitstatus == "OK" or (
+        isinstance(exitstatus, str) and exitstatus.startswith("WARNINGS")
+    )
+
+
+class TaskWatcher:
+    def __init__(
+        self,
+        *,
+        api: Callable[[], Any],
+        log_tail: Callable[..., list[str]],
+    ) -> None:
+        self._api = api
+        self._log_tail = log_tail
+        self._lock = threading.Condition()
+        self._watches: list[_Watch] = []
+        # Set by watch(), cleared when the thread takes its snapshot of watches.
+        self._added = False
+        self._thread: threading.Thread | None = None
+        self.polls = 0
+
+    def watch(
+        self,
+        node: str,
+        upid: str,
+        *,
+        interval: float,
+        log_tail_lines: int = 8,
+        on_update: TaskUpdateFn | None = None,
+    ) -> Future[dict]:
+        """Track ``upid`` on ``node`` until it stops.
+
+        ``on_update`` runs on the watcher thread with every polled status and
+        finally with ``None``; it must only hand the value off.
+        """
+        item = _Watch(node, upid, max(float(interval), 0.0), log_tail_lines, on_update)
+        with self._lock:
+            self._watches.append(item)
+            self._added = True
+            # Wake the thread so a shorter interval applies now, not after the current wait.
+            self._lock.notify()
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run,
+                    name="proxmox-task-watcher",
+                    daemon=True,
+                )
+                self._thread.start()
+        return item.future
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._watches)
+
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                self._watches = [item for item in self._watches if not item.future.done()]
+                if not self._watches:
+                    self._thread = None
+                    return
+                watches = list(self._watches)
+                self._added = False
+                interval = min(item.interval for item in watches)
+
+            by_node: dict[str, list[_Watch]] = {}
+            for item in watches:
+                by_node.setdefault(item.node, []).append(item)
+            for node, node_watches in by_node.items():
+                self._poll_node(node, node_watches)
+
+            with self._lock:
+                # A watch added while polling is picked up right away instead of
+                # sleeping out an interval chosen before it existed.
+                if not self._added and any(not item.future.done() for item in self._watches):
+                    self._lock.wait(timeout=interval)
+
+    def _poll_node(self, node: str, watches: list[_Watch]) -> None:
+        try:
+            proxmox = self._api()
+        except Exception as exc:
+            for item in watches:
+                self._finish(item, exc=exc)
+            return
+
+        statuses = self._list_statuses(proxmox, node, watches)
+        for item in watches:
+            try:
+                data = statuses.get(item.upid)
+                if data is None:
+                    data = proxmox.nodes(node).tasks(item.upid).status.get()
+                self._publish(proxmox, item, data)
+            except Exception as exc:
+                self._finish(item, exc=exc)
+
+    def _list_statuses(self, proxmox: Any, node: str, watches: list[_Watch]) -> dict[str, dict]:
+        starts = [upid_start_time(item.upid) for item in watches]
+        if any(start is None for start in starts):
+            return {}
+        self.polls += 1
+        try:
+            rows = proxmox.nodes(node).tasks.get(
+                source="all",
+                since=min(starts) - 1,
+                limit=max(_MIN_LIST_LIMIT, 4 * len(watches)),
+            )
+        except Exception as exc:
+            logger.debug("Task listing failed on %s; reading statuses directly: %s", node, exc)
+            return {}
+        wanted = {item.upid for item in watches}
+        return {
+            row["upid"]: _status_from_listing(row)
+            for row in rows or []
+            if row.get("upid") in wanted
+        }
+
+    def _publish(self, proxmox: Any, item: _Watch, data: dict) -> None:
+        if item.future.done():
+            return
+        if item.on_update is not None:
+            item.on_update(data)
+        if data.get("status") != "stopped":
+            return
+
+        exitstatus = data.get("exitstatus")
+        if _succeeded(exitstatus):
+            if exitstatus != "OK":
+                logger.warning("Task %s completed with warnings: %s", item.upid, exitstatus)
+            else:
+                logger.info("Task %s completed successfully", item.upid)
+            self._finish(item, result=data)
+            return
+
+        error_msg = f"Task {item.upid} failed with exitstatus: {exitstatus}"
+        log_tail = self._log_tail(
+            proxmox,
+            node_name=item.node,
+            task_id=item.upid,
+            limit=item.log_tail_lines,
+        )
+        if log_tail:
+            error_msg = f"{error_msg}. Task log tail: {' | '.join(log_tail)}"
+        logger.error(error_msg)
+        self._finish(item, exc=ProxmoxError(error_msg))
+
+    @staticmethod
+    def _finish(
+        item: _Watch,
+        *,
+        result: dict | None = None,
+        exc: BaseException | None = None,
+    ) -> None:
+        if item.future.done():
+            return
+        if item.on_update is not None:
+            item.on_update(None)
+        if not item.future.set_running_or_notify_cancel():
+            return
+        if exc is not None:
+            item.future.set_exception(exc)
+        else:
+            item.future.set_result(result or {})
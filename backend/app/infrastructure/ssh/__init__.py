@@ -6,14 +6,22 @@ from .client import (
     exec_command,
     exec_command_streaming,
     generate_ed25519_keypair,
+    sftp_read_file,
+    sftp_write_file,
 )
+from .pool import SSHConnectionPool, get_ssh_pool, pooled_key_client
 
 __all__ = [
     "SSHAuthenticationError",
+    "SSHConnectionPool",
     "create_key_client",
     "create_password_client",
     "ensure_ssh_backend",
     "exec_command",
     "exec_command_streaming",
     "generate_ed25519_keypair",
+    "get_ssh_pool",
+    "pooled_key_client",
+    "sftp_read_file",
+    "sftp_write_file",
 ]
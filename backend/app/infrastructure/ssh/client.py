@@ -24,6 +24,7 @@ from cryptography.hazmat.primitives.serialization import (
     PrivateFormat,
 )
 
+from app.core.metrics import SSH_OPERATION_LATENCY
 from app.exceptions import ProxmoxError
 
 _PARAMIKO_AVAILABLE = not isinstance(paramiko, SimpleNamespace)
@@ -111,13 +112,49 @@ def exec_command(
     timeout: int | None = None,
     decode_errors: str = "replace",
 ) -> tuple[int, str, str]:
-    _, stdout_ch, stderr_ch = client.exec_command(command, timeout=timeout)
-    stdout_text = stdout_ch.read().decode(errors=decode_errors)
-    stderr_text = stderr_ch.read().decode(errors=decode_errors)
-    exit_code = stdout_ch.channel.recv_exit_status()
+    started = time.perf_counter()
+    try:
+        _, stdout_ch, stderr_ch = client.exec_command(command, timeout=timeout)
+        stdout_text = stdout_ch.read().decode(errors=decode_errors)
+        stderr_text = stderr_ch.read().decode(errors=decode_errors)
+        exit_code = stdout_ch.channel.recv_exit_status()
+    finally:
+        SSH_OPERATION_LATENCY.labels(operation="exec").observe(
+            time.perf_counter() - started
+        )
     return exit_code, stdout_text, stderr_text
 
 
+def sftp_read_file(client: Any, path: str) -> bytes | None:
+    """Read a remote file over SFTP; ``None`` when it does not exist."""
+    started = time.perf_counter()
+    sftp = client.open_sftp()
+    try:
+        try:
+            with sftp.open(path, "rb") as handle:
+                return handle.read()
+        except FileNotFoundError:
+            return None
+    finally:
+        sftp.close()
+        SSH_OPERATION_LATENCY.labels(operation="sftp_read").observe(
+            time.perf_counter() - started
+        )
+
+
+def sftp_write_file(client: Any, path: str, content: bytes) -> None:
+    started = time.perf_counter()
+    sftp = client.open_sftp()
+    try:
+        with sftp.open(path, "wb") as handle:
+            handle.write(content)
+    finally:
+        sftp.close()
+        SSH_OPERATION_LATENCY.labels(operation="sftp_write").observe(
+            time.perf_counter() - started
+        )
+
+
 def exec_command_streaming(
     client: Any,
     command: str,
@@ -0,0 +1,244 @@
+"""Keyed pool of authenticated SSH connections.
+
+Gateway config syncs used to pay a TCP connect, key exchange and public-key
+auth for every rule change. The pool keeps finished connections per
+``(host, port, user, key)`` and hands them out one caller at a time:
+
+- a connection idle for longer than ``healthcheck_after`` is probed by
+  opening and closing a session channel before it is reused;
+- connections whose transport died, or whose caller hit an SSH/socket
+  error, are closed instead of returned;
+- idle connections beyond ``max_idle_per_key`` or older than
+  ``idle_timeout`` are closed by a reaper thread that exits once the pool
+  is empty.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import socket
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any
+
+from app.core.config import settings
+from app.core.metrics import SSH_POOL_CHECKOUTS
+
+from .client import HostKeyPolicy, create_key_client, paramiko
+
+logger = logging.getLogger(__name__)
+
+PoolKey = tuple[str, int, str, str]
+
+
+@dataclass
+class _Idle:
+    client: Any
+    since: float
+
+
+def _connection_errors() -> tuple[type[BaseException], ...]:
+    errors: tuple[type[BaseException], ...] = (OSError, EOFError, socket.timeout)
+    ssh_exception = getattr(paramiko, "SSHException", None)
+    if isinstance(ssh_exception, type):
+        errors += (ssh_exception,)
+    return errors
+
+
+def _transport_active(client: Any) -> bool:
+    transport = client.get_transport()
+    return transport is not None and transport.is_active()
+
+
+def _close_quietly(client: Any) -> None:
+    try:
+        client.close()
+    except Exception:
+        logger.debug("Closing pooled SSH client failed", exc_info=True)
+
+
+class SSHConnectionPool:
+    def __init__(
+        self,
+        *,
+        connect: Callable[..., Any] = create_key_client,
+        max_idle_per_key: Callable[[], int] = lambda: settings.SSH_POOL_MAX_IDLE_PER_HOST,
+        idle_timeout: Callable[[], float] = lambda: settings.SSH_POOL_IDLE_TIMEOUT,
+        healthcheck_after: Callable[[], float] = lambda: settings.SSH_POOL_HEALTHCHECK_AFTER,
+        keepalive_interval: Callable[[], int] = lambda: settings.SSH_POOL_KEEPALIVE_INTERVAL,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._connect = connect
+        self._max_idle_per_key = max_idle_per_key
+        self._idle_timeout = idle_timeout
+        self._healthcheck_after = healthcheck_after
+        self._keepalive_interval = keepalive_interval
+        self._clock = clock
+        self._lock = threading.Condition()
+        self._idle: dict[PoolKey, list[_Idle]] = {}
+        self._reaper: threading.Thread | None = None
+
+    @staticmethod
+    def key_for(host: str, port: int, username: str, private_key_pem: str) -> PoolKey:
+        fingerprint = hashlib.sha256(private_key_pem.encode()).hexdigest()
+        return (host, int(port), username, fingerprint)
+
+    @contextmanager
+    def connection(
+        self,
+        host: str,
+        port: int,
+        username: str,
+        private_key_pem: str,
+        *,
+        timeout: int = 10,
+        host_key_policy: HostKeyPolicy = "auto_add",
+    ) -> Iterator[Any]:
+        """Borrow a connected ``paramiko.SSHClient`` for the ``with`` block."""
+        key = self.key_for(host, port, username, private_key_pem)
+        client = self._checkout(key)
+        if client is None:
+            client = self._connect(
+                host,
+                port,
+                username,
+                private_key_pem,
+                timeout=timeout,
+                host_key_policy=host_key_policy,
+            )
+            transport = client.get_transport()
+            if transport is not None:
+                transport.set_keepalive(self._keepalive_interval())
+            SSH_POOL_CHECKOUTS.labels(result="created").inc()
+
+        reusable = True
+        try:
+            yield client
+        except _connection_errors():
+            reusable = False
+            raise
+        finally:
+            self._checkin(key, client, reusable=reusable)
+
+    def _checkout(self, key: PoolKey) -> Any | None:
+        while True:
+            with self._lock:
+                idle = self._idle.get(key)
+                if not idle:
+                    return None
+                entry = idle.pop()
+            if self._healthy(entry):
+                SSH_POOL_CHECKOUTS.labels(result="reused").inc()
+                return entry.client
+            SSH_POOL_CHECKOUTS.labels(result="stale").inc()
+            _close_quietly(entry.client)
+
+    def _healthy(self, entry: _Idle) -> bool:
+        if not _transport_active(entry.client):
+            return False
+        if self._clock() - entry.since < self._healthcheck_after():
+            return True
+        try:
+            entry.client.get_transport().open_session(timeout=5).close()
+        except Exception:
+            return False
+        return True
+
+    def _checkin(self, key: PoolKey, client: Any, *, reusable: bool) -> None:
+        if not reusable or not _transport_active(client):
+            _close_quietly(client)
+            return
+        evicted: list[Any] = []
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            idle.append(_Idle(client, self._clock()))
+            overflow = len(idle) - max(0, self._max_idle_per_key())
+            if overflow > 0:
+                evicted = [entry.client for entry in idle[:overflow]]
+                del idle[:overflow]
+            self._ensure_reaper()
+        for stale in evicted:
+            _close_quietly(stale)
+
+    # ── Idle eviction ─────────────────────────────────────────────────────
+
+    def evict_idle(self) -> int:
+        """Close connections idle for longer than ``idle_timeout``."""
+        cutoff = self._clock() - self._idle_timeout()
+        expired: list[Any] = []
+        with self._lock:
+            for key in list(self._idle):
+                keep = [entry for entry in self._idle[key] if entry.since > cutoff]
+                expired.extend(entry.client for entry in self._idle[key] if entry.since <= cutoff)
+                if keep:
+                    self._idle[key] = keep
+                else:
+                    del self._idle[key]
+        for client in expired:
+            _close_quietly(client)
+        return len(expired)
+
+    def idle_count(self, key: PoolKey | None = None) -> int:
+        with self._lock:
+            if key is not None:
+                return len(self._idle.get(key, []))
+            return sum(len(entries) for entries in self._idle.values())
+
+    def close_all(self) -> None:
+        with self._lock:
+            clients = [entry.client for entries in self._idle.values() for entry in entries]
+            self._idle.clear()
+            self._lock.notify_all()
+        for client in clients:
+            _close_quietly(client)
+
+    def _ensure_reaper(self) -> None:
+        # Caller holds self._lock.
+        if self._reaper is not None:
+            return
+        self._reaper = threading.Thread(
+            target=self._reap_forever,
+            name="ssh-pool-reaper",
+            daemon=True,
+        )
+        self._reaper.start()
+
+    def _reap_forever(self) -> None:
+        while True:
+            with self._lock:
+                if not self._idle:
+                    self._reaper = None
+                    return
+                self._lock.wait(timeout=max(1.0, self._idle_timeout() / 4))
+            self.evict_idle()
+
+
+_gateway_pool = SSHConnectionPool()
+
+
+def get_ssh_pool() -> SSHConnectionPool:
+    return _gateway_pool
+
+
+def pooled_key_client(
+    host: str,
+    port: int,
+    username: str,
+    private_key_pem: str,
+    *,
+    timeout: int = 10,
+    host_key_policy: HostKeyPolicy = "auto_add",
+):
+    """``with pooled_key_client(...) as client:`` — shared-pool shortcut."""
+    return _gateway_pool.connection(
+        host,
+        port,
+        username,
+        private_key_pem,
+        timeout=timeout,
+        host_key_policy=host_key_policy,
+    )
@@ -6,7 +6,7 @@ from typing import Any
 
 from app.core.config import settings
 from app.exceptions import BadRequestError, ProxmoxError
-from app.infrastructure.ssh import create_key_client, exec_command
+from app.infrastructure.ssh import exec_command, pooled_key_client
 
 
 def _normalize_path(path: str) -> str:
@@ -55,7 +55,7 @@ class TraefikGatewayClient:
 
         private_key_pem = get_decrypted_private_key(config)  # type: ignore[arg-type]
         self._base_url = settings.TRAEFIK_API_BASE_URL.rstrip("/")
-        self._client = create_key_client(
+        self._lease = pooled_key_client(
             config.host,
             config.ssh_port,
             config.ssh_user,
@@ -63,15 +63,17 @@ class TraefikGatewayClient:
             timeout=10,
             host_key_policy="auto_add",
         )
+        self._client = self._lease.__enter__()
 
     def close(self) -> None:
-        self._client.close()
+        self._lease.__exit__(None, None, None)
 
     def __enter__(self) -> TraefikGatewayClient:
         return self
 
     def __exit__(self, exc_type, exc, tb) -> None:
-        self.close()
+        # 連線層錯誤時讓 pool 丟棄這條連線
+        self._lease.__exit__(exc_type, exc, tb)
 
     def fetch_json(self, path: str) -> Any:
         url = f"{self._base_url}{_normalize_path(path)}"
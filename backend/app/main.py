@@ -13,12 +13,19 @@ from app.api.websocket import vnc_proxy
 from app.api.websocket.jobs import jobs_ws_proxy
 from app.api.websocket.terminal import terminal_proxy
 from app.core.config import settings
+from app.core.db import engine
 from app.core.logging import configure_logging
 from app.core.metrics import PrometheusMiddleware, metrics_endpoint
 from app.core.request_context import RequestContextMiddleware
 from app.exceptions import AppError
+from app.infrastructure.proxmox import close_async_proxmox_api, node_health_monitor
 from app.infrastructure.redis import close_redis, init_redis
+from app.infrastructure.ssh import get_ssh_pool
 from app.infrastructure.worker import init_background_runner, shutdown_background_runner
+from app.services.jobs import job_feed
+from app.services.llm_gateway.usage_buffer import usage_buffer
+from app.services.network import firewall_sync_service
+from app.services.network.gateway_sync import gateway_sync
 from app.services.scheduling import vm_request_schedule_service
 
 _SECURITY_HEADERS: list[tuple[str, str]] = [
@@ -90,6 +97,12 @@ async def lifespan(app: FastAPI):
     )
     await init_redis()
     init_background_runner()
+    node_health_monitor.start()
+    job_feed.start(
+        engine.url.set(drivername="postgresql").render_as_string(hide_password=False)
+    )
+    # 重啟前仍在執行的防火牆同步工作不會再有人接手
+    await asyncio.to_thread(firewall_sync_service.recover_interrupted_jobs)
     stop_event = asyncio.Event()
     scheduler_task: asyncio.Task[None] | None = None
     if settings.SCHEDULER_ENABLED:
@@ -107,6 +120,14 @@ async def lifespan(app: FastAPI):
             except asyncio.CancelledError:
                 pass
         await shutdown_background_runner()
+        await job_feed.stop()
+        # 送出仍在 debounce 中的 gateway 規則變更
+        await asyncio.to_thread(gateway_sync.flush_all, timeout=10.0)
+        # 寫完仍在緩衝中的 AI 使用量紀錄
+        await asyncio.to_thread(usage_buffer.close, timeout=10.0)
+        node_health_monitor.stop(timeout=5.0)
+        get_ssh_pool().close_all()
+        await close_async_proxmox_api()
         await close_redis()
 
 
@@ -23,7 +23,9 @@ from .batch_provision import (
 from .cloudflare_config import CloudflareConfig
 from .deletion_request import DeletionRequest, DeletionRequestStatus
 from .firewall_layout import FirewallLayout
+from .firewall_sync_job import FirewallSyncJob, FirewallSyncJobStatus
 from .gateway_config import GatewayConfig
+from .gpu_usage import GPUUsageEntry, GPUUsageIndexState
 from .group import Group
 from .group_member import GroupMember
 from .ip_allocation import IpAllocation
@@ -86,10 +88,15 @@ __all__ = [
     "ProxmoxStorage",
     # Firewall Layout
     "FirewallLayout",
+    "FirewallSyncJob",
+    "FirewallSyncJobStatus",
     # NAT Rules
     "NatRule",
     # Gateway Config
     "GatewayConfig",
+    # GPU Usage Index
+    "GPUUsageEntry",
+    "GPUUsageIndexState",
     # Cloudflare Config
     "CloudflareConfig",
     # Reverse Proxy Rules
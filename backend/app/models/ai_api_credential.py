@@ -21,6 +21,10 @@ class AIAPICredential(SQLModel, table=True):
     base_url: str = Field(max_length=2048)
     api_key_encrypted: str = Field(max_length=4096)
     api_key_prefix: str = Field(max_length=32)
+    # HMAC-SHA256(key)，驗證時以單一索引等值查詢取代逐筆解密比對
+    api_key_digest: str | None = Field(
+        default=None, max_length=64, unique=True, index=True
+    )
     api_key_name: str = Field(default="test", min_length=1, max_length=20)
     rate_limit: int | None = Field(
         default=None, description="每分鐘請求限制（1-1000），None 使用預設值 20"
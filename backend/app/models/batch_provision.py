@@ -63,10 +63,16 @@ class BatchProvisionJob(SQLModel, table=True):
     created_at: datetime = Field(
         sa_column=Column(DateTime(timezone=True), nullable=False, index=True)
     )
+    started_at: datetime | None = Field(
+        default=None,
+        sa_column=Column(DateTime(timezone=True), nullable=True),
+    )
     finished_at: datetime | None = Field(
         default=None,
         sa_column=Column(DateTime(timezone=True), nullable=True),
     )
+    # 完成的資源數 / 執行分鐘數，用於調整並行上限
+    throughput_per_minute: float | None = Field(default=None)
 
     reviewer_id: uuid.UUID | None = Field(
         default=None,
@@ -120,6 +126,7 @@ class BatchProvisionTask(SQLModel, table=True):
         default=None,
         sa_column=Column(sa.String(500), nullable=True),
     )
+    attempts: int = Field(default=0, description="已嘗試建立的次數（含重試）")
     started_at: datetime | None = Field(
         default=None,
         sa_column=Column(DateTime(timezone=True), nullable=True),
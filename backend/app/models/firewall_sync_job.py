@@ -0,0 +1,76 @@
+"""防火牆封鎖網段同步工作模型
+
+管理員修改額外封鎖網段後，背景工作會把規則套用到 pool 內每台 VM/LXC；
+此表記錄進度（透過 Jobs API 呈現）與各節點的處理量統計。
+部分唯一索引保證所有 worker 行程合計同一時間只有一個 ``running`` 工作。
+"""
+
+import enum
+import uuid
+from datetime import datetime
+
+import sqlalchemy as sa
+from sqlmodel import Column, DateTime, Enum, Field, SQLModel
+
+
+class FirewallSyncJobStatus(str, enum.Enum):
+    pending = "pending"
+    running = "running"
+    completed = "completed"
+    failed = "failed"
+
+
+class FirewallSyncJob(SQLModel, table=True):
+    __tablename__ = "firewall_sync_jobs"
+    __table_args__ = (
+        sa.Index(
+            "uq_firewall_sync_jobs_running",
+            "status",
+            unique=True,
+            postgresql_where=sa.text("status = 'running'"),
+        ),
+    )
+
+    id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
+    initiated_by: uuid.UUID | None = Field(
+        default=None,
+        sa_column=Column(
+            sa.ForeignKey("user.id", ondelete="SET NULL"),
+            nullable=True,
+            index=True,
+        ),
+    )
+    status: FirewallSyncJobStatus = Field(
+        default=FirewallSyncJobStatus.pending,
+        sa_column=Column(
+            Enum(FirewallSyncJobStatus),
+            nullable=False,
+            default=FirewallSyncJobStatus.pending,
+        ),
+    )
+    # JSON-encoded 目標封鎖網段清單
+    targets: str = Field(sa_column=Column(sa.Text, nullable=False))
+    total: int = Field(default=0)
+    done: int = Field(default=0)  # 已處理（含略過與失敗）
+    skipped: int = Field(default=0)  # fingerprint 相同而略過
+    failed_count: int = Field(default=0)
+    # JSON-encoded 完成摘要（各節點處理量、錯誤清單）
+    summary: str | None = Field(default=None, sa_column=Column(sa.Text, nullable=True))
+    error: str | None = Field(default=None, max_length=2000)
+    created_at: datetime = Field(
+        sa_column=Column(DateTime(timezone=True), nullable=False, index=True)
+    )
+    started_at: datetime | None = Field(
+        default=None,
+        sa_column=Column(DateTime(timezone=True), nullable=True),
+    )
+    finished_at: datetime | None = Field(
+        default=None,
+        sa_column=Column(DateTime(timezone=True), nullable=True),
+    )
+    updated_at: datetime = Field(
+        sa_column=Column(DateTime(timezone=True), nullable=False, index=True)
+    )
+
+
+__all__ = ["FirewallSyncJob", "FirewallSyncJobStatus"]
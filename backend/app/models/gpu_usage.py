@@ -0,0 +1,46 @@
+"""GPU 使用索引模型 — 記錄每台 QEMU VM 的 hostpci mapping 使用情況"""
+
+from datetime import datetime
+
+import sqlalchemy as sa
+from sqlalchemy import DateTime
+from sqlmodel import Field, SQLModel
+
+from .base import get_datetime_utc
+
+
+class GPUUsageEntry(SQLModel, table=True):
+    """單台 VM 的 PCI mapping 使用（由 gpu_usage_index 維護）
+
+    ``mappings`` 為 ``[[mapping_id, mdev_type], ...]``；digest 為 PVE config
+    digest，背景 reconcile 時 digest 未變就不重新解析。
+    """
+
+    __tablename__ = "gpu_usage_entry"
+
+    vmid: int = Field(primary_key=True)
+    node: str = Field(max_length=64)
+    digest: str | None = Field(default=None, max_length=64)
+    mappings: list = Field(default_factory=list, sa_type=sa.JSON())
+    updated_at: datetime = Field(
+        default_factory=get_datetime_utc,
+        sa_type=DateTime(timezone=True),
+    )
+
+
+class GPUUsageIndexState(SQLModel, table=True):
+    """索引狀態（單列 singleton，id 固定為 1）
+
+    reconcile 期間鎖住此列，所有 worker 共用同一次掃描。
+    """
+
+    __tablename__ = "gpu_usage_index_state"
+
+    id: int = Field(default=1, primary_key=True)
+    reconciled_at: datetime | None = Field(
+        default=None,
+        sa_type=DateTime(timezone=True),
+    )
+
+
+__all__ = ["GPUUsageEntry", "GPUUsageIndexState"]
@@ -27,6 +27,11 @@ class Resource(SQLModel, table=True):
         default=None,
         description="IP 位址最後快取時間",
     )
+    block_rules_fingerprint: str | None = Field(
+        default=None,
+        max_length=64,
+        description="最後成功套用的額外封鎖網段 fingerprint（相同時同步可略過）",
+    )
     expiry_date: date | None = Field(default=None, description="到期日，None表示無期限")
     template_id: int | None = Field(
         default=None, description="使用的模板ID（如果是從模板創建）"
@@ -25,6 +25,11 @@ class SubnetConfig(SQLModel, table=True):
     gateway_vm_ip: str = Field(max_length=50)
     dns_servers: str | None = Field(default=None, max_length=255)
     extra_blocked_subnets: str | None = Field(default=None, sa_type=sa.Text())
+    # 第 i 個 bit 代表 network_address + i 是否已被佔用（含 network/broadcast）；
+    # NULL 表示尚未建立，下次分配時由 ip_allocation 重建
+    allocation_bitmap: bytes | None = Field(default=None, sa_type=sa.LargeBinary())
+    # 第一個可能有空位的 byte 位置，分配時從這裡開始找
+    allocation_hint: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
     updated_at: datetime = Field(
         default_factory=get_datetime_utc,
         sa_type=DateTime(timezone=True),
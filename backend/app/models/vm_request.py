@@ -33,6 +33,16 @@ class VMMigrationStatus(str, enum.Enum):
 
 class VMRequest(SQLModel, table=True):
     __tablename__ = "vm_requests"
+    __table_args__ = (
+        # Due-queue for process_recurrence_windows: only live recurring rows.
+        sa.Index(
+            "ix_vm_requests_recurrence_due",
+            "next_window_end",
+            postgresql_where=sa.text(
+                "recurrence_rule IS NOT NULL AND recurrence_exhausted_at IS NULL"
+            ),
+        ),
+    )
 
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     user_id: uuid.UUID = Field(foreign_key="user.id")
@@ -123,6 +133,12 @@ class VMRequest(SQLModel, table=True):
         default=None,
         sa_column=Column(DateTime(timezone=True), nullable=True),
     )
+    # Set when the rule has no further occurrence (UNTIL/COUNT reached or
+    # unparsable); the window maintenance tick stops looking at the row.
+    recurrence_exhausted_at: datetime | None = Field(
+        default=None,
+        sa_column=Column(DateTime(timezone=True), nullable=True),
+    )
     batch_job_id: uuid.UUID | None = Field(
         default=None,
         sa_column=Column(
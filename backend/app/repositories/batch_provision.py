@@ -3,6 +3,7 @@
 import uuid
 from datetime import UTC, datetime
 
+import sqlalchemy as sa
 from sqlmodel import Session, select
 
 from app.models.batch_provision import (
@@ -75,8 +76,6 @@ def transition_pending_review(
     on success, or ``None`` if the job doesn't exist or is no longer pending
     (i.e. another reviewer already won the race).
     """
-    import sqlalchemy as sa
-
     now = datetime.now(UTC)
     result = session.exec(
         sa.update(BatchProvisionJob)
@@ -165,7 +164,21 @@ def update_task_running(*, session: Session, task_id: uuid.UUID) -> None:
     task = session.get(BatchProvisionTask, task_id)
     if task:
         task.status = BatchProvisionTaskStatus.running
-        task.started_at = datetime.now(UTC)
+        task.attempts += 1
+        if task.started_at is None:
+            task.started_at = datetime.now(UTC)
+        session.add(task)
+        session.commit()
+
+
+def update_task_retrying(
+    *, session: Session, task_id: uuid.UUID, error: str
+) -> None:
+    """Put a failed attempt back to ``pending`` while it waits for its retry."""
+    task = session.get(BatchProvisionTask, task_id)
+    if task:
+        task.status = BatchProvisionTaskStatus.pending
+        task.error = error[:500]
         session.add(task)
         session.commit()
 
@@ -177,6 +190,7 @@ def update_task_done(
     if task:
         task.status = BatchProvisionTaskStatus.completed
         task.vmid = vmid
+        task.error = None
         task.finished_at = datetime.now(UTC)
         session.add(task)
         session.commit()
@@ -195,19 +209,22 @@ def update_task_failed(
 
 
 def increment_job_done(*, session: Session, job_id: uuid.UUID) -> None:
-    job = session.get(BatchProvisionJob, job_id)
-    if job:
-        job.done += 1
-        session.add(job)
-        session.commit()
+    # Single UPDATE so concurrent workers never lose an increment.
+    session.exec(
+        sa.update(BatchProvisionJob)
+        .where(BatchProvisionJob.id == job_id)
+        .values(done=BatchProvisionJob.done + 1)
+    )
+    session.commit()
 
 
 def increment_job_failed(*, session: Session, job_id: uuid.UUID) -> None:
-    job = session.get(BatchProvisionJob, job_id)
-    if job:
-        job.failed_count += 1
-        session.add(job)
-        session.commit()
+    session.exec(
+        sa.update(BatchProvisionJob)
+        .where(BatchProvisionJob.id == job_id)
+        .values(failed_count=BatchProvisionJob.failed_count + 1)
+    )
+    session.commit()
 
 
 def update_job_status(
@@ -218,9 +235,15 @@ def update_job_status(
 ) -> None:
     job = session.get(BatchProvisionJob, job_id)
     if job:
+        now = datetime.now(UTC)
         job.status = status
+        if status == BatchProvisionJobStatus.running and job.started_at is None:
+            job.started_at = now
         if status in (BatchProvisionJobStatus.completed, BatchProvisionJobStatus.failed):
-            job.finished_at = datetime.now(UTC)
+            job.finished_at = now
+            if job.started_at is not None:
+                minutes = max((now - job.started_at).total_seconds() / 60, 1 / 60)
+                job.throughput_per_minute = round(job.done / minutes, 3)
         session.add(job)
         session.commit()
 
@@ -0,0 +1,137 @@
+"""防火牆封鎖網段同步工作 repository"""
+
+import json
+import uuid
+from datetime import UTC, datetime, timedelta
+
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, col, or_, select
+
+from app.models.firewall_sync_job import FirewallSyncJob, FirewallSyncJobStatus
+
+
+def create_job(
+    *,
+    session: Session,
+    initiated_by: uuid.UUID | None,
+    targets: list[str],
+) -> FirewallSyncJob:
+    now = datetime.now(UTC)
+    job = FirewallSyncJob(
+        initiated_by=initiated_by,
+        status=FirewallSyncJobStatus.pending,
+        targets=json.dumps(targets),
+        created_at=now,
+        updated_at=now,
+    )
+    session.add(job)
+    session.commit()
+    session.refresh(job)
+    return job
+
+
+def get_job(*, session: Session, job_id: uuid.UUID) -> FirewallSyncJob | None:
+    return session.get(FirewallSyncJob, job_id)
+
+
+def lease_job(*, session: Session, job_id: uuid.UUID) -> FirewallSyncJob | None:
+    """以 FOR KEY SHARE 鎖住工作列並保持交易開啟。
+
+    鎖隨連線存在：執行中的 worker 行程結束時自動釋放，
+    :func:`fail_orphaned_jobs` 因此能分辨仍在執行與已中斷的工作。
+    進度更新不改主鍵，與此鎖不衝突。
+    """
+    return session.exec(
+        select(FirewallSyncJob)
+        .where(FirewallSyncJob.id == job_id)
+        .with_for_update(read=True, key_share=True)
+    ).first()
+
+
+def claim_job(*, session: Session, job: FirewallSyncJob) -> bool:
+    """把工作標為 running；已有其他 running 工作（唯一索引衝突）時回傳 False。"""
+    now = datetime.now(UTC)
+    job.status = FirewallSyncJobStatus.running
+    job.started_at = now
+    job.updated_at = now
+    session.add(job)
+    try:
+        session.commit()
+    except IntegrityError:
+        session.rollback()
+        return False
+    return True
+
+
+def fail_orphaned_jobs(
+    *,
+    session: Session,
+    error: str,
+    pending_grace: timedelta = timedelta(minutes=1),
+) -> int:
+    """把沒有任何行程持有租約的 running / pending 工作標為 failed。
+
+    剛建立、尚未被背景執行緒租用的 pending 工作在 ``pending_grace`` 內不處理。
+    """
+    now = datetime.now(UTC)
+    jobs = session.exec(
+        select(FirewallSyncJob)
+        .where(
+            or_(
+                col(FirewallSyncJob.status) == FirewallSyncJobStatus.running,
+                (col(FirewallSyncJob.status) == FirewallSyncJobStatus.pending)
+                & (col(FirewallSyncJob.created_at) < now - pending_grace),
+            )
+        )
+        .with_for_update(skip_locked=True)
+    ).all()
+    for job in jobs:
+        job.status = FirewallSyncJobStatus.failed
+        job.error = error
+        job.finished_at = now
+        job.updated_at = now
+        session.add(job)
+    session.commit()
+    return len(jobs)
+
+
+def set_total(*, session: Session, job: FirewallSyncJob, total: int) -> None:
+    job.total = total
+    job.updated_at = datetime.now(UTC)
+    session.add(job)
+    session.commit()
+
+
+def record_progress(
+    *,
+    session: Session,
+    job: FirewallSyncJob,
+    done: int,
+    skipped: int,
+    failed_count: int,
+) -> None:
+    """只由協調執行緒呼叫，因此直接覆寫計數（不需 atomic increment）"""
+    job.done = done
+    job.skipped = skipped
+    job.failed_count = failed_count
+    job.updated_at = datetime.now(UTC)
+    session.add(job)
+    session.commit()
+
+
+def finish_job(
+    *,
+    session: Session,
+    job: FirewallSyncJob,
+    status: FirewallSyncJobStatus,
+    summary: dict | None = None,
+    error: str | None = None,
+) -> None:
+    now = datetime.now(UTC)
+    job.status = status
+    job.summary = json.dumps(summary, ensure_ascii=False) if summary is not None else None
+    job.error = error[:2000] if error else None
+    job.finished_at = now
+    job.updated_at = now
+    session.add(job)
+    session.commit()
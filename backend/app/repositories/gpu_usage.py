@@ -0,0 +1,110 @@
+"""GPU 使用索引資料庫操作
+
+寫入都用 upsert，並以 ``updated_at`` 判斷新舊：reconcile 只覆蓋在它開始
+之前寫入的列，不會蓋掉掃描期間由 clone / 規格變更寫入的新結果。
+"""
+
+from datetime import datetime
+
+from sqlalchemy import delete
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlmodel import Session, select
+
+from app.models.base import get_datetime_utc
+from app.models.gpu_usage import GPUUsageEntry, GPUUsageIndexState
+
+_SINGLETON_ID = 1
+
+
+def list_entries(session: Session) -> list[GPUUsageEntry]:
+    return list(session.exec(select(GPUUsageEntry)).all())
+
+
+def upsert_entry(
+    session: Session,
+    *,
+    vmid: int,
+    node: str,
+    digest: str | None,
+    mappings: list[list[str]],
+    older_than: datetime | None = None,
+) -> None:
+    """寫入一台 VM 的使用情況；``older_than`` 時只覆蓋比它舊的列。不 commit。"""
+    now = get_datetime_utc()
+    stmt = pg_insert(GPUUsageEntry).values(
+        vmid=vmid, node=node, digest=digest, mappings=mappings, updated_at=now
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["vmid"],
+        set_={
+            "node": stmt.excluded.node,
+            "digest": stmt.excluded.digest,
+            "mappings": stmt.excluded.mappings,
+            "updated_at": stmt.excluded.updated_at,
+        },
+        where=GPUUsageEntry.updated_at <= older_than if older_than is not None else None,
+    )
+    session.exec(stmt)  # type: ignore[call-overload]
+
+
+def set_entry_node(session: Session, *, vmid: int, node: str, older_than: datetime) -> None:
+    """VM 遷移後只更新所在節點。不 commit。"""
+    entry = session.get(GPUUsageEntry, vmid)
+    if entry is not None and entry.updated_at <= older_than:
+        entry.node = node
+        session.add(entry)
+
+
+def clear_digest(session: Session, vmid: int) -> None:
+    """讓下一次 reconcile 一定重新解析這台 VM。不 commit。"""
+    entry = session.get(GPUUsageEntry, vmid)
+    if entry is not None:
+        entry.digest = None
+        session.add(entry)
+
+
+def delete_entry(session: Session, vmid: int) -> None:
+    session.exec(delete(GPUUsageEntry).where(GPUUsageEntry.vmid == vmid))  # type: ignore[call-overload]
+
+
+def delete_missing_entries(
+    session: Session, *, live_vmids: set[int], older_than: datetime
+) -> int:
+    """刪除已不在叢集上的 VM；掃描期間才寫入的列保留。不 commit。"""
+    result = session.exec(  # type: ignore[call-overload]
+        delete(GPUUsageEntry).where(
+            GPUUsageEntry.vmid.notin_(live_vmids),  # type: ignore[attr-defined]
+            GPUUsageEntry.updated_at <= older_than,
+        )
+    )
+    return int(result.rowcount or 0)
+
+
+def get_state(session: Session) -> GPUUsageIndexState | None:
+    return session.get(GPUUsageIndexState, _SINGLETON_ID)
+
+
+def lock_state(session: Session, *, skip_locked: bool = False) -> GPUUsageIndexState | None:
+    """鎖住索引狀態列；``skip_locked`` 時若已被其他 worker 鎖住則回傳 None。"""
+    session.exec(  # type: ignore[call-overload]
+        pg_insert(GPUUsageIndexState)
+        .values(id=_SINGLETON_ID)
+        .on_conflict_do_nothing(index_elements=["id"])
+    )
+    return session.exec(
+        select(GPUUsageIndexState)
+        .where(GPUUsageIndexState.id == _SINGLETON_ID)
+        .with_for_update(skip_locked=skip_locked)
+    ).first()
+
+
+__all__ = [
+    "clear_digest",
+    "delete_entry",
+    "delete_missing_entries",
+    "get_state",
+    "list_entries",
+    "lock_state",
+    "set_entry_node",
+    "upsert_entry",
+]
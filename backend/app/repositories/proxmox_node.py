@@ -2,6 +2,7 @@
 
 from datetime import datetime, timezone
 
+from sqlalchemy import update
 from sqlmodel import Session, select
 
 from app.models.proxmox_node import ProxmoxNode
@@ -99,9 +100,25 @@ def update_node_status(session: Session, node_id: int, is_online: bool) -> None:
         session.commit()
 
 
+def update_node_statuses(session: Session, statuses: dict[int, bool]) -> None:
+    """以一次 executemany UPDATE 寫回多個節點的連線狀態。"""
+    if not statuses:
+        return
+    now = datetime.now(timezone.utc)
+    session.execute(
+        update(ProxmoxNode),
+        [
+            {"id": node_id, "is_online": is_online, "last_checked": now}
+            for node_id, is_online in statuses.items()
+        ],
+    )
+    session.commit()
+
+
 __all__ = [
     "get_all_nodes",
     "upsert_nodes",
     "update_node",
     "update_node_status",
+    "update_node_statuses",
 ]
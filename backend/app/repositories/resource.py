@@ -1,7 +1,9 @@
 import uuid
+from collections.abc import Iterable
 from datetime import date, datetime, timezone
 from typing import Any
 
+from sqlalchemy import update
 from sqlmodel import Session, select
 
 from app.models import Resource
@@ -46,6 +48,17 @@ def get_resource_by_vmid(*, session: Session, vmid: int) -> Resource | None:
     return session.exec(select(Resource).where(Resource.vmid == vmid)).first()
 
 
+def get_resources_by_vmids(
+    *, session: Session, vmids: Iterable[int]
+) -> dict[int, Resource]:
+    """以單一 IN 查詢取回多筆資源，回傳 vmid -> Resource"""
+    wanted = set(vmids)
+    if not wanted:
+        return {}
+    rows = session.exec(select(Resource).where(Resource.vmid.in_(wanted))).all()  # type: ignore[attr-defined]
+    return {row.vmid: row for row in rows}
+
+
 def get_all_resources(*, session: Session) -> list[Resource]:
     return list(session.exec(select(Resource)).all())
 
@@ -79,6 +92,50 @@ def update_ip_address(*, session: Session, vmid: int, ip_address: str) -> None:
         session.flush()
 
 
+def bulk_update_ip_addresses(
+    *, session: Session, ip_addresses: dict[int, str], cached_at: datetime
+) -> None:
+    """以一次 executemany UPDATE 寫回多筆 VM 的快取 IP 位址（不 commit）"""
+    if not ip_addresses:
+        return
+    session.execute(
+        update(Resource),
+        [
+            {"vmid": vmid, "ip_address": ip, "ip_address_cached_at": cached_at}
+            for vmid, ip in ip_addresses.items()
+        ],
+    )
+
+
+def get_block_rules_fingerprints(
+    *, session: Session, vmids: Iterable[int]
+) -> dict[int, str | None]:
+    """回傳 vmid -> 最後套用的封鎖規則 fingerprint（只含 DB 有紀錄的 VM）"""
+    wanted = set(vmids)
+    if not wanted:
+        return {}
+    rows = session.exec(
+        select(Resource.vmid, Resource.block_rules_fingerprint).where(
+            Resource.vmid.in_(wanted)  # type: ignore[attr-defined]
+        )
+    ).all()
+    return dict(rows)
+
+
+def set_block_rules_fingerprint(
+    *, session: Session, vmids: Iterable[int], fingerprint: str
+) -> None:
+    """以單一 UPDATE 記錄多筆 VM 已套用的封鎖規則 fingerprint（不 commit）"""
+    wanted = set(vmids)
+    if not wanted:
+        return
+    session.exec(
+        update(Resource)
+        .where(Resource.vmid.in_(wanted))  # type: ignore[attr-defined]
+        .values(block_rules_fingerprint=fingerprint)
+    )
+
+
 def is_ip_address_fresh(*, session: Session, vmid: int, ttl_seconds: int = 3600) -> bool:
     """檢查快取的 IP 位址是否仍在有效期內"""
     from datetime import datetime, timezone
@@ -364,3 +364,43 @@ def list_due_for_rebalance_vm_requests(
         .with_for_update()
     )
     return list(session.exec(statement).all())
+
+
+def list_due_recurrence_windows(
+    *,
+    session: Session,
+    now: datetime,
+) -> list[tuple[uuid.UUID, str, int | None, str | None]]:
+    """Recurring requests whose window must be (re)computed.
+
+    Uses the ``ix_vm_requests_recurrence_due`` partial index, so the cost
+    follows the number of windows rolling over, not of recurring requests.
+    Returns ``(id, recurrence_rule, recurrence_duration_minutes,
+    schedule_timezone)`` tuples.
+    """
+    statement = select(
+        VMRequest.id,
+        VMRequest.recurrence_rule,
+        VMRequest.recurrence_duration_minutes,
+        VMRequest.schedule_timezone,
+    ).where(
+        VMRequest.recurrence_rule.is_not(None),  # type: ignore[union-attr]
+        VMRequest.recurrence_exhausted_at.is_(None),  # type: ignore[union-attr]
+        sa.or_(
+            VMRequest.next_window_end.is_(None),  # type: ignore[union-attr]
+            VMRequest.next_window_end <= now,
+        ),
+    )
+    return list(session.exec(statement).all())
+
+
+def update_recurrence_windows(
+    *,
+    session: Session,
+    windows: list[dict],
+) -> None:
+    """Bulk UPDATE by primary key; each dict holds ``id`` and the new
+    ``next_window_start`` / ``next_window_end`` / ``recurrence_exhausted_at``.
+    Caller commits."""
+    if windows:
+        session.execute(sa.update(VMRequest), windows)
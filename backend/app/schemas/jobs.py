@@ -5,6 +5,8 @@
 - script_deploy:  服務模板部署 (script_deploy_logs)
 - vm_request:     VM/LXC 開機申請 (vm_requests)
 - spec_change:    規格變更申請 (spec_change_requests)
+- deletion:       VM/LXC 刪除 (deletion_requests)
+- firewall_sync:  額外封鎖網段全機隊同步 (firewall_sync_jobs)
 
 所有來源被正規化到統一的 JobItem 結構，以便前端 Job 中心一致顯示。
 """
@@ -25,6 +27,7 @@ class JobKind(str, enum.Enum):
     vm_request = "vm_request"
     spec_change = "spec_change"
     deletion = "deletion"
+    firewall_sync = "firewall_sync"
 
 
 class JobStatus(str, enum.Enum):
@@ -71,6 +74,10 @@ class JobsListResponse(BaseModel):
     items: list[JobItem]
     total: int
     active_count: int
+    next_cursor: str | None = Field(
+        default=None,
+        description="下一頁的 keyset cursor；已是最後一頁時為 null",
+    )
 
 
 class JobDetail(BaseModel):
@@ -3,18 +3,30 @@
 聚合多個來源的「需要等待的任務」，正規化為單一介面提供 API/WebSocket 使用。
 """
 
+from .job_feed import JobChange, JobSubscription, job_feed
 from .jobs_service import (
+    InvalidJobCursorError,
     JobAccessDeniedError,
     JobNotFoundError,
     get_job_detail,
+    get_recent_job_item,
     list_jobs,
     list_recent_for_user,
+    list_recent_window,
+    recent_page,
 )
 
 __all__ = [
+    "InvalidJobCursorError",
     "JobAccessDeniedError",
+    "JobChange",
     "JobNotFoundError",
+    "JobSubscription",
     "get_job_detail",
+    "get_recent_job_item",
+    "job_feed",
     "list_jobs",
     "list_recent_for_user",
+    "list_recent_window",
+    "recent_page",
 ]
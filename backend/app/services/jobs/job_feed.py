@@ -0,0 +1,280 @@
+"""Job 變更推播：DB commit → 受影響的使用者。
+
+- SQLAlchemy flush hook 收集各 job 來源的變更（job id + 擁有者），
+  在同一個交易內 ``pg_notify``，commit 後才會送出、rollback 則丟棄。
+- 每個程序的 :class:`JobChangeFeed` 以一條 ``LISTEN`` 連線接收所有 worker
+  的通知，再只轉發給擁有者與 admin 的訂閱。
+- LISTEN 連線尚未建立或中斷時，改在 commit 後直接投遞到本程序的訂閱者。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import threading
+import uuid
+from collections.abc import Iterable
+from dataclasses import dataclass
+
+from sqlalchemy import event, select, text
+from sqlalchemy.orm import Session
+
+from app.models import (
+    DeletionRequest,
+    FirewallSyncJob,
+    ScriptDeployLog,
+    SpecChangeRequest,
+    VMMigrationJob,
+    VMRequest,
+)
+
+logger = logging.getLogger(__name__)
+
+JOB_CHANGES_CHANNEL = "campus_cloud_job_changes"
+
+_SESSION_KEY = "_job_changes"
+_RECONNECT_SECONDS = 5.0
+
+
+@dataclass(frozen=True)
+class JobChange:
+    job_id: str  # "<kind>:<source_id>"，與 JobItem.id 相同
+    user_id: uuid.UUID | None
+
+    def to_payload(self) -> str:
+        return json.dumps(
+            {"job_id": self.job_id, "user_id": str(self.user_id) if self.user_id else None}
+        )
+
+    @classmethod
+    def from_payload(cls, payload: str) -> JobChange:
+        data = json.loads(payload)
+        user_id = data.get("user_id")
+        return cls(job_id=data["job_id"], user_id=uuid.UUID(user_id) if user_id else None)
+
+
+# ─── 訂閱 ─────────────────────────────────────────────────────────────────────
+
+
+class JobSubscription:
+    """單一 WebSocket 的變更信箱；連續變更會合併成一組 job id。"""
+
+    def __init__(
+        self,
+        feed: JobChangeFeed,
+        *,
+        user_id: uuid.UUID,
+        is_admin: bool,
+        loop: asyncio.AbstractEventLoop,
+    ) -> None:
+        self._feed = feed
+        self.user_id = user_id
+        self.is_admin = is_admin
+        self._loop = loop
+        self._pending: set[str] = set()
+        self._wakeup = asyncio.Event()
+        self._closed = False
+
+    def wants(self, change: JobChange) -> bool:
+        return self.is_admin or change.user_id == self.user_id
+
+    def _push(self, job_ids: Iterable[str]) -> None:
+        self._pending.update(job_ids)
+        self._wakeup.set()
+
+    async def next(self, timeout: float | None = None) -> set[str] | None:
+        """等待下一批變更；逾時回傳空集合，關閉後回傳 ``None``。"""
+        if not self._pending and not self._closed:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except TimeoutError:
+                pass
+        if self._closed:
+            return None
+        self._wakeup.clear()
+        job_ids, self._pending = self._pending, set()
+        return job_ids
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._wakeup.set()
+        self._feed._unsubscribe(self)
+
+
+# ─── Feed ────────────────────────────────────────────────────────────────────
+
+
+class JobChangeFeed:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._subscriptions: set[JobSubscription] = set()
+        self._listen_task: asyncio.Task[None] | None = None
+        self.listening = False
+
+    def subscribe(self, *, user_id: uuid.UUID, is_admin: bool) -> JobSubscription:
+        """在事件迴圈內呼叫；回傳的訂閱需在斷線時 ``close()``。"""
+        sub = JobSubscription(
+            self,
+            user_id=user_id,
+            is_admin=is_admin,
+            loop=asyncio.get_running_loop(),
+        )
+        with self._lock:
+            self._subscriptions.add(sub)
+        return sub
+
+    def _unsubscribe(self, sub: JobSubscription) -> None:
+        with self._lock:
+            self._subscriptions.discard(sub)
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len(self._subscriptions)
+
+    def publish(self, changes: Iterable[JobChange]) -> None:
+        """投遞給本程序內受影響的訂閱者；可由任何執行緒呼叫。"""
+        changes = list(changes)
+        if not changes:
+            return
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        for sub in subscriptions:
+            job_ids = [c.job_id for c in changes if sub.wants(c)]
+            if not job_ids:
+                continue
+            try:
+                sub._loop.call_soon_threadsafe(sub._push, job_ids)
+            except RuntimeError:  # 迴圈已關閉
+                self._unsubscribe(sub)
+
+    # ── LISTEN ───────────────────────────────────────────────────────────
+
+    def start(self, conninfo: str) -> None:
+        """在 lifespan 啟動時呼叫，背景維持一條 LISTEN 連線。"""
+        if self._listen_task is None or self._listen_task.done():
+            self._listen_task = asyncio.create_task(self._listen_forever(conninfo))
+
+    async def stop(self) -> None:
+        task, self._listen_task = self._listen_task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self.listening = False
+
+    async def _listen_forever(self, conninfo: str) -> None:
+        import psycopg
+
+        while True:
+            try:
+                async with await psycopg.AsyncConnection.connect(
+                    conninfo, autocommit=True
+                ) as conn:
+                    await conn.execute(f"LISTEN {JOB_CHANGES_CHANNEL}")
+                    self.listening = True
+                    logger.info("Job change feed listening on %s", JOB_CHANGES_CHANNEL)
+                    async for notify in conn.notifies():
+                        try:
+                            self.publish([JobChange.from_payload(notify.payload)])
+                        except (ValueError, KeyError):
+                            logger.warning("Ignoring malformed job change: %r", notify.payload)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.warning(
+                    "Job change feed disconnected (%s); retrying in %.0fs",
+                    exc,
+                    _RECONNECT_SECONDS,
+                )
+            finally:
+                self.listening = False
+            await asyncio.sleep(_RECONNECT_SECONDS)
+
+
+job_feed = JobChangeFeed()
+
+
+# ─── SQLAlchemy hooks ────────────────────────────────────────────────────────
+
+
+def _job_change_for(session: Session, obj: object) -> JobChange | None:
+    if isinstance(obj, VMRequest):
+        return JobChange(f"vm_request:{obj.id}", obj.user_id)
+    if isinstance(obj, SpecChangeRequest):
+        return JobChange(f"spec_change:{obj.id}", obj.user_id)
+    if isinstance(obj, DeletionRequest):
+        return JobChange(f"deletion:{obj.id}", obj.user_id)
+    if isinstance(obj, ScriptDeployLog):
+        return JobChange(f"script_deploy:{obj.task_id}", obj.user_id)
+    if isinstance(obj, FirewallSyncJob):
+        return JobChange(f"firewall_sync:{obj.id}", obj.initiated_by)
+    if isinstance(obj, VMMigrationJob):
+        owner_id = session.connection().execute(
+            select(VMRequest.user_id).where(VMRequest.id == obj.request_id)
+        ).scalar()
+        return JobChange(f"migration:{obj.id}", owner_id)
+    return None
+
+
+_JOB_MODELS = (
+    VMRequest,
+    SpecChangeRequest,
+    DeletionRequest,
+    ScriptDeployLog,
+    VMMigrationJob,
+    FirewallSyncJob,
+)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_job_changes(session: Session, _flush_context) -> None:
+    touched = [
+        obj
+        for obj in (*session.new, *session.dirty, *session.deleted)
+        if isinstance(obj, _JOB_MODELS)
+        and (obj not in session.dirty or session.is_modified(obj, include_collections=False))
+    ]
+    if not touched:
+        return
+    changes: dict[str, JobChange] = session.info.setdefault(_SESSION_KEY, {})
+    is_postgres = session.get_bind().dialect.name == "postgresql"
+    for obj in touched:
+        try:
+            change = _job_change_for(session, obj)
+        except Exception:
+            logger.debug("Could not resolve job change for %r", obj, exc_info=True)
+            continue
+        if change is None or change.job_id in changes:
+            continue
+        changes[change.job_id] = change
+        if is_postgres:
+            session.connection().execute(
+                text("SELECT pg_notify(:channel, :payload)"),
+                {"channel": JOB_CHANGES_CHANNEL, "payload": change.to_payload()},
+            )
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_job_changes(session: Session) -> None:
+    changes: dict[str, JobChange] = session.info.pop(_SESSION_KEY, {})
+    if changes and not job_feed.listening:
+        job_feed.publish(changes.values())
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_job_changes(session: Session) -> None:
+    session.info.pop(_SESSION_KEY, None)
+
+
+__all__ = [
+    "JOB_CHANGES_CHANNEL",
+    "JobChange",
+    "JobChangeFeed",
+    "JobSubscription",
+    "job_feed",
+]
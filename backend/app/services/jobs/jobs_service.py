@@ -1,25 +1,33 @@
 """聚合多個 Job 來源並正規化為 JobItem。
 
 設計策略：
-- 直接查 DB（in-memory union + 排序），來源資料量在合理範圍內（最近 N 天）。
+- 清單（list_jobs）：各來源只投影 (job_id, 擁有者, 正規化狀態, 排序時間) 後
+  UNION ALL 成單一查詢，狀態過濾、排序與 keyset 分頁都在 SQL 內完成，
+  只有當頁的列才載入完整資料並轉成 JobItem。
+- banner / WebSocket（list_recent_window）：視窗小，仍逐來源查詢後在記憶體合併。
 - 非 admin：依 user_id 過濾。
-- 排序：依 updated_at desc，提供 limit/offset 分頁。
+- 排序：依 (updated_at, id) desc。
 """
 
 from __future__ import annotations
 
+import base64
+import json
 import logging
 import re
 import uuid
-from collections.abc import Iterable
+from collections.abc import Callable, Iterable
 from datetime import datetime, timedelta, timezone
 
+from sqlalchemy import String, case, cast, func, literal, tuple_, union_all
 from sqlalchemy.orm import selectinload
 from sqlmodel import Session, select
 
 from app.models import (
     DeletionRequest,
     DeletionRequestStatus,
+    FirewallSyncJob,
+    FirewallSyncJobStatus,
     ScriptDeployLog,
     SpecChangeRequest,
     SpecChangeRequestStatus,
@@ -90,6 +98,14 @@ _DELETION_STATUS_MAP: dict[DeletionRequestStatus, JobStatus] = {
 }
 
 
+_FIREWALL_SYNC_STATUS_MAP: dict[FirewallSyncJobStatus, JobStatus] = {
+    FirewallSyncJobStatus.pending: JobStatus.pending,
+    FirewallSyncJobStatus.running: JobStatus.running,
+    FirewallSyncJobStatus.completed: JobStatus.completed,
+    FirewallSyncJobStatus.failed: JobStatus.failed,
+}
+
+
 def _now() -> datetime:
     return datetime.now(timezone.utc)
 
@@ -320,8 +336,10 @@ def _fetch_script_deploy(
     if not is_admin:
         stmt = stmt.where(ScriptDeployLog.user_id == user.id)
     stmt = stmt.order_by(ScriptDeployLog.updated_at.desc()).limit(_PER_SOURCE_FETCH_LIMIT)
-    rows = list(session.exec(stmt).all())
+    return _script_deploy_items(session, list(session.exec(stmt).all()))
+
 
+def _script_deploy_items(session: Session, rows: list[ScriptDeployLog]) -> list[JobItem]:
     # 取使用者 email
     user_ids = {r.user_id for r in rows if r.user_id is not None}
     email_map: dict[uuid.UUID, str] = {}
@@ -431,15 +449,289 @@ def _fetch_deletions(
     ]
 
 
+def _firewall_sync_to_job(job: FirewallSyncJob, *, user_email: str | None = None) -> JobItem:
+    status = _FIREWALL_SYNC_STATUS_MAP.get(job.status, JobStatus.pending)
+    if status == JobStatus.completed:
+        progress: int | None = 100
+    elif job.total:
+        progress = min(100, job.done * 100 // job.total)
+    else:
+        progress = 0 if status == JobStatus.pending else None
+    message = job.error or (
+        f"{job.done}/{job.total} 台（略過 {job.skipped}，失敗 {job.failed_count}）"
+        if job.total
+        else None
+    )
+    return JobItem(
+        id=f"firewall_sync:{job.id}",
+        kind=JobKind.firewall_sync,
+        title="同步防火牆封鎖網段",
+        status=status,
+        progress=progress,
+        message=message,
+        user_id=job.initiated_by,
+        user_email=user_email,
+        created_at=_coerce_aware(job.created_at) or _now(),
+        updated_at=_coerce_aware(job.updated_at) or _now(),
+        completed_at=_coerce_aware(job.finished_at),
+        detail_url=f"/jobs?focus=firewall_sync:{job.id}",
+        meta={
+            "total": job.total,
+            "done": job.done,
+            "skipped": job.skipped,
+            "failed_count": job.failed_count,
+            "raw_status": job.status.value,
+        },
+    )
+
+
+def _fetch_firewall_sync_jobs(
+    session: Session, *, user: User, since: datetime
+) -> list[JobItem]:
+    is_admin = bool(user.is_superuser or getattr(user, "role", None) == "admin")
+    stmt = (
+        select(FirewallSyncJob, User)
+        .outerjoin(User, User.id == FirewallSyncJob.initiated_by)
+        .where(FirewallSyncJob.updated_at >= since)
+    )
+    if not is_admin:
+        stmt = stmt.where(FirewallSyncJob.initiated_by == user.id)
+    stmt = stmt.order_by(FirewallSyncJob.updated_at.desc()).limit(_PER_SOURCE_FETCH_LIMIT)
+    rows = session.exec(stmt).all()
+    return [
+        _firewall_sync_to_job(job, user_email=u.email if u else None)
+        for (job, u) in rows
+    ]
+
+
 _FETCHERS = {
     JobKind.migration: _fetch_migration_jobs,
     JobKind.script_deploy: _fetch_script_deploy,
     JobKind.vm_request: _fetch_vm_requests,
     JobKind.spec_change: _fetch_spec_changes,
     JobKind.deletion: _fetch_deletions,
+    JobKind.firewall_sync: _fetch_firewall_sync_jobs,
+}
+
+
+# ─── 清單索引（UNION ALL + keyset 分頁） ─────────────────────────────────────
+#
+# 每個來源投影成相同欄位：kind、source_id、job_id（= JobItem.id）、
+# 正規化後的 status 與排序用的 sort_at（= JobItem.updated_at）。
+# 擁有者與歷史視窗條件放在各分支內，讓各表自己的索引可以使用。
+
+
+class InvalidJobCursorError(Exception):
+    pass
+
+
+def _status_case(column, mapping: dict) -> object:
+    return case(
+        {raw: status.value for raw, status in mapping.items()},
+        value=column,
+        else_=JobStatus.pending.value,
+    )
+
+
+def _index_columns(kind: JobKind, source_id, status, sort_at) -> tuple:
+    return (
+        literal(kind.value, String).label("kind"),
+        cast(source_id, String).label("source_id"),
+        (literal(f"{kind.value}:", String) + cast(source_id, String)).label("job_id"),
+        status.label("status"),
+        sort_at.label("sort_at"),
+    )
+
+
+def _index_migration_jobs(*, user: User, since: datetime):
+    stmt = (
+        select(*_index_columns(
+            JobKind.migration,
+            VMMigrationJob.id,
+            _status_case(VMMigrationJob.status, _MIGRATION_STATUS_MAP),
+            VMMigrationJob.updated_at,
+        ))
+        .join(VMRequest, VMRequest.id == VMMigrationJob.request_id)
+        .where(VMMigrationJob.updated_at >= since)
+    )
+    if not _is_admin(user):
+        stmt = stmt.where(VMRequest.user_id == user.id)
+    return stmt
+
+
+def _index_script_deploy(*, user: User, since: datetime):
+    stmt = select(*_index_columns(
+        JobKind.script_deploy,
+        ScriptDeployLog.task_id,
+        _status_case(func.lower(ScriptDeployLog.status), _SCRIPT_DEPLOY_STATUS_MAP),
+        ScriptDeployLog.updated_at,
+    )).where(ScriptDeployLog.updated_at >= since)
+    if not _is_admin(user):
+        stmt = stmt.where(ScriptDeployLog.user_id == user.id)
+    return stmt
+
+
+def _index_vm_requests(*, user: User, since: datetime):
+    stmt = (
+        select(*_index_columns(
+            JobKind.vm_request,
+            VMRequest.id,
+            _status_case(VMRequest.status, _VM_REQUEST_STATUS_MAP),
+            func.coalesce(VMRequest.reviewed_at, VMRequest.created_at),
+        ))
+        .where(VMRequest.created_at >= since)
+        .where(VMRequest.status != VMRequestStatus.running)
+    )
+    if not _is_admin(user):
+        stmt = stmt.where(VMRequest.user_id == user.id)
+    return stmt
+
+
+def _index_spec_changes(*, user: User, since: datetime):
+    stmt = select(*_index_columns(
+        JobKind.spec_change,
+        SpecChangeRequest.id,
+        _status_case(SpecChangeRequest.status, _SPEC_CHANGE_STATUS_MAP),
+        func.coalesce(SpecChangeRequest.reviewed_at, SpecChangeRequest.created_at),
+    )).where(SpecChangeRequest.created_at >= since)
+    if not _is_admin(user):
+        stmt = stmt.where(SpecChangeRequest.user_id == user.id)
+    return stmt
+
+
+def _index_deletions(*, user: User, since: datetime):
+    stmt = select(*_index_columns(
+        JobKind.deletion,
+        DeletionRequest.id,
+        _status_case(DeletionRequest.status, _DELETION_STATUS_MAP),
+        func.coalesce(
+            DeletionRequest.completed_at,
+            DeletionRequest.started_at,
+            DeletionRequest.created_at,
+        ),
+    )).where(DeletionRequest.created_at >= since)
+    if not _is_admin(user):
+        stmt = stmt.where(DeletionRequest.user_id == user.id)
+    return stmt
+
+
+def _index_firewall_sync_jobs(*, user: User, since: datetime):
+    stmt = select(*_index_columns(
+        JobKind.firewall_sync,
+        FirewallSyncJob.id,
+        _status_case(FirewallSyncJob.status, _FIREWALL_SYNC_STATUS_MAP),
+        FirewallSyncJob.updated_at,
+    )).where(FirewallSyncJob.updated_at >= since)
+    if not _is_admin(user):
+        stmt = stmt.where(FirewallSyncJob.initiated_by == user.id)
+    return stmt
+
+
+_INDEX_QUERIES = {
+    JobKind.migration: _index_migration_jobs,
+    JobKind.script_deploy: _index_script_deploy,
+    JobKind.vm_request: _index_vm_requests,
+    JobKind.spec_change: _index_spec_changes,
+    JobKind.deletion: _index_deletions,
+    JobKind.firewall_sync: _index_firewall_sync_jobs,
 }
 
 
+def _uuids(ids: list[str]) -> list[uuid.UUID]:
+    return [uuid.UUID(raw) for raw in ids]
+
+
+def _load_migration_jobs(session: Session, ids: list[str]) -> list[JobItem]:
+    rows = session.exec(
+        select(VMMigrationJob, User)
+        .join(VMRequest, VMRequest.id == VMMigrationJob.request_id)
+        .join(User, User.id == VMRequest.user_id)
+        .where(VMMigrationJob.id.in_(_uuids(ids)))
+    ).all()
+    return [_migration_to_job(job, user_email=u.email, user_id=u.id) for (job, u) in rows]
+
+
+def _load_script_deploy(session: Session, ids: list[str]) -> list[JobItem]:
+    rows = session.exec(select(ScriptDeployLog).where(ScriptDeployLog.task_id.in_(ids))).all()
+    return _script_deploy_items(session, list(rows))
+
+
+def _load_vm_requests(session: Session, ids: list[str]) -> list[JobItem]:
+    rows = session.exec(
+        select(VMRequest)
+        .options(selectinload(VMRequest.user))
+        .where(VMRequest.id.in_(_uuids(ids)))
+    ).all()
+    return [_vm_request_to_job(r) for r in rows]
+
+
+def _load_spec_changes(session: Session, ids: list[str]) -> list[JobItem]:
+    rows = session.exec(
+        select(SpecChangeRequest)
+        .options(selectinload(SpecChangeRequest.user))
+        .where(SpecChangeRequest.id.in_(_uuids(ids)))
+    ).all()
+    return [_spec_change_to_job(r) for r in rows]
+
+
+def _load_deletions(session: Session, ids: list[str]) -> list[JobItem]:
+    rows = session.exec(
+        select(DeletionRequest)
+        .options(selectinload(DeletionRequest.user))
+        .where(DeletionRequest.id.in_(_uuids(ids)))
+    ).all()
+    return [_deletion_to_job(r, user_email=r.user.email if r.user else None) for r in rows]
+
+
+def _load_firewall_sync_jobs(session: Session, ids: list[str]) -> list[JobItem]:
+    rows = session.exec(
+        select(FirewallSyncJob, User)
+        .outerjoin(User, User.id == FirewallSyncJob.initiated_by)
+        .where(FirewallSyncJob.id.in_(_uuids(ids)))
+    ).all()
+    return [_firewall_sync_to_job(job, user_email=u.email if u else None) for (job, u) in rows]
+
+
+_PAGE_LOADERS: dict[JobKind, Callable[[Session, list[str]], list[JobItem]]] = {
+    JobKind.migration: _load_migration_jobs,
+    JobKind.script_deploy: _load_script_deploy,
+    JobKind.vm_request: _load_vm_requests,
+    JobKind.spec_change: _load_spec_changes,
+    JobKind.deletion: _load_deletions,
+    JobKind.firewall_sync: _load_firewall_sync_jobs,
+}
+
+
+def _load_page(session: Session, rows: list) -> list[JobItem]:
+    """依 kind 分批載入當頁的來源列，並維持索引查詢的順序。"""
+    ids_by_kind: dict[JobKind, list[str]] = {}
+    for row in rows:
+        ids_by_kind.setdefault(JobKind(row.kind), []).append(row.source_id)
+    loaded: dict[str, JobItem] = {}
+    for kind, ids in ids_by_kind.items():
+        for item in _PAGE_LOADERS[kind](session, ids):
+            loaded[item.id] = item
+    # 兩次查詢之間被刪除的列直接略過
+    return [loaded[row.job_id] for row in rows if row.job_id in loaded]
+
+
+def _encode_cursor(sort_at: datetime, job_id: str) -> str:
+    raw = json.dumps([_isoformat(sort_at), job_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> tuple[datetime, str]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        at_text, job_id = json.loads(raw)
+        after_at = _coerce_aware(datetime.fromisoformat(at_text))
+    except (ValueError, TypeError) as e:
+        raise InvalidJobCursorError(f"invalid cursor {cursor}") from e
+    if after_at is None or not isinstance(job_id, str):
+        raise InvalidJobCursorError(f"invalid cursor {cursor}")
+    return after_at, job_id
+
+
 # ─── Public API ───────────────────────────────────────────────────────────────
 
 
@@ -460,7 +752,8 @@ def _aggregate_jobs(
             items.extend(fetcher(session, user=user, since=since))
         except Exception as exc:  # noqa: BLE001 — 單一來源失敗不應拖垮整個查詢
             logger.exception("fetch jobs for kind=%s failed: %s", kind.value, exc)
-    items.sort(key=lambda j: j.updated_at, reverse=True)
+    # 與 list_jobs 相同的 (updated_at, id) 排序，同時間的 job 順序才穩定
+    items.sort(key=lambda j: (j.updated_at, j.id), reverse=True)
     return items
 
 
@@ -474,22 +767,76 @@ def list_jobs(
     limit: int = 50,
     offset: int = 0,
     history_days: int = _HISTORY_WINDOW_DAYS,
+    cursor: str | None = None,
 ) -> JobsListResponse:
-    since = _now() - timedelta(days=history_days)
-    all_items = _aggregate_jobs(session=session, user=user, kinds=kinds, since=since)
+    """Job 中心清單。
 
-    active_count = sum(1 for j in all_items if j.status in ACTIVE_JOB_STATUSES)
+    ``cursor`` 為上一頁回傳的 ``next_cursor``；帶 cursor 時從該筆之後接續，
+    ``offset`` 會被忽略（cursor 本身已是位置）。cursor 格式錯誤時拋出 :class:`InvalidJobCursorError`。
+    """
+    since = _now() - timedelta(days=history_days)
+    selected = list(dict.fromkeys(kinds)) if kinds else list(JobKind)
+    branches = [
+        _INDEX_QUERIES[kind](user=user, since=since)
+        for kind in selected
+        if kind in _INDEX_QUERIES
+    ]
+    if not branches:
+        return JobsListResponse(items=[], total=0, active_count=0)
+    index = union_all(*branches).subquery("job_index")
 
-    filtered = all_items
+    wanted: set[JobStatus] | None = None
     if active_only:
-        filtered = [j for j in filtered if j.status in ACTIVE_JOB_STATUSES]
+        wanted = ACTIVE_JOB_STATUSES
     elif statuses:
         wanted = set(statuses)
-        filtered = [j for j in filtered if j.status in wanted]
+    status_filter = (
+        index.c.status.in_(sorted(s.value for s in wanted)) if wanted else None
+    )
+    is_active = index.c.status.in_(sorted(s.value for s in ACTIVE_JOB_STATUSES))
+
+    # total / active_count 只計數，不載入任何來源列
+    total_expr = func.count() if status_filter is None else func.count().filter(status_filter)
+    total, active_count = session.exec(
+        select(total_expr, func.count().filter(is_active)).select_from(index)
+    ).one()
+
+    page_stmt = select(index.c.kind, index.c.source_id, index.c.job_id, index.c.sort_at)
+    if status_filter is not None:
+        page_stmt = page_stmt.where(status_filter)
+    if cursor:
+        after_at, after_id = _decode_cursor(cursor)
+        page_stmt = page_stmt.where(
+            tuple_(index.c.sort_at, index.c.job_id) < tuple_(literal(after_at), literal(after_id))
+        )
+    elif offset:
+        page_stmt = page_stmt.offset(offset)
+    page_stmt = page_stmt.order_by(index.c.sort_at.desc(), index.c.job_id.desc()).limit(limit + 1)
+    rows = list(session.exec(page_stmt).all())
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    next_cursor = _encode_cursor(rows[-1].sort_at, rows[-1].job_id) if has_more else None
+    return JobsListResponse(
+        items=_load_page(session, rows),
+        total=total,
+        active_count=active_count,
+        next_cursor=next_cursor,
+    )
+
+
+def recent_page(items: list[JobItem], *, limit: int) -> list[JobItem]:
+    """active 全部納入（即使超過 limit，也要全部讓 user 看到正在跑的）；
+    剩餘空間再補最近的歷史。``items`` 須已依 updated_at desc 排序。"""
+    actives = [j for j in items if j.status in ACTIVE_JOB_STATUSES]
+    others = [j for j in items if j.status not in ACTIVE_JOB_STATUSES]
+    return actives + others[: max(0, limit - len(actives))]
 
-    total = len(filtered)
-    page = filtered[offset : offset + limit]
-    return JobsListResponse(items=page, total=total, active_count=active_count)
+
+def list_recent_window(*, session: Session, user: User) -> list[JobItem]:
+    """banner / WebSocket 使用的完整歷史視窗（已排序，未分頁）。"""
+    since = _now() - timedelta(days=_HISTORY_WINDOW_DAYS)
+    return _aggregate_jobs(session=session, user=user, kinds=None, since=since)
 
 
 def list_recent_for_user(
@@ -499,15 +846,9 @@ def list_recent_for_user(
     limit: int = 5,
 ) -> JobsListResponse:
     """提供 banner popover 用：active 優先排在最上方，再補最近的歷史任務直到 limit。"""
-    since = _now() - timedelta(days=_HISTORY_WINDOW_DAYS)
-    all_items = _aggregate_jobs(session=session, user=user, kinds=None, since=since)
+    all_items = list_recent_window(session=session, user=user)
     active_count = sum(1 for j in all_items if j.status in ACTIVE_JOB_STATUSES)
-
-    actives = [j for j in all_items if j.status in ACTIVE_JOB_STATUSES]
-    others = [j for j in all_items if j.status not in ACTIVE_JOB_STATUSES]
-    # active 全部納入（即使超過 limit，也要全部讓 user 看到正在跑的）；
-    # 剩餘空間再補最近的歷史，但不少於 limit 筆總量
-    page = actives + others[: max(0, limit - len(actives))]
+    page = recent_page(all_items, limit=limit)
     return JobsListResponse(items=page, total=len(all_items), active_count=active_count)
 
 
@@ -698,12 +1039,34 @@ def _detail_deletion(session: Session, raw_id: str, user: User) -> JobDetail:
     return JobDetail(item=item, error=req.error_message, extra=extra)
 
 
+def _detail_firewall_sync(session: Session, raw_id: str, user: User) -> JobDetail:
+    try:
+        job_uuid = uuid.UUID(raw_id)
+    except ValueError as e:
+        raise JobNotFoundError(f"invalid firewall sync id {raw_id}") from e
+    job = session.get(FirewallSyncJob, job_uuid)
+    if job is None:
+        raise JobNotFoundError("firewall sync job not found")
+    _ensure_owner_or_admin(user, job.initiated_by)
+    owner = session.get(User, job.initiated_by) if job.initiated_by else None
+    item = _firewall_sync_to_job(job, user_email=owner.email if owner else None)
+    extra = {
+        "targets": json.loads(job.targets),
+        "summary": json.loads(job.summary) if job.summary else None,
+        "raw_status": job.status.value,
+        "started_at": _isoformat(job.started_at),
+        "finished_at": _isoformat(job.finished_at),
+    }
+    return JobDetail(item=item, error=job.error, extra=extra)
+
+
 _DETAIL_FETCHERS = {
     JobKind.migration: _detail_migration,
     JobKind.script_deploy: _detail_script_deploy,
     JobKind.vm_request: _detail_vm_request,
     JobKind.spec_change: _detail_spec_change,
     JobKind.deletion: _detail_deletion,
+    JobKind.firewall_sync: _detail_firewall_sync,
 }
 
 
@@ -718,3 +1081,26 @@ def get_job_detail(*, session: Session, user: User, job_id: str) -> JobDetail:
         raise JobNotFoundError(f"unknown kind {kind_str}") from e
     fetcher = _DETAIL_FETCHERS[kind]
     return fetcher(session, raw_id, user)
+
+
+def get_recent_job_item(*, session: Session, user: User, job_id: str) -> JobItem | None:
+    """單筆 JobItem（推播用）。
+
+    查無、無權限或不會出現在 :func:`list_recent_window` 的 job 回傳 ``None``，
+    呼叫端據此把它從畫面移除。
+    """
+    try:
+        item = get_job_detail(session=session, user=user, job_id=job_id).item
+    except (JobNotFoundError, JobAccessDeniedError):
+        return None
+    if item.kind == JobKind.vm_request and item.meta.get("raw_status") == VMRequestStatus.running.value:
+        return None
+    since = _now() - timedelta(days=_HISTORY_WINDOW_DAYS)
+    window_start = (
+        item.updated_at
+        if item.kind in {JobKind.migration, JobKind.script_deploy, JobKind.firewall_sync}
+        else item.created_at
+    )
+    if window_start < since:
+        return None
+    return item
@@ -11,7 +11,7 @@ from sqlalchemy import and_, or_
 from sqlmodel import Session, select
 
 from app.core.authorizers import require_ai_api_access
-from app.core.security import decrypt_value, encrypt_value
+from app.core.security import decrypt_value, encrypt_value, hash_api_key
 from app.exceptions import BadRequestError, NotFoundError
 from app.features.ai.config import settings as ai_api_settings
 from app.models import (
@@ -34,6 +34,8 @@ from app.schemas import (
     AIAPIRequestsPublic,
     Message,
 )
+from app.services.llm_gateway.api_key_cache import api_key_auth_cache
+from app.services.llm_gateway.usage_buffer import usage_buffer
 from app.services.user import audit_service
 
 logger = logging.getLogger(__name__)
@@ -244,6 +246,7 @@ def review_request(
                 base_url=base_url,
                 api_key_encrypted=encrypt_value(api_key),
                 api_key_prefix=_credential_prefix(api_key),
+                api_key_digest=hash_api_key(api_key),
                 api_key_name=db_request.api_key_name,
                 rate_limit=db_request.rate_limit,  # 繼承申請的 rate_limit
                 expires_at=expires_at,
@@ -363,6 +366,7 @@ def rotate_credential(
         base_url=credential.base_url,
         api_key_encrypted=encrypt_value(new_api_key),
         api_key_prefix=_credential_prefix(new_api_key),
+        api_key_digest=hash_api_key(new_api_key),
         api_key_name=credential.api_key_name,
         rate_limit=credential.rate_limit,
         expires_at=credential.expires_at,
@@ -378,6 +382,7 @@ def rotate_credential(
     )
 
     session.commit()
+    api_key_auth_cache.invalidate_credential(credential_id)
     session.refresh(new_credential)
     return _to_credential_public(new_credential)
 
@@ -389,6 +394,8 @@ def delete_credential(
         session=session, credential_id=credential_id, current_user=current_user
     )
 
+    # 先寫入緩衝中屬於此憑證的使用量，之後才不會因 FK 失效被丟棄
+    usage_buffer.flush()
     session.delete(credential)
     audit_service.log_action(
         session=session,
@@ -398,6 +405,7 @@ def delete_credential(
         commit=False,
     )
     session.commit()
+    api_key_auth_cache.invalidate_credential(credential_id)
     return Message(message="AI API credential deleted successfully")
 
 
@@ -429,7 +437,6 @@ def update_credential_name(
 
 def record_usage(
     *,
-    session: Session,
     user_id: uuid.UUID,
     credential_id: uuid.UUID,
     model_name: str,
@@ -441,10 +448,9 @@ def record_usage(
     error_message: str | None = None,
 ) -> None:
     """
-    記錄 AI API Proxy 使用量
+    記錄 AI API Proxy 使用量（排入 write-behind 緩衝，不等待 DB 寫入）
 
     Args:
-        session: 資料庫會話
         user_id: 使用者 ID
         credential_id: 憑證 ID
         model_name: 模型名稱
@@ -466,8 +472,7 @@ def record_usage(
         status=status,
         error_message=error_message,
     )
-    session.add(usage)
-    session.commit()
+    usage_buffer.submit(usage)
     logger.info(
         "Recorded proxy usage: user=%s, model=%s, in=%d, out=%d",
         user_id,
@@ -479,7 +484,6 @@ def record_usage(
 
 def record_template_call(
     *,
-    session: Session,
     user_id: uuid.UUID,
     call_type: str,
     model_name: str,
@@ -491,10 +495,9 @@ def record_template_call(
     error_message: str | None = None,
 ) -> None:
     """
-    記錄 AI Template 呼叫（chat / recommend）
+    記錄 AI Template 呼叫（chat / recommend），同樣經由 write-behind 緩衝寫入
 
     Args:
-        session: 資料庫會話
         user_id: 使用者 ID
         call_type: 呼叫類型（"chat" | "recommend"）
         model_name: 模型名稱
@@ -516,8 +519,7 @@ def record_template_call(
         status=status,
         error_message=error_message,
     )
-    session.add(log)
-    session.commit()
+    usage_buffer.submit(log)
     logger.info(
         "Recorded template call: user=%s, type=%s, model=%s, in=%d, out=%d",
         user_id,
@@ -0,0 +1,95 @@
+"""AI API key 驗證結果的短期快取。
+
+以 key 的 HMAC digest 為索引，快取通過驗證的使用者與憑證欄位；
+串流大量小請求的 client 在 TTL 內不再查 DB。
+
+- 命中時回傳以快取欄位重建的新物件（未綁定 session），請求之間不共用實例。
+- 過期時間每次都會重新檢查；TTL 只影響撤銷在「其他 worker 行程」生效的延遲。
+- 本行程內的輪替 / 刪除呼叫 :meth:`APIKeyAuthCache.invalidate_credential` 立即失效。
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+import uuid
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+from app.features.ai.config import settings as ai_api_settings
+from app.models import AIAPICredential, User
+
+_MAX_ENTRIES = 4096
+
+
+@dataclass(frozen=True)
+class _Entry:
+    expires_at: float
+    user: dict[str, Any]
+    credential: dict[str, Any]
+
+
+class APIKeyAuthCache:
+    def __init__(
+        self,
+        *,
+        ttl: Callable[[], float] = lambda: ai_api_settings.ai_api_key_auth_cache_ttl_seconds,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: dict[str, _Entry] = {}
+        self._digests: dict[uuid.UUID, str] = {}
+
+    def get(self, digest: str) -> tuple[User, AIAPICredential] | None:
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is None:
+                return None
+            if entry.expires_at <= self._clock():
+                self._drop(digest)
+                return None
+        return User(**entry.user), AIAPICredential(**entry.credential)
+
+    def put(self, digest: str, user: User, credential: AIAPICredential) -> None:
+        ttl = self._ttl()
+        if ttl <= 0:
+            return
+        entry = _Entry(
+            expires_at=self._clock() + ttl,
+            user=user.model_dump(),
+            credential=credential.model_dump(),
+        )
+        with self._lock:
+            if len(self._entries) >= _MAX_ENTRIES and digest not in self._entries:
+                now = self._clock()
+                for stale in [d for d, e in self._entries.items() if e.expires_at <= now]:
+                    self._drop(stale)
+                if len(self._entries) >= _MAX_ENTRIES:
+                    self._drop(next(iter(self._entries)))
+            self._entries[digest] = entry
+            self._digests[credential.id] = digest
+
+    def invalidate_credential(self, credential_id: uuid.UUID) -> None:
+        with self._lock:
+            digest = self._digests.get(credential_id)
+            if digest is not None:
+                self._drop(digest)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._digests.clear()
+
+    def _drop(self, digest: str) -> None:
+        entry = self._entries.pop(digest, None)
+        if entry is not None:
+            self._digests.pop(entry.credential["id"], None)
+
+
+api_key_auth_cache = APIKeyAuthCache()
+
+
+__all__ = ["APIKeyAuthCache", "api_key_auth_cache"]
@@ -0,0 +1,316 @@
+"""AI 使用量紀錄的 write-behind 緩衝 — 請求路徑不再等待 DB commit。
+
+``record_usage`` / ``record_template_call`` 只把列放進有上限的佇列：
+
+- 背景執行緒在第一筆入列後 ``AI_USAGE_FLUSH_INTERVAL_MS`` 或累積
+  ``AI_USAGE_FLUSH_BATCH_SIZE`` 筆時寫入，每張表一個多列 INSERT。
+- 佇列超過 ``AI_USAGE_QUEUE_MAX`` 或 DB 無法寫入時，列改寫到本機 spool 檔
+  （JSON lines）；之後任一次成功寫入會重放並刪除 spool。
+- 同一台機器上的多個 worker 行程共用 spool 檔：寫入與取出以 ``<spool>.lock``
+  的 flock 保護，重放期間持有 ``<spool>.replay.lock``，同一時間只有一個行程重放。
+- 主鍵在建立列時就決定，INSERT 使用 ON CONFLICT DO NOTHING，重放不會重複計入。
+- 整批因 FK / 資料錯誤失敗時改逐筆寫入，只丟棄有問題的列。
+- 關閉時（lifespan）:meth:`UsageWriteBuffer.close` 寫完佇列中剩餘的列。
+"""
+
+from __future__ import annotations
+
+import fcntl
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from typing import Any
+
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import DataError, IntegrityError, SQLAlchemyError
+from sqlmodel import SQLModel
+
+from app.core.config import settings
+from app.core.metrics import (
+    AI_USAGE_FLUSH_LATENCY,
+    AI_USAGE_QUEUE_DEPTH,
+    AI_USAGE_SPOOLED_ROWS,
+)
+from app.models import AIAPIUsage, AITemplateCallLog
+
+logger = logging.getLogger(__name__)
+
+_MODELS: dict[str, type[SQLModel]] = {
+    model.__tablename__: model for model in (AIAPIUsage, AITemplateCallLog)
+}
+
+
+def _default_session_factory():
+    from sqlmodel import Session  # noqa: PLC0415
+
+    from app.core.db import engine  # noqa: PLC0415
+
+    return Session(engine)
+
+
+def _insert(session: Any, rows: list[SQLModel]) -> None:
+    by_table: dict[str, list[dict[str, Any]]] = {}
+    for row in rows:
+        by_table.setdefault(row.__tablename__, []).append(row.model_dump())
+    for table, values in by_table.items():
+        stmt = (
+            pg_insert(_MODELS[table].__table__)
+            .values(values)
+            .on_conflict_do_nothing(index_elements=["id"])
+        )
+        session.execute(stmt)
+
+
+@contextmanager
+def _file_lock(path: str, *, blocking: bool = True) -> Iterator[bool]:
+    """跨行程的 flock；``blocking=False`` 且已被其他行程持有時 yield False。"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "a") as handle:
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+class UsageWriteBuffer:
+    def __init__(
+        self,
+        *,
+        session_factory: Callable[[], Any] = _default_session_factory,
+        flush_interval: Callable[[], float] = lambda: settings.AI_USAGE_FLUSH_INTERVAL_MS / 1000,
+        batch_size: Callable[[], int] = lambda: settings.AI_USAGE_FLUSH_BATCH_SIZE,
+        max_queue: Callable[[], int] = lambda: settings.AI_USAGE_QUEUE_MAX,
+        spool_path: Callable[[], str] = lambda: settings.AI_USAGE_SPOOL_PATH,
+        clock: Callable[[], float] = time.monotonic,
+        background: bool = True,
+    ) -> None:
+        self._session_factory = session_factory
+        self._flush_interval = flush_interval
+        self._batch_size = batch_size
+        self._max_queue = max_queue
+        self._spool_path = spool_path
+        self._clock = clock
+        self._background = background
+        self._cond = threading.Condition()
+        self._queue: deque[SQLModel] = deque()
+        self._first_queued_at: float | None = None
+        self._closed = False
+        self._worker: threading.Thread | None = None
+        # 背景執行緒與同步 flush() 不同時寫入
+        self._write_lock = threading.Lock()
+        self._spool_lock = threading.Lock()
+
+    # ── 入列 ─────────────────────────────────────────────────────────────
+
+    def submit(self, row: SQLModel) -> None:
+        """排入一筆待寫入的列；不做任何 DB I/O。"""
+        with self._cond:
+            overflow = self._closed or len(self._queue) >= self._max_queue()
+            if not overflow:
+                if not self._queue:
+                    self._first_queued_at = self._clock()
+                self._queue.append(row)
+                depth = len(self._queue)
+                if depth >= self._batch_size():
+                    self._cond.notify_all()
+                if self._background:
+                    self._ensure_worker()
+        if overflow:
+            logger.warning("AI usage buffer full or closed; spooling row to disk")
+            self._spool([row])
+            return
+        AI_USAGE_QUEUE_DEPTH.set(depth)
+
+    def depth(self) -> int:
+        with self._cond:
+            return len(self._queue)
+
+    # ── 寫入 ─────────────────────────────────────────────────────────────
+
+    def flush(self) -> int:
+        """在目前執行緒寫完佇列中的列並重放 spool；回傳寫入 DB 的列數。"""
+        with self._write_lock:
+            return self._drain()
+
+    def close(self, timeout: float | None = None) -> None:
+        """停止背景執行緒並寫完剩餘的列；之後的 submit 直接寫入 spool。"""
+        with self._cond:
+            self._closed = True
+            worker = self._worker
+            self._cond.notify_all()
+        if worker is not None:
+            worker.join(timeout)
+        self.flush()
+
+    def _take(self, limit: int) -> list[SQLModel]:
+        with self._cond:
+            batch = [self._queue.popleft() for _ in range(min(limit, len(self._queue)))]
+            self._first_queued_at = self._clock() if self._queue else None
+            depth = len(self._queue)
+        AI_USAGE_QUEUE_DEPTH.set(depth)
+        return batch
+
+    def _drain(self) -> int:
+        written = 0
+        ok = True
+        while batch := self._take(max(1, self._batch_size())):
+            if ok and self._write(batch):
+                written += len(batch)
+            else:
+                # DB 已失敗過一次：剩下的直接寫入 spool，不再逐批等待逾時
+                ok = False
+                self._spool(batch)
+        if ok:
+            written += self._replay_spool()
+        return written
+
+    def _write(self, rows: list[SQLModel]) -> bool:
+        start = time.perf_counter()
+        try:
+            with self._session_factory() as session:
+                _insert(session, rows)
+                session.commit()
+        except (IntegrityError, DataError):
+            return self._write_one_by_one(rows)
+        except SQLAlchemyError as e:
+            logger.warning("AI usage flush of %d rows failed, spooling: %s", len(rows), e)
+            return False
+        finally:
+            AI_USAGE_FLUSH_LATENCY.observe(time.perf_counter() - start)
+        return True
+
+    def _write_one_by_one(self, rows: list[SQLModel]) -> bool:
+        try:
+            with self._session_factory() as session:
+                for row in rows:
+                    try:
+                        with session.begin_nested():
+                            _insert(session, [row])
+                    except (IntegrityError, DataError) as e:
+                        logger.error("Dropping AI usage row %s: %s", row.id, e)
+                session.commit()
+        except SQLAlchemyError as e:
+            logger.warning("AI usage flush of %d rows failed, spooling: %s", len(rows), e)
+            return False
+        return True
+
+    # ── Spool ────────────────────────────────────────────────────────────
+
+    def _spool(self, rows: list[SQLModel]) -> None:
+        path = self._spool_path()
+        lines = "".join(
+            json.dumps({"table": row.__tablename__, "row": row.model_dump(mode="json")}) + "\n"
+            for row in rows
+        )
+        try:
+            with self._spool_lock, _file_lock(f"{path}.lock"):
+                with open(path, "a", encoding="utf-8") as f:
+                    f.write(lines)
+        except OSError:
+            logger.exception("Cannot spool %d AI usage rows; they are lost", len(rows))
+            return
+        AI_USAGE_SPOOLED_ROWS.inc(len(rows))
+
+    def _replay_spool(self) -> int:
+        path = self._spool_path()
+        replay_path = f"{path}.replay"
+        if not os.path.exists(path) and not os.path.exists(replay_path):
+            return 0
+        try:
+            with _file_lock(f"{path}.replay.lock", blocking=False) as acquired:
+                if not acquired:
+                    return 0  # 另一個 worker 行程正在重放
+                return self._replay_locked(path, replay_path)
+        except OSError:
+            logger.exception("Cannot replay spooled AI usage rows; will retry")
+            return 0
+
+    def _replay_locked(self, path: str, replay_path: str) -> int:
+        with self._spool_lock, _file_lock(f"{path}.lock"):
+            # 上次重放中斷時 .replay 仍在；先處理它，新的 spool 留待下一輪
+            if not os.path.exists(replay_path):
+                if not os.path.exists(path):
+                    return 0
+                os.replace(path, replay_path)
+
+        rows: list[SQLModel] = []
+        try:
+            with open(replay_path, encoding="utf-8") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    try:
+                        record = json.loads(line)
+                        rows.append(_MODELS[record["table"]].model_validate(record["row"]))
+                    except (ValueError, KeyError) as e:
+                        logger.error("Skipping unreadable AI usage spool line: %s", e)
+        except FileNotFoundError:
+            return 0
+
+        written = 0
+        batch_size = max(1, self._batch_size())
+        for i in range(0, len(rows), batch_size):
+            batch = rows[i : i + batch_size]
+            if not self._write(batch):
+                # 已寫入的部分重放時會被 ON CONFLICT 略過
+                return written
+            written += len(batch)
+        try:
+            os.remove(replay_path)
+        except FileNotFoundError:
+            pass
+        if written:
+            logger.info("Replayed %d spooled AI usage rows", written)
+        return written
+
+    # ── 背景執行緒 ───────────────────────────────────────────────────────
+
+    def _ensure_worker(self) -> None:
+        # 呼叫端持有 self._cond
+        if self._worker is not None:
+            return
+        self._worker = threading.Thread(
+            target=self._work_forever, name="ai-usage-writer", daemon=True
+        )
+        self._worker.start()
+
+    def _wait_for_batch(self) -> bool:
+        """等到該寫入的時間點；關閉且佇列已空時回傳 False。"""
+        with self._cond:
+            while not self._queue and not self._closed:
+                self._cond.wait()
+            while self._queue and not self._closed:
+                if len(self._queue) >= self._batch_size():
+                    break
+                first = self._first_queued_at or self._clock()
+                remaining = first + self._flush_interval() - self._clock()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            return bool(self._queue) or not self._closed
+
+    def _work_forever(self) -> None:
+        while self._wait_for_batch():
+            if self._closed:
+                return  # close() 會在呼叫端執行緒寫完剩餘的列
+            try:
+                with self._write_lock:
+                    self._drain()
+            except Exception:
+                logger.exception("AI usage writer failed")
+
+
+usage_buffer = UsageWriteBuffer()
+
+
+__all__ = ["UsageWriteBuffer", "usage_buffer"]
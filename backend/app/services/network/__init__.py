@@ -5,7 +5,9 @@ from importlib import import_module
 __all__ = [
     "cloudflare_service",
     "firewall_service",
+    "firewall_sync_service",
     "gateway_service",
+    "gateway_sync",
     "nat_service",
     "reverse_proxy_service",
     "script_deploy_service",
@@ -16,7 +18,9 @@ __all__ = [
 _MODULES = {
     "cloudflare_service": "app.services.network.cloudflare_service",
     "firewall_service": "app.services.network.firewall_service",
+    "firewall_sync_service": "app.services.network.firewall_sync_service",
     "gateway_service": "app.services.network.gateway_service",
+    "gateway_sync": "app.services.network.gateway_sync",
     "nat_service": "app.services.network.nat_service",
     "reverse_proxy_service": "app.services.network.reverse_proxy_service",
     "script_deploy_service": "app.services.network.script_deploy_service",
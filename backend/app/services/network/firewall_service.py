@@ -10,10 +10,16 @@
 
 import logging
 import re
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import UTC, datetime
 
 from sqlmodel import Session
 
 from app.core.authorizers import can_bypass_resource_ownership
+from app.core.config import settings
 from app.exceptions import BadRequestError, NotFoundError, ProxmoxError
 from app.infrastructure.proxmox import get_proxmox_api
 from app.infrastructure.proxmox.operations import ResourceType
@@ -26,6 +32,7 @@ from app.schemas.firewall import (
     TopologyNode,
     TopologyResponse,
 )
+from app.services.network.gateway_sync import gateway_sync
 from app.services.proxmox import proxmox_service
 
 logger = logging.getLogger(__name__)
@@ -242,50 +249,18 @@ def ensure_firewall_enabled(node: str, vmid: int, resource_type: ResourceType) -
         logger.error(f"VM {vmid}: 確認防火牆啟用失敗: {e}")
 
 
-def sync_block_local_subnet_rules() -> dict:
-    """掃描所有 pool 內 VM/LXC，同步管理員設定的額外封鎖網段規則（含孤兒清理）。
+def sync_block_local_subnet_rules(*, initiated_by: uuid.UUID | None = None) -> dict:
+    """以背景工作同步所有 pool 內 VM/LXC 的額外封鎖網段規則（含孤兒清理）。
 
-    回傳 {"extra_blocks": {...}} 統計。
+    實際執行見 :mod:`app.services.network.firewall_sync_service`；進度可由
+    Jobs API 以 ``firewall_sync:<job_id>`` 查詢。回傳 {"job_id": ...} 或 noop。
     """
-    from app.core.db import engine  # noqa: PLC0415
-    from app.infrastructure.proxmox.operations import (
-        list_all_resources,  # noqa: PLC0415
-    )
-    from app.services.network import ip_management_service  # noqa: PLC0415
+    from app.services.network import firewall_sync_service  # noqa: PLC0415
 
-    with Session(engine) as s:
-        subnet_config = ip_management_service.get_subnet_config(s)
-        extra_blocks = ip_management_service.get_extra_blocked_subnets(subnet_config)
-    if not extra_blocks:
+    job_id = firewall_sync_service.start_block_rule_sync(initiated_by=initiated_by)
+    if job_id is None:
         return {"noop": True, "reason": "未設定任何額外封鎖網段"}
-
-    extra_aggregate: dict[str, list] = {
-        "created": [], "updated": [], "skipped": [], "deleted": [], "errors": [],
-    }
-
-    for r in list_all_resources():
-        vmid = int(r["vmid"])
-        node = r.get("node")
-        rtype = "lxc" if r.get("type") == "lxc" else "qemu"
-        if not node:
-            continue
-        try:
-            sub = _apply_extra_block_rules(node, vmid, rtype, extra_blocks)
-            for k in extra_aggregate:
-                extra_aggregate[k].extend(sub.get(k, []))
-        except Exception as e:
-            extra_aggregate["errors"].append({"vmid": vmid, "error": str(e)})
-
-    logger.info(
-        "block-extra 同步 -> targets=%s: created=%d updated=%d skipped=%d deleted=%d errors=%d",
-        extra_blocks,
-        len(extra_aggregate["created"]), len(extra_aggregate["updated"]),
-        len(extra_aggregate["skipped"]), len(extra_aggregate["deleted"]),
-        len(extra_aggregate["errors"]),
-    )
-    return {
-        "extra_blocks": {"targets": extra_blocks, **extra_aggregate},
-    }
+    return {"job_id": str(job_id)}
 
 
 def setup_default_rules(node: str, vmid: int, resource_type: ResourceType) -> None:
@@ -570,6 +545,7 @@ def create_connection(
 
         # 記錄已建立的防火牆規則 comment，供失敗時 rollback
         created_comments: list[str] = []
+        touched_targets: set[str] = set()
         try:
             for port_spec in ports:
                 comment = (
@@ -605,7 +581,9 @@ def create_connection(
                         domain=domain,
                         internal_port=port_spec.port,
                         enable_https=enable_https,
+                        wait=False,
                     )
+                    touched_targets.add("traefik")
                 elif port_spec.external_port is not None:
                     # 🔌 Port 轉發（haproxy）
                     from app.services.network import nat_service  # noqa: PLC0415
@@ -616,8 +594,14 @@ def create_connection(
                         external_port=port_spec.external_port,
                         internal_port=port_spec.port,
                         protocol=port_spec.protocol,
+                        wait=False,
                     )
+                    touched_targets.add("haproxy")
                 # else: 🔓 僅開放防火牆，不需額外操作
+
+            # 多個 port 的 Gateway 規則合併成每個 target 一次寫入
+            for sync_target in sorted(touched_targets):
+                gateway_sync.flush(sync_target)
         except Exception:
             # 回退：刪除已建立的 Proxmox 防火牆規則
             if created_comments:
@@ -780,16 +764,20 @@ def delete_connection(
                 reverse_proxy_service,
             )
             if ports is None:
-                nat_service.remove_nat_rules_for_vmid(session, target_vmid)
-                reverse_proxy_service.remove_reverse_proxy_rules_for_vmid(session, target_vmid)
+                nat_service.remove_nat_rules_for_vmid(session, target_vmid, wait=False)
+                reverse_proxy_service.remove_reverse_proxy_rules_for_vmid(
+                    session, target_vmid, wait=False
+                )
             else:
                 for port_spec in ports:
                     nat_service.remove_nat_rules_by_internal_port(
-                        session, target_vmid, port_spec.port, port_spec.protocol
+                        session, target_vmid, port_spec.port, port_spec.protocol, wait=False
                     )
                     reverse_proxy_service.remove_reverse_proxy_rules_by_internal_port(
-                        session, target_vmid, port_spec.port
+                        session, target_vmid, port_spec.port, wait=False
                     )
+            gateway_sync.flush("haproxy")
+            gateway_sync.flush("traefik")
         return
 
     # 決定要在哪個 VM 上刪除規則
@@ -938,29 +926,130 @@ def _delete_matching_rules(
 # ─── 拓撲資料聚合 ─────────────────────────────────────────────────────────────
 
 
-def get_connections_from_rules(vmids: list[int]) -> list[TopologyEdge]:
-    """從 VM 的防火牆規則中解析出 campus-cloud 管理的連線（edges）"""
-    edges: dict[str, TopologyEdge] = {}
+_topology_pool: ThreadPoolExecutor | None = None
+_topology_pool_lock = threading.Lock()
+# vmid -> (VM 防火牆設定檔 digest, 解析後的 campus-cloud 規則)；
+# digest 不變代表規則沒動過，不必重新抓取與解析。
+_parsed_rules_cache: dict[int, tuple[str, list[dict]]] = {}
+_parsed_rules_lock = threading.Lock()
+
+
+def _topology_executor() -> ThreadPoolExecutor:
+    global _topology_pool
+    with _topology_pool_lock:
+        if _topology_pool is None:
+            _topology_pool = ThreadPoolExecutor(
+                max_workers=max(1, settings.FIREWALL_TOPOLOGY_CONCURRENCY),
+                thread_name_prefix="firewall-topology",
+            )
+        return _topology_pool
+
+
+@dataclass
+class _VMFirewallState:
+    firewall_enabled: bool = False
+    parsed_rules: list[dict] | None = None  # None 表示規則讀取失敗
+    ip_address: str | None = None
 
+
+def _snapshot_resources(vmids: list[int]) -> dict[int, dict]:
+    """從同一份 cluster 資源快照取出所有 VM，保留 ``vmids`` 的順序。"""
+    by_vmid = {r.get("vmid"): r for r in proxmox_service.list_all_resources()}
+    resources: dict[int, dict] = {}
     for vmid in vmids:
+        resource = by_vmid.get(vmid)
+        if resource is None:
+            logger.warning("拓撲圖跳過 VMID=%s（無法在 Proxmox 找到資源）", vmid)
+            continue
+        resources[vmid] = resource
+    return resources
+
+
+def _parse_vm_rules(rules: list[dict]) -> list[dict]:
+    parsed_rules = []
+    for rule in rules:
+        parsed = _parse_connection_comment(rule.get("comment", "") or "")
+        if parsed:
+            parsed_rules.append(parsed)
+    return parsed_rules
+
+
+def _load_parsed_rules(resource: dict, digest: str | None) -> list[dict] | None:
+    vmid = resource["vmid"]
+    if digest:
+        with _parsed_rules_lock:
+            cached = _parsed_rules_cache.get(vmid)
+        if cached is not None and cached[0] == digest:
+            return cached[1]
+
+    try:
+        rules = _firewall_api(resource["node"], vmid, resource["type"]).rules.get() or []
+    except Exception as e:
+        logger.warning(
+            "讀取 VMID=%s 防火牆規則失敗，拓撲圖將略過該節點連線: %s",
+            vmid, e,
+        )
+        return None
+
+    parsed_rules = _parse_vm_rules(rules)
+    digest = digest or (rules[0].get("digest") if rules else None)
+    if digest:
+        with _parsed_rules_lock:
+            _parsed_rules_cache[vmid] = (digest, parsed_rules)
+    return parsed_rules
+
+
+def _fetch_firewall_state(resource: dict, *, with_ip: bool) -> _VMFirewallState:
+    """單一 VM 的防火牆選項、規則（digest 未變時用快取）與 IP。"""
+    vmid = resource["vmid"]
+    state = _VMFirewallState()
+
+    opts = get_firewall_options(resource["node"], vmid, resource["type"])
+    state.firewall_enabled = bool(opts.get("enable", False))
+    state.parsed_rules = _load_parsed_rules(resource, opts.get("digest"))
+
+    # 離線 VM 沒有 guest agent，直接使用 DB 快取
+    if with_ip and resource.get("status") == "running":
         try:
-            resource = proxmox_service.find_resource(vmid)
-            node = resource["node"]
-            resource_type = resource["type"]
-            rules = get_vm_firewall_rules(node, vmid, resource_type)
+            state.ip_address = proxmox_service.get_ip_address(
+                resource["node"], vmid, resource["type"]
+            )
         except Exception as e:
-            logger.warning(
-                "讀取 VMID=%s 防火牆規則失敗，拓撲圖將略過該節點連線: %s",
-                vmid, e,
+            logger.debug(
+                "拓撲圖 VMID=%s IP 查詢失敗（將顯示為無 IP）: %s", vmid, e
             )
-            continue
+    return state
 
-        for rule in rules:
-            comment = rule.get("comment", "") or ""
-            parsed = _parse_connection_comment(comment)
-            if not parsed:
-                continue
 
+def _fetch_firewall_states(
+    resources: dict[int, dict], *, with_ip: bool
+) -> dict[int, _VMFirewallState]:
+    """以有上限的 thread pool 並行查詢每台 VM 的防火牆狀態。"""
+    if not resources:
+        return {}
+    pool = _topology_executor()
+    futures = {
+        vmid: pool.submit(_fetch_firewall_state, resource, with_ip=with_ip)
+        for vmid, resource in resources.items()
+    }
+    states: dict[int, _VMFirewallState] = {}
+    for vmid, future in futures.items():
+        try:
+            states[vmid] = future.result()
+        except Exception as e:
+            logger.warning("拓撲圖 VMID=%s 防火牆狀態查詢失敗: %s", vmid, e)
+            states[vmid] = _VMFirewallState()
+    return states
+
+
+def _edges_from_parsed_rules(
+    parsed_by_vmid: dict[int, list[dict] | None],
+) -> list[TopologyEdge]:
+    """將各 VM 解析後的規則合併成拓撲 edges（依 VM 順序）。"""
+    edges: dict[str, TopologyEdge] = {}
+
+    for vmid, parsed_rules in parsed_by_vmid.items():
+        for parsed in parsed_rules or []:
             if parsed["type"] == "gateway_default":
                 # 預設網關規則（無特定 port）
                 edge_key = f"{vmid}->None"
@@ -1016,6 +1105,14 @@ def get_connections_from_rules(vmids: list[int]) -> list[TopologyEdge]:
     return list(edges.values())
 
 
+def get_connections_from_rules(vmids: list[int]) -> list[TopologyEdge]:
+    """從 VM 的防火牆規則中解析出 campus-cloud 管理的連線（edges）"""
+    states = _fetch_firewall_states(_snapshot_resources(vmids), with_ip=False)
+    return _edges_from_parsed_rules(
+        {vmid: state.parsed_rules for vmid, state in states.items()}
+    )
+
+
 def _enrich_edges_from_db(
     edges: list[TopologyEdge], session: Session
 ) -> None:
@@ -1076,13 +1173,13 @@ def get_topology(user: User, session: Session) -> TopologyResponse:
     """
     # 取得有權限的 user_id 清單
     if can_bypass_resource_ownership(user):
-        all_resources = resource_repo.get_all_resources(session=session)
-        target_vmids = [r.vmid for r in all_resources]
+        db_rows = resource_repo.get_all_resources(session=session)
     else:
-        own_resources = resource_repo.get_resources_by_user(
+        db_rows = resource_repo.get_resources_by_user(
             session=session, user_id=user.id
         )
-        target_vmids = [r.vmid for r in own_resources]
+    target_vmids = [r.vmid for r in db_rows]
+    db_resources = {r.vmid: r for r in db_rows}
 
     # 取得使用者的佈局記錄
     layout_records = layout_repo.get_layout(session=session, user_id=user.id)
@@ -1091,54 +1188,34 @@ def get_topology(user: User, session: Session) -> TopologyResponse:
         key = f"{rec.vmid}:{rec.node_type}"
         layout_map[key] = (rec.position_x, rec.position_y)
 
+    # 一份 cluster 快照 + 並行查詢每台 VM 的防火牆狀態與 IP
+    resources = _snapshot_resources(target_vmids)
+    states = _fetch_firewall_states(resources, with_ip=True)
+
     # 建立節點清單
     nodes: list[TopologyNode] = []
-    valid_vmids: list[int] = []
+    ip_updates: dict[int, str] = {}
 
     # 自動排列起始位置
     col_x = 100.0
     row_y_step = 120.0
 
     for i, vmid in enumerate(target_vmids):
-        try:
-            resource = proxmox_service.find_resource(vmid)
-        except Exception as e:
-            logger.warning(
-                "拓撲圖跳過 VMID=%s（無法在 Proxmox 找到資源）: %s", vmid, e
-            )
+        resource = resources.get(vmid)
+        if resource is None:
             continue
+        state = states[vmid]
 
         node_name = _from_punycode_hostname(resource.get("name", f"VM-{vmid}"))
         status = resource.get("status", "unknown")
-        ip_address = None
-        firewall_enabled = False
-
-        try:
-            ip_address = proxmox_service.get_ip_address(
-                resource["node"], vmid, resource["type"]
-            )
-            if ip_address:
-                resource_repo.update_ip_address(
-                    session=session, vmid=vmid, ip_address=ip_address
-                )
-            else:
-                # VM 離線時回退 DB 快取
-                cached = resource_repo.get_resource_by_vmid(session=session, vmid=vmid)
-                if cached and cached.ip_address:
-                    ip_address = cached.ip_address
-        except Exception as e:
-            logger.debug(
-                "拓撲圖 VMID=%s IP 查詢失敗（將顯示為無 IP）: %s", vmid, e
-            )
-
-        try:
-            opts = get_firewall_options(resource["node"], vmid, resource["type"])
-            firewall_enabled = bool(opts.get("enable", False))
-        except Exception as e:
-            logger.debug(
-                "拓撲圖 VMID=%s 防火牆狀態查詢失敗（將顯示為 disabled）: %s",
-                vmid, e,
-            )
+        db_resource = db_resources.get(vmid)
+        ip_address = state.ip_address
+        if ip_address:
+            if db_resource is not None and db_resource.ip_address != ip_address:
+                ip_updates[vmid] = ip_address
+        elif db_resource is not None and db_resource.ip_address:
+            # VM 離線時回退 DB 快取
+            ip_address = db_resource.ip_address
 
         layout_key = f"{vmid}:vm"
         if layout_key in layout_map:
@@ -1155,12 +1232,21 @@ def get_topology(user: User, session: Session) -> TopologyResponse:
                 vm_type=resource.get("type", "qemu"),
                 status=status,
                 ip_address=ip_address,
-                firewall_enabled=firewall_enabled,
+                firewall_enabled=state.firewall_enabled,
                 position_x=px,
                 position_y=py,
             )
         )
-        valid_vmids.append(vmid)
+
+    if ip_updates:
+        try:
+            resource_repo.bulk_update_ip_addresses(
+                session=session, ip_addresses=ip_updates, cached_at=datetime.now(UTC)
+            )
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            logger.debug("拓撲圖 IP 快取寫入失敗: %s", e)
 
     # 新增網關節點
     gw_key = "None:gateway"
@@ -1179,7 +1265,9 @@ def get_topology(user: User, session: Session) -> TopologyResponse:
     )
 
     # 解析連線並充實 DB 資訊（external_port / domain）
-    edges = get_connections_from_rules(valid_vmids)
+    edges = _edges_from_parsed_rules(
+        {vmid: states[vmid].parsed_rules for vmid in target_vmids if vmid in resources}
+    )
     _enrich_edges_from_db(edges, session)
 
     return TopologyResponse(nodes=nodes, edges=edges)
@@ -0,0 +1,291 @@
+"""額外封鎖網段的全機隊同步 — 以背景工作套用到 pool 內每台 VM/LXC。
+
+- 每個 PVE 節點各自一組有上限的 worker（``FIREWALL_SYNC_WORKERS_PER_NODE``），
+  節點之間並行。
+- 每台 VM 成功套用後記錄目標網段的 fingerprint；fingerprint 相同的 VM 直接略過。
+- 進度寫入 ``firewall_sync_jobs``，透過 Jobs API / ``/ws/jobs`` 呈現；
+  完成摘要包含各節點的處理量。
+- 所有 worker 行程合計同一時間只執行一個同步工作（``running`` 的部分唯一索引），
+  後建立的工作排隊等待。
+- 執行中的工作以另一條連線持有工作列的 FOR KEY SHARE 鎖；行程中斷後鎖隨連線
+  釋放，啟動時（或下一個工作取得執行權前）把這些孤兒工作標為 failed。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.core.db import engine
+from app.models.firewall_sync_job import FirewallSyncJob, FirewallSyncJobStatus
+from app.repositories import firewall_sync_job as sync_repo
+from app.repositories import resource as resource_repo
+from app.services.proxmox import proxmox_service
+
+logger = logging.getLogger(__name__)
+
+# 進度最多每隔這麼久寫回 DB 一次（避免每台 VM 都觸發一次推播）
+_PROGRESS_INTERVAL_SECONDS = 1.0
+_MAX_SUMMARY_ERRORS = 50
+
+# 已有其他工作在執行時，排隊中的工作每隔這麼久重新嘗試取得執行權
+_CLAIM_RETRY_SECONDS = 2.0
+_ORPHANED_ERROR = "Interrupted by a server restart"
+
+
+def block_rules_fingerprint(targets: list[str]) -> str:
+    return hashlib.sha256("\n".join(sorted(set(targets))).encode("utf-8")).hexdigest()
+
+
+@dataclass
+class _Target:
+    vmid: int
+    node: str
+    resource_type: str
+
+
+@dataclass
+class _NodeStats:
+    vms: int = 0
+    skipped: int = 0
+    failed: int = 0
+    first_started: float | None = None
+    last_finished: float | None = None
+
+    def record(self, started: float, finished: float, *, failed: bool) -> None:
+        self.vms += 1
+        self.failed += int(failed)
+        if self.first_started is None or started < self.first_started:
+            self.first_started = started
+        if self.last_finished is None or finished > self.last_finished:
+            self.last_finished = finished
+
+    def to_summary(self) -> dict:
+        seconds = 0.0
+        if self.first_started is not None and self.last_finished is not None:
+            seconds = max(self.last_finished - self.first_started, 0.0)
+        return {
+            "vms": self.vms,
+            "skipped": self.skipped,
+            "failed": self.failed,
+            "seconds": round(seconds, 3),
+            "vms_per_minute": round(self.vms / (seconds / 60), 2) if seconds > 0 else None,
+        }
+
+
+# ─── 啟動 ─────────────────────────────────────────────────────────────────────
+
+
+def start_block_rule_sync(*, initiated_by: uuid.UUID | None = None) -> uuid.UUID | None:
+    """建立同步工作並在背景執行；未設定額外封鎖網段時回傳 ``None``。"""
+    from app.services.network import ip_management_service  # noqa: PLC0415
+
+    with Session(engine) as session:
+        subnet_config = ip_management_service.get_subnet_config(session)
+        targets = ip_management_service.get_extra_blocked_subnets(subnet_config)
+        if not targets:
+            return None
+        job = sync_repo.create_job(
+            session=session, initiated_by=initiated_by, targets=targets
+        )
+        job_id = job.id
+
+    threading.Thread(
+        target=run_block_rule_sync,
+        args=(job_id,),
+        daemon=True,
+        name=f"firewall-sync-{job_id}",
+    ).start()
+    logger.info("Firewall block-subnet sync job %s queued: targets=%s", job_id, targets)
+    return job_id
+
+
+# ─── 執行 ─────────────────────────────────────────────────────────────────────
+
+
+def _list_targets() -> list[_Target]:
+    targets = []
+    for r in proxmox_service.list_all_resources():
+        node = r.get("node")
+        if not node:
+            continue
+        targets.append(
+            _Target(
+                vmid=int(r["vmid"]),
+                node=node,
+                resource_type="lxc" if r.get("type") == "lxc" else "qemu",
+            )
+        )
+    return targets
+
+
+def _apply(target: _Target, targets: list[str]) -> tuple[dict, float, float]:
+    from app.services.network import firewall_service  # noqa: PLC0415
+
+    started = time.monotonic()
+    try:
+        stats = firewall_service._apply_extra_block_rules(
+            target.node, target.vmid, target.resource_type, targets
+        )
+    except Exception as e:
+        stats = {"errors": [{"vmid": target.vmid, "error": str(e)}]}
+    return stats, started, time.monotonic()
+
+
+def recover_interrupted_jobs() -> int:
+    """把中斷行程留下的 running / pending 工作標為 failed（lifespan 啟動時呼叫）。
+
+    仍在其他 worker 行程執行或排隊的工作持有租約，不受影響。
+    """
+    with Session(engine) as session:
+        count = sync_repo.fail_orphaned_jobs(session=session, error=_ORPHANED_ERROR)
+    if count:
+        logger.warning("Marked %d interrupted firewall sync job(s) as failed", count)
+    return count
+
+
+def _claim(session: Session, job: FirewallSyncJob) -> bool:
+    sync_repo.fail_orphaned_jobs(session=session, error=_ORPHANED_ERROR)
+    return sync_repo.claim_job(session=session, job=job)
+
+
+def run_block_rule_sync(job_id: uuid.UUID) -> None:
+    """背景執行緒進入點（測試可直接呼叫）。"""
+    with Session(engine) as lease, Session(engine) as session:
+        if sync_repo.lease_job(session=lease, job_id=job_id) is None:
+            return
+        job = sync_repo.get_job(session=session, job_id=job_id)
+        if job is None or job.status != FirewallSyncJobStatus.pending:
+            return
+        try:
+            while not _claim(session, job):
+                time.sleep(_CLAIM_RETRY_SECONDS)
+            _run(session, job)
+        except Exception as e:
+            logger.exception("Firewall block-subnet sync job %s failed", job_id)
+            session.rollback()
+            sync_repo.finish_job(
+                session=session,
+                job=job,
+                status=FirewallSyncJobStatus.failed,
+                error=str(e),
+            )
+
+
+def _run(session: Session, job: FirewallSyncJob) -> None:
+    targets: list[str] = json.loads(job.targets)
+    fingerprint = block_rules_fingerprint(targets)
+
+    vms = _list_targets()
+    stored = resource_repo.get_block_rules_fingerprints(
+        session=session, vmids=[vm.vmid for vm in vms]
+    )
+    sync_repo.set_total(session=session, job=job, total=len(vms))
+
+    node_stats: dict[str, _NodeStats] = {}
+    pending: list[_Target] = []
+    for vm in vms:
+        stats = node_stats.setdefault(vm.node, _NodeStats())
+        if stored.get(vm.vmid) == fingerprint:
+            stats.skipped += 1
+        else:
+            pending.append(vm)
+
+    skipped = len(vms) - len(pending)
+    done = skipped
+    failed = 0
+    totals = {"created": 0, "updated": 0, "deleted": 0}
+    errors: list[dict] = []
+    synced_vmids: list[int] = []
+    last_progress = time.monotonic()
+
+    def flush_progress() -> None:
+        nonlocal synced_vmids, last_progress
+        resource_repo.set_block_rules_fingerprint(
+            session=session, vmids=synced_vmids, fingerprint=fingerprint
+        )
+        sync_repo.record_progress(
+            session=session, job=job, done=done, skipped=skipped, failed_count=failed
+        )
+        synced_vmids = []
+        last_progress = time.monotonic()
+
+    if skipped:
+        flush_progress()
+
+    by_node: dict[str, list[_Target]] = {}
+    for vm in pending:
+        by_node.setdefault(vm.node, []).append(vm)
+
+    pools = {
+        node: ThreadPoolExecutor(
+            max_workers=max(1, min(settings.FIREWALL_SYNC_WORKERS_PER_NODE, len(node_vms))),
+            thread_name_prefix=f"firewall-sync-{node}",
+        )
+        for node, node_vms in by_node.items()
+    }
+    try:
+        futures: dict[Future, _Target] = {
+            pools[vm.node].submit(_apply, vm, targets): vm for vm in pending
+        }
+        remaining = set(futures)
+        while remaining:
+            finished, remaining = wait(
+                remaining, timeout=_PROGRESS_INTERVAL_SECONDS, return_when=FIRST_COMPLETED
+            )
+            for future in finished:
+                vm = futures[future]
+                stats, started, ended = future.result()
+                vm_errors = stats.get("errors") or []
+                node_stats[vm.node].record(started, ended, failed=bool(vm_errors))
+                done += 1
+                for key in totals:
+                    totals[key] += len(stats.get(key) or [])
+                if vm_errors:
+                    failed += 1
+                    errors.extend(vm_errors)
+                else:
+                    synced_vmids.append(vm.vmid)
+            if time.monotonic() - last_progress >= _PROGRESS_INTERVAL_SECONDS:
+                flush_progress()
+    finally:
+        for pool in pools.values():
+            pool.shutdown(wait=True)
+
+    flush_progress()
+    summary = {
+        "targets": targets,
+        "fingerprint": fingerprint,
+        **totals,
+        "skipped_vms": skipped,
+        "failed_vms": failed,
+        "errors": errors[:_MAX_SUMMARY_ERRORS],
+        "nodes": {node: stats.to_summary() for node, stats in sorted(node_stats.items())},
+    }
+    status = (
+        FirewallSyncJobStatus.failed
+        if failed and failed == len(pending)
+        else FirewallSyncJobStatus.completed
+    )
+    sync_repo.finish_job(session=session, job=job, status=status, summary=summary)
+    logger.info(
+        "Firewall block-subnet sync job %s finished: vms=%d skipped=%d failed=%d nodes=%s",
+        job.id, len(vms), skipped, failed, summary["nodes"],
+    )
+
+
+__all__ = [
+    "block_rules_fingerprint",
+    "recover_interrupted_jobs",
+    "run_block_rule_sync",
+    "start_block_rule_sync",
+]
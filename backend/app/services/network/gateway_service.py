@@ -14,6 +14,9 @@ from app.infrastructure.ssh import (
     SSHAuthenticationError,
     create_key_client,
     exec_command,
+    pooled_key_client,
+    sftp_read_file,
+    sftp_write_file,
 )
 from app.infrastructure.ssh import (
     generate_ed25519_keypair as _generate_ed25519_keypair,
@@ -58,6 +61,18 @@ def _make_client(host: str, ssh_port: int, ssh_user: str, private_key_pem: str):
     )
 
 
+def _pooled_client(config: object, private_key_pem: str):
+    """``with _pooled_client(config, key) as client:`` — 共用 Gateway 的 SSH 連線。"""
+    return pooled_key_client(
+        config.host,  # type: ignore[attr-defined]
+        config.ssh_port,  # type: ignore[attr-defined]
+        config.ssh_user,  # type: ignore[attr-defined]
+        private_key_pem,
+        timeout=10,
+        host_key_policy="auto_add",
+    )
+
+
 def _exec(client, command: str) -> tuple[int, str, str]:
     return exec_command(client, command)
 
@@ -178,12 +193,7 @@ def build_traefik_systemd_unit() -> str:
 
 def _write_remote_file(client, path: str, content: str) -> None:
         tmp_path = path + ".tmp"
-        sftp = client.open_sftp()
-        try:
-                with sftp.open(tmp_path, "wb") as handle:
-                        handle.write(content.encode("utf-8"))
-        finally:
-                sftp.close()
+        sftp_write_file(client, tmp_path, content.encode("utf-8"))
 
         _exec_checked(client, f"mv {tmp_path} {path}", f"寫入 {path} 失敗")
 
@@ -219,21 +229,12 @@ def read_service_config(session: object, service: str) -> str:
     if path is None:
         raise BadRequestError(f"未知服務：{service}")
 
-    client = _make_client(config.host, config.ssh_port, config.ssh_user, private_key_pem)
     try:
-        sftp = client.open_sftp()
-        try:
-            try:
-                with sftp.open(path, "r") as handle:
-                    return handle.read().decode()
-            except FileNotFoundError:
-                return ""
-        finally:
-            sftp.close()
+        with _pooled_client(config, private_key_pem) as client:
+            content = sftp_read_file(client, path)
     except Exception as exc:
         raise ProxmoxError(f"讀取 {service} 設定失敗：{exc}")
-    finally:
-        client.close()
+    return content.decode() if content is not None else ""
 
 
 def write_service_config(session: object, service: str, content: str) -> None:
@@ -248,18 +249,21 @@ def write_service_config(session: object, service: str, content: str) -> None:
     if path is None:
         raise BadRequestError(f"未知服務：{service}")
 
-    client = _make_client(config.host, config.ssh_port, config.ssh_user, private_key_pem)
     try:
-        _write_remote_file(client, path, content)
+        with _pooled_client(config, private_key_pem) as client:
+            _write_remote_file(client, path, content)
     except ProxmoxError:
         raise
     except Exception as exc:
         raise ProxmoxError(f"寫入 {service} 設定失敗：{exc}")
-    finally:
-        client.close()
 
 
-def sync_traefik_dns_challenge(session: object) -> None:
+def sync_traefik_dns_challenge(session: object, *, only_if_changed: bool = False) -> None:
+    """寫入 Traefik 的 Cloudflare 環境檔、static config 與 systemd unit 並重啟。
+
+    ``only_if_changed`` 時先讀取 gateway 上的檔案，全部相同且 Traefik 正在運行
+    就不寫入也不重啟（規則同步時使用，避免每次都重啟 Traefik）。
+    """
     from app.repositories import cloudflare_config as cf_repo  # noqa: PLC0415
     from app.repositories.gateway_config import (
         get_decrypted_private_key,  # noqa: PLC0415
@@ -271,51 +275,56 @@ def sync_traefik_dns_challenge(session: object) -> None:
         raise BadRequestError("請先在 admin/domains 完成 Cloudflare API Token 設定")
 
     private_key_pem = get_decrypted_private_key(gateway_config)  # type: ignore[arg-type]
-    client = _make_client(
-        gateway_config.host,
-        gateway_config.ssh_port,
-        gateway_config.ssh_user,
-        private_key_pem,
-    )
+    files = {
+        TRAEFIK_ENV_PATH: build_traefik_env_file(
+            cf_repo.get_decrypted_api_token(cloudflare_config)
+        ),
+        SERVICE_CONFIG_PATHS["traefik"]: build_traefik_static_config(
+            acme_email=_get_traefik_acme_email()
+        ),
+        TRAEFIK_SYSTEMD_PATH: build_traefik_systemd_unit(),
+    }
 
     try:
-        _exec_checked(
-            client,
-            "mkdir -p /etc/traefik/dynamic /etc/traefik/env && "
-            "touch /etc/traefik/acme.json && chmod 600 /etc/traefik/acme.json",
-            "初始化 Traefik 目錄失敗",
-        )
+        with _pooled_client(gateway_config, private_key_pem) as client:
+            if only_if_changed and _remote_files_match(client, files):
+                code, _, _ = _exec(client, "systemctl is-active traefik")
+                if code == 0:
+                    logger.debug("Traefik dnsChallenge 設定未變更，略過重啟")
+                    return
+
+            _exec_checked(
+                client,
+                "mkdir -p /etc/traefik/dynamic /etc/traefik/env && "
+                "touch /etc/traefik/acme.json && chmod 600 /etc/traefik/acme.json",
+                "初始化 Traefik 目錄失敗",
+            )
 
-        _write_remote_file(
-            client,
-            TRAEFIK_ENV_PATH,
-            build_traefik_env_file(
-                cf_repo.get_decrypted_api_token(cloudflare_config)
-            ),
-        )
-        _write_remote_file(
-            client,
-            SERVICE_CONFIG_PATHS["traefik"],
-            build_traefik_static_config(acme_email=_get_traefik_acme_email()),
-        )
-        _write_remote_file(client, TRAEFIK_SYSTEMD_PATH, build_traefik_systemd_unit())
+            for path, content in files.items():
+                _write_remote_file(client, path, content)
 
-        _exec_checked(
-            client,
-            f"chmod 600 {TRAEFIK_ENV_PATH}",
-            "設定 Traefik 環境檔權限失敗",
-        )
-        _exec_checked(
-            client,
-            "systemctl daemon-reload && systemctl restart traefik",
-            "重啟 Traefik 失敗",
-        )
+            _exec_checked(
+                client,
+                f"chmod 600 {TRAEFIK_ENV_PATH}",
+                "設定 Traefik 環境檔權限失敗",
+            )
+            _exec_checked(
+                client,
+                "systemctl daemon-reload && systemctl restart traefik",
+                "重啟 Traefik 失敗",
+            )
     except ProxmoxError:
         raise
     except Exception as exc:
         raise ProxmoxError(f"套用 Traefik dnsChallenge 設定失敗：{exc}")
-    finally:
-        client.close()
+
+
+def _remote_files_match(client, files: dict[str, str]) -> bool:
+    for path, content in files.items():
+        current = sftp_read_file(client, path)
+        if current is None or current.decode("utf-8") != content:
+            return False
+    return True
 
 
 def control_service(session: object, service: str, action: str) -> tuple[bool, str]:
@@ -334,22 +343,21 @@ def control_service(session: object, service: str, action: str) -> tuple[bool, s
         raise BadRequestError(f"未知服務：{service}")
 
     try:
-        client = _make_client(config.host, config.ssh_port, config.ssh_user, private_key_pem)
+        with _pooled_client(config, private_key_pem) as client:
+            if action == "restart":
+                # Some services hang on restart; do stop+start with a kill fallback
+                _exec(client, f"systemctl stop {service} 2>&1; sleep 1; "
+                              f"systemctl kill -s SIGKILL {service} 2>/dev/null; "
+                              f"systemctl start {service} 2>&1")
+                code, out, err = _exec(client, f"systemctl is-active {service} 2>&1")
+            else:
+                code, out, err = _exec(client, f"systemctl {action} {service} 2>&1")
         if action == "restart":
-            # Some services hang on restart; do stop+start with a kill fallback
-            _exec(client, f"systemctl stop {service} 2>&1; sleep 1; "
-                          f"systemctl kill -s SIGKILL {service} 2>/dev/null; "
-                          f"systemctl start {service} 2>&1")
-            code, out, err = _exec(client, f"systemctl is-active {service} 2>&1")
-            client.close()
             if out.strip() == "active":
                 return True, f"{service} restart 完成"
             return False, f"{service} restart 後狀態: {out.strip()}"
-        else:
-            code, out, err = _exec(client, f"systemctl {action} {service} 2>&1")
-            client.close()
-            output = (out + err).strip()
-            return code == 0, output or f"{service} {action} 完成"
+        output = (out + err).strip()
+        return code == 0, output or f"{service} {action} 完成"
     except Exception as exc:
         return False, str(exc)
 
@@ -367,9 +375,8 @@ def get_service_logs(session: object, service: str, lines: int = 50) -> tuple[bo
         raise BadRequestError(f"未知服務：{service}")
 
     try:
-        client = _make_client(config.host, config.ssh_port, config.ssh_user, private_key_pem)
-        _, out, err = _exec(client, f"journalctl -u {service} --no-pager -n {lines} 2>&1")
-        client.close()
+        with _pooled_client(config, private_key_pem) as client:
+            _, out, err = _exec(client, f"journalctl -u {service} --no-pager -n {lines} 2>&1")
         return True, (out + err).strip()
     except Exception as exc:
         return False, str(exc)
@@ -387,14 +394,13 @@ def get_service_status(session: object, service: str) -> tuple[bool, str]:
         raise BadRequestError(f"未知服務：{service}")
 
     try:
-        client = _make_client(config.host, config.ssh_port, config.ssh_user, private_key_pem)
-        code, _, _ = _exec(client, f"systemctl is-active {service}")
-        _, status_out, _ = _exec(
-            client,
-            f"systemctl show {service} --no-page "
-            f"-p ActiveState,SubState,MainPID 2>&1 | head -5",
-        )
-        client.close()
+        with _pooled_client(config, private_key_pem) as client:
+            code, _, _ = _exec(client, f"systemctl is-active {service}")
+            _, status_out, _ = _exec(
+                client,
+                f"systemctl show {service} --no-page "
+                f"-p ActiveState,SubState,MainPID 2>&1 | head -5",
+            )
         return code == 0, status_out.strip()
     except Exception as exc:
         return False, str(exc)
@@ -500,8 +506,7 @@ def get_service_versions(session: object) -> GatewayServiceVersionsResult:
     private_key_pem = get_decrypted_private_key(config)  # type: ignore[arg-type]
     install_targets = _load_install_script_targets()
 
-    client = _make_client(config.host, config.ssh_port, config.ssh_user, private_key_pem)
-    try:
+    with _pooled_client(config, private_key_pem) as client:
         haproxy_candidate_version = _get_haproxy_candidate_version(client)
         items: list[GatewayServiceVersionInfo] = []
         for service, command in _SERVICE_VERSION_COMMANDS.items():
@@ -517,9 +522,7 @@ def get_service_versions(session: object) -> GatewayServiceVersionsResult:
                 info.detection_error = version_output or f"無法取得 {service} 版本"
             items.append(info)
 
-        return GatewayServiceVersionsResult(
-            items=items,
-            checked_at=datetime.now(timezone.utc),
-        )
-    finally:
-        client.close()
+    return GatewayServiceVersionsResult(
+        items=items,
+        checked_at=datetime.now(timezone.utc),
+    )
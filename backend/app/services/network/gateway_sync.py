@@ -0,0 +1,273 @@
+"""Gateway 設定同步協調器 — 合併短時間內的多次規則變更。
+
+規則變更只把對應的 target（``traefik`` / ``haproxy``）標記為 dirty：
+
+- 背景執行緒在最後一次標記後靜置 ``GATEWAY_SYNC_DEBOUNCE_SECONDS``
+  才寫入；持續有變更時最晚 ``GATEWAY_SYNC_MAX_DELAY_SECONDS`` 也會寫一次。
+- 同步函式先讀取 gateway 上目前的內容，與 DB 重建的結果相同時跳過寫入與
+  reload。多個 worker 行程共用同一台 gateway，本行程記得的部署結果可能已被
+  其他 worker 覆蓋，因此一律以遠端內容為準。
+- 需要「寫入後立即生效」的呼叫端用 :meth:`GatewaySyncCoordinator.flush`
+  在目前執行緒同步完成，失敗時直接拋出錯誤。
+- 背景同步失敗時保持 dirty，以指數退避重試。
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from typing import Any
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# (session, force)；force 時不比對遠端內容，一定重寫
+SyncFn = Callable[[Any, bool], None]
+
+_MAX_RETRY_SECONDS = 300.0
+
+
+def _default_session_factory():
+    from sqlmodel import Session  # noqa: PLC0415
+
+    from app.core.db import engine  # noqa: PLC0415
+
+    return Session(engine)
+
+
+@dataclass
+class _Target:
+    sync: SyncFn
+    seq: int = 0  # 每次 mark_dirty 遞增
+    deployed_seq: int = 0  # 最後一次成功同步開始時的 seq
+    pending_since: float | None = None
+    last_marked: float = 0.0
+    running: bool = False
+    failures: int = 0
+    retry_at: float | None = None
+    last_error: BaseException | None = field(default=None, repr=False)
+
+    @property
+    def dirty(self) -> bool:
+        return self.seq > self.deployed_seq
+
+
+class GatewaySyncCoordinator:
+    def __init__(
+        self,
+        *,
+        session_factory: Callable[[], Any] = _default_session_factory,
+        debounce: Callable[[], float] = lambda: settings.GATEWAY_SYNC_DEBOUNCE_SECONDS,
+        max_delay: Callable[[], float] = lambda: settings.GATEWAY_SYNC_MAX_DELAY_SECONDS,
+        retry_delay: Callable[[], float] = lambda: settings.GATEWAY_SYNC_RETRY_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+        background: bool = True,
+    ) -> None:
+        self._session_factory = session_factory
+        self._debounce = debounce
+        self._max_delay = max_delay
+        self._retry_delay = retry_delay
+        self._clock = clock
+        self._background = background
+        self._lock = threading.Condition()
+        self._targets: dict[str, _Target] = {}
+        self._worker: threading.Thread | None = None
+
+    def register(self, name: str, sync: SyncFn) -> None:
+        with self._lock:
+            if name in self._targets:
+                self._targets[name].sync = sync
+            else:
+                self._targets[name] = _Target(sync=sync)
+
+    def _get(self, name: str) -> _Target:
+        target = self._targets.get(name)
+        if target is None:
+            raise KeyError(f"Unknown gateway sync target: {name}")
+        return target
+
+    # ── 標記 / 查詢 ───────────────────────────────────────────────────────
+
+    def mark_dirty(self, name: str) -> None:
+        """記錄 ``name`` 的來源資料已變更；實際寫入由背景執行緒合併處理。"""
+        with self._lock:
+            target = self._get(name)
+            now = self._clock()
+            target.seq += 1
+            target.last_marked = now
+            if target.pending_since is None:
+                target.pending_since = now
+            if self._background:
+                self._ensure_worker()
+            self._lock.notify_all()
+
+    def is_dirty(self, name: str) -> bool:
+        with self._lock:
+            return self._get(name).dirty
+
+    def due_at(self, name: str) -> float | None:
+        with self._lock:
+            return self._due_at(self._get(name))
+
+    def _due_at(self, target: _Target) -> float | None:
+        if not target.dirty or target.running:
+            return None
+        pending_since = (
+            target.last_marked if target.pending_since is None else target.pending_since
+        )
+        due = min(
+            target.last_marked + self._debounce(),
+            pending_since + self._max_delay(),
+        )
+        if target.retry_at is not None:
+            due = max(due, target.retry_at)
+        return due
+
+    # ── 同步 ─────────────────────────────────────────────────────────────
+
+    def flush(self, name: str, *, force: bool = False, timeout: float | None = None) -> None:
+        """確保呼叫前的所有變更都已部署；必要時在目前執行緒同步。
+
+        ``force`` 不比對 gateway 上的內容，強制重寫（手動同步用）。
+        同步失敗時拋出同步函式的例外；等待逾時拋出 ``TimeoutError``。
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            target = self._get(name)
+            if force:
+                target.seq += 1
+                target.last_marked = self._clock()
+                if target.pending_since is None:
+                    target.pending_since = target.last_marked
+            wanted = target.seq
+            while True:
+                if target.deployed_seq >= wanted:
+                    return
+                if not target.running:
+                    break
+                # 進行中的同步可能在我們的變更之前就讀取了 DB，等它結束再判斷
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise TimeoutError(f"Timed out waiting for gateway sync: {name}")
+                self._lock.wait(timeout=remaining)
+            started = self._begin(target)
+        self._run(name, target, started, force=force, raise_errors=True)
+
+    def flush_all(self, *, timeout: float | None = None) -> None:
+        """同步所有 dirty 的 target；錯誤只記錄，不拋出（關閉程序時使用）。"""
+        with self._lock:
+            names = [name for name, target in self._targets.items() if target.dirty]
+        for name in names:
+            try:
+                self.flush(name, timeout=timeout)
+            except Exception as exc:
+                logger.warning("Gateway sync for %s failed during flush: %s", name, exc)
+
+    def run_due(self) -> list[str]:
+        """執行所有已到期的 target，回傳已執行的名稱（背景執行緒與測試使用）。"""
+        ran: list[str] = []
+        while True:
+            with self._lock:
+                now = self._clock()
+                due = [
+                    (name, target)
+                    for name, target in self._targets.items()
+                    if (at := self._due_at(target)) is not None and at <= now
+                ]
+                if not due:
+                    return ran
+                name, target = due[0]
+                started = self._begin(target)
+            self._run(name, target, started, force=False, raise_errors=False)
+            ran.append(name)
+
+    def _begin(self, target: _Target) -> tuple[int, float | None]:
+        # Caller holds self._lock.
+        target.running = True
+        started = (target.seq, target.pending_since)
+        target.pending_since = None
+        return started
+
+    def _run(
+        self,
+        name: str,
+        target: _Target,
+        started: tuple[int, float | None],
+        *,
+        force: bool,
+        raise_errors: bool,
+    ) -> None:
+        start_seq, pending_since = started
+        try:
+            with self._session_factory() as session:
+                target.sync(session, force)
+        except BaseException as exc:
+            with self._lock:
+                target.running = False
+                target.failures += 1
+                target.last_error = exc
+                delay = min(
+                    self._retry_delay() * 2 ** (target.failures - 1), _MAX_RETRY_SECONDS
+                )
+                target.retry_at = self._clock() + delay
+                if target.pending_since is None:
+                    target.pending_since = pending_since
+                self._lock.notify_all()
+            if raise_errors:
+                raise
+            logger.warning(
+                "Gateway sync for %s failed (attempt %d), retrying in %.0fs: %s",
+                name,
+                target.failures,
+                delay,
+                exc,
+            )
+            return
+
+        with self._lock:
+            target.running = False
+            target.failures = 0
+            target.retry_at = None
+            target.last_error = None
+            target.deployed_seq = max(target.deployed_seq, start_seq)
+            self._lock.notify_all()
+
+    # ── 背景執行緒 ───────────────────────────────────────────────────────
+
+    def _ensure_worker(self) -> None:
+        # Caller holds self._lock.
+        if self._worker is not None:
+            return
+        self._worker = threading.Thread(
+            target=self._work_forever,
+            name="gateway-sync",
+            daemon=True,
+        )
+        self._worker.start()
+
+    def _work_forever(self) -> None:
+        while True:
+            with self._lock:
+                pending = [
+                    at
+                    for target in self._targets.values()
+                    if (at := self._due_at(target)) is not None
+                ]
+                if not pending and not any(t.running for t in self._targets.values()):
+                    self._worker = None
+                    return
+                wait = min(pending) - self._clock() if pending else None
+                if wait is None or wait > 0:
+                    self._lock.wait(timeout=wait)
+                    continue
+            self.run_due()
+
+
+gateway_sync = GatewaySyncCoordinator()
+
+
+__all__ = ["GatewaySyncCoordinator", "SyncFn", "gateway_sync"]
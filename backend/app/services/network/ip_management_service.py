@@ -3,14 +3,19 @@
 設計原則：
 - SubnetConfig 為 singleton（id=1），管理者設定一次即啟用 IP 管理
 - IpAllocation 以 ip_address 的 UNIQUE 約束確保不重複
-- allocate_ip 使用 SELECT ... FOR UPDATE 防止並發衝突
+- 已佔用位址另以 bitmap 存在 SubnetConfig，分配時從 allocation_hint
+  往後找第一個 0 bit，不必載入所有分配記錄或從頭掃描 network.hosts()
+- 分配/釋放都使用 SELECT ... FOR UPDATE 鎖定 subnet_config 防止並發衝突；
+  bitmap 與 ip_allocation 不一致時（UNIQUE 衝突或看似耗盡）會從 DB 重建
 - ensure_subnet_configured() 作為所有 VM/LXC 操作的前置防護
 """
 
 import ipaddress
 import logging
+from collections.abc import Sequence
 
-from sqlmodel import Session, select
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, func, select
 
 from app.exceptions import BadRequestError, ConflictError
 from app.models.base import get_datetime_utc
@@ -121,6 +126,7 @@ def upsert_subnet_config(
 
     # 清除舊的系統 IP 保留並重新建立
     _reserve_system_ips(session, config)
+    _rebuild_bitmap(session, config, network)
 
     session.commit()
     session.refresh(config)
@@ -185,6 +191,107 @@ def _reserve_system_ips(session: Session, config: SubnetConfig) -> None:
     session.flush()
 
 
+# ─── 分配 bitmap ────────────────────────────────────────────────────────────
+
+
+class _AllocationBitmap:
+    """bit i = network_address + i 是否已佔用（LSB first）。"""
+
+    def __init__(self, data: bytes | bytearray, size: int) -> None:
+        self.bits = bytearray(data)
+        self.size = size
+
+    @classmethod
+    def for_network(cls, network: ipaddress.IPv4Network) -> "_AllocationBitmap":
+        size = network.num_addresses
+        bitmap = cls(bytearray((size + 7) // 8), size)
+        first, last = _host_offset_range(network)
+        # network / broadcast 與最後一個 byte 的補位 bit 都視為已佔用
+        for offset in (*range(first), *range(last + 1, len(bitmap.bits) * 8)):
+            bitmap.set(offset)
+        return bitmap
+
+    def set(self, offset: int) -> None:
+        self.bits[offset >> 3] |= 1 << (offset & 7)
+
+    def clear(self, offset: int) -> None:
+        self.bits[offset >> 3] &= ~(1 << (offset & 7)) & 0xFF
+
+    def next_free(self, hint: int) -> tuple[int | None, int]:
+        """從第 hint 個 byte 起找第一個空位，回傳 (offset, 新的 hint)。"""
+        rest = self.bits[hint:]
+        index = hint + len(rest) - len(rest.lstrip(b"\xff"))
+        if index >= len(self.bits):
+            return None, len(self.bits)
+        byte = self.bits[index]
+        bit = ((~byte) & (byte + 1)).bit_length() - 1
+        return index * 8 + bit, index
+
+
+def _host_offset_range(network: ipaddress.IPv4Network) -> tuple[int, int]:
+    """可分配 host 的 offset 範圍（與 network.hosts() 一致，含兩端）。"""
+    if network.prefixlen >= 31:
+        return 0, network.num_addresses - 1
+    return 1, network.num_addresses - 2
+
+
+def _rebuild_bitmap(
+    session: Session, config: SubnetConfig, network: ipaddress.IPv4Network
+) -> _AllocationBitmap:
+    """依 ip_allocation 重建 bitmap（呼叫者需持有 subnet_config 的鎖）。"""
+    bitmap = _AllocationBitmap.for_network(network)
+    base = int(network.network_address)
+    for ip_str in session.exec(select(IpAllocation.ip_address)).all():
+        try:
+            offset = int(ipaddress.IPv4Address(ip_str)) - base
+        except ValueError:
+            continue
+        if 0 <= offset < bitmap.size:
+            bitmap.set(offset)
+    config.allocation_bitmap = bytes(bitmap.bits)
+    config.allocation_hint = 0
+    session.add(config)
+    return bitmap
+
+
+def _load_bitmap(
+    session: Session, config: SubnetConfig, network: ipaddress.IPv4Network
+) -> _AllocationBitmap:
+    data = config.allocation_bitmap
+    if data is None or len(data) != (network.num_addresses + 7) // 8:
+        return _rebuild_bitmap(session, config, network)
+    return _AllocationBitmap(data, network.num_addresses)
+
+
+def _lock_subnet_config(session: Session) -> SubnetConfig | None:
+    return session.exec(
+        select(SubnetConfig).where(SubnetConfig.id == 1).with_for_update()
+    ).first()
+
+
+def _mark_released(session: Session, ip_addresses: Sequence[str]) -> None:
+    """把已釋放的位址從 bitmap 清掉（呼叫者需持有 subnet_config 的鎖）。"""
+    config = get_subnet_config(session)
+    if config is None or config.allocation_bitmap is None or not ip_addresses:
+        return
+    network = ipaddress.IPv4Network(config.cidr, strict=False)
+    bitmap = _load_bitmap(session, config, network)
+    first, last = _host_offset_range(network)
+    base = int(network.network_address)
+    hint = config.allocation_hint
+    for ip_str in ip_addresses:
+        try:
+            offset = int(ipaddress.IPv4Address(ip_str)) - base
+        except ValueError:
+            continue
+        if first <= offset <= last:
+            bitmap.clear(offset)
+            hint = min(hint, offset >> 3)
+    config.allocation_bitmap = bytes(bitmap.bits)
+    config.allocation_hint = hint
+    session.add(config)
+
+
 # ─── IP 分配與釋放 ──────────────────────────────────────────────────────────
 
 
@@ -194,40 +301,82 @@ def allocate_ip(session: Session, vmid: int, purpose: str) -> str:
     使用 SELECT FOR UPDATE 鎖定 subnet_config 防止並發衝突，
     ip_allocation 表的 UNIQUE 約束作為最終保障。
     """
+    return allocate_ips(session, [(vmid, purpose)])[0]
+
+
+def allocate_ips(session: Session, requests: Sequence[tuple[int, str]]) -> list[str]:
+    """在同一個交易中為多個 (vmid, purpose) 分配 IP，回傳順序與輸入相同。
+
+    只鎖一次 subnet_config、只寫一次 bitmap；UNIQUE 衝突代表 bitmap 與
+    ip_allocation 不一致，重建 bitmap 後重試一次。
+    """
+    if not requests:
+        return []
+
     # 鎖定 subnet_config 確保串行化
-    config = session.exec(
-        select(SubnetConfig).where(SubnetConfig.id == 1).with_for_update()
-    ).first()
+    config = _lock_subnet_config(session)
     if config is None:
         raise BadRequestError("請先設定 IP 管理網段才能進行此操作")
 
     network = ipaddress.IPv4Network(config.cidr, strict=False)
-
-    # 取得所有已分配的 IP
-    allocated = set(
-        session.exec(select(IpAllocation.ip_address)).all()
-    )
-
-    # 遍歷 host IPs（排除 network 和 broadcast）
-    for host_ip in network.hosts():
-        ip_str = str(host_ip)
-        if ip_str not in allocated:
-            alloc = IpAllocation(
+    base = int(network.network_address)
+    bitmap = _load_bitmap(session, config, network)
+
+    for attempt in range(2):
+        hint = config.allocation_hint
+        rebuilt = attempt > 0
+        offsets: list[int] = []
+        while len(offsets) < len(requests):
+            offset, hint = bitmap.next_free(hint)
+            if offset is None:
+                if rebuilt:
+                    raise ConflictError("IP 地址已耗盡，無法分配新的 IP")
+                # 看似耗盡：可能有未同步的釋放，重建一次再找
+                bitmap = _rebuild_bitmap(session, config, network)
+                for picked in offsets:
+                    bitmap.set(picked)
+                hint = 0
+                rebuilt = True
+                continue
+            bitmap.set(offset)
+            offsets.append(offset)
+
+        ips = [str(ipaddress.IPv4Address(base + offset)) for offset in offsets]
+        allocs = [
+            IpAllocation(
                 ip_address=ip_str,
                 purpose=purpose,
                 vmid=vmid,
                 description=f"VMID {vmid}",
             )
-            session.add(alloc)
-            session.flush()
+            for ip_str, (vmid, purpose) in zip(ips, requests, strict=True)
+        ]
+        try:
+            with session.begin_nested():
+                session.add_all(allocs)
+                session.flush()
+        except IntegrityError:
+            if attempt:
+                raise ConflictError("IP 分配發生衝突，請稍後再試")
+            logger.warning("IP bitmap 與 ip_allocation 不一致，重建後重試")
+            bitmap = _rebuild_bitmap(session, config, network)
+            continue
+
+        config.allocation_bitmap = bytes(bitmap.bits)
+        config.allocation_hint = hint
+        session.add(config)
+        session.flush()
+        for ip_str, (vmid, purpose) in zip(ips, requests, strict=True):
             logger.info("已為 VMID %s 分配 IP %s (purpose=%s)", vmid, ip_str, purpose)
-            return ip_str
+        return ips
 
-    raise ConflictError("IP 地址已耗盡，無法分配新的 IP")
+    raise ConflictError("IP 分配發生衝突，請稍後再試")
 
 
 def release_ip(session: Session, vmid: int) -> str | None:
     """釋放指定 VMID 的 IP 分配，回傳被釋放的 IP 或 None。"""
+    # 先鎖 subnet_config（與分配相同順序），再刪除記錄並更新 bitmap
+    _lock_subnet_config(session)
     alloc = session.exec(
         select(IpAllocation).where(IpAllocation.vmid == vmid)
     ).first()
@@ -237,6 +386,7 @@ def release_ip(session: Session, vmid: int) -> str | None:
 
     ip = alloc.ip_address
     session.delete(alloc)
+    _mark_released(session, [ip])
     session.flush()
     logger.info("已釋放 VMID %s 的 IP %s", vmid, ip)
     return ip
@@ -244,12 +394,14 @@ def release_ip(session: Session, vmid: int) -> str | None:
 
 def release_ip_by_address(session: Session, ip_address: str) -> bool:
     """依 IP 位址釋放分配"""
+    _lock_subnet_config(session)
     alloc = session.exec(
         select(IpAllocation).where(IpAllocation.ip_address == ip_address)
     ).first()
     if alloc is None:
         return False
     session.delete(alloc)
+    _mark_released(session, [ip_address])
     session.flush()
     logger.info("已釋放 IP %s", ip_address)
     return True
@@ -277,7 +429,7 @@ def get_ip_stats(session: Session) -> dict[str, int]:
     if total < 0:
         total = 0
 
-    used = len(session.exec(select(IpAllocation)).all())
+    used = session.exec(select(func.count()).select_from(IpAllocation)).one()
     return {"total": total, "used": used, "available": max(0, total - used)}
 
 
@@ -2,7 +2,9 @@
 
 設計原則：
 - DB 為 source of truth，儲存所有 external_port → vm_ip:internal_port 映射
-- 每次新增 / 刪除後，從 DB 完整重建 haproxy managed section 並 reload
+- 每次新增 / 刪除後，從 DB 完整重建 haproxy managed section 並 reload；
+  透過 gateway_sync 合併短時間內的多次變更，gateway 上的 managed section
+  已與 DB 相同時不寫入也不 reload
 - haproxy.cfg 以 BEGIN/END 標記區隔手動設定與自動管理部分
 - 若 Gateway VM 尚未設定，只寫 DB、跳過 haproxy 同步（不中斷主流程）
 """
@@ -10,6 +12,7 @@
 import logging
 
 from app.exceptions import BadRequestError, ProxmoxError
+from app.services.network.gateway_sync import gateway_sync
 
 logger = logging.getLogger(__name__)
 
@@ -80,11 +83,16 @@ def _build_haproxy_managed_block(rules: list) -> str:
 # ─── haproxy 同步（核心） ──────────────────────────────────────────────────────
 
 
-def _sync_haproxy(session: object) -> None:
+def _sync_haproxy(session: object, force: bool = False) -> None:
     """從 DB 重建 haproxy managed section 並 reload。
-    若 Gateway VM 未設定則靜默略過（不拋錯，讓主流程繼續）。
+    gateway 上現有的 managed section 已相同時（``force`` 除外）跳過寫入與 reload。
     """
-    from app.infrastructure.ssh import create_key_client, exec_command  # noqa: PLC0415
+    from app.infrastructure.ssh import (  # noqa: PLC0415
+        exec_command,
+        pooled_key_client,
+        sftp_read_file,
+        sftp_write_file,
+    )
     from app.repositories import gateway_config as gw_repo  # noqa: PLC0415
     from app.repositories import nat_rule as nat_repo  # noqa: PLC0415
     from app.repositories.gateway_config import (
@@ -99,65 +107,64 @@ def _sync_haproxy(session: object) -> None:
         raise ProxmoxError("Gateway VM 尚未設定，無法同步 haproxy 規則")
 
     rules = nat_repo.list_rules(session)  # type: ignore[arg-type]
+    new_block = _build_haproxy_managed_block(rules)
     private_key_pem = get_decrypted_private_key(config)  # type: ignore[arg-type]
     haproxy_path = SERVICE_CONFIG_PATHS["haproxy"]
     tmp_path = haproxy_path + ".campus-cloud.tmp"
 
-    client = create_key_client(
-        config.host,
-        config.ssh_port,
-        config.ssh_user,
-        private_key_pem,
-    )
     try:
-        # 讀取現有 haproxy.cfg
-        sftp = client.open_sftp()
-        try:
+        with pooled_key_client(
+            config.host,
+            config.ssh_port,
+            config.ssh_user,
+            private_key_pem,
+        ) as client:
+            # 讀取現有 haproxy.cfg
             try:
-                with sftp.open(haproxy_path, "r") as f:
-                    current_cfg = f.read().decode()
+                current_bytes = sftp_read_file(client, haproxy_path)
             except OSError:
-                current_cfg = ""
-        finally:
-            sftp.close()
-
-        # 重建 managed section
-        new_block = _build_haproxy_managed_block(rules)
-        begin_idx = current_cfg.find(_HAPROXY_BEGIN)
-        end_idx = current_cfg.find(_HAPROXY_END)
-
-        if begin_idx != -1 and end_idx != -1:
-            new_cfg = (
-                current_cfg[:begin_idx]
-                + _HAPROXY_BEGIN + "\n"
-                + new_block
-                + _HAPROXY_END + "\n"
-                + current_cfg[end_idx + len(_HAPROXY_END):].lstrip("\n")
-            )
-        else:
-            # 標記不存在時附加在末尾
-            new_cfg = (
-                current_cfg.rstrip()
-                + f"\n\n{_HAPROXY_BEGIN}\n{new_block}{_HAPROXY_END}\n"
+                current_bytes = None
+            current_cfg = current_bytes.decode() if current_bytes is not None else ""
+
+            # 重建 managed section
+            begin_idx = current_cfg.find(_HAPROXY_BEGIN)
+            end_idx = current_cfg.find(_HAPROXY_END)
+
+            if (
+                not force
+                and -1 < begin_idx < end_idx
+                and current_cfg[begin_idx:end_idx] == f"{_HAPROXY_BEGIN}\n{new_block}"
+            ):
+                logger.debug("[NAT] haproxy managed section 未變更，略過同步")
+                return
+
+            if begin_idx != -1 and end_idx != -1:
+                new_cfg = (
+                    current_cfg[:begin_idx]
+                    + _HAPROXY_BEGIN + "\n"
+                    + new_block
+                    + _HAPROXY_END + "\n"
+                    + current_cfg[end_idx + len(_HAPROXY_END):].lstrip("\n")
+                )
+            else:
+                # 標記不存在時附加在末尾
+                new_cfg = (
+                    current_cfg.rstrip()
+                    + f"\n\n{_HAPROXY_BEGIN}\n{new_block}{_HAPROXY_END}\n"
+                )
+
+            # 原子性寫入 + 驗證 + reload
+            sftp_write_file(client, tmp_path, new_cfg.encode())
+
+            code, out, err = exec_command(
+                client,
+                f"haproxy -c -f {tmp_path} 2>&1 "
+                f"&& mv {tmp_path} {haproxy_path} "
+                f"&& systemctl reload haproxy 2>&1",
             )
-
-        # 原子性寫入 + 驗證 + reload
-        sftp = client.open_sftp()
-        try:
-            with sftp.open(tmp_path, "w") as f:
-                f.write(new_cfg.encode())
-        finally:
-            sftp.close()
-
-        code, out, err = exec_command(
-            client,
-            f"haproxy -c -f {tmp_path} 2>&1 "
-            f"&& mv {tmp_path} {haproxy_path} "
-            f"&& systemctl reload haproxy 2>&1",
-        )
-        if code != 0:
-            exec_command(client, f"rm -f {tmp_path}")
-            raise ProxmoxError(f"haproxy 設定同步失敗：{out}{err}")
+            if code != 0:
+                exec_command(client, f"rm -f {tmp_path}")
+                raise ProxmoxError(f"haproxy 設定同步失敗：{out}{err}")
 
         logger.info(f"[NAT] haproxy 已同步 {len(rules)} 條轉發規則並 reload")
 
@@ -165,8 +172,17 @@ def _sync_haproxy(session: object) -> None:
         raise
     except Exception as e:
         raise ProxmoxError(f"haproxy 同步失敗：{e}")
-    finally:
-        client.close()
+
+
+# 以名稱查找，讓測試可以替換 _sync_haproxy
+gateway_sync.register("haproxy", lambda session, force: _sync_haproxy(session, force))
+
+
+def _request_haproxy_sync(*, wait: bool) -> None:
+    """標記 haproxy 需要同步；``wait`` 時等到寫入完成（失敗則拋錯）。"""
+    gateway_sync.mark_dirty("haproxy")
+    if wait:
+        gateway_sync.flush("haproxy")
 
 
 # ─── 公開操作 ──────────────────────────────────────────────────────────────────
@@ -179,8 +195,13 @@ def apply_nat_rule(
     external_port: int,
     internal_port: int,
     protocol: str,
+    *,
+    wait: bool = True,
 ) -> None:
-    """建立 NAT 規則：寫入 DB + 同步 haproxy。"""
+    """建立 NAT 規則：寫入 DB + 同步 haproxy。
+
+    ``wait=False`` 只標記待同步，供批次操作最後再一次 flush。
+    """
     from app.models.nat_rule import NatRule  # noqa: PLC0415
     from app.repositories import nat_rule as nat_repo  # noqa: PLC0415
 
@@ -195,10 +216,10 @@ def apply_nat_rule(
         protocol=protocol,
     )
     nat_repo.create_rule(session, rule)  # type: ignore[arg-type]
-    _sync_haproxy(session)
+    _request_haproxy_sync(wait=wait)
 
 
-def remove_nat_rule_by_id(session: object, rule_id: str) -> None:
+def remove_nat_rule_by_id(session: object, rule_id: str, *, wait: bool = True) -> None:
     """刪除指定 NAT 規則：從 DB 刪除後同步 haproxy。"""
     import uuid as _uuid  # noqa: PLC0415
 
@@ -209,20 +230,20 @@ def remove_nat_rule_by_id(session: object, rule_id: str) -> None:
         raise BadRequestError(f"NAT 規則 {rule_id} 不存在")
 
     nat_repo.delete_rule(session, rule)  # type: ignore[arg-type]
-    _sync_haproxy(session)
+    _request_haproxy_sync(wait=wait)
 
 
-def remove_nat_rules_for_vmid(session: object, vmid: int) -> None:
+def remove_nat_rules_for_vmid(session: object, vmid: int, *, wait: bool = True) -> None:
     """刪除指定 VM 的所有 NAT 規則（VM 刪除時使用）。"""
     from app.repositories import nat_rule as nat_repo  # noqa: PLC0415
 
     deleted = nat_repo.delete_rules_by_vmid(session, vmid)  # type: ignore[arg-type]
     if deleted:
-        _sync_haproxy(session)
+        _request_haproxy_sync(wait=wait)
 
 
 def remove_nat_rules_by_internal_port(
-    session: object, vmid: int, internal_port: int, protocol: str
+    session: object, vmid: int, internal_port: int, protocol: str, *, wait: bool = True
 ) -> None:
     """刪除指定 VM 特定內部 port 的 NAT 規則（刪除連線 edge 時使用）。"""
     from app.repositories import nat_rule as nat_repo  # noqa: PLC0415
@@ -231,11 +252,12 @@ def remove_nat_rules_by_internal_port(
         session, vmid, internal_port, protocol
     )
     if deleted:
-        _sync_haproxy(session)
+        _request_haproxy_sync(wait=wait)
 
 
 def sync_to_gateway(session: object) -> None:
     """手動觸發 haproxy 同步（供管理員 API 使用）。
     Gateway VM 未設定時拋錯（讓 API 回 500，給使用者明確提示）。
+    不比對 gateway 上的內容，一定重寫並 reload。
     """
-    _sync_haproxy(session)
+    gateway_sync.flush("haproxy", force=True)
@@ -2,7 +2,8 @@
 
 設計原則：
 - DB 為 source of truth
-- 每次新增 / 刪除後，從 DB 完整重建 Traefik dynamic config（YAML）
+- 每次新增 / 刪除後，從 DB 完整重建 Traefik dynamic config（YAML）；
+  透過 gateway_sync 合併短時間內的多次變更，gateway 上的內容已相同時不重寫
 - Traefik 的 file provider 設定 watch: true，寫入後自動生效，無需 reload
 - dns_provider 欄位預留給 Cloudflare 等 DNS API 對接
 """
@@ -14,6 +15,7 @@ import yaml
 
 from app.exceptions import BadRequestError, ProxmoxError
 from app.schemas.reverse_proxy import ReverseProxySetupContext, ReverseProxyZoneOption
+from app.services.network.gateway_sync import gateway_sync
 
 logger = logging.getLogger(__name__)
 _HOSTNAME_LABEL_PATTERN = re.compile(
@@ -217,11 +219,17 @@ def _build_traefik_dynamic_config(rules: list) -> str:
 # ─── Traefik 同步（核心）──────────────────────────────────────────────────────
 
 
-def _sync_traefik(session: object) -> None:
+def _sync_traefik(session: object, force: bool = False) -> None:
     """從 DB 重建 Traefik dynamic config 並寫入 Gateway VM。
     Traefik file provider 設定 watch: true，寫入即生效。
+    gateway 上現有的檔案已相同時（``force`` 除外）跳過寫入。
     """
-    from app.infrastructure.ssh import create_key_client, exec_command  # noqa: PLC0415
+    from app.infrastructure.ssh import (  # noqa: PLC0415
+        exec_command,
+        pooled_key_client,
+        sftp_read_file,
+        sftp_write_file,
+    )
     from app.repositories import gateway_config as gw_repo  # noqa: PLC0415
     from app.repositories import reverse_proxy as rp_repo  # noqa: PLC0415
     from app.repositories.gateway_config import (
@@ -237,12 +245,13 @@ def _sync_traefik(session: object) -> None:
         raise ProxmoxError("Gateway VM 尚未設定，無法同步 Traefik 規則")
 
     rules = rp_repo.list_rules(session)  # type: ignore[arg-type]
+    needs_https = any(rule.enable_https for rule in rules)
+    new_cfg = _build_traefik_dynamic_config(rules)
     private_key_pem = get_decrypted_private_key(config)  # type: ignore[arg-type]
 
-    if any(rule.enable_https for rule in rules):
-        gateway_service.sync_traefik_dns_challenge(session)
+    if needs_https:
+        gateway_service.sync_traefik_dns_challenge(session, only_if_changed=not force)
 
-    new_cfg = _build_traefik_dynamic_config(rules)
     tmp_path = TRAEFIK_DYNAMIC_PATH + ".tmp"
 
     logger.info(
@@ -250,55 +259,65 @@ def _sync_traefik(session: object) -> None:
     )
     logger.debug(f"[ReverseProxy] 生成的 Traefik config:\n{new_cfg}")
 
-    client = create_key_client(
-        config.host,
-        config.ssh_port,
-        config.ssh_user,
-        private_key_pem,
-    )
     try:
-        # 確保目錄存在
-        code, out, err = exec_command(
-            client, f"mkdir -p $(dirname {TRAEFIK_DYNAMIC_PATH})"
-        )
-        if code != 0:
-            raise ProxmoxError(f"建立目錄失敗：{out}{err}")
+        with pooled_key_client(
+            config.host,
+            config.ssh_port,
+            config.ssh_user,
+            private_key_pem,
+        ) as client:
+            if not force:
+                current = sftp_read_file(client, TRAEFIK_DYNAMIC_PATH)
+                if current is not None and current.decode("utf-8") == new_cfg:
+                    logger.debug("[ReverseProxy] Traefik 設定未變更，略過同步")
+                    return
+
+            # 確保目錄存在
+            code, out, err = exec_command(
+                client, f"mkdir -p $(dirname {TRAEFIK_DYNAMIC_PATH})"
+            )
+            if code != 0:
+                raise ProxmoxError(f"建立目錄失敗：{out}{err}")
 
-        # 原子性寫入
-        content_bytes = new_cfg.encode("utf-8")
-        sftp = client.open_sftp()
-        try:
-            with sftp.open(tmp_path, "wb") as f:
-                f.write(content_bytes)
-        finally:
-            sftp.close()
-
-        code, out, err = exec_command(client, f"mv {tmp_path} {TRAEFIK_DYNAMIC_PATH}")
-        if code != 0:
-            raise ProxmoxError(f"Traefik 設定寫入失敗：{out}{err}")
-
-        # 驗證寫入結果
-        code, verify_out, _ = exec_command(
-            client, f"wc -c < {TRAEFIK_DYNAMIC_PATH}"
-        )
-        written_size = verify_out.strip() if code == 0 else "unknown"
-        logger.info(
-            f"[ReverseProxy] Traefik 已同步 {len(rules)} 條 domain 規則 "
-            f"(檔案大小: {written_size} bytes, 預期: {len(content_bytes)} bytes)"
-        )
+            # 原子性寫入
+            content_bytes = new_cfg.encode("utf-8")
+            sftp_write_file(client, tmp_path, content_bytes)
+
+            code, out, err = exec_command(client, f"mv {tmp_path} {TRAEFIK_DYNAMIC_PATH}")
+            if code != 0:
+                raise ProxmoxError(f"Traefik 設定寫入失敗：{out}{err}")
 
-        # 檢查 Traefik 服務狀態
-        code, _, _ = exec_command(client, "systemctl is-active traefik")
-        if code != 0:
-            logger.warning(
-                "[ReverseProxy] Traefik 服務未在運行，設定已寫入但可能不會立即生效"
+            # 驗證寫入結果
+            code, verify_out, _ = exec_command(
+                client, f"wc -c < {TRAEFIK_DYNAMIC_PATH}"
             )
+            written_size = verify_out.strip() if code == 0 else "unknown"
+            logger.info(
+                f"[ReverseProxy] Traefik 已同步 {len(rules)} 條 domain 規則 "
+                f"(檔案大小: {written_size} bytes, 預期: {len(content_bytes)} bytes)"
+            )
+
+            # 檢查 Traefik 服務狀態
+            code, _, _ = exec_command(client, "systemctl is-active traefik")
+            if code != 0:
+                logger.warning(
+                    "[ReverseProxy] Traefik 服務未在運行，設定已寫入但可能不會立即生效"
+                )
     except ProxmoxError:
         raise
     except Exception as e:
         raise ProxmoxError(f"Traefik 同步失敗：{e}")
-    finally:
-        client.close()
+
+
+# 以名稱查找，讓測試可以替換 _sync_traefik
+gateway_sync.register("traefik", lambda session, force: _sync_traefik(session, force))
+
+
+def _request_traefik_sync(*, wait: bool) -> None:
+    """標記 Traefik 需要同步；``wait`` 時等到寫入完成（失敗則拋錯）。"""
+    gateway_sync.mark_dirty("traefik")
+    if wait:
+        gateway_sync.flush("traefik")
 
 
 # ─── 公開操作 ──────────────────────────────────────────────────────────────────
@@ -312,8 +331,13 @@ def apply_reverse_proxy_rule(
     hostname_prefix: str,
     internal_port: int,
     enable_https: bool = True,
+    *,
+    wait: bool = True,
 ) -> None:
-    """建立反向代理規則：寫入 DB + 同步 Traefik。"""
+    """建立反向代理規則：寫入 DB + 同步 Traefik。
+
+    ``wait=False`` 只標記待同步，供批次操作最後再一次 flush。
+    """
     from app.models.reverse_proxy_rule import ReverseProxyRule  # noqa: PLC0415
     from app.repositories import reverse_proxy as rp_repo  # noqa: PLC0415
     from app.services.network import cloudflare_service  # noqa: PLC0415
@@ -343,7 +367,7 @@ def apply_reverse_proxy_rule(
         dns_provider="cloudflare",
     )
     rp_repo.create_rule(session, rule)  # type: ignore[arg-type]
-    _sync_traefik(session)
+    _request_traefik_sync(wait=wait)
 
 
 def update_reverse_proxy_rule(
@@ -355,6 +379,8 @@ def update_reverse_proxy_rule(
     hostname_prefix: str,
     internal_port: int,
     enable_https: bool = True,
+    *,
+    wait: bool = True,
 ) -> None:
     import uuid as _uuid  # noqa: PLC0415
 
@@ -389,7 +415,7 @@ def update_reverse_proxy_rule(
     rule.enable_https = enable_https
     rule.dns_provider = "cloudflare"
     rp_repo.update_rule(session, rule)  # type: ignore[arg-type]
-    _sync_traefik(session)
+    _request_traefik_sync(wait=wait)
 
 
 def _cleanup_managed_dns_record(session: object, rule) -> None:
@@ -408,7 +434,9 @@ def _cleanup_managed_dns_record(session: object, rule) -> None:
         logger.warning("清理 Cloudflare DNS record 失敗 (%s): %s", rule.id, exc)
 
 
-def remove_reverse_proxy_rule_by_id(session: object, rule_id: str) -> None:
+def remove_reverse_proxy_rule_by_id(
+    session: object, rule_id: str, *, wait: bool = True
+) -> None:
     """刪除指定反向代理規則。"""
     import uuid as _uuid  # noqa: PLC0415
 
@@ -420,10 +448,12 @@ def remove_reverse_proxy_rule_by_id(session: object, rule_id: str) -> None:
 
     _cleanup_managed_dns_record(session, rule)
     rp_repo.delete_rule(session, rule)  # type: ignore[arg-type]
-    _sync_traefik(session)
+    _request_traefik_sync(wait=wait)
 
 
-def remove_reverse_proxy_rules_for_vmid(session: object, vmid: int) -> None:
+def remove_reverse_proxy_rules_for_vmid(
+    session: object, vmid: int, *, wait: bool = True
+) -> None:
     """刪除指定 VM 的所有反向代理規則。"""
     from app.repositories import reverse_proxy as rp_repo  # noqa: PLC0415
 
@@ -431,11 +461,11 @@ def remove_reverse_proxy_rules_for_vmid(session: object, vmid: int) -> None:
     if deleted:
         for rule in deleted:
             _cleanup_managed_dns_record(session, rule)
-        _sync_traefik(session)
+        _request_traefik_sync(wait=wait)
 
 
 def remove_reverse_proxy_rules_by_internal_port(
-    session: object, vmid: int, internal_port: int
+    session: object, vmid: int, internal_port: int, *, wait: bool = True
 ) -> None:
     """刪除指定 VM 特定內部 port 的反向代理規則。"""
     from app.repositories import reverse_proxy as rp_repo  # noqa: PLC0415
@@ -446,9 +476,9 @@ def remove_reverse_proxy_rules_by_internal_port(
     if deleted:
         for rule in deleted:
             _cleanup_managed_dns_record(session, rule)
-        _sync_traefik(session)
+        _request_traefik_sync(wait=wait)
 
 
 def sync_to_gateway(session: object) -> None:
-    """手動觸發 Traefik 同步。"""
-    _sync_traefik(session)
+    """手動觸發 Traefik 同步（不比對 gateway 上的內容，一定重寫）。"""
+    gateway_sync.flush("traefik", force=True)
@@ -2,10 +2,18 @@ from __future__ import annotations
 
 from importlib import import_module
 
-__all__ = ["gpu_service", "provisioning_service", "proxmox_service"]
+__all__ = [
+    "async_proxmox_service",
+    "gpu_service",
+    "gpu_usage_index",
+    "provisioning_service",
+    "proxmox_service",
+]
 
 _MODULES = {
+    "async_proxmox_service": "app.infrastructure.proxmox.async_operations",
     "gpu_service": "app.services.proxmox.gpu_service",
+    "gpu_usage_index": "app.services.proxmox.gpu_usage_index",
     "provisioning_service": "app.services.proxmox.provisioning_service",
     "proxmox_service": "app.infrastructure.proxmox.operations",
 }
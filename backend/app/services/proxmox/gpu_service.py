@@ -1,7 +1,9 @@
 """GPU (PCI resource mapping) service.
 
 Wraps Proxmox /cluster/mapping/pci endpoints and provides GPU availability
-and usage tracking by cross-referencing VM configurations.
+and usage tracking by cross-referencing VM configurations. Usage is read from
+the database-backed :mod:`gpu_usage_index` rather than scanning every
+VM config per request.
 """
 
 import logging
@@ -19,6 +21,7 @@ from app.schemas.gpu import (
     GPUSummary,
     GPUUsageInfo,
 )
+from app.services.proxmox.gpu_usage_index import gpu_usage_index
 
 logger = logging.getLogger(__name__)
 
@@ -213,7 +216,6 @@ def list_gpu_mappings() -> list[GPUMappingDetail]:
         logger.error("Failed to list PCI mappings: %s", e)
         raise ProxmoxError("Failed to list GPU mappings from Proxmox")
 
-    # Get all VM configs to find GPU usage
     usage_map = _build_usage_map()
     managed_vmids = _get_managed_vmids()
 
@@ -371,59 +373,5 @@ def list_gpu_options() -> list[GPUSummary]:
 
 
 def _build_usage_map() -> dict[str, list[GPUUsageInfo]]:
-    """Scan all VMs to find which ones are using PCI resource mappings.
-
-    Returns a dict mapping mapping_id → list of GPUUsageInfo.
-    """
-    usage: dict[str, list[GPUUsageInfo]] = {}
-
-    try:
-        proxmox = get_proxmox_api()
-        all_resources = proxmox.cluster.resources.get(type="vm")
-    except Exception as e:
-        logger.warning("Failed to scan VM resources for GPU usage: %s", e)
-        return usage
-
-    for resource in all_resources:
-        if resource.get("type") != "qemu":
-            continue
-
-        vmid = resource.get("vmid")
-        node = resource.get("node", "")
-        vm_name = resource.get("name", "")
-        status = resource.get("status", "")
-
-        if not vmid or not node:
-            continue
-
-        try:
-            config = proxmox.nodes(node).qemu(vmid).config.get()
-        except Exception:
-            continue
-
-        # Check hostpci0..hostpci15 for mapping= references
-        for i in range(16):
-            key = f"hostpci{i}"
-            val = config.get(key)
-            if not val:
-                continue
-
-            val_str = str(val)
-            # Format: mapping=<mapping_id>,... or raw PCI address
-            mapping_match = re.search(r"mapping=([^,\s]+)", val_str)
-            if mapping_match:
-                mid = mapping_match.group(1)
-                # Extract mdev type if present (e.g. mdev=nvidia-1028)
-                mdev_match = re.search(r"mdev=([^,\s]+)", val_str)
-                mdev_type = mdev_match.group(1) if mdev_match else ""
-                usage.setdefault(mid, []).append(
-                    GPUUsageInfo(
-                        vmid=vmid,
-                        vm_name=vm_name,
-                        node=node,
-                        status=status,
-                        mdev_type=mdev_type,
-                    )
-                )
-
-    return usage
+    """Return a dict mapping mapping_id → list of GPUUsageInfo."""
+    return gpu_usage_index.usage_map()
@@ -0,0 +1,318 @@
+"""Database-backed index of which QEMU guests use which PCI resource mappings.
+
+Listing GPU mappings used to GET the config of every QEMU guest in the
+cluster, serially, on every form load. The index keeps the parsed
+``hostpci*`` usage per VM in the ``gpu_usage_entry`` table instead, so
+every worker process (and the provisioning GPU guard) reads the same data:
+
+- Built once (configs fetched concurrently) by whichever worker reads first.
+- Updated directly by our own clone, spec-change and delete paths; the
+  write is visible to every worker as soon as it commits.
+- Reconciled in the background every ``GPU_USAGE_RECONCILE_SECONDS``. The
+  ``gpu_usage_index_state`` row is locked for the pass and records when it
+  ran, so only one worker scans the cluster per interval. A config whose
+  digest is unchanged is not re-parsed, and guests that disappeared from
+  the cluster are dropped.
+
+Names and power status come from the shared cluster resource snapshot at
+read time, so they stay fresh without touching the index.
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any
+
+from app.core.config import settings
+from app.models.base import get_datetime_utc
+from app.repositories import gpu_usage as gpu_usage_repo
+from app.schemas.gpu import GPUUsageInfo
+
+logger = logging.getLogger(__name__)
+
+_HOSTPCI_SLOTS = 16
+_MAPPING_RE = re.compile(r"mapping=([^,\s]+)")
+_MDEV_RE = re.compile(r"mdev=([^,\s]+)")
+
+
+def parse_gpu_usage(config: dict) -> tuple[tuple[str, str], ...]:
+    """Return ``(mapping_id, mdev_type)`` for each hostpciN mapping reference."""
+    usages: list[tuple[str, str]] = []
+    for i in range(_HOSTPCI_SLOTS):
+        val = config.get(f"hostpci{i}")
+        if not val:
+            continue
+        # Format: mapping=<mapping_id>,... or raw PCI address
+        val_str = str(val)
+        mapping_match = _MAPPING_RE.search(val_str)
+        if not mapping_match:
+            continue
+        mdev_match = _MDEV_RE.search(val_str)
+        usages.append((mapping_match.group(1), mdev_match.group(1) if mdev_match else ""))
+    return tuple(usages)
+
+
+def _default_fetch_config(node: str, vmid: int) -> dict:
+    from app.infrastructure.proxmox import get_proxmox_api  # noqa: PLC0415
+
+    return get_proxmox_api().nodes(node).qemu(vmid).config.get()
+
+
+def _default_list_guests() -> list[dict]:
+    from app.infrastructure.proxmox import get_cluster_resources  # noqa: PLC0415
+
+    return list(get_cluster_resources().resources)
+
+
+def _default_session_factory():
+    from sqlmodel import Session  # noqa: PLC0415
+
+    from app.core.db import engine  # noqa: PLC0415
+
+    return Session(engine)
+
+
+class GPUUsageIndex:
+    def __init__(
+        self,
+        *,
+        fetch_config: Callable[[str, int], dict] = _default_fetch_config,
+        list_guests: Callable[[], list[dict]] = _default_list_guests,
+        session_factory: Callable[[], Any] = _default_session_factory,
+        reconcile_interval: Callable[[], float] = lambda: settings.GPU_USAGE_RECONCILE_SECONDS,
+        concurrency: Callable[[], int] = lambda: settings.GPU_USAGE_SCAN_CONCURRENCY,
+        background: bool = True,
+    ) -> None:
+        self._fetch_config = fetch_config
+        self._list_guests = list_guests
+        self._session_factory = session_factory
+        self._reconcile_interval = reconcile_interval
+        self._concurrency = concurrency
+        self._background = background
+        self._lock = threading.Lock()
+        # Once the shared index exists, readers stop checking the state row.
+        self._built = False
+        self._worker: threading.Thread | None = None
+
+    # ─── Reads ────────────────────────────────────────────────────────────────
+
+    def usage_map(self) -> dict[str, list[GPUUsageInfo]]:
+        """Return mapping_id → guests using it, built from the index."""
+        if not self._built:
+            self._build()
+        if self._background:
+            self._ensure_worker()
+
+        try:
+            guests = {
+                int(r["vmid"]): r
+                for r in self._list_guests()
+                if r.get("type") == "qemu" and r.get("vmid") is not None
+            }
+        except Exception as e:
+            logger.warning("Failed to scan VM resources for GPU usage: %s", e)
+            return {}
+        with self._session_factory() as session:
+            entries = gpu_usage_repo.list_entries(session)
+
+        usage: dict[str, list[GPUUsageInfo]] = {}
+        for entry in sorted(entries, key=lambda e: e.vmid):
+            guest = guests.get(entry.vmid)
+            if guest is None:
+                continue
+            for mapping_id, mdev_type in entry.mappings:
+                usage.setdefault(mapping_id, []).append(
+                    GPUUsageInfo(
+                        vmid=entry.vmid,
+                        vm_name=guest.get("name", ""),
+                        node=guest.get("node") or entry.node,
+                        status=guest.get("status", ""),
+                        mdev_type=mdev_type,
+                    )
+                )
+        return usage
+
+    # ─── Local updates ────────────────────────────────────────────────────────
+
+    def record_config(self, vmid: int, node: str, config: dict) -> None:
+        """Store the usage parsed from a config we just read or wrote."""
+        with self._session_factory() as session:
+            gpu_usage_repo.upsert_entry(
+                session,
+                vmid=int(vmid),
+                node=node,
+                digest=config.get("digest"),
+                mappings=[list(u) for u in parse_gpu_usage(config)],
+            )
+            session.commit()
+
+    def refresh_vm(self, node: str, vmid: int) -> None:
+        """Re-read one guest after we changed its config (best-effort)."""
+        try:
+            config = self._fetch_config(node, vmid)
+        except Exception as e:
+            logger.warning("GPU usage index: cannot read config of VM %s: %s", vmid, e)
+            # Unknown digest forces the next reconcile to re-parse this guest.
+            with self._session_factory() as session:
+                gpu_usage_repo.clear_digest(session, int(vmid))
+                session.commit()
+            return
+        self.record_config(vmid, node, config)
+
+    def remove_vm(self, vmid: int) -> None:
+        with self._session_factory() as session:
+            gpu_usage_repo.delete_entry(session, int(vmid))
+            session.commit()
+
+    # ─── Reconcile ────────────────────────────────────────────────────────────
+
+    def reconcile(self) -> dict[str, int]:
+        """Compare every QEMU guest's config digest with the index.
+
+        Waits for a reconcile running in another worker, then scans anyway.
+        Raises if the cluster guest list cannot be fetched. Returns counters:
+        ``fetched``, ``changed``, ``removed``, ``failed``.
+        """
+        with self._session_factory() as session:
+            state = gpu_usage_repo.lock_state(session)
+            if state is None:
+                raise RuntimeError("GPU usage index state row is missing")
+            return self._reconcile_locked(session, state)
+
+    def _build(self) -> None:
+        try:
+            # Concurrent first readers (in any worker) share one build.
+            self._reconcile_if_stale(max_age=float("inf"), wait=True)
+        except Exception as e:
+            # Stay unbuilt so the next read tries again.
+            logger.warning("GPU usage index: initial build failed: %s", e)
+            return
+        self._built = True
+
+    def _reconcile_if_stale(self, *, max_age: float, wait: bool) -> dict[str, int] | None:
+        """Reconcile unless another worker did so less than ``max_age`` seconds ago.
+
+        With ``wait=False`` a pass already running in another worker counts
+        as this one. Returns None when skipped.
+        """
+        with self._session_factory() as session:
+            state = gpu_usage_repo.lock_state(session, skip_locked=not wait)
+            if state is None:
+                return None
+            if (
+                state.reconciled_at is not None
+                and (get_datetime_utc() - state.reconciled_at).total_seconds() < max_age
+            ):
+                session.rollback()
+                return None
+            return self._reconcile_locked(session, state)
+
+    def _reconcile_locked(self, session: Any, state: Any) -> dict[str, int]:
+        # The state row stays locked until the commit, so one worker scans at a time.
+        started = get_datetime_utc()
+        stats = self._reconcile(session, started)
+        state.reconciled_at = started
+        session.add(state)
+        session.commit()
+        return stats
+
+    def _reconcile(self, session: Any, started: datetime) -> dict[str, int]:
+        stats = {"fetched": 0, "changed": 0, "removed": 0, "failed": 0}
+        guests = [
+            (int(r["vmid"]), r["node"])
+            for r in self._list_guests()
+            if r.get("type") == "qemu" and r.get("vmid") is not None and r.get("node")
+        ]
+
+        def fetch(guest: tuple[int, str]) -> tuple[int, str, dict | None]:
+            vmid, node = guest
+            try:
+                return vmid, node, self._fetch_config(node, vmid)
+            except Exception as e:
+                logger.debug("GPU usage index: config of VM %s unavailable: %s", vmid, e)
+                return vmid, node, None
+
+        if guests:
+            workers = max(1, min(self._concurrency(), len(guests)))
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="gpu-usage") as pool:
+                results = list(pool.map(fetch, guests))
+        else:
+            results = []
+
+        # Read after fetching so local writes made during the scan are seen;
+        # the repository skips rows written after ``started`` either way.
+        current = {entry.vmid: entry for entry in gpu_usage_repo.list_entries(session)}
+        for vmid, node, config in results:
+            entry = current.get(vmid)
+            if entry is not None and entry.updated_at > started:
+                continue
+            if config is None:
+                # Keep whatever we knew; the guest may be mid-migration.
+                stats["failed"] += 1
+                continue
+            stats["fetched"] += 1
+            digest = config.get("digest")
+            if entry is not None and digest and entry.digest == digest:
+                if entry.node != node:
+                    gpu_usage_repo.set_entry_node(
+                        session, vmid=vmid, node=node, older_than=started
+                    )
+                continue
+            mappings = [list(u) for u in parse_gpu_usage(config)]
+            if entry is None or entry.mappings != mappings:
+                stats["changed"] += 1
+            gpu_usage_repo.upsert_entry(
+                session,
+                vmid=vmid,
+                node=node,
+                digest=digest,
+                mappings=mappings,
+                older_than=started,
+            )
+
+        stats["removed"] = gpu_usage_repo.delete_missing_entries(
+            session, live_vmids={vmid for vmid, _node in guests}, older_than=started
+        )
+        return stats
+
+    def reset(self) -> None:
+        """Forget the local build flag; the next read checks the shared index again."""
+        with self._lock:
+            self._built = False
+
+    # ─── Background worker ────────────────────────────────────────────────────
+
+    def _ensure_worker(self) -> None:
+        with self._lock:
+            if self._worker is not None:
+                return
+            self._worker = threading.Thread(
+                target=self._work_forever, name="gpu-usage-index", daemon=True
+            )
+            self._worker.start()
+
+    def _work_forever(self) -> None:
+        while True:
+            time.sleep(self._reconcile_interval())
+            try:
+                # Whichever worker wakes first scans; the others see a fresh
+                # reconciled_at (or the held lock) and go back to sleep.
+                stats = self._reconcile_if_stale(
+                    max_age=self._reconcile_interval(), wait=False
+                )
+                if stats and (stats["changed"] or stats["removed"]):
+                    logger.info("GPU usage index reconciled: %s", stats)
+            except Exception:
+                logger.exception("GPU usage index reconcile failed")
+
+
+gpu_usage_index = GPUUsageIndex()
+
+
+__all__ = ["GPUUsageIndex", "gpu_usage_index", "parse_gpu_usage"]
@@ -8,7 +8,7 @@ from sqlmodel import Session
 
 from app.ai.pve_advisor import recommendation_service as advisor_service
 from app.core.security import decrypt_value, encrypt_value
-from app.exceptions import ProxmoxError
+from app.exceptions import AppError, ProxmoxError
 from app.infrastructure.proxmox import get_proxmox_settings
 from app.infrastructure.ssh.client import generate_ed25519_keypair
 from app.repositories import resource as resource_repo
@@ -27,6 +27,7 @@ from app.services.network import (
     tunnel_proxy_service,
 )
 from app.services.proxmox import gpu_service, proxmox_service
+from app.services.proxmox.gpu_usage_index import gpu_usage_index
 from app.services.user import audit_service
 from app.services.vm import vm_request_placement_service
 from app.utils.hostname import to_punycode_hostname
@@ -67,6 +68,7 @@ def _cleanup_failed_resource(node: str, vmid: int, resource_type: str) -> None:
         if resource_type == "qemu":
             delete_params["destroy-unreferenced-disks"] = 1
         proxmox_service.delete_resource(node, vmid, resource_type, **delete_params)
+        gpu_usage_index.remove_vm(vmid)
         logger.info("Cleaned up partially provisioned %s %s", resource_type, vmid)
     except Exception:
         logger.exception(
@@ -232,7 +234,20 @@ def _dedupe_templates(templates: Iterable[dict]) -> list[dict]:
 def create_lxc(
     *, session: Session, lxc_data: LXCCreateRequest, user_id: uuid.UUID
 ) -> LXCCreateResponse:
-    vmid = proxmox_service.next_vmid()
+    vmid = proxmox_service.reserve_vmid()
+    try:
+        return _create_lxc(session=session, lxc_data=lxc_data, user_id=user_id, vmid=vmid)
+    finally:
+        proxmox_service.release_vmid(vmid)
+
+
+def _create_lxc(
+    *,
+    session: Session,
+    lxc_data: LXCCreateRequest,
+    user_id: uuid.UUID,
+    vmid: int,
+) -> LXCCreateResponse:
     target_node = _get_lxc_target_node()
     target_storage = _resolve_managed_storage(
         session=session,
@@ -245,6 +260,9 @@ def create_lxc(
     # 取得網路配置並分配 IP
     net_cfg = ip_management_service.get_network_config_for_vm(session)
     allocated_ip = ip_management_service.allocate_ip(session, vmid, "lxc")
+    # Release the subnet row lock before the long PVE calls; the failure path
+    # below releases the IP in its own session.
+    session.commit()
 
     created = False
     try:
@@ -353,13 +371,29 @@ def create_lxc(
                 )
             _cleanup_failed_resource(target_node, vmid, "lxc")
         logger.error(f"Failed to create LXC container: {e}")
+        if isinstance(e, AppError):
+            # 驗證、權限、IP 耗盡等錯誤保留原本型別，呼叫端才能判斷是否重試
+            raise
         raise ProxmoxError(f"Failed to create LXC container: {e}")
 
 
 def create_vm(
     *, session: Session, vm_data: VMCreateRequest, user_id: uuid.UUID
 ) -> VMCreateResponse:
-    new_vmid = proxmox_service.next_vmid()
+    new_vmid = proxmox_service.reserve_vmid()
+    try:
+        return _create_vm(session=session, vm_data=vm_data, user_id=user_id, new_vmid=new_vmid)
+    finally:
+        proxmox_service.release_vmid(new_vmid)
+
+
+def _create_vm(
+    *,
+    session: Session,
+    vm_data: VMCreateRequest,
+    user_id: uuid.UUID,
+    new_vmid: int,
+) -> VMCreateResponse:
     target_node = _get_vm_target_node(vm_data.template_id)
     target_storage = _resolve_managed_storage(
         session=session,
@@ -373,6 +407,9 @@ def create_vm(
     # 取得網路配置並分配 IP
     net_cfg = ip_management_service.get_network_config_for_vm(session)
     allocated_ip = ip_management_service.allocate_ip(session, new_vmid, "vm")
+    # Release the subnet row lock before the long PVE calls; the failure path
+    # below releases the IP in its own session.
+    session.commit()
 
     created = False
     try:
@@ -419,6 +456,7 @@ def create_vm(
                 raise ProxmoxError(f"無法驗證 GPU '{gpu_mapping_id}'：{e}")
             config_updates["hostpci0"] = f"mapping={gpu_mapping_id}"
         proxmox_service.update_config(target_node, new_vmid, "qemu", **config_updates)
+        gpu_usage_index.refresh_vm(target_node, new_vmid)
 
         if vm_data.disk_size:
             proxmox_service.resize_disk(
@@ -504,6 +542,9 @@ def create_vm(
                 )
             _cleanup_failed_resource(target_node, new_vmid, "qemu")
         logger.error(f"Failed to create VM: {e}")
+        if isinstance(e, AppError):
+            # 驗證、權限、IP 耗盡等錯誤保留原本型別，呼叫端才能判斷是否重試
+            raise
         raise ProxmoxError(f"Failed to create VM: {e}")
 
 
@@ -728,6 +769,7 @@ def execute_provision(plan: dict) -> tuple[int, str]:
                     raise ProxmoxError(f"無法驗證 GPU '{plan['gpu_mapping_id']}'：{e}")
                 config_updates["hostpci0"] = f"mapping={plan['gpu_mapping_id']}"
             proxmox_service.update_config(actual_node, new_vmid, "qemu", **config_updates)
+            gpu_usage_index.refresh_vm(actual_node, new_vmid)
 
             if plan.get("disk_size"):
                 proxmox_service.resize_disk(
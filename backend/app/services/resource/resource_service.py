@@ -1,10 +1,14 @@
 import logging
+import threading
 import time
 import uuid
+from concurrent.futures import Future, ThreadPoolExecutor, wait
 from datetime import UTC, datetime, timedelta
 
 from sqlmodel import Session
 
+from app.core.config import settings
+from app.core.db import engine
 from app.exceptions import BadRequestError, ProxmoxError
 from app.models.vm_request import VMRequestStatus
 from app.repositories import audit_log as audit_log_repo
@@ -20,6 +24,7 @@ from app.schemas.resource import (
 )
 from app.services.network import firewall_service
 from app.services.proxmox import proxmox_service
+from app.services.proxmox.gpu_usage_index import gpu_usage_index
 from app.services.scheduling.recurrence import (
     get_schedule_policy,
     is_in_window,
@@ -70,30 +75,147 @@ def _from_punycode_hostname(hostname: str) -> str:
     return ".".join(result_labels)
 
 
-def _build_resource_public(
-    resource: dict, db_resource, node: str, vm_type: str,
-    session: Session | None = None,
-) -> ResourcePublic:
+_ip_lookup_pool: ThreadPoolExecutor | None = None
+_ip_lookup_pool_lock = threading.Lock()
+# vmid -> monotonic time of the last lookup that returned nothing (or timed
+# out), so guests without a responsive agent are not asked again on every
+# page load.
+_ip_lookup_misses: dict[int, float] = {}
+# vmid -> lookup still running in the pool; later calls reuse it instead of
+# submitting another one next to a hung guest agent.
+_ip_lookups_inflight: dict[int, Future] = {}
+
+
+def _ip_lookup_executor() -> ThreadPoolExecutor:
+    global _ip_lookup_pool
+    with _ip_lookup_pool_lock:
+        if _ip_lookup_pool is None:
+            _ip_lookup_pool = ThreadPoolExecutor(
+                max_workers=max(1, settings.RESOURCE_IP_LOOKUP_CONCURRENCY),
+                thread_name_prefix="resource-ip",
+            )
+        return _ip_lookup_pool
+
+
+def _ip_cache_is_fresh(db_resource, now: datetime) -> bool:
+    if db_resource is None or not db_resource.ip_address:
+        return False
+    cached_at = db_resource.ip_address_cached_at
+    if cached_at is None:
+        return False
+    if cached_at.tzinfo is None:
+        cached_at = cached_at.replace(tzinfo=UTC)
+    return (now - cached_at).total_seconds() <= settings.RESOURCE_IP_CACHE_TTL
+
+
+def _needs_ip_lookup(resource: dict, db_resource, now: datetime) -> bool:
+    """只查詢執行中、且快取已過期的 VM；離線 VM 直接使用 DB 快取。"""
+    if resource.get("status") != "running":
+        return False
+    if _ip_cache_is_fresh(db_resource, now):
+        return False
+    missed_at = _ip_lookup_misses.get(resource.get("vmid"))
+    return missed_at is None or (
+        time.monotonic() - missed_at > settings.RESOURCE_IP_CACHE_TTL
+    )
+
+
+def _ip_lookup_future(resource: dict) -> Future:
     vmid = resource.get("vmid")
-    ip_address = proxmox_service.get_ip_address(node, vmid, vm_type)
+    pool = _ip_lookup_executor()
+    with _ip_lookup_pool_lock:
+        future = _ip_lookups_inflight.get(vmid)
+        if future is not None and not future.done():
+            return future
+        future = pool.submit(
+            proxmox_service.get_ip_address,
+            resource.get("node"),
+            vmid,
+            resource.get("type"),
+        )
+        _ip_lookups_inflight[vmid] = future
+    # 在鎖外註冊：已完成的 future 會在目前執行緒立即執行 callback
+    future.add_done_callback(lambda f: _forget_ip_lookup(vmid, f))
+    return future
+
+
+def _forget_ip_lookup(vmid: int, future: Future) -> None:
+    with _ip_lookup_pool_lock:
+        if _ip_lookups_inflight.get(vmid) is future:
+            del _ip_lookups_inflight[vmid]
+
+
+def _ip_lookup_result(vmid: int, future: Future) -> str | None:
+    """取出查詢結果並更新 miss 記錄；失敗視為查無 IP。"""
+    try:
+        ip_address = future.result()
+    except Exception:
+        logger.debug("IP lookup failed for vmid=%s", vmid, exc_info=True)
+        ip_address = None
     if ip_address:
-        if session is not None:
-            try:
-                resource_repo.update_ip_address(
-                    session=session, vmid=vmid, ip_address=ip_address
-                )
-            except Exception:
-                session.rollback()
-                logger.warning(
-                    "Failed to update cached IP address for vmid=%s ip_address=%s",
-                    vmid,
-                    ip_address,
-                    exc_info=True,
-                )
+        _ip_lookup_misses.pop(vmid, None)
     else:
-        # VM 離線時用 DB 快取
-        if db_resource and db_resource.ip_address:
-            ip_address = db_resource.ip_address
+        _ip_lookup_misses[vmid] = time.monotonic()
+    return ip_address
+
+
+def _store_late_ip_lookup(vmid: int, future: Future) -> None:
+    """逾時後才完成的查詢：結果直接寫回 DB 快取，下次列表不必再查。"""
+    if future.cancelled():
+        return
+    ip_address = _ip_lookup_result(vmid, future)
+    if not ip_address:
+        return
+    try:
+        with Session(engine) as session:
+            resource_repo.bulk_update_ip_addresses(
+                session=session, ip_addresses={vmid: ip_address}, cached_at=_utc_now()
+            )
+            session.commit()
+    except Exception:
+        logger.warning("Failed to cache late IP address for vmid=%s", vmid, exc_info=True)
+
+
+def _lookup_ip_addresses(resources: list[dict]) -> dict[int, str]:
+    """並行查詢多台 VM 的 IP；逾時或查無結果的 VM 不會出現在回傳值中。
+
+    逾時的查詢：尚未開始的直接取消，執行中的先記為 miss（TTL 內不再查），
+    之後完成時由 callback 寫回快取。
+    """
+    if not resources:
+        return {}
+    futures = {_ip_lookup_future(r): r.get("vmid") for r in resources}
+    done, not_done = wait(futures, timeout=settings.RESOURCE_IP_LOOKUP_TIMEOUT)
+    if not_done:
+        logger.info(
+            "IP lookup timed out for %d of %d resources; using cached addresses",
+            len(not_done),
+            len(futures),
+        )
+        missed_at = time.monotonic()
+        for future in not_done:
+            vmid = futures[future]
+            if future.cancel():
+                continue
+            _ip_lookup_misses[vmid] = missed_at
+            future.add_done_callback(lambda f, vmid=vmid: _store_late_ip_lookup(vmid, f))
+
+    found: dict[int, str] = {}
+    for future in done:
+        vmid = futures[future]
+        ip_address = _ip_lookup_result(vmid, future)
+        if ip_address:
+            found[vmid] = ip_address
+    return found
+
+
+def _build_resource_public(
+    resource: dict, db_resource, node: str, vm_type: str,
+    ip_address: str | None,
+) -> ResourcePublic:
+    if not ip_address and db_resource and db_resource.ip_address:
+        # VM 離線或查詢逾時時用 DB 快取
+        ip_address = db_resource.ip_address
     return ResourcePublic(
         vmid=resource.get("vmid"),
         name=_from_punycode_hostname(resource.get("name", "")),
@@ -116,35 +238,72 @@ def _build_resource_public(
     )
 
 
+def _build_resource_publics(
+    *, session: Session, resources: list[dict], db_resources: dict[int, object]
+) -> list[ResourcePublic]:
+    """合併 Proxmox 與 DB 資料：IP 並行查詢，變更的快取一次批次寫回。"""
+    now = _utc_now()
+    ip_addresses = _lookup_ip_addresses(
+        [r for r in resources if _needs_ip_lookup(r, db_resources.get(r.get("vmid")), now)]
+    )
+    result = [
+        _build_resource_public(
+            r,
+            db_resources.get(r.get("vmid")),
+            r.get("node"),
+            r.get("type"),
+            ip_addresses.get(r.get("vmid")),
+        )
+        for r in resources
+    ]
+
+    cache_updates = {
+        vmid: ip for vmid, ip in ip_addresses.items() if vmid in db_resources
+    }
+    if cache_updates:
+        try:
+            resource_repo.bulk_update_ip_addresses(
+                session=session, ip_addresses=cache_updates, cached_at=now
+            )
+            session.commit()
+        except Exception:
+            session.rollback()
+            logger.warning(
+                "Failed to update cached IP addresses for vmids=%s",
+                sorted(cache_updates),
+                exc_info=True,
+            )
+    return result
+
+
 def get_by_vmid(
     *, session: Session, vmid: int, resource_info: dict,
 ) -> ResourcePublic:
     """Get a single resource with merged Proxmox + DB data."""
-    vm_type = resource_info.get("type", "")
-    vm_node = resource_info.get("node", "")
     db_resource = resource_repo.get_resource_by_vmid(session=session, vmid=vmid)
-    return _build_resource_public(resource_info, db_resource, vm_node, vm_type, session)
+    resource = {"vmid": vmid, **resource_info}
+    return _build_resource_publics(
+        session=session,
+        resources=[resource],
+        db_resources={vmid: db_resource} if db_resource else {},
+    )[0]
 
 
 def list_all(
     *, session: Session, node: str | None = None
 ) -> list[ResourcePublic]:
     try:
-        resources = proxmox_service.list_all_resources()
-        result = []
-        for r in resources:
-            if (node and r.get("node") != node) or r.get("template") == 1:
-                continue
-            vmid = r.get("vmid")
-            vm_type = r.get("type")
-            vm_node = r.get("node")
-            db_resource = resource_repo.get_resource_by_vmid(
-                session=session, vmid=vmid
-            )
-            result.append(
-                _build_resource_public(r, db_resource, vm_node, vm_type, session)
-            )
-        return result
+        resources = [
+            r
+            for r in proxmox_service.list_all_resources()
+            if not ((node and r.get("node") != node) or r.get("template") == 1)
+        ]
+        db_resources = resource_repo.get_resources_by_vmids(
+            session=session, vmids=[r.get("vmid") for r in resources]
+        )
+        return _build_resource_publics(
+            session=session, resources=resources, db_resources=db_resources
+        )
     except Exception as e:
         logger.error(f"Failed to get resources: {e}")
         raise ProxmoxError(f"Failed to get resources: {e}")
@@ -161,22 +320,14 @@ def list_by_user(
             return []
 
         owned_vmids = {r.vmid: r for r in user_resources}
-        resources = proxmox_service.list_all_resources()
-        result = []
-        for r in resources:
-            if r.get("template") == 1:
-                continue
-            vmid = r.get("vmid")
-            if vmid not in owned_vmids:
-                continue
-            vm_type = r.get("type")
-            vm_node = r.get("node")
-            result.append(
-                _build_resource_public(
-                    r, owned_vmids[vmid], vm_node, vm_type, session
-                )
-            )
-        return result
+        resources = [
+            r
+            for r in proxmox_service.list_all_resources()
+            if r.get("template") != 1 and r.get("vmid") in owned_vmids
+        ]
+        return _build_resource_publics(
+            session=session, resources=resources, db_resources=owned_vmids
+        )
     except Exception as e:
         logger.error(f"Failed to get user resources: {e}")
         raise ProxmoxError(f"Failed to get user resources: {e}")
@@ -291,11 +442,14 @@ def delete(
                 delete_params["destroy-unreferenced-disks"] = 1
 
         proxmox_service.delete_resource(node, vmid, resource_type, **delete_params)
+        gpu_usage_index.remove_vm(vmid)
 
         # Clean up reverse proxy rules and Cloudflare DNS records for this VM
         try:
             from app.services.network import reverse_proxy_service  # noqa: PLC0415
-            reverse_proxy_service.remove_reverse_proxy_rules_for_vmid(session, vmid)
+            reverse_proxy_service.remove_reverse_proxy_rules_for_vmid(
+                session, vmid, wait=False
+            )
         except Exception as exc:
             logger.warning("Failed to clean up reverse proxy rules for VM %s: %s", vmid, exc)
 
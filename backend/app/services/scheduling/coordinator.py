@@ -8,6 +8,7 @@ from datetime import datetime
 
 from sqlmodel import Session, select
 
+from app.core.config import settings
 from app.core.db import engine
 from app.domain.scheduling.models import ScheduledTask
 from app.domain.scheduling.runner import run_polling_scheduler
@@ -1130,28 +1131,61 @@ def process_due_request_stops() -> int:
     return stopped_count
 
 
+# 每個任務各自的間隔、逾時與 lane：開機批次或搬移再平衡變慢時，
+# 只會延遲同一個 lane 的任務，不會拖住 auto-stop 與刪除。
+# 啟動 / 停止同一批 VMRequest，放在同一個 lane 維持原本的先後順序。
+_REQUEST_WINDOW_LANE = "request_windows"
+
+
+def _scheduled_tasks() -> list[ScheduledTask]:
+    return [
+        ScheduledTask(
+            name="process_due_request_starts",
+            handler=process_due_request_starts,
+            interval_seconds=SCHEDULER_POLL_SECONDS,
+            timeout_seconds=settings.SCHEDULER_REQUEST_STARTS_TIMEOUT_SECONDS,
+            lane=_REQUEST_WINDOW_LANE,
+        ),
+        ScheduledTask(
+            name="process_due_request_stops",
+            handler=process_due_request_stops,
+            interval_seconds=SCHEDULER_POLL_SECONDS,
+            timeout_seconds=settings.SCHEDULER_REQUEST_STOPS_TIMEOUT_SECONDS,
+            lane=_REQUEST_WINDOW_LANE,
+        ),
+        ScheduledTask(
+            name="process_pending_deletions",
+            handler=process_pending_deletions_task,
+            interval_seconds=settings.SCHEDULER_DELETIONS_INTERVAL_SECONDS,
+            timeout_seconds=settings.SCHEDULER_DELETIONS_TIMEOUT_SECONDS,
+        ),
+        ScheduledTask(
+            name="process_recurrence_windows",
+            handler=recurrence_scheduler.process_recurrence_windows,
+            interval_seconds=SCHEDULER_POLL_SECONDS,
+            timeout_seconds=settings.SCHEDULER_RECURRENCE_WINDOWS_TIMEOUT_SECONDS,
+        ),
+        ScheduledTask(
+            name="process_scheduled_boot",
+            handler=recurrence_scheduler.process_scheduled_boot,
+            interval_seconds=SCHEDULER_POLL_SECONDS,
+            timeout_seconds=settings.SCHEDULER_BOOT_TIMEOUT_SECONDS,
+        ),
+        ScheduledTask(
+            name="process_auto_stops",
+            handler=recurrence_scheduler.process_auto_stops,
+            interval_seconds=settings.SCHEDULER_AUTO_STOPS_INTERVAL_SECONDS,
+            timeout_seconds=settings.SCHEDULER_AUTO_STOPS_TIMEOUT_SECONDS,
+        ),
+    ]
+
+
 async def run_scheduler(stop_event: asyncio.Event) -> None:
     logger.info("VM request scheduler is running")
     await run_polling_scheduler(
         stop_event=stop_event,
         interval_seconds=SCHEDULER_POLL_SECONDS,
-        tasks=[
-            ScheduledTask(name="process_due_request_starts", handler=process_due_request_starts),
-            ScheduledTask(name="process_due_request_stops", handler=process_due_request_stops),
-            ScheduledTask(name="process_pending_deletions", handler=process_pending_deletions_task),
-            ScheduledTask(
-                name="process_recurrence_windows",
-                handler=recurrence_scheduler.process_recurrence_windows,
-            ),
-            ScheduledTask(
-                name="process_scheduled_boot",
-                handler=recurrence_scheduler.process_scheduled_boot,
-            ),
-            ScheduledTask(
-                name="process_auto_stops",
-                handler=recurrence_scheduler.process_auto_stops,
-            ),
-        ],
+        tasks=_scheduled_tasks(),
     )
     logger.info("VM request scheduler stopped")
 
@@ -9,16 +9,18 @@ scheduler. Stored fields on ``VMRequest`` / ``BatchProvisionJob``:
 
 Window computation is timezone-aware: the RRULE start is anchored at
 ``00:00`` of *today* in the requested timezone, then advanced via
-``dateutil.rrule``. Returned datetimes are UTC-aware.
+``dateutil.rrule``. Returned datetimes are UTC-aware. Each distinct rule
+string is parsed once; later calls re-anchor the cached ``rrule``.
 """
 
 from __future__ import annotations
 
 from dataclasses import dataclass
 from datetime import UTC, datetime, timedelta
+from functools import lru_cache
 from zoneinfo import ZoneInfo
 
-from dateutil.rrule import rrulestr
+from dateutil.rrule import rrule, rrulestr
 from sqlmodel import Session
 
 from app.repositories import proxmox_config as proxmox_config_repo
@@ -92,7 +94,11 @@ def compute_next_window(
     # intended time-of-day.
     dtstart = after_local.replace(hour=0, minute=0, second=0, microsecond=0)
 
-    rule_set = rrulestr(rule, dtstart=dtstart)
+    parsed = _parse_rule(rule)
+    if parsed is not None:
+        rule_set = parsed.replace(dtstart=dtstart)
+    else:
+        rule_set = rrulestr(rule, dtstart=dtstart)
     occurrence = rule_set.after(after_local, inc=True)
     if occurrence is None:
         return None
@@ -103,6 +109,21 @@ def compute_next_window(
     return start_utc, end_utc
 
 
+# Parse-time anchor only; compute_next_window swaps in the real dtstart.
+# It must be tz-aware so UNTIL is validated exactly as with the real anchor.
+_PARSE_ANCHOR = datetime(2000, 1, 1, tzinfo=UTC)
+
+
+@lru_cache(maxsize=1024)
+def _parse_rule(rule: str) -> rrule | None:
+    """Parse ``rule`` once. ``None`` for rules that cannot be re-anchored
+    (their own ``DTSTART``, or anything that parses to an ``rruleset``)."""
+    if "DTSTART" in rule.upper():
+        return None
+    parsed = rrulestr(rule, dtstart=_PARSE_ANCHOR)
+    return parsed if isinstance(parsed, rrule) else None
+
+
 def is_in_window(
     window_start: datetime | None,
     window_end: datetime | None,
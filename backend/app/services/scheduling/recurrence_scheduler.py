@@ -2,36 +2,50 @@
 
 These are registered alongside the existing migration handlers in
 :func:`app.services.scheduling.coordinator.run_scheduler`. Each handler
-runs once per tick (default 60s) inside a worker thread.
+runs on its own interval; the sync ones inside a worker thread.
 
 Three handlers:
 
 - :func:`process_recurrence_windows` — Recompute ``next_window_start/end`` for
-  vm_requests with a recurrence rule. Batch jobs reuse this through their
-  member tasks.
+  recurring vm_requests whose window has rolled over. Batch jobs reuse
+  this through their member tasks.
 - :func:`process_scheduled_boot` — For VMs whose next window starts within
-  ``lead_time``, power them on in batches with a sleep between batches.
+  ``lead_time``, power them on in batches with an async sleep between
+  batches, so the wait never holds a worker thread or another task.
   Each booted VM gets ``auto_stop_at = window_end + grace_period``.
 - :func:`process_auto_stops` — Shut down VMs whose ``auto_stop_at`` has elapsed
   (covers both ``window_grace`` and ``practice_quota`` reasons).
+
+Boot and auto-stop read power state from one ``cluster.resources`` call and
+DB rows from one query per tick, send start / shutdown calls in parallel
+(``SCHEDULER_POWER_ACTIONS_PER_NODE`` at a time per node), and write the
+resulting schedule changes and audit entries in one transaction.
 """
 
 from __future__ import annotations
 
+import asyncio
 import logging
-import time
+import uuid
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import UTC, datetime, timedelta
 
 from sqlmodel import Session, select
 
+from app.core.config import settings
 from app.core.db import engine
-from app.models import Resource, VMRequest
+from app.models import VMRequest
 from app.repositories import resource as resource_repo
+from app.repositories import vm_request as vm_request_repo
 from app.services.proxmox import proxmox_service
 from app.services.scheduling.recurrence import (
+    SchedulePolicy,
     compute_next_window,
     get_schedule_policy,
 )
+from app.services.user import audit_service
 
 logger = logging.getLogger(__name__)
 
@@ -41,46 +55,80 @@ def _utc_now() -> datetime:
 
 
 def process_recurrence_windows() -> None:
-    """Refresh ``next_window_start/end`` on every recurring VMRequest.
-
-    A row's window is "stale" when ``next_window_end`` has passed; we then
-    advance to the following occurrence. If no future occurrence exists
-    (RRULE exhausted via UNTIL), the columns are cleared.
+    """Refresh ``next_window_start/end`` on recurring VMRequests that are due.
+
+    A row is due when ``next_window_end`` has passed (or was never set); we
+    then advance to the following occurrence. Only due rows are read, via
+    an indexed query, and rows sharing a rule / duration / timezone (e.g.
+    members of one batch job) share one computation. If no future
+    occurrence exists (RRULE exhausted via UNTIL/COUNT, or unparsable), the
+    columns are cleared and ``recurrence_exhausted_at`` drops the row from
+    the queue.
     """
     now = _utc_now()
     with Session(engine) as session:
-        stmt = select(VMRequest).where(
-            VMRequest.recurrence_rule.isnot(None),  # type: ignore[union-attr]
-        )
-        requests = list(session.exec(stmt).all())
-        updated = 0
-        for req in requests:
-            if req.next_window_end and req.next_window_end > now:
-                continue  # current window still valid
-            window = compute_next_window(
-                rule=req.recurrence_rule or "",
-                duration_minutes=req.recurrence_duration_minutes or 0,
-                timezone=req.schedule_timezone,
-                after=now,
-            )
+        due = vm_request_repo.list_due_recurrence_windows(session=session, now=now)
+        if not due:
+            return
+
+        windows: dict[tuple[str, int, str | None], tuple[datetime, datetime] | None] = {}
+        updates: list[dict] = []
+        for request_id, rule, duration, timezone in due:
+            key = (rule, duration or 0, timezone)
+            if key not in windows:
+                try:
+                    windows[key] = compute_next_window(
+                        rule=rule,
+                        duration_minutes=duration or 0,
+                        timezone=timezone,
+                        after=now,
+                    )
+                except Exception:
+                    logger.exception("Invalid recurrence rule %r; disabling it", rule)
+                    windows[key] = None
+            window = windows[key]
             if window is None:
-                req.next_window_start = None
-                req.next_window_end = None
+                updates.append({
+                    "id": request_id,
+                    "next_window_start": None,
+                    "next_window_end": None,
+                    "recurrence_exhausted_at": now,
+                })
             else:
-                req.next_window_start, req.next_window_end = window
-            session.add(req)
-            updated += 1
-        if updated:
-            session.commit()
-            logger.debug("Refreshed %d recurrence windows", updated)
+                updates.append({
+                    "id": request_id,
+                    "next_window_start": window[0],
+                    "next_window_end": window[1],
+                })
+
+        vm_request_repo.update_recurrence_windows(session=session, windows=updates)
+        session.commit()
+        logger.debug("Refreshed %d recurrence windows", len(updates))
 
 
-def process_scheduled_boot() -> None:
+async def process_scheduled_boot() -> None:
     """Power on resources whose next window is about to start.
 
     Batches are sized by ``scheduled_boot_batch_size`` and separated by
     ``scheduled_boot_batch_interval_seconds`` to avoid hammering Proxmox.
+    DB reads and Proxmox calls run in worker threads; the pause between
+    batches is an ``asyncio.sleep``.
     """
+    targets, policy, grace = await asyncio.to_thread(_load_boot_targets)
+    if not targets:
+        return
+
+    logger.info("Scheduled boot: %d VM(s) to power on", len(targets))
+
+    batches = _chunk(targets, policy.boot_batch_size)
+    for batch_idx, batch in enumerate(batches):
+        await asyncio.to_thread(_boot_batch, batch, grace)
+        # Sleep between batches (skip after final batch).
+        if batch_idx < len(batches) - 1:
+            await asyncio.sleep(policy.boot_batch_interval_seconds)
+
+
+def _load_boot_targets() -> tuple[list[_PowerAction], SchedulePolicy, timedelta]:
     now = _utc_now()
     with Session(engine) as session:
         policy = get_schedule_policy(session=session)
@@ -96,25 +144,49 @@ def process_scheduled_boot() -> None:
             VMRequest.vmid.isnot(None),  # type: ignore[union-attr]
         )
         candidates = list(session.exec(stmt).all())
-        targets = _filter_due_for_boot(session=session, requests=candidates)
+        targets = _filter_due_for_boot(session=session, requests=candidates, grace=grace)
+    return targets, policy, grace
 
-    if not targets:
-        return
 
-    logger.info("Scheduled boot: %d VM(s) to power on", len(targets))
+def _boot_batch(batch: list[_PowerAction], grace: timedelta) -> None:
+    """Start one batch in parallel (bounded per node), then record the
+    grace stops and audit entries in a single transaction."""
+    results = _run_per_node(
+        batch,
+        lambda a: proxmox_service.control(a.node, a.vmid, a.resource_type, "start"),
+    )
+    started: list[_PowerAction] = []
+    for action, error in results:
+        if error is None:
+            started.append(action)
+            logger.info("Scheduled boot triggered: vmid=%s node=%s", action.vmid, action.node)
+        else:
+            logger.error(
+                "Scheduled boot failed for vmid=%s request=%s: %s",
+                action.vmid, action.request_id, error,
+            )
+    if not started:
+        return
 
-    for batch_idx, batch in enumerate(_chunk(targets, policy.boot_batch_size)):
-        for req in batch:
-            try:
-                _boot_one(req=req, window_end=req.next_window_end, grace=grace)
-            except Exception:
-                logger.exception(
-                    "Scheduled boot failed for vmid=%s request=%s",
-                    req.vmid, req.id,
-                )
-        # Sleep between batches (skip after final batch).
-        if batch_idx < (len(targets) - 1) // policy.boot_batch_size:
-            time.sleep(policy.boot_batch_interval_seconds)
+    with Session(engine) as session:
+        resources = resource_repo.get_resources_by_vmids(
+            session=session, vmids=[a.vmid for a in started]
+        )
+        for action in started:
+            resource = resources.get(action.vmid)
+            if resource is not None and action.window_end is not None:
+                resource.auto_stop_at = action.window_end + grace
+                resource.auto_stop_reason = "window_grace"
+                session.add(resource)
+            audit_service.log_action(
+                session=session,
+                user_id=None,
+                vmid=action.vmid,
+                action="resource_start",
+                details=f"Scheduled boot for recurrence window of request {action.request_id}",
+                commit=False,
+            )
+        session.commit()
 
 
 def process_auto_stops() -> None:
@@ -126,32 +198,97 @@ def process_auto_stops() -> None:
     if not due:
         return
 
+    vms = _cluster_vms()
+    if vms is None:
+        # Without the cluster view we cannot tell "gone" from "unreachable";
+        # keep the schedules and retry next tick.
+        logger.warning("Auto-stop skipped: Proxmox cluster resources unavailable")
+        return
+
     logger.info("Auto-stop: %d VM(s) due", len(due))
-    for resource in due:
-        try:
-            _stop_one(resource=resource)
-        except Exception:
-            logger.exception(
-                "Auto-stop failed for vmid=%s reason=%s",
-                resource.vmid, resource.auto_stop_reason,
+    # Already gone from Proxmox, or already off — clear the schedule so we don't loop.
+    cleared = [
+        r.vmid for r in due
+        if vms.get(r.vmid) is None or vms[r.vmid].get("status") != "running"
+    ]
+    actions = [
+        _PowerAction(
+            vmid=r.vmid,
+            node=str(vms[r.vmid]["node"]),
+            resource_type=str(vms[r.vmid]["type"]),
+            reason=r.auto_stop_reason,
+        )
+        for r in due
+        if r.vmid not in cleared
+    ]
+
+    stopped: list[tuple[_PowerAction, str]] = []
+    for action, result in _run_per_node(actions, _shut_down):
+        if isinstance(result, str):
+            stopped.append((action, result))
+        else:
+            logger.error(
+                "Auto-stop failed for vmid=%s reason=%s: %s",
+                action.vmid, action.reason, result,
+            )
+
+    with Session(engine) as session:
+        resources = resource_repo.get_resources_by_vmids(
+            session=session, vmids=cleared + [a.vmid for a, _ in stopped]
+        )
+        for resource in resources.values():
+            resource.auto_stop_at = None
+            resource.auto_stop_reason = None
+            session.add(resource)
+        for action, power_action in stopped:
+            audit_service.log_action(
+                session=session,
+                user_id=None,
+                vmid=action.vmid,
+                action=power_action,
+                details=f"Scheduled auto-stop ({action.reason or 'unknown'})",
+                commit=False,
             )
+        session.commit()
 
 
 # ─── helpers ──────────────────────────────────────────────────────────────────
 
 
+@dataclass(frozen=True)
+class _PowerAction:
+    vmid: int
+    node: str
+    resource_type: str
+    request_id: uuid.UUID | None = None
+    window_end: datetime | None = None
+    reason: str | None = None
+
+
 def _filter_due_for_boot(
     *,
     session: Session,
     requests: list[VMRequest],
-) -> list[VMRequest]:
+    grace: timedelta,
+) -> list[_PowerAction]:
     """Drop requests whose VM is already running or already has a future
-    auto_stop set for this window (idempotency across ticks)."""
-    due: list[VMRequest] = []
+    auto_stop set for this window (idempotency across ticks).
+
+    DB rows come from one IN query and power states from one
+    ``cluster.resources`` read, so the cost no longer grows with one PVE
+    round-trip per candidate.
+    """
+    resources = resource_repo.get_resources_by_vmids(
+        session=session, vmids=[req.vmid for req in requests if req.vmid is not None]
+    )
+    vms = _cluster_vms() or {}
+
+    due: list[_PowerAction] = []
+    grace_stops = 0
     for req in requests:
         if req.vmid is None:
             continue
-        resource = resource_repo.get_resource_by_vmid(session=session, vmid=req.vmid)
+        resource = resources.get(req.vmid)
         if resource is None:
             continue
         # If we already scheduled this window's grace stop, scheduler already
@@ -162,120 +299,95 @@ def _filter_due_for_boot(
             and resource.auto_stop_at >= req.next_window_end
         ):
             continue
+        info = vms.get(req.vmid)
         # Skip if running already (e.g. user manually started it ahead of time).
-        try:
-            status = proxmox_service.get_status(
-                req.actual_node or req.assigned_node or "",
-                req.vmid,
-                _resource_type(req),
+        if info is not None and info.get("status") == "running":
+            # Running but no auto_stop yet — set the grace stop and move on
+            # without re-issuing start.
+            if req.next_window_end is not None:
+                resource.auto_stop_at = req.next_window_end + grace
+                resource.auto_stop_reason = "window_grace"
+                session.add(resource)
+                grace_stops += 1
+            continue
+        node = info["node"] if info is not None else req.actual_node or req.assigned_node
+        if not node:
+            logger.warning("Cannot boot vmid=%s: no node assigned", req.vmid)
+            continue
+        due.append(
+            _PowerAction(
+                vmid=req.vmid,
+                node=str(node),
+                resource_type=str(info["type"]) if info is not None else _resource_type(req),
+                request_id=req.id,
+                window_end=req.next_window_end,
             )
-            if status.get("status") == "running":
-                # Running but no auto_stop yet — set the grace stop and move on
-                # without re-issuing start.
-                _write_window_grace_stop(
-                    session=session, vmid=req.vmid,
-                    window_end=req.next_window_end,
-                    grace_minutes=get_schedule_policy(session=session).window_grace_minutes,
-                )
-                continue
-        except Exception:  # noqa: BLE001 — Proxmox transient errors are common
-            pass
-        due.append(req)
+        )
+    if grace_stops:
+        session.commit()
     return due
 
 
-def _boot_one(
-    *,
-    req: VMRequest,
-    window_end: datetime | None,
-    grace: timedelta,
-) -> None:
-    if req.vmid is None:
-        return
-    node = req.actual_node or req.assigned_node
-    if not node:
-        logger.warning("Cannot boot vmid=%s: no node assigned", req.vmid)
-        return
-    proxmox_service.control(node, req.vmid, _resource_type(req), "start")
-    logger.info("Scheduled boot triggered: vmid=%s node=%s", req.vmid, node)
+def _cluster_vms() -> dict[int, dict] | None:
+    """One pool-scoped ``cluster.resources`` read keyed by vmid; ``None`` when
+    Proxmox cannot be reached."""
+    try:
+        return {int(r["vmid"]): r for r in proxmox_service.list_all_resources()}
+    except Exception:  # noqa: BLE001 — Proxmox transient errors are common
+        logger.warning("Failed to read Proxmox cluster resources", exc_info=True)
+        return None
 
-    if window_end is None:
-        return
-    auto_stop_at = window_end + grace
-    with Session(engine) as session:
-        resource_repo.set_auto_stop(
-            session=session,
-            vmid=req.vmid,
-            auto_stop_at=auto_stop_at,
-            auto_stop_reason="window_grace",
-        )
 
+def _run_per_node(
+    actions: list[_PowerAction],
+    call: Callable[[_PowerAction], object],
+) -> list[tuple[_PowerAction, object]]:
+    """Run ``call`` for every action, at most
+    ``SCHEDULER_POWER_ACTIONS_PER_NODE`` at a time on each node.
 
-def _write_window_grace_stop(
-    *,
-    session: Session,
-    vmid: int,
-    window_end: datetime | None,
-    grace_minutes: int,
-) -> None:
-    if window_end is None:
-        return
-    resource_repo.set_auto_stop(
-        session=session,
-        vmid=vmid,
-        auto_stop_at=window_end + timedelta(minutes=grace_minutes),
-        auto_stop_reason="window_grace",
-    )
-
-
-def _stop_one(*, resource: Resource) -> None:
-    """Try a graceful shutdown first; if the VM is still running after a few
-    seconds, fall back to a hard stop."""
-    info = _resource_info(vmid=resource.vmid)
-    if info is None:
-        # Already gone from Proxmox — clear the schedule so we don't loop.
-        with Session(engine) as session:
-            resource_repo.set_auto_stop(
-                session=session, vmid=resource.vmid,
-                auto_stop_at=None, auto_stop_reason=None,
-            )
-        return
-    node = info["node"]
-    rtype = info["type"]
-    if info.get("status") != "running":
-        # Already off — clear the schedule.
-        with Session(engine) as session:
-            resource_repo.set_auto_stop(
-                session=session, vmid=resource.vmid,
-                auto_stop_at=None, auto_stop_reason=None,
-            )
-        return
+    Returns ``(action, result)`` pairs; ``result`` is the raised exception
+    when the call failed.
+    """
+    by_node: dict[str, list[_PowerAction]] = {}
+    for action in actions:
+        by_node.setdefault(action.node, []).append(action)
+
+    pools = {
+        node: ThreadPoolExecutor(
+            max_workers=max(1, min(settings.SCHEDULER_POWER_ACTIONS_PER_NODE, len(node_actions))),
+            thread_name_prefix=f"power-{node}",
+        )
+        for node, node_actions in by_node.items()
+    }
+    try:
+        futures: dict[Future, _PowerAction] = {
+            pools[action.node].submit(call, action): action for action in actions
+        }
+        results: list[tuple[_PowerAction, object]] = []
+        for future, action in futures.items():
+            try:
+                results.append((action, future.result()))
+            except Exception as exc:  # noqa: BLE001 — reported per VM by the caller
+                results.append((action, exc))
+        return results
+    finally:
+        for pool in pools.values():
+            pool.shutdown(wait=True)
+
+
+def _shut_down(action: _PowerAction) -> str:
+    """Try a graceful shutdown first; fall back to a hard stop. Returns the
+    audit action that succeeded."""
     try:
-        proxmox_service.control(node, resource.vmid, rtype, "shutdown")
-        logger.info("Auto-stop graceful shutdown: vmid=%s", resource.vmid)
+        proxmox_service.control(action.node, action.vmid, action.resource_type, "shutdown")
+        logger.info("Auto-stop graceful shutdown: vmid=%s", action.vmid)
+        return "resource_shutdown"
     except Exception:
         logger.exception(
-            "Graceful shutdown failed; forcing stop for vmid=%s", resource.vmid
+            "Graceful shutdown failed; forcing stop for vmid=%s", action.vmid
         )
-        try:
-            proxmox_service.control(node, resource.vmid, rtype, "stop")
-        except Exception:
-            logger.exception("Hard stop also failed for vmid=%s", resource.vmid)
-            return
-    with Session(engine) as session:
-        resource_repo.set_auto_stop(
-            session=session, vmid=resource.vmid,
-            auto_stop_at=None, auto_stop_reason=None,
-        )
-
-
-def _resource_info(*, vmid: int) -> dict | None:
-    """Locate the resource on Proxmox to discover its node & type."""
-    try:
-        info = proxmox_service.find_resource(vmid)
-    except Exception:
-        return None
-    return info if info else None
+    proxmox_service.control(action.node, action.vmid, action.resource_type, "stop")
+    return "resource_stop"
 
 
 def _resource_type(req: VMRequest) -> str:
@@ -1,22 +1,29 @@
-"""批量建立資源服務 — 包含逐一排隊邏輯"""
+"""批量建立資源服務 — 包含並行排隊與重試邏輯"""
 
 import json
 import logging
 import re
 import threading
+import time
 import uuid
+from collections.abc import Callable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import date
 
+from sqlalchemy.exc import OperationalError
 from sqlmodel import Session
 
+from app.core.config import settings
 from app.core.db import engine
-from app.exceptions import BadRequestError
+from app.core.metrics import BATCH_PROVISION_THROUGHPUT
+from app.exceptions import BadRequestError, ProxmoxError
 from app.models.batch_provision import BatchProvisionJobStatus, BatchProvisionTask
 from app.repositories import batch_provision as bp_repo
 from app.repositories import group as group_repo
 from app.schemas import LXCCreateRequest, VMCreateRequest
 from app.services.network import ip_management_service
-from app.services.proxmox import provisioning_service
+from app.services.proxmox import provisioning_service, proxmox_service
 
 logger = logging.getLogger(__name__)
 
@@ -186,8 +193,39 @@ def start_batch_job(
 # ─── 背景排隊執行 ──────────────────────────────────────────────────────────────
 
 
+class _KeyedSlots:
+    """每個 key（節點或 storage）各自一組有上限的並行名額，跨 job 共用。"""
+
+    def __init__(self, limit: Callable[[], int]) -> None:
+        self._limit = limit
+        self._lock = threading.Lock()
+        self._slots: dict[str, threading.BoundedSemaphore] = {}
+
+    def _semaphore(self, key: str) -> threading.BoundedSemaphore:
+        with self._lock:
+            semaphore = self._slots.get(key)
+            if semaphore is None:
+                semaphore = threading.BoundedSemaphore(max(self._limit(), 1))
+                self._slots[key] = semaphore
+            return semaphore
+
+    @contextmanager
+    def hold(self, key: str) -> Iterator[None]:
+        semaphore = self._semaphore(key)
+        with semaphore:
+            yield
+
+
+_node_slots = _KeyedSlots(lambda: settings.BATCH_PROVISION_PER_NODE_LIMIT)
+_storage_slots = _KeyedSlots(lambda: settings.BATCH_PROVISION_PER_STORAGE_LIMIT)
+
+
 def _run_queue(job_id: uuid.UUID) -> None:
-    """背景執行緒：逐一建立每個成員的資源。"""
+    """背景執行緒：以有上限的並行度建立每個成員的資源。
+
+    並行數受 ``BATCH_PROVISION_MAX_CONCURRENCY`` 限制，同一節點與同一
+    storage 另有各自的上限；失敗的成員會以指數退避重試。
+    """
     with Session(engine) as session:
         bp_repo.update_job_status(
             session=session,
@@ -198,9 +236,31 @@ def _run_queue(job_id: uuid.UUID) -> None:
     with Session(engine) as session:
         tasks = bp_repo.get_pending_tasks(session=session, job_id=job_id)
         task_ids = [t.id for t in tasks]
+        job = bp_repo.get_job(session=session, job_id=job_id)
+        if job is None:
+            return
+        resource_type = job.resource_type
+        params = json.loads(job.template_params)
 
-    for task_id in task_ids:
-        _process_task(job_id=job_id, task_id=task_id)
+    node, storage = _placement_keys(resource_type, params)
+    if task_ids:
+        workers = max(min(settings.BATCH_PROVISION_MAX_CONCURRENCY, len(task_ids)), 1)
+        with ThreadPoolExecutor(
+            max_workers=workers,
+            thread_name_prefix=f"batch-provision-{job_id}",
+        ) as pool:
+            futures = [
+                pool.submit(
+                    _process_task,
+                    job_id=job_id,
+                    task_id=task_id,
+                    node=node,
+                    storage=storage,
+                )
+                for task_id in task_ids
+            ]
+            for future in futures:
+                future.result()
 
     with Session(engine) as session:
         job = bp_repo.get_job(session=session, job_id=job_id)
@@ -212,14 +272,57 @@ def _run_queue(job_id: uuid.UUID) -> None:
             else BatchProvisionJobStatus.completed
         )
         bp_repo.update_job_status(session=session, job_id=job_id, status=final)
+        session.refresh(job)
+        if job.throughput_per_minute is not None:
+            BATCH_PROVISION_THROUGHPUT.labels(resource_type=job.resource_type).set(
+                job.throughput_per_minute
+            )
         logger.info(
-            "Batch provision job %s finished: done=%d failed=%d",
-            job_id, job.done, job.failed_count,
+            "Batch provision job %s finished: done=%d failed=%d throughput=%s/min",
+            job_id, job.done, job.failed_count, job.throughput_per_minute,
         )
 
 
-def _process_task(*, job_id: uuid.UUID, task_id: uuid.UUID) -> None:
-    """執行單一成員的建立，並更新 task / job 計數。"""
+def _placement_keys(resource_type: str, params: dict) -> tuple[str, str]:
+    """預估成員會落在哪個節點與 storage，作為並行限制的 key。
+
+    與 provisioning_service 的選點一致：VM 跟著範本所在節點，LXC 使用
+    預設節點。查詢失敗時退回單一共用 key，仍受上限保護。
+    """
+    storage = params.get("storage") or "local-lvm"
+    try:
+        if resource_type == "lxc":
+            node = proxmox_service.pick_target_node()
+        else:
+            node = proxmox_service.find_vm_template(params["template_id"])["node"]
+    except Exception as exc:
+        logger.warning("Unable to resolve batch target node: %s", exc)
+        node = "unknown"
+    return node, f"{node}/{storage}"
+
+
+# 只有暫時性錯誤才重試：PVE 呼叫失敗、連線中斷、逾時。參數驗證
+# （ValidationError / KeyError）、權限、IP 耗盡等錯誤每次都會以相同方式失敗。
+_RETRYABLE_ERRORS: tuple[type[Exception], ...] = (
+    ProxmoxError,
+    ConnectionError,
+    TimeoutError,
+    OperationalError,
+)
+
+
+def _is_retryable(exc: Exception) -> bool:
+    return isinstance(exc, _RETRYABLE_ERRORS)
+
+
+def _process_task(
+    *,
+    job_id: uuid.UUID,
+    task_id: uuid.UUID,
+    node: str,
+    storage: str,
+) -> None:
+    """執行單一成員的建立（含重試），並更新 task / job 計數。"""
     # 讀取必要資訊
     with Session(engine) as session:
         task = session.get(BatchProvisionTask, task_id)
@@ -234,33 +337,56 @@ def _process_task(*, job_id: uuid.UUID, task_id: uuid.UUID) -> None:
         resource_type = job.resource_type
         hostname = _build_hostname(job.hostname_prefix, member_index)
 
-    with Session(engine) as session:
-        bp_repo.update_task_running(session=session, task_id=task_id)
-
-    try:
-        with Session(engine) as session:
-            vmid = _provision_one(
-                session=session,
-                resource_type=resource_type,
-                hostname=hostname,
-                user_id=user_id,
-                params=params,
+    max_attempts = max(settings.BATCH_PROVISION_MAX_ATTEMPTS, 1)
+    for attempt in range(1, max_attempts + 1):
+        # 固定先取節點再取 storage 名額，避免互相等待
+        with _node_slots.hold(node), _storage_slots.hold(storage):
+            with Session(engine) as session:
+                bp_repo.update_task_running(session=session, task_id=task_id)
+            try:
+                with Session(engine) as session:
+                    vmid = _provision_one(
+                        session=session,
+                        resource_type=resource_type,
+                        hostname=hostname,
+                        user_id=user_id,
+                        params=params,
+                    )
+            except Exception as exc:
+                error = exc
+            else:
+                with Session(engine) as session:
+                    bp_repo.update_task_done(session=session, task_id=task_id, vmid=vmid)
+                    bp_repo.increment_job_done(session=session, job_id=job_id)
+                logger.info(
+                    "Batch task %s done: vmid=%d user=%s attempt=%d",
+                    task_id, vmid, user_id, attempt,
+                )
+                return
+
+        error_msg = str(error)[:500]
+        if attempt < max_attempts and _is_retryable(error):
+            delay = settings.BATCH_PROVISION_RETRY_BACKOFF_SECONDS * 2 ** (attempt - 1)
+            with Session(engine) as session:
+                bp_repo.update_task_retrying(
+                    session=session,
+                    task_id=task_id,
+                    error=f"第 {attempt} 次嘗試失敗，{delay:.0f} 秒後重試：{error_msg}",
+                )
+            logger.warning(
+                "Batch task %s attempt %d failed user=%s, retrying in %.1fs: %s",
+                task_id, attempt, user_id, delay, error_msg,
             )
+            time.sleep(delay)
+            continue
 
-        with Session(engine) as session:
-            bp_repo.update_task_done(session=session, task_id=task_id, vmid=vmid)
-            bp_repo.increment_job_done(session=session, job_id=job_id)
-
-        logger.info("Batch task %s done: vmid=%d user=%s", task_id, vmid, user_id)
-
-    except Exception as exc:
-        error_msg = str(exc)[:500]
         with Session(engine) as session:
             bp_repo.update_task_failed(
                 session=session, task_id=task_id, error=error_msg
             )
             bp_repo.increment_job_failed(session=session, job_id=job_id)
         logger.error("Batch task %s failed user=%s: %s", task_id, user_id, error_msg)
+        return
 
 
 def _provision_one(
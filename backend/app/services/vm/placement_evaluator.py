@@ -0,0 +1,391 @@
+from __future__ import annotations
+
+import uuid
+from dataclasses import dataclass, replace
+
+from app.ai.pve_advisor import recommendation_service as advisor_service
+from app.ai.pve_advisor.schemas import NodeCapacity
+from app.domain.placement import scorer as placement_scorer
+from app.domain.placement.models import (
+    AssignmentEvaluation,
+    PlacementContext,
+    WorkingStoragePool,
+)
+from app.domain.placement.storage import (
+    reserve_storage_pool,
+    select_best_storage_for_request,
+)
+from app.models import VMRequest
+from app.services.vm import placement_support
+
+INFEASIBLE_OBJECTIVE: tuple[float, ...] = (
+    float("inf"),
+    float("inf"),
+    10**9,
+    float("inf"),
+    float("inf"),
+    float("inf"),
+)
+
+
+@dataclass(frozen=True)
+class _GroupResult:
+    feasible: bool
+    node_scores: dict[str, float]
+    storage_penalties: dict[str, float]
+    # request index -> (contention_penalty, speed_rank, user_priority)
+    request_storage: dict[int, tuple[float, int, int]]
+
+
+class IncrementalAssignmentEvaluator:
+    """Score assignment maps by replaying only the nodes a change touches.
+
+    Nodes are partitioned into groups that share no state: without managed
+    storage every node is its own group, otherwise nodes attached to the same
+    shared storage pool are merged. Each group's result only depends on the
+    ordered requests assigned to it, so a move or swap replays the affected
+    groups and reuses the cached result of every other group. Objective sums
+    are taken in the same order as a full evaluation, so ``score`` returns the
+    exact tuple that ``_evaluate_active_assignment_map`` would.
+    """
+
+    def __init__(
+        self,
+        *,
+        context: PlacementContext,
+        ordered_requests: list[VMRequest],
+        baseline_nodes: list[NodeCapacity],
+        allowed_target_nodes_by_request: dict[uuid.UUID, set[str]] | None = None,
+        max_migrations: int | None = None,
+    ) -> None:
+        self._requests = list(ordered_requests)
+        self._requirements = [
+            placement_support.requirements_for(context, item) for item in self._requests
+        ]
+        self._current_nodes = [
+            placement_support.provisioned_current_node(item) for item in self._requests
+        ]
+        self._index_by_id = {item.id: index for index, item in enumerate(self._requests)}
+        self._baseline_by_node = {item.node: item for item in baseline_nodes}
+        self._node_names = list(self._baseline_by_node)
+        (
+            self._storage_pools_by_node,
+            self._has_managed_storage,
+        ) = placement_support.context_storage_pool_state(
+            context,
+            node_names=self._node_names,
+        )
+        self._disk_overcommit_ratio = context.disk_overcommit_ratio
+        self._priorities = context.priorities
+        self._tuning = context.tuning
+        self._allowed_targets = allowed_target_nodes_by_request or {}
+        self._max_migrations = max_migrations
+
+        self._group_of: dict[str, int] = {}
+        self._groups: list[list[str]] = []
+        self._build_groups()
+
+        self._assignments: dict[uuid.UUID, str] = {}
+        self._invalid: set[int] = set()
+        self._members: dict[int, list[int]] = {}
+        self._results: dict[int, _GroupResult] = {}
+        self._movement_count = 0
+        self._priority_total = 0
+
+    @property
+    def assignments(self) -> dict[uuid.UUID, str]:
+        return dict(self._assignments)
+
+    def _build_groups(self) -> None:
+        parent = {name: name for name in self._node_names}
+
+        def find(name: str) -> str:
+            while parent[name] != name:
+                parent[name] = parent[parent[name]]
+                name = parent[name]
+            return name
+
+        if self._has_managed_storage:
+            owner_by_pool: dict[int, str] = {}
+            for node_name in self._node_names:
+                for pool in self._storage_pools_by_node.get(node_name, []):
+                    owner = owner_by_pool.setdefault(id(pool), node_name)
+                    parent[find(node_name)] = find(owner)
+
+        roots: dict[str, int] = {}
+        for node_name in self._node_names:
+            group_id = roots.setdefault(find(node_name), len(self._groups))
+            if group_id == len(self._groups):
+                self._groups.append([])
+            self._groups[group_id].append(node_name)
+            self._group_of[node_name] = group_id
+
+    def _target_is_valid(self, index: int, target_node: str | None) -> bool:
+        if not target_node:
+            return False
+        request_id = self._requests[index].id
+        allowed_targets = self._allowed_targets.get(request_id)
+        if allowed_targets is not None and target_node not in allowed_targets:
+            return False
+        return target_node in self._baseline_by_node
+
+    def _moved(self, index: int, target_node: str) -> int:
+        return int(self._current_nodes[index] not in {None, target_node})
+
+    def _replay_group(
+        self,
+        group_id: int,
+        request_indices: list[int],
+        assignments: dict[uuid.UUID, str],
+    ) -> _GroupResult:
+        group_nodes = self._groups[group_id]
+        nodes = {
+            name: self._baseline_by_node[name].model_copy(deep=True)
+            for name in group_nodes
+        }
+        pool_copies: dict[int, WorkingStoragePool] = {}
+        pools_by_node = {
+            name: [
+                pool_copies.setdefault(id(pool), replace(pool))
+                for pool in self._storage_pools_by_node.get(name, [])
+            ]
+            for name in group_nodes
+        }
+        request_storage: dict[int, tuple[float, int, int]] = {}
+
+        for index in request_indices:
+            requirement = self._requirements[index]
+            target_node = assignments[self._requests[index].id]
+            node = nodes[target_node]
+            if not node.candidate or not advisor_service._can_fit(
+                node,
+                cores=requirement.cpu_cores,
+                memory_bytes=requirement.memory_bytes,
+                disk_bytes=requirement.disk_bytes,
+                gpu_required=requirement.gpu_required,
+            ):
+                return _GroupResult(False, {}, {}, {})
+
+            storage_selection = None
+            if self._has_managed_storage:
+                storage_selection = select_best_storage_for_request(
+                    storage_pools=pools_by_node.get(target_node, []),
+                    resource_type=requirement.resource_type,
+                    disk_gb=requirement.disk_gb,
+                    disk_overcommit_ratio=self._disk_overcommit_ratio,
+                    tuning=self._tuning,
+                )
+                if storage_selection is None:
+                    return _GroupResult(False, {}, {}, {})
+
+            placement_support.reserve_capacity_on_node(
+                node,
+                cpu_cores=requirement.reserved_cpu_cores,
+                memory_bytes=requirement.reserved_memory_bytes,
+                disk_bytes=requirement.reserved_disk_bytes,
+            )
+            if storage_selection is not None:
+                reserve_storage_pool(
+                    selection=storage_selection,
+                    disk_gb=requirement.disk_gb,
+                    disk_overcommit_ratio=self._disk_overcommit_ratio,
+                )
+                request_storage[index] = (
+                    storage_selection.contention_penalty,
+                    storage_selection.speed_rank,
+                    storage_selection.user_priority,
+                )
+
+        return _GroupResult(
+            feasible=True,
+            node_scores={
+                name: placement_scorer.node_balance_score(node, tuning=self._tuning)
+                for name, node in nodes.items()
+            },
+            storage_penalties={
+                name: sum(
+                    placement_scorer.storage_contention_penalty(
+                        projected_share=placement_scorer.projected_share(
+                            used=max(pool.total_gb - pool.avail_gb, 0.0),
+                            total=max(pool.total_gb, 1.0),
+                        ),
+                        placed_count=pool.placed_count,
+                        overcommit_placed_count=pool.overcommit_placed_count,
+                        tuning=self._tuning,
+                        overcommit=pool.overcommit_placed_count > 0,
+                    )
+                    for pool in pools_by_node.get(name, [])
+                )
+                for name in group_nodes
+            },
+            request_storage=request_storage,
+        )
+
+    def load(self, assignments: dict[uuid.UUID, str]) -> AssignmentEvaluation:
+        """Replay every group for ``assignments`` and make it the current state."""
+        self._assignments = dict(assignments)
+        self._invalid = set()
+        self._members = {group_id: [] for group_id in range(len(self._groups))}
+        self._movement_count = 0
+        self._priority_total = 0
+        for index, request in enumerate(self._requests):
+            target_node = self._assignments.get(request.id)
+            if not self._target_is_valid(index, target_node):
+                self._invalid.add(index)
+                continue
+            self._members[self._group_of[target_node]].append(index)
+            self._movement_count += self._moved(index, target_node)
+            self._priority_total += self._priorities.get(target_node, 5)
+        self._results = {
+            group_id: self._replay_group(group_id, members, self._assignments)
+            for group_id, members in self._members.items()
+        }
+        return self._compose(
+            invalid=self._invalid,
+            results=self._results,
+            movement_count=self._movement_count,
+            priority_total=self._priority_total,
+        )
+
+    def _trial(
+        self,
+        changes: dict[uuid.UUID, str],
+    ) -> tuple[
+        dict[uuid.UUID, str],
+        set[int],
+        dict[int, list[int]],
+        dict[int, _GroupResult],
+        int,
+        int,
+    ]:
+        trial_assignments = dict(self._assignments)
+        trial_assignments.update(changes)
+        invalid = set(self._invalid)
+        movement_count = self._movement_count
+        priority_total = self._priority_total
+        leaving: dict[int, set[int]] = {}
+        joining: dict[int, set[int]] = {}
+
+        for request_id, target_node in changes.items():
+            index = self._index_by_id.get(request_id)
+            if index is None:
+                continue
+            previous_node = self._assignments.get(request_id)
+            if index not in self._invalid and previous_node is not None:
+                leaving.setdefault(self._group_of[previous_node], set()).add(index)
+                movement_count -= self._moved(index, previous_node)
+                priority_total -= self._priorities.get(previous_node, 5)
+            invalid.discard(index)
+            if not self._target_is_valid(index, target_node):
+                invalid.add(index)
+                continue
+            joining.setdefault(self._group_of[target_node], set()).add(index)
+            movement_count += self._moved(index, target_node)
+            priority_total += self._priorities.get(target_node, 5)
+
+        members = dict(self._members)
+        results = dict(self._results)
+        for group_id in set(leaving) | set(joining):
+            group_members = sorted(
+                (set(self._members[group_id]) - leaving.get(group_id, set()))
+                | joining.get(group_id, set())
+            )
+            members[group_id] = group_members
+            if invalid:
+                # The trial is infeasible regardless of this group's replay.
+                continue
+            results[group_id] = self._replay_group(
+                group_id,
+                group_members,
+                trial_assignments,
+            )
+        return trial_assignments, invalid, members, results, movement_count, priority_total
+
+    def score(self, changes: dict[uuid.UUID, str]) -> AssignmentEvaluation:
+        """Evaluate the current state with ``changes`` applied, without keeping them."""
+        _, invalid, _, results, movement_count, priority_total = self._trial(changes)
+        return self._compose(
+            invalid=invalid,
+            results=results,
+            movement_count=movement_count,
+            priority_total=priority_total,
+        )
+
+    def apply(self, changes: dict[uuid.UUID, str]) -> AssignmentEvaluation:
+        """Commit ``changes`` to the current state and return its evaluation."""
+        (
+            self._assignments,
+            self._invalid,
+            self._members,
+            self._results,
+            self._movement_count,
+            self._priority_total,
+        ) = self._trial(changes)
+        if self._invalid:
+            return self.load(self._assignments)
+        return self._compose(
+            invalid=self._invalid,
+            results=self._results,
+            movement_count=self._movement_count,
+            priority_total=self._priority_total,
+        )
+
+    def _compose(
+        self,
+        *,
+        invalid: set[int],
+        results: dict[int, _GroupResult],
+        movement_count: int,
+        priority_total: int,
+    ) -> AssignmentEvaluation:
+        if invalid or not all(item.feasible for item in results.values()):
+            return AssignmentEvaluation(feasible=False, objective=INFEASIBLE_OBJECTIVE)
+        if self._max_migrations is not None and movement_count > max(
+            self._max_migrations, 0
+        ):
+            return AssignmentEvaluation(feasible=False, objective=INFEASIBLE_OBJECTIVE)
+
+        node_score_map = {
+            name: results[self._group_of[name]].node_scores[name]
+            for name in self._node_names
+        }
+        storage_penalty_total = 0.0
+        storage_speed_rank_total = 0.0
+        storage_user_priority_total = 0.0
+        if self._has_managed_storage:
+            request_storage: dict[int, tuple[float, int, int]] = {}
+            for result in results.values():
+                request_storage.update(result.request_storage)
+            # Accumulate in request order so float rounding matches a full replay.
+            for index in range(len(self._requirements)):
+                penalty, speed_rank, user_priority = request_storage[index]
+                storage_penalty_total += penalty
+                storage_speed_rank_total += float(speed_rank)
+                storage_user_priority_total += float(user_priority)
+
+        max_node_score = max(node_score_map.values(), default=0.0)
+        total_score = (
+            sum(node_score_map.values())
+            + (storage_penalty_total * self._tuning.disk_penalty_weight)
+            + (movement_count * self._tuning.migration_cost)
+        )
+        return AssignmentEvaluation(
+            feasible=True,
+            objective=(
+                max_node_score,
+                total_score,
+                float(priority_total),
+                float(movement_count),
+                storage_speed_rank_total,
+                storage_user_priority_total,
+            ),
+            max_node_score=max_node_score,
+            total_score=total_score,
+            priority_total=float(priority_total),
+            movement_count=movement_count,
+            node_scores=node_score_map,
+            storage_penalties={
+                name: results[self._group_of[name]].storage_penalties[name]
+                for name in self._node_names
+            },
+        )
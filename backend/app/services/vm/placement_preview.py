@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import threading
+from collections.abc import Callable
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from app.core.config import settings
+from app.domain.placement.models import AssignmentEvaluation, PreviewCohort
+from app.services.vm import placement_support
+
+logger = logging.getLogger(__name__)
+
+SolveCandidateFn = Callable[[PreviewCohort, str], AssignmentEvaluation | None]
+
+_BOUND_EPSILON = 1e-9
+
+_executor: ProcessPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # Spawned workers never inherit DB connections or request threads.
+            _executor = ProcessPoolExecutor(
+                max_workers=settings.PLACEMENT_PREVIEW_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _executor
+
+
+def _discard_executor(executor: ProcessPoolExecutor) -> None:
+    global _executor
+    with _executor_lock:
+        if _executor is executor:
+            _executor = None
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _runner_up_objective(
+    results: dict[str, AssignmentEvaluation],
+) -> tuple[float, ...] | None:
+    if len(results) < 2:
+        return None
+    return sorted(item.objective for item in results.values())[1]
+
+
+def _cannot_beat(
+    bound: tuple[float, float],
+    objective: tuple[float, ...] | None,
+) -> bool:
+    if objective is None:
+        return False
+    if bound[0] > objective[0] + _BOUND_EPSILON:
+        return True
+    return bound[0] >= objective[0] and bound[1] > objective[1] + _BOUND_EPSILON
+
+
+def evaluate_preview_candidates(
+    *,
+    cohort: PreviewCohort,
+    candidate_nodes: list[str],
+    solve_candidate_fn: SolveCandidateFn,
+    prune: bool = True,
+) -> dict[str, AssignmentEvaluation]:
+    """Solve ``cohort`` with the preview pinned to each candidate node.
+
+    Candidates are visited in lower-bound order. With ``prune`` set, visiting
+    stops once a bound can no longer beat the runner-up found so far, so the
+    winner and the runner-up used for the preview reasons are always exact.
+    Only feasible evaluations are returned.
+    """
+    requirements = cohort.context.requirements[cohort.preview_request_id]
+    baseline_nodes = list(cohort.baseline_nodes)
+    bounds = {
+        node: placement_support.preview_objective_lower_bound(
+            context=cohort.context,
+            baseline_nodes=baseline_nodes,
+            requirements=requirements,
+            candidate_node=node,
+        )
+        for node in candidate_nodes
+    }
+    ordered_nodes = sorted(candidate_nodes, key=lambda node: (bounds[node], node))
+
+    workers = settings.PLACEMENT_PREVIEW_WORKERS
+    if (
+        workers > 1
+        and len(ordered_nodes) >= settings.PLACEMENT_PREVIEW_PARALLEL_MIN_CANDIDATES
+    ):
+        try:
+            return _evaluate_on_pool(
+                cohort=cohort,
+                ordered_nodes=ordered_nodes,
+                bounds=bounds,
+                solve_candidate_fn=solve_candidate_fn,
+                prune=prune,
+                workers=workers,
+            )
+        except BrokenProcessPool:
+            logger.warning(
+                "Placement preview pool is unavailable; solving candidates in-process"
+            )
+
+    results: dict[str, AssignmentEvaluation] = {}
+    for node in ordered_nodes:
+        if prune and _cannot_beat(bounds[node], _runner_up_objective(results)):
+            break
+        evaluation = solve_candidate_fn(cohort, node)
+        if evaluation is not None:
+            results[node] = evaluation
+    return results
+
+
+def _evaluate_on_pool(
+    *,
+    cohort: PreviewCohort,
+    ordered_nodes: list[str],
+    bounds: dict[str, tuple[float, float]],
+    solve_candidate_fn: SolveCandidateFn,
+    prune: bool,
+    workers: int,
+) -> dict[str, AssignmentEvaluation]:
+    executor = _get_executor()
+    results: dict[str, AssignmentEvaluation] = {}
+    pending: dict[Future[AssignmentEvaluation | None], str] = {}
+    queue = iter(ordered_nodes)
+    exhausted = False
+    try:
+        while True:
+            while not exhausted and len(pending) < workers:
+                node = next(queue, None)
+                if node is None or (
+                    prune and _cannot_beat(bounds[node], _runner_up_objective(results))
+                ):
+                    exhausted = True
+                    break
+                pending[executor.submit(solve_candidate_fn, cohort, node)] = node
+            if not pending:
+                return results
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                node = pending.pop(future)
+                evaluation = future.result()
+                if evaluation is not None:
+                    results[node] = evaluation
+    except BrokenProcessPool:
+        _discard_executor(executor)
+        raise
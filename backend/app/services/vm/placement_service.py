@@ -20,6 +20,9 @@ from app.domain.placement.models import (
 )
 from app.domain.placement.models import (
     NodeScoreBreakdown,
+    PlacementContext,
+    PreviewCohort,
+    RequestRequirements,
 )
 from app.domain.placement.models import (
     PlacementTuning as _PlacementTuning,
@@ -36,11 +39,13 @@ from app.domain.placement.storage import (
 from app.domain.placement.storage import (
     select_best_storage_for_request as _select_best_storage_for_request,
 )
+from app.domain.placement.timeline import CapacityTimeline
 from app.models import VMRequest
 from app.repositories import vm_request as vm_request_repo
 from app.services.scheduling import policy as scheduling_policy
 from app.services.scheduling import support as scheduling_support
-from app.services.vm import placement_support
+from app.services.vm import placement_preview, placement_support
+from app.services.vm.placement_evaluator import IncrementalAssignmentEvaluator
 
 GIB = 1024**3
 _STORAGE_SPEED_RANK = {"nvme": 0, "ssd": 1, "hdd": 2, "unknown": 3}
@@ -85,6 +90,27 @@ def _get_placement_tuning(*, session: Session) -> _PlacementTuning:
     return placement_policy.get_placement_tuning(session=session)
 
 
+def _build_placement_context(
+    *,
+    session: Session,
+    requests: list[VMRequest] | None = None,
+    strategy: str | None = None,
+    priorities: dict[str, int] | None = None,
+    tuning: _PlacementTuning | None = None,
+) -> PlacementContext:
+    return placement_support.build_placement_context(
+        session=session,
+        requests=requests,
+        strategy=strategy,
+        priorities=priorities,
+        tuning=tuning,
+        get_placement_strategy_fn=get_placement_strategy,
+        get_node_priorities_fn=get_node_priorities,
+        get_placement_tuning_fn=_get_placement_tuning,
+        get_overcommit_ratios_fn=get_overcommit_ratios,
+    )
+
+
 def _build_storage_pool_state(
     *,
     session: Session,
@@ -194,20 +220,23 @@ def _reserve_request_on_capacities(
     )
 
 
-def _hour_window_iter(start_at: datetime, end_at: datetime) -> list[datetime]:
-    return placement_support.hour_window_iter(start_at, end_at)
+def _reserve_requirements_on_capacities(
+    *,
+    node_capacities: list[NodeCapacity],
+    requirements: RequestRequirements,
+    node_name: str,
+) -> None:
+    placement_support.reserve_requirements_on_capacities(
+        node_capacities=node_capacities,
+        requirements=requirements,
+        node_name=node_name,
+        refresh_node_candidate_fn=_refresh_node_candidate,
+    )
 
 
-def _apply_reserved_requests_to_capacities(
-    *,
-    baseline_capacities,
-    reserved_requests: list[VMRequest],
-    at_time: datetime,
-):
-    return placement_support.apply_reserved_requests_to_capacities(
-        baseline_capacities=baseline_capacities,
+def _build_capacity_timeline(*, reserved_requests: list[VMRequest]) -> CapacityTimeline:
+    return placement_support.build_capacity_timeline(
         reserved_requests=reserved_requests,
-        at_time=at_time,
         normalize_datetime_fn=_normalize_datetime,
         request_capacity_tuple_fn=_request_capacity_tuple,
     )
@@ -223,6 +252,7 @@ def build_plan(
     placement_strategy: str | None = None,
     node_priorities: dict[str, int] | None = None,
     current_node: str | None = None,
+    context: PlacementContext | None = None,
 ) -> PlacementPlan:
     return placement_support.build_plan(
         session=session,
@@ -233,6 +263,7 @@ def build_plan(
         placement_strategy=placement_strategy,
         node_priorities=node_priorities,
         current_node=current_node,
+        context=context,
         build_storage_pool_state_fn=_build_storage_pool_state,
         get_placement_tuning_fn=_get_placement_tuning,
         get_overcommit_ratios_fn=get_overcommit_ratios,
@@ -247,13 +278,13 @@ def select_current_target_node(
     db_request: VMRequest,
 ) -> CurrentPlacementSelection:
     request = _to_placement_request(db_request)
+    context = _build_placement_context(session=session)
     nodes, resources = advisor_service._load_cluster_state()
-    cpu_overcommit_ratio, disk_overcommit_ratio = get_overcommit_ratios(session)
     node_capacities = advisor_service._build_node_capacities(
         nodes=nodes,
         resources=resources,
-        cpu_overcommit_ratio=cpu_overcommit_ratio,
-        disk_overcommit_ratio=disk_overcommit_ratio,
+        cpu_overcommit_ratio=context.cpu_overcommit_ratio,
+        disk_overcommit_ratio=context.disk_overcommit_ratio,
     )
     effective_resource_type, resource_type_reason = advisor_service._decide_resource_type(
         request
@@ -264,10 +295,11 @@ def select_current_target_node(
         node_capacities=node_capacities,
         effective_resource_type=effective_resource_type,
         resource_type_reason=resource_type_reason,
+        context=context,
     )
     return CurrentPlacementSelection(
         node=plan.recommended_node,
-        strategy=get_placement_strategy(session),
+        strategy=context.strategy,
         plan=plan,
     )
 
@@ -296,14 +328,14 @@ def select_reserved_target_node_for_request(
     end_at: datetime | None,
     reserved_requests: list[VMRequest] | None = None,
 ) -> CurrentPlacementSelection:
+    context = _build_placement_context(session=session)
     if not start_at or not end_at:
         nodes, resources = advisor_service._load_cluster_state()
-        cpu_overcommit_ratio, disk_overcommit_ratio = get_overcommit_ratios(session)
         node_capacities = advisor_service._build_node_capacities(
             nodes=nodes,
             resources=resources,
-            cpu_overcommit_ratio=cpu_overcommit_ratio,
-            disk_overcommit_ratio=disk_overcommit_ratio,
+            cpu_overcommit_ratio=context.cpu_overcommit_ratio,
+            disk_overcommit_ratio=context.disk_overcommit_ratio,
         )
         effective_resource_type, resource_type_reason = (
             advisor_service._decide_resource_type(request)
@@ -314,20 +346,20 @@ def select_reserved_target_node_for_request(
             node_capacities=node_capacities,
             effective_resource_type=effective_resource_type,
             resource_type_reason=resource_type_reason,
+            context=context,
         )
         return CurrentPlacementSelection(
             node=plan.recommended_node,
-            strategy=get_placement_strategy(session),
+            strategy=context.strategy,
             plan=plan,
         )
 
     nodes, resources = advisor_service._load_cluster_state()
-    cpu_overcommit_ratio, disk_overcommit_ratio = get_overcommit_ratios(session)
     baseline_capacities = advisor_service._build_node_capacities(
         nodes=nodes,
         resources=resources,
-        cpu_overcommit_ratio=cpu_overcommit_ratio,
-        disk_overcommit_ratio=disk_overcommit_ratio,
+        cpu_overcommit_ratio=context.cpu_overcommit_ratio,
+        disk_overcommit_ratio=context.disk_overcommit_ratio,
     )
     effective_resource_type, resource_type_reason = advisor_service._decide_resource_type(
         request
@@ -338,44 +370,18 @@ def select_reserved_target_node_for_request(
             window_start=start_at,
             window_end=end_at,
         )
-    checkpoints = [start_at] + [
-        checkpoint
-        for checkpoint in _hour_window_iter(start_at, end_at)
-        if checkpoint != start_at
-    ]
-
-    feasible_nodes = {item.node for item in baseline_capacities}
-    start_capacities = baseline_capacities
-
-    for index, checkpoint in enumerate(checkpoints):
-        adjusted_capacities = _apply_reserved_requests_to_capacities(
-            baseline_capacities=baseline_capacities,
-            reserved_requests=reserved_requests,
-            at_time=checkpoint,
-        )
-        if index == 0:
-            start_capacities = adjusted_capacities
-
-        hour_feasible_nodes = {
-            item.node
-            for item in adjusted_capacities
-            if advisor_service._can_fit(
-                item,
-                cores=advisor_service._effective_cpu_cores(
-                    request, effective_resource_type
-                ),
-                memory_bytes=advisor_service._effective_memory_bytes(
-                    request, effective_resource_type
-                ),
-                disk_bytes=request.disk_gb * GIB,
-                gpu_required=request.gpu_required,
-            )
-        }
-        feasible_nodes &= hour_feasible_nodes
-        if not feasible_nodes:
-            break
+    timeline = _build_capacity_timeline(reserved_requests=reserved_requests)
+    start_capacities = timeline.capacities_at(baseline_capacities, start_at)
+    feasible_nodes = placement_support.reserved_window_feasible_nodes(
+        timeline=timeline,
+        baseline_capacities=baseline_capacities,
+        request=request,
+        effective_resource_type=effective_resource_type,
+        start_at=start_at,
+        end_at=end_at,
+    )
 
-    strategy = get_placement_strategy(session)
+    strategy = context.strategy
     if not feasible_nodes:
         return CurrentPlacementSelection(
             node=None,
@@ -386,8 +392,7 @@ def select_reserved_target_node_for_request(
                 node_capacities=[],
                 effective_resource_type=effective_resource_type,
                 resource_type_reason=resource_type_reason,
-                placement_strategy=strategy,
-                node_priorities=get_node_priorities(session),
+                context=context,
             ),
         )
 
@@ -400,8 +405,7 @@ def select_reserved_target_node_for_request(
         node_capacities=filtered_start_capacities,
         effective_resource_type=effective_resource_type,
         resource_type_reason=resource_type_reason,
-        placement_strategy=strategy,
-        node_priorities=get_node_priorities(session),
+        context=context,
     )
     overlapping_start_requests = [
         item
@@ -434,41 +438,19 @@ def select_reserved_target_node_for_request(
         for item in preview_baseline_nodes
         if item.node in feasible_nodes
     ]
-    priorities = get_node_priorities(session)
-    tuning = _get_placement_tuning(session=session)
-    best_preview_node = plan.recommended_node
-    best_preview_objective: tuple[float, float, float, int] | None = None
-    candidate_evals: dict[str, _AssignmentEvaluation] = {}
-    for candidate_node in sorted(feasible_nodes):
-        try:
-            preview_assignments = _solve_rebalance_assignments(
-                session=session,
-                ordered_requests=preview_ordered_requests,
-                baseline_nodes=preview_baseline_nodes,
-                strategy=strategy,
-                priorities=priorities,
-                tuning=tuning,
-                fixed_assignments={preview_request.id: candidate_node},
-            )
-            preview_eval = _evaluate_active_assignment_map(
-                session=session,
-                ordered_requests=preview_ordered_requests,
-                baseline_nodes=preview_baseline_nodes,
-                assignments=preview_assignments,
-                priorities=priorities,
-                tuning=tuning,
-            )
-        except ValueError:
-            continue
-        if not preview_eval.feasible:
-            continue
-        candidate_evals[candidate_node] = preview_eval
-        if (
-            best_preview_objective is None
-            or preview_eval.objective < best_preview_objective
-        ):
-            best_preview_objective = preview_eval.objective
-            best_preview_node = candidate_node
+    cohort = _build_preview_cohort(
+        context=context,
+        ordered_requests=preview_ordered_requests,
+        baseline_nodes=preview_baseline_nodes,
+        preview_request=preview_request,
+    )
+    priorities = dict(cohort.context.priorities)
+    candidate_evals = placement_preview.evaluate_preview_candidates(
+        cohort=cohort,
+        candidate_nodes=sorted(feasible_nodes),
+        solve_candidate_fn=_solve_preview_candidate,
+    )
+    best_preview_node = _best_preview_node(candidate_evals) or plan.recommended_node
     preview_reasons = (
         _build_preview_selection_reasons(
             selected_node=best_preview_node,
@@ -495,202 +477,144 @@ def select_reserved_target_node_for_request(
     )
 
 
-def _evaluate_active_assignment_map(
+def _build_preview_cohort(
     *,
-    session: Session,
+    context: PlacementContext,
     ordered_requests: list[VMRequest],
     baseline_nodes: list[NodeCapacity],
-    assignments: dict[uuid.UUID, str],
-    priorities: dict[str, int],
-    tuning: _PlacementTuning,
-    allowed_target_nodes_by_request: dict[uuid.UUID, set[str]] | None = None,
-    max_migrations: int | None = None,
-) -> _AssignmentEvaluation:
-    working_nodes = [item.model_copy(deep=True) for item in baseline_nodes]
-    by_node = {item.node: item for item in working_nodes}
-    storage_pools_by_node, has_managed_storage = _build_storage_pool_state(
-        session=session,
-        node_names=[item.node for item in working_nodes],
-    )
-    _, disk_overcommit_ratio = get_overcommit_ratios(session)
-    storage_penalty_total = 0.0
-    priority_total = 0.0
-    movement_count = 0
-    storage_speed_rank_total = 0.0
-    storage_user_priority_total = 0.0
-    _INFEASIBLE_OBJECTIVE: tuple[float, ...] = (
-        float("inf"),
-        float("inf"),
-        10**9,
-        float("inf"),
-        float("inf"),
-        float("inf"),
+    preview_request: VMRequest,
+) -> PreviewCohort:
+    return PreviewCohort(
+        context=placement_support.with_request_requirements(context, ordered_requests),
+        requests=tuple(
+            placement_support.snapshot_cohort_request(item) for item in ordered_requests
+        ),
+        baseline_nodes=tuple(baseline_nodes),
+        preview_request_id=preview_request.id,
     )
 
-    for request in ordered_requests:
-        target_node = assignments.get(request.id)
-        if not target_node:
-            return _AssignmentEvaluation(
-                feasible=False,
-                objective=_INFEASIBLE_OBJECTIVE,
-            )
-        allowed_targets = (allowed_target_nodes_by_request or {}).get(request.id)
-        if allowed_targets is not None and target_node not in allowed_targets:
-            return _AssignmentEvaluation(
-                feasible=False,
-                objective=_INFEASIBLE_OBJECTIVE,
-            )
-        node = by_node.get(target_node)
-        if node is None:
-            return _AssignmentEvaluation(
-                feasible=False,
-                objective=_INFEASIBLE_OBJECTIVE,
-            )
 
-        placement_request = _to_placement_request(request)
-        effective_resource_type, _ = advisor_service._decide_resource_type(
-            placement_request
-        )
-        required_cpu = advisor_service._effective_cpu_cores(
-            placement_request,
-            effective_resource_type,
+def _solve_preview_candidate(
+    cohort: PreviewCohort,
+    candidate_node: str,
+) -> _AssignmentEvaluation | None:
+    # Runs on preview pool workers, so it must stay a picklable module-level function.
+    ordered_requests = list(cohort.requests)
+    baseline_nodes = list(cohort.baseline_nodes)
+    try:
+        assignments = _solve_rebalance_assignments(
+            context=cohort.context,
+            ordered_requests=ordered_requests,
+            baseline_nodes=baseline_nodes,
+            fixed_assignments={cohort.preview_request_id: candidate_node},
         )
-        required_memory = advisor_service._effective_memory_bytes(
-            placement_request,
-            effective_resource_type,
+        evaluation = _evaluate_active_assignment_map(
+            context=cohort.context,
+            ordered_requests=ordered_requests,
+            baseline_nodes=baseline_nodes,
+            assignments=assignments,
         )
-        required_disk = placement_request.disk_gb * GIB
-        if not node.candidate or not advisor_service._can_fit(
-            node,
-            cores=required_cpu,
-            memory_bytes=required_memory,
-            disk_bytes=required_disk,
-            gpu_required=placement_request.gpu_required,
-        ):
-            return _AssignmentEvaluation(
-                feasible=False,
-                objective=_INFEASIBLE_OBJECTIVE,
-            )
+    except ValueError:
+        return None
+    return evaluation if evaluation.feasible else None
 
-        storage_selection: _StorageSelection | None = None
-        if has_managed_storage:
-            storage_selection = _select_best_storage_for_request(
-                storage_pools=storage_pools_by_node.get(target_node, []),
-                resource_type=str(placement_request.resource_type),
-                disk_gb=int(placement_request.disk_gb),
-                disk_overcommit_ratio=disk_overcommit_ratio,
-                tuning=tuning,
-            )
-            if storage_selection is None:
-                return _AssignmentEvaluation(
-                    feasible=False,
-                    objective=_INFEASIBLE_OBJECTIVE,
-                )
 
-        _reserve_request_on_capacities(
-            node_capacities=working_nodes,
-            db_request=request,
-            node_name=target_node,
-        )
-        if storage_selection is not None:
-            _reserve_storage_pool(
-                selection=storage_selection,
-                disk_gb=int(placement_request.disk_gb),
-                disk_overcommit_ratio=disk_overcommit_ratio,
-            )
-            storage_penalty_total += storage_selection.contention_penalty
-            storage_speed_rank_total += float(storage_selection.speed_rank)
-            storage_user_priority_total += float(storage_selection.user_priority)
-        priority_total += float(priorities.get(target_node, 5))
-        if _provisioned_current_node(request) not in {None, target_node}:
-            movement_count += 1
+def _best_preview_node(candidate_evals: dict[str, _AssignmentEvaluation]) -> str | None:
+    if not candidate_evals:
+        return None
+    return min(candidate_evals, key=lambda node: (candidate_evals[node].objective, node))
 
-    if max_migrations is not None and movement_count > max(max_migrations, 0):
-        return _AssignmentEvaluation(
-            feasible=False,
-            objective=_INFEASIBLE_OBJECTIVE,
-        )
 
-    node_score_map = {
-        node.node: _node_balance_score(node, tuning=tuning) for node in working_nodes
-    }
-    max_node_score = max(node_score_map.values(), default=0.0)
-    total_score = (
-        sum(node_score_map.values())
-        + (storage_penalty_total * tuning.disk_penalty_weight)
-        + (movement_count * tuning.migration_cost)
+def _resolve_placement_context(
+    *,
+    context: PlacementContext | None,
+    session: Session | None,
+    ordered_requests: list[VMRequest],
+    priorities: dict[str, int] | None = None,
+    tuning: _PlacementTuning | None = None,
+) -> PlacementContext:
+    if context is not None:
+        return placement_support.with_request_requirements(context, ordered_requests)
+    if session is None:
+        raise ValueError("Either a placement context or a session is required")
+    return _build_placement_context(
+        session=session,
+        requests=ordered_requests,
+        priorities=priorities,
+        tuning=tuning,
     )
-    return _AssignmentEvaluation(
-        feasible=True,
-        objective=(
-            max_node_score,
-            total_score,
-            priority_total,
-            float(movement_count),
-            storage_speed_rank_total,
-            storage_user_priority_total,
+
+
+def _build_assignment_evaluator(
+    *,
+    context: PlacementContext,
+    ordered_requests: list[VMRequest],
+    baseline_nodes: list[NodeCapacity],
+    allowed_target_nodes_by_request: dict[uuid.UUID, set[str]] | None = None,
+    max_migrations: int | None = None,
+) -> IncrementalAssignmentEvaluator:
+    return IncrementalAssignmentEvaluator(
+        context=context,
+        ordered_requests=ordered_requests,
+        baseline_nodes=baseline_nodes,
+        allowed_target_nodes_by_request=allowed_target_nodes_by_request,
+        max_migrations=max_migrations,
+    )
+
+
+def _evaluate_active_assignment_map(
+    *,
+    ordered_requests: list[VMRequest],
+    baseline_nodes: list[NodeCapacity],
+    assignments: dict[uuid.UUID, str],
+    context: PlacementContext | None = None,
+    session: Session | None = None,
+    priorities: dict[str, int] | None = None,
+    tuning: _PlacementTuning | None = None,
+    allowed_target_nodes_by_request: dict[uuid.UUID, set[str]] | None = None,
+    max_migrations: int | None = None,
+) -> _AssignmentEvaluation:
+    evaluator = _build_assignment_evaluator(
+        context=_resolve_placement_context(
+            context=context,
+            session=session,
+            ordered_requests=ordered_requests,
+            priorities=priorities,
+            tuning=tuning,
         ),
-        max_node_score=max_node_score,
-        total_score=total_score,
-        priority_total=priority_total,
-        movement_count=movement_count,
-        node_scores=node_score_map,
-        storage_penalties={
-            node_name: sum(
-                _storage_contention_penalty(
-                    projected_share=_projected_share(
-                        used=max(pool.total_gb - pool.avail_gb, 0.0),
-                        total=max(pool.total_gb, 1.0),
-                    ),
-                    placed_count=pool.placed_count,
-                    overcommit_placed_count=pool.overcommit_placed_count,
-                    tuning=tuning,
-                    overcommit=pool.overcommit_placed_count > 0,
-                )
-                for pool in storage_pools_by_node.get(node_name, [])
-            )
-            for node_name in by_node
-        },
+        ordered_requests=ordered_requests,
+        baseline_nodes=baseline_nodes,
+        allowed_target_nodes_by_request=allowed_target_nodes_by_request,
+        max_migrations=max_migrations,
     )
+    return evaluator.load(assignments)
 
 
 def _initial_active_assignment_map(
     *,
-    session: Session,
+    context: PlacementContext,
     ordered_requests: list[VMRequest],
     baseline_nodes: list[NodeCapacity],
-    strategy: str,
-    priorities: dict[str, int],
-    tuning: _PlacementTuning,
     fixed_assignments: dict[uuid.UUID, str] | None = None,
     allowed_target_nodes_by_request: dict[uuid.UUID, set[str]] | None = None,
     max_migrations: int | None = None,
 ) -> dict[uuid.UUID, str]:
     working_nodes = [item.model_copy(deep=True) for item in baseline_nodes]
-    storage_pools_by_node, has_managed_storage = _build_storage_pool_state(
-        session=session,
+    storage_pools_by_node, has_managed_storage = placement_support.context_storage_pool_state(
+        context,
         node_names=[item.node for item in working_nodes],
     )
-    _, disk_overcommit_ratio = get_overcommit_ratios(session)
+    disk_overcommit_ratio = context.disk_overcommit_ratio
     placements: dict[str, int] = {item.node: 0 for item in working_nodes}
     assignments: dict[uuid.UUID, str] = {}
     locked_nodes = fixed_assignments or {}
     movement_count = 0
 
     for request in ordered_requests:
-        placement_request = _to_placement_request(request)
-        effective_resource_type, resource_type_reason = advisor_service._decide_resource_type(
-            placement_request
-        )
-        required_cpu = advisor_service._effective_cpu_cores(
-            placement_request,
-            effective_resource_type,
-        )
-        required_memory = advisor_service._effective_memory_bytes(
-            placement_request,
-            effective_resource_type,
-        )
-        required_disk = placement_request.disk_gb * GIB
+        requirements = placement_support.requirements_for(context, request)
+        required_cpu = requirements.cpu_cores
+        required_memory = requirements.memory_bytes
+        required_disk = requirements.disk_bytes
         current_node = _provisioned_current_node(request)
         movement_budget_exhausted = (
             max_migrations is not None
@@ -712,7 +636,7 @@ def _initial_active_assignment_map(
                 cores=required_cpu,
                 memory_bytes=required_memory,
                 disk_bytes=required_disk,
-                gpu_required=placement_request.gpu_required,
+                gpu_required=requirements.gpu_required,
             ):
                 continue
 
@@ -720,10 +644,10 @@ def _initial_active_assignment_map(
             if has_managed_storage:
                 storage_selection = _select_best_storage_for_request(
                     storage_pools=storage_pools_by_node.get(item.node, []),
-                    resource_type=str(placement_request.resource_type),
-                    disk_gb=int(placement_request.disk_gb),
+                    resource_type=requirements.resource_type,
+                    disk_gb=requirements.disk_gb,
                     disk_overcommit_ratio=disk_overcommit_ratio,
-                    tuning=tuning,
+                    tuning=context.tuning,
                 )
                 if storage_selection is None:
                     continue
@@ -732,18 +656,12 @@ def _initial_active_assignment_map(
         if not candidates:
             # Try relief relocation before giving up
             relief = _try_relief_relocation(
-                session=session,
+                context=context,
                 stuck_request=request,
                 ordered_requests_so_far=[r for r in ordered_requests if r.id in assignments],
                 current_assignments=assignments,
                 working_nodes=working_nodes,
-                storage_pools_by_node=storage_pools_by_node,
-                has_managed_storage=has_managed_storage,
-                strategy=strategy,
-                priorities=priorities,
-                tuning=tuning,
                 locked_request_ids=set(locked_nodes.keys()),
-                disk_overcommit_ratio=disk_overcommit_ratio,
                 allowed_target_nodes_by_request=allowed_target_nodes_by_request,
                 max_migrations=max_migrations,
             )
@@ -754,9 +672,9 @@ def _initial_active_assignment_map(
                 working_nodes_copy = [item.model_copy(deep=True) for item in baseline_nodes]
                 for r in ordered_requests:
                     if r.id in assignments:
-                        _reserve_request_on_capacities(
+                        _reserve_requirements_on_capacities(
                             node_capacities=working_nodes_copy,
-                            db_request=r,
+                            requirements=placement_support.requirements_for(context, r),
                             node_name=assignments[r.id],
                         )
                 working_nodes = working_nodes_copy
@@ -771,29 +689,29 @@ def _initial_active_assignment_map(
             key=lambda candidate: _placement_sort_key(
                 candidate[0],
                 placements=placements,
-                priorities=priorities,
-                strategy=strategy,
+                priorities=context.priorities,
+                strategy=context.strategy,
                 cores=required_cpu,
                 memory_bytes=required_memory,
                 disk_bytes=required_disk,
                 storage_selection=candidate[1],
-                tuning=tuning,
-                current_node=_provisioned_current_node(request),
+                tuning=context.tuning,
+                current_node=current_node,
             ),
         )
         assignments[request.id] = chosen.node
         placements[chosen.node] += 1
         if current_node is not None and chosen.node != current_node:
             movement_count += 1
-        _reserve_request_on_capacities(
+        _reserve_requirements_on_capacities(
             node_capacities=working_nodes,
-            db_request=request,
+            requirements=requirements,
             node_name=chosen.node,
         )
         if chosen_storage is not None:
             _reserve_storage_pool(
                 selection=chosen_storage,
-                disk_gb=int(placement_request.disk_gb),
+                disk_gb=requirements.disk_gb,
                 disk_overcommit_ratio=disk_overcommit_ratio,
             )
 
@@ -802,16 +720,25 @@ def _initial_active_assignment_map(
 
 def _run_local_rebalance_search(
     *,
-    session: Session,
     ordered_requests: list[VMRequest],
     baseline_nodes: list[NodeCapacity],
     initial_assignments: dict[uuid.UUID, str],
-    priorities: dict[str, int],
-    tuning: _PlacementTuning,
+    context: PlacementContext | None = None,
+    session: Session | None = None,
+    priorities: dict[str, int] | None = None,
+    tuning: _PlacementTuning | None = None,
     locked_request_ids: set[uuid.UUID] | None = None,
     allowed_target_nodes_by_request: dict[uuid.UUID, set[str]] | None = None,
     max_migrations: int | None = None,
 ) -> dict[uuid.UUID, str]:
+    context = _resolve_placement_context(
+        context=context,
+        session=session,
+        ordered_requests=ordered_requests,
+        priorities=priorities,
+        tuning=tuning,
+    )
+    tuning = context.tuning
     if tuning.search_depth <= 0 or tuning.search_max_relocations <= 0:
         return initial_assignments
 
@@ -821,16 +748,14 @@ def _run_local_rebalance_search(
     for req in ordered_requests:
         if getattr(req, 'migration_pinned', False):
             locked_ids.add(req.id)
-    current_eval = _evaluate_active_assignment_map(
-        session=session,
+    evaluator = _build_assignment_evaluator(
+        context=context,
         ordered_requests=ordered_requests,
         baseline_nodes=baseline_nodes,
-        assignments=current_assignments,
-        priorities=priorities,
-        tuning=tuning,
         allowed_target_nodes_by_request=allowed_target_nodes_by_request,
         max_migrations=max_migrations,
     )
+    current_eval = evaluator.load(current_assignments)
     if not current_eval.feasible:
         return initial_assignments
 
@@ -841,7 +766,7 @@ def _run_local_rebalance_search(
         if used_moves >= tuning.search_max_relocations:
             break
 
-        best_assignments: dict[uuid.UUID, str] | None = None
+        best_changes: dict[uuid.UUID, str] | None = None
         best_eval: _AssignmentEvaluation | None = None
         best_move_cost = 0
 
@@ -857,22 +782,12 @@ def _run_local_rebalance_search(
                     continue
                 if allowed_targets is not None and candidate_node not in allowed_targets:
                     continue
-                trial_assignments = dict(current_assignments)
-                trial_assignments[request.id] = candidate_node
-                trial_eval = _evaluate_active_assignment_map(
-                    session=session,
-                    ordered_requests=ordered_requests,
-                    baseline_nodes=baseline_nodes,
-                    assignments=trial_assignments,
-                    priorities=priorities,
-                    tuning=tuning,
-                    allowed_target_nodes_by_request=allowed_target_nodes_by_request,
-                    max_migrations=max_migrations,
-                )
+                trial_changes = {request.id: candidate_node}
+                trial_eval = evaluator.score(trial_changes)
                 if not trial_eval.feasible or trial_eval.objective >= current_eval.objective:
                     continue
                 if best_eval is None or trial_eval.objective < best_eval.objective:
-                    best_assignments = trial_assignments
+                    best_changes = trial_changes
                     best_eval = trial_eval
                     best_move_cost = 1
 
@@ -889,30 +804,19 @@ def _run_local_rebalance_search(
                     node_b = current_assignments.get(request_b.id)
                     if not node_b or node_a == node_b:
                         continue
-                    trial_assignments = dict(current_assignments)
-                    trial_assignments[request_a.id] = node_b
-                    trial_assignments[request_b.id] = node_a
-                    trial_eval = _evaluate_active_assignment_map(
-                        session=session,
-                        ordered_requests=ordered_requests,
-                        baseline_nodes=baseline_nodes,
-                        assignments=trial_assignments,
-                        priorities=priorities,
-                        tuning=tuning,
-                        allowed_target_nodes_by_request=allowed_target_nodes_by_request,
-                        max_migrations=max_migrations,
-                    )
+                    trial_changes = {request_a.id: node_b, request_b.id: node_a}
+                    trial_eval = evaluator.score(trial_changes)
                     if not trial_eval.feasible or trial_eval.objective >= current_eval.objective:
                         continue
                     if best_eval is None or trial_eval.objective < best_eval.objective:
-                        best_assignments = trial_assignments
+                        best_changes = trial_changes
                         best_eval = trial_eval
                         best_move_cost = 2
 
-        if best_assignments is None or best_eval is None:
+        if best_changes is None or best_eval is None:
             break
-        current_assignments = best_assignments
-        current_eval = best_eval
+        current_eval = evaluator.apply(best_changes)
+        current_assignments = evaluator.assignments
         used_moves += best_move_cost
 
     return current_assignments
@@ -923,18 +827,12 @@ _RELIEF_MAX_EVALUATIONS = 50
 
 def _try_relief_relocation(
     *,
-    session: Session,
+    context: PlacementContext,
     stuck_request: VMRequest,
     ordered_requests_so_far: list[VMRequest],
     current_assignments: dict[uuid.UUID, str],
     working_nodes: list[NodeCapacity],
-    storage_pools_by_node: dict[str, list[_WorkingStoragePool]],
-    has_managed_storage: bool,
-    strategy: str,
-    priorities: dict[str, int],
-    tuning: _PlacementTuning,
     locked_request_ids: set[uuid.UUID],
-    disk_overcommit_ratio: float,
     allowed_target_nodes_by_request: dict[uuid.UUID, set[str]] | None = None,
     max_migrations: int | None = None,
 ) -> dict[uuid.UUID, str] | None:
@@ -944,16 +842,18 @@ def _try_relief_relocation(
     to other nodes to free capacity for the stuck request.
     Returns updated assignment map or None if no relief found.
     """
-    if tuning.search_max_relocations <= 0:
+    if context.tuning.search_max_relocations <= 0:
         return None
 
-    stuck_placement = _to_placement_request(stuck_request)
-    effective_type, _ = advisor_service._decide_resource_type(stuck_placement)
-    required_cpu = advisor_service._effective_cpu_cores(stuck_placement, effective_type)
-    required_memory = advisor_service._effective_memory_bytes(stuck_placement, effective_type)
-    required_disk = stuck_placement.disk_gb * GIB
-
     node_names = [n.node for n in working_nodes]
+    evaluator = _build_assignment_evaluator(
+        context=context,
+        ordered_requests=ordered_requests_so_far + [stuck_request],
+        baseline_nodes=working_nodes,
+        allowed_target_nodes_by_request=allowed_target_nodes_by_request,
+        max_migrations=max_migrations,
+    )
+    evaluator.load(current_assignments)
     evaluations = 0
     best_result: dict[uuid.UUID, str] | None = None
     best_score: tuple | None = None
@@ -990,17 +890,9 @@ def _try_relief_relocation(
             trial[stuck_request.id] = current_node
 
             # Validate the entire assignment
-            all_requests = ordered_requests_so_far + [stuck_request]
             try:
-                trial_eval = _evaluate_active_assignment_map(
-                    session=session,
-                    ordered_requests=all_requests,
-                    baseline_nodes=working_nodes,
-                    assignments=trial,
-                    priorities=priorities,
-                    tuning=tuning,
-                    allowed_target_nodes_by_request=allowed_target_nodes_by_request,
-                    max_migrations=max_migrations,
+                trial_eval = evaluator.score(
+                    {req.id: target_node, stuck_request.id: current_node}
                 )
             except (ValueError, KeyError):
                 continue
@@ -1017,34 +909,27 @@ def _try_relief_relocation(
 
 def _solve_rebalance_assignments(
     *,
-    session: Session,
+    context: PlacementContext,
     ordered_requests: list[VMRequest],
     baseline_nodes: list[NodeCapacity],
-    strategy: str,
-    priorities: dict[str, int],
-    tuning: _PlacementTuning,
     fixed_assignments: dict[uuid.UUID, str] | None = None,
     allowed_target_nodes_by_request: dict[uuid.UUID, set[str]] | None = None,
     max_migrations: int | None = None,
 ) -> dict[uuid.UUID, str]:
+    context = placement_support.with_request_requirements(context, ordered_requests)
     initial_assignments = _initial_active_assignment_map(
-        session=session,
+        context=context,
         ordered_requests=ordered_requests,
         baseline_nodes=baseline_nodes,
-        strategy=strategy,
-        priorities=priorities,
-        tuning=tuning,
         fixed_assignments=fixed_assignments,
         allowed_target_nodes_by_request=allowed_target_nodes_by_request,
         max_migrations=max_migrations,
     )
     final_assignments = _run_local_rebalance_search(
-        session=session,
+        context=context,
         ordered_requests=ordered_requests,
         baseline_nodes=baseline_nodes,
         initial_assignments=initial_assignments,
-        priorities=priorities,
-        tuning=tuning,
         locked_request_ids=(
             set((fixed_assignments or {}).keys())
             | {r.id for r in ordered_requests if getattr(r, 'migration_pinned', False)}
@@ -1053,12 +938,10 @@ def _solve_rebalance_assignments(
         max_migrations=max_migrations,
     )
     final_eval = _evaluate_active_assignment_map(
-        session=session,
+        context=context,
         ordered_requests=ordered_requests,
         baseline_nodes=baseline_nodes,
         assignments=final_assignments,
-        priorities=priorities,
-        tuning=tuning,
         allowed_target_nodes_by_request=allowed_target_nodes_by_request,
         max_migrations=max_migrations,
     )
@@ -1180,9 +1063,8 @@ def rebalance_active_assignments(
         requests=ordered_requests,
     )
     migration_policy = scheduling_policy.get_migration_policy(session=session)
-    strategy = get_placement_strategy(session)
-    priorities = get_node_priorities(session)
-    tuning = _get_placement_tuning(session=session)
+    context = _build_placement_context(session=session, requests=ordered_requests)
+    strategy = context.strategy
 
     baseline_nodes = [item.model_copy(deep=True) for item in working_nodes]
     allowed_target_nodes_by_request = _build_active_rebalance_allowed_target_nodes(
@@ -1192,12 +1074,9 @@ def rebalance_active_assignments(
         now=_utc_now(),
     )
     final_assignments = _solve_rebalance_assignments(
-        session=session,
+        context=context,
         ordered_requests=ordered_requests,
         baseline_nodes=baseline_nodes,
-        strategy=strategy,
-        priorities=priorities,
-        tuning=tuning,
         allowed_target_nodes_by_request=allowed_target_nodes_by_request,
         max_migrations=migration_policy.max_per_rebalance,
     )
@@ -1284,13 +1163,13 @@ def get_preview_node_scores(
     request = _to_placement_request(db_request)
     effective_resource_type, _ = advisor_service._decide_resource_type(request)
 
+    context = _build_placement_context(session=session)
     nodes, resources = advisor_service._load_cluster_state()
-    cpu_overcommit_ratio, disk_overcommit_ratio = get_overcommit_ratios(session)
     baseline_capacities = advisor_service._build_node_capacities(
         nodes=nodes,
         resources=resources,
-        cpu_overcommit_ratio=cpu_overcommit_ratio,
-        disk_overcommit_ratio=disk_overcommit_ratio,
+        cpu_overcommit_ratio=context.cpu_overcommit_ratio,
+        disk_overcommit_ratio=context.disk_overcommit_ratio,
     )
 
     if reserved_requests is None:
@@ -1300,33 +1179,14 @@ def get_preview_node_scores(
             window_end=end_at,
         )
 
-    checkpoints = [start_at] + [
-        checkpoint
-        for checkpoint in _hour_window_iter(start_at, end_at)
-        if checkpoint != start_at
-    ]
-
-    feasible_nodes = {item.node for item in baseline_capacities}
-    for checkpoint in checkpoints:
-        adjusted = _apply_reserved_requests_to_capacities(
-            baseline_capacities=baseline_capacities,
-            reserved_requests=reserved_requests,
-            at_time=checkpoint,
-        )
-        hour_feasible = {
-            item.node for item in adjusted
-            if advisor_service._can_fit(
-                item,
-                cores=advisor_service._effective_cpu_cores(request, effective_resource_type),
-                memory_bytes=advisor_service._effective_memory_bytes(request, effective_resource_type),
-                disk_bytes=request.disk_gb * GIB,
-                gpu_required=request.gpu_required,
-            )
-        }
-        feasible_nodes &= hour_feasible
-        if not feasible_nodes:
-            break
-
+    feasible_nodes = placement_support.reserved_window_feasible_nodes(
+        timeline=_build_capacity_timeline(reserved_requests=reserved_requests),
+        baseline_capacities=baseline_capacities,
+        request=request,
+        effective_resource_type=effective_resource_type,
+        start_at=start_at,
+        end_at=end_at,
+    )
     if not feasible_nodes:
         return []
 
@@ -1357,46 +1217,25 @@ def get_preview_node_scores(
         if item.node in feasible_nodes
     ]
 
-    priorities = get_node_priorities(session)
-    strategy = get_placement_strategy(session)
-    tuning = _get_placement_tuning(session=session)
-
-    candidate_evals: dict[str, _AssignmentEvaluation] = {}
-    best_node: str | None = None
-    best_obj = None
-    for candidate_node in sorted(feasible_nodes):
-        try:
-            assignments = _solve_rebalance_assignments(
-                session=session,
-                ordered_requests=preview_ordered,
-                baseline_nodes=preview_baseline,
-                strategy=strategy,
-                priorities=priorities,
-                tuning=tuning,
-                fixed_assignments={preview_request.id: candidate_node},
-            )
-            evaluation = _evaluate_active_assignment_map(
-                session=session,
-                ordered_requests=preview_ordered,
-                baseline_nodes=preview_baseline,
-                assignments=assignments,
-                priorities=priorities,
-                tuning=tuning,
-            )
-        except ValueError:
-            continue
-        if not evaluation.feasible:
-            continue
-        candidate_evals[candidate_node] = evaluation
-        if best_obj is None or evaluation.objective < best_obj:
-            best_obj = evaluation.objective
-            best_node = candidate_node
+    cohort = _build_preview_cohort(
+        context=context,
+        ordered_requests=preview_ordered,
+        baseline_nodes=preview_baseline,
+        preview_request=preview_request,
+    )
+    # Every candidate is shown in the breakdown, so none may be pruned here.
+    candidate_evals = placement_preview.evaluate_preview_candidates(
+        cohort=cohort,
+        candidate_nodes=sorted(feasible_nodes),
+        solve_candidate_fn=_solve_preview_candidate,
+        prune=False,
+    )
 
     return compute_node_score_breakdown(
         session=session,
         candidate_evals=candidate_evals,
-        selected_node=best_node,
-        priorities=priorities,
+        selected_node=_best_preview_node(candidate_evals),
+        priorities=dict(cohort.context.priorities),
     )
 
 
@@ -1,7 +1,9 @@
 from __future__ import annotations
 
 import uuid
-from datetime import UTC, datetime, timedelta
+from dataclasses import replace
+from datetime import UTC, datetime
+from types import MappingProxyType
 
 from sqlmodel import Session
 
@@ -16,14 +18,20 @@ from app.ai.pve_advisor.schemas import (
 from app.domain.placement import policy as placement_policy
 from app.domain.placement import scorer as placement_scorer
 from app.domain.placement.models import (
+    CohortRequest,
+    PlacementContext,
     PlacementTuning,
+    RequestRequirements,
     StorageSelection,
+    StorageSnapshot,
     WorkingStoragePool,
 )
 from app.domain.placement.storage import (
+    build_working_storage_pools,
     reserve_storage_pool,
     select_best_storage_for_request,
 )
+from app.domain.placement.timeline import CapacityTimeline, Reservation
 from app.models import VMRequest
 from app.repositories import proxmox_storage as proxmox_storage_repo
 
@@ -64,55 +72,149 @@ def build_storage_pool_state(
     session: Session,
     node_names: list[str],
 ) -> tuple[dict[str, list[WorkingStoragePool]], bool]:
-    storages = proxmox_storage_repo.get_all_storages(session)
-    if not storages:
-        return {node_name: [] for node_name in node_names}, False
+    return build_working_storage_pools(
+        storages=proxmox_storage_repo.get_all_storages(session),
+        node_names=node_names,
+    )
 
-    shared_registry: dict[str, WorkingStoragePool] = {}
-    by_node: dict[str, list[WorkingStoragePool]] = {node_name: [] for node_name in node_names}
-    node_set = set(node_names)
 
-    for storage in storages:
-        node_name = str(storage.node_name or "")
-        if node_name not in node_set:
-            continue
+def snapshot_storages(*, session: Session) -> tuple[StorageSnapshot, ...]:
+    return tuple(
+        StorageSnapshot(
+            node_name=str(storage.node_name or ""),
+            storage=storage.storage,
+            total_gb=float(storage.total_gb or 0.0),
+            avail_gb=float(storage.avail_gb or 0.0),
+            active=bool(storage.active),
+            enabled=bool(storage.enabled),
+            can_vm=bool(storage.can_vm),
+            can_lxc=bool(storage.can_lxc),
+            is_shared=bool(storage.is_shared),
+            speed_tier=str(storage.speed_tier or "unknown"),
+            user_priority=int(storage.user_priority or 5),
+        )
+        for storage in proxmox_storage_repo.get_all_storages(session)
+    )
 
-        if storage.is_shared:
-            pool = shared_registry.get(storage.storage)
-            if pool is None:
-                pool = WorkingStoragePool(
-                    storage=storage.storage,
-                    total_gb=float(storage.total_gb or 0.0),
-                    avail_gb=float(storage.avail_gb or 0.0),
-                    active=bool(storage.active),
-                    enabled=bool(storage.enabled),
-                    can_vm=bool(storage.can_vm),
-                    can_lxc=bool(storage.can_lxc),
-                    is_shared=bool(storage.is_shared),
-                    speed_tier=str(storage.speed_tier or "unknown"),
-                    user_priority=int(storage.user_priority or 5),
-                )
-                shared_registry[storage.storage] = pool
-            by_node[node_name].append(pool)
-            continue
 
-        by_node[node_name].append(
-            WorkingStoragePool(
-                storage=storage.storage,
-                total_gb=float(storage.total_gb or 0.0),
-                avail_gb=float(storage.avail_gb or 0.0),
-                active=bool(storage.active),
-                enabled=bool(storage.enabled),
-                can_vm=bool(storage.can_vm),
-                can_lxc=bool(storage.can_lxc),
-                is_shared=bool(storage.is_shared),
-                speed_tier=str(storage.speed_tier or "unknown"),
-                user_priority=int(storage.user_priority or 5),
+def request_requirements(db_request: VMRequest) -> RequestRequirements:
+    placement_request = to_placement_request(db_request)
+    effective_resource_type, _ = advisor_service._decide_resource_type(placement_request)
+    reserved_cpu_cores, reserved_memory_bytes, reserved_disk_bytes = request_capacity_tuple(
+        db_request
+    )
+    return RequestRequirements(
+        resource_type=str(placement_request.resource_type),
+        effective_resource_type=effective_resource_type,
+        cpu_cores=advisor_service._effective_cpu_cores(
+            placement_request,
+            effective_resource_type,
+        ),
+        memory_bytes=advisor_service._effective_memory_bytes(
+            placement_request,
+            effective_resource_type,
+        ),
+        disk_bytes=placement_request.disk_gb * GIB,
+        disk_gb=int(placement_request.disk_gb),
+        gpu_required=placement_request.gpu_required,
+        reserved_cpu_cores=reserved_cpu_cores,
+        reserved_memory_bytes=reserved_memory_bytes,
+        reserved_disk_bytes=reserved_disk_bytes,
+    )
+
+
+def build_placement_context(
+    *,
+    session: Session,
+    requests: list[VMRequest] | None = None,
+    strategy: str | None = None,
+    priorities: dict[str, int] | None = None,
+    tuning: PlacementTuning | None = None,
+    get_placement_strategy_fn,
+    get_node_priorities_fn,
+    get_placement_tuning_fn,
+    get_overcommit_ratios_fn,
+) -> PlacementContext:
+    cpu_overcommit_ratio, disk_overcommit_ratio = get_overcommit_ratios_fn(session)
+    return PlacementContext(
+        strategy=placement_policy.normalize_strategy(
+            strategy or get_placement_strategy_fn(session)
+        ),
+        tuning=tuning or get_placement_tuning_fn(session=session),
+        cpu_overcommit_ratio=cpu_overcommit_ratio,
+        disk_overcommit_ratio=disk_overcommit_ratio,
+        priorities=MappingProxyType(
+            dict(priorities if priorities is not None else get_node_priorities_fn(session))
+        ),
+        storages=snapshot_storages(session=session),
+        requirements=MappingProxyType(
+            {item.id: request_requirements(item) for item in requests or []}
+        ),
+    )
+
+
+def with_request_requirements(
+    context: PlacementContext,
+    requests: list[VMRequest],
+) -> PlacementContext:
+    missing = [item for item in requests if item.id not in context.requirements]
+    if not missing:
+        return context
+    requirements = dict(context.requirements)
+    requirements.update({item.id: request_requirements(item) for item in missing})
+    return replace(context, requirements=MappingProxyType(requirements))
+
+
+def requirements_for(context: PlacementContext, db_request: VMRequest) -> RequestRequirements:
+    requirements = context.requirements.get(db_request.id)
+    if requirements is None:
+        return request_requirements(db_request)
+    return requirements
+
+
+def snapshot_cohort_request(db_request: VMRequest) -> CohortRequest:
+    return CohortRequest(
+        id=db_request.id,
+        vmid=db_request.vmid,
+        actual_node=db_request.actual_node,
+        assigned_node=db_request.assigned_node,
+        migration_pinned=bool(getattr(db_request, "migration_pinned", False)),
+    )
+
+
+def preview_objective_lower_bound(
+    *,
+    context: PlacementContext,
+    baseline_nodes: list[NodeCapacity],
+    requirements: RequestRequirements,
+    candidate_node: str,
+) -> tuple[float, float]:
+    """Bound the first two objective terms when the preview is pinned to a node.
+
+    Node scores only grow as requests are reserved, so scoring the baseline with
+    just the preview request on ``candidate_node`` cannot exceed the solved
+    ``(max_node_score, total_score)`` for that candidate.
+    """
+    scores: list[float] = []
+    for node in baseline_nodes:
+        if node.node == candidate_node:
+            node = node.model_copy(deep=True)
+            reserve_capacity_on_node(
+                node,
+                cpu_cores=requirements.reserved_cpu_cores,
+                memory_bytes=requirements.reserved_memory_bytes,
+                disk_bytes=requirements.reserved_disk_bytes,
             )
-        )
+        scores.append(placement_scorer.node_balance_score(node, tuning=context.tuning))
+    return max(scores, default=0.0), sum(scores)
 
-    has_managed_storage = any(pools for pools in by_node.values())
-    return by_node, has_managed_storage
+
+def context_storage_pool_state(
+    context: PlacementContext,
+    *,
+    node_names: list[str],
+) -> tuple[dict[str, list[WorkingStoragePool]], bool]:
+    return build_working_storage_pools(storages=context.storages, node_names=node_names)
 
 
 def provisioned_current_node(request: VMRequest) -> str | None:
@@ -241,6 +343,43 @@ def reserve_request_on_capacities(
         raise ValueError(f"Target node {node_name} not found in capacity list")
 
     cpu_cores, memory_bytes, disk_bytes = request_capacity_tuple_fn(db_request)
+    reserve_capacity_on_node(
+        node,
+        cpu_cores=cpu_cores,
+        memory_bytes=memory_bytes,
+        disk_bytes=disk_bytes,
+        refresh_node_candidate_fn=refresh_node_candidate_fn,
+    )
+
+
+def reserve_requirements_on_capacities(
+    *,
+    node_capacities: list[NodeCapacity],
+    requirements: RequestRequirements,
+    node_name: str,
+    refresh_node_candidate_fn=refresh_node_candidate,
+) -> None:
+    node = next((item for item in node_capacities if item.node == node_name), None)
+    if node is None:
+        raise ValueError(f"Target node {node_name} not found in capacity list")
+
+    reserve_capacity_on_node(
+        node,
+        cpu_cores=requirements.reserved_cpu_cores,
+        memory_bytes=requirements.reserved_memory_bytes,
+        disk_bytes=requirements.reserved_disk_bytes,
+        refresh_node_candidate_fn=refresh_node_candidate_fn,
+    )
+
+
+def reserve_capacity_on_node(
+    node: NodeCapacity,
+    *,
+    cpu_cores: float,
+    memory_bytes: int,
+    disk_bytes: int,
+    refresh_node_candidate_fn=refresh_node_candidate,
+) -> None:
     node.allocatable_cpu_cores = max(round(node.allocatable_cpu_cores - cpu_cores, 2), 0.0)
     node.allocatable_memory_bytes = max(node.allocatable_memory_bytes - memory_bytes, 0)
     node.allocatable_disk_bytes = max(node.allocatable_disk_bytes - disk_bytes, 0)
@@ -248,55 +387,63 @@ def reserve_request_on_capacities(
     refresh_node_candidate_fn(node)
 
 
-def hour_window_iter(start_at: datetime, end_at: datetime) -> list[datetime]:
-    if end_at <= start_at:
-        return [start_at]
-    cursor = start_at.replace(minute=0, second=0, microsecond=0)
-    if cursor < start_at:
-        cursor += timedelta(hours=1)
-    checkpoints: list[datetime] = []
-    while cursor < end_at:
-        checkpoints.append(cursor)
-        cursor += timedelta(hours=1)
-    return checkpoints or [start_at]
-
-
-def apply_reserved_requests_to_capacities(
+def build_capacity_timeline(
     *,
-    baseline_capacities,
     reserved_requests: list[VMRequest],
-    at_time: datetime,
     normalize_datetime_fn,
     request_capacity_tuple_fn,
-):
-    adjusted = [item.model_copy(deep=True) for item in baseline_capacities]
-    by_node = {item.node: item for item in adjusted}
-
+) -> CapacityTimeline:
+    reservations: list[Reservation] = []
     for reserved in reserved_requests:
         reserved_start = normalize_datetime_fn(reserved.start_at)
         reserved_end = normalize_datetime_fn(reserved.end_at)
         assigned_node = str(reserved.assigned_node or "")
         if not reserved_start or not reserved_end or not assigned_node:
             continue
-        if not (reserved_start <= at_time < reserved_end):
-            continue
+        cpu_cores, memory_bytes, disk_bytes = request_capacity_tuple_fn(reserved)
+        reservations.append(
+            Reservation(
+                node=assigned_node,
+                start_at=reserved_start,
+                end_at=reserved_end,
+                cpu_cores=cpu_cores,
+                memory_bytes=memory_bytes,
+                disk_bytes=disk_bytes,
+            )
+        )
+    return CapacityTimeline(reservations)
 
-        node = by_node.get(assigned_node)
-        if not node:
-            continue
 
-        reserved_cpu, reserved_memory, reserved_disk = request_capacity_tuple_fn(reserved)
-        node.allocatable_cpu_cores = max(node.allocatable_cpu_cores - reserved_cpu, 0.0)
-        node.allocatable_memory_bytes = max(node.allocatable_memory_bytes - reserved_memory, 0)
-        node.allocatable_disk_bytes = max(node.allocatable_disk_bytes - reserved_disk, 0)
-        node.candidate = (
-            node.status == "online"
-            and node.allocatable_cpu_cores > 0
-            and node.allocatable_memory_bytes > 0
-            and node.allocatable_disk_bytes > 0
+def reserved_window_feasible_nodes(
+    *,
+    timeline: CapacityTimeline,
+    baseline_capacities: list[NodeCapacity],
+    request: PlacementRequest,
+    effective_resource_type: ResourceType,
+    start_at: datetime,
+    end_at: datetime,
+) -> set[str]:
+    cores = advisor_service._effective_cpu_cores(request, effective_resource_type)
+    memory_bytes = advisor_service._effective_memory_bytes(request, effective_resource_type)
+    feasible: set[str] = set()
+    for item in baseline_capacities:
+        cpu_free, memory_free, disk_free = timeline.min_headroom(item, start_at, end_at)
+        window_node = item.model_copy(
+            update={
+                "allocatable_cpu_cores": cpu_free,
+                "allocatable_memory_bytes": memory_free,
+                "allocatable_disk_bytes": disk_free,
+            }
         )
-
-    return adjusted
+        if advisor_service._can_fit(
+            window_node,
+            cores=cores,
+            memory_bytes=memory_bytes,
+            disk_bytes=request.disk_gb * GIB,
+            gpu_required=request.gpu_required,
+        ):
+            feasible.add(item.node)
+    return feasible
 
 
 def build_plan(
@@ -309,23 +456,34 @@ def build_plan(
     placement_strategy: str | None = None,
     node_priorities: dict[str, int] | None = None,
     current_node: str | None = None,
+    context: PlacementContext | None = None,
     build_storage_pool_state_fn,
     get_placement_tuning_fn,
     get_overcommit_ratios_fn,
     get_node_priorities_fn,
     placement_sort_key_fn,
 ) -> PlacementPlan:
-    strategy = placement_policy.normalize_strategy(
-        placement_strategy or placement_policy.get_placement_strategy(session)
-    )
-    priorities = node_priorities or get_node_priorities_fn(session)
-    tuning = get_placement_tuning_fn(session=session)
     working_nodes = [item.model_copy(deep=True) for item in node_capacities]
-    storage_pools_by_node, has_managed_storage = build_storage_pool_state_fn(
-        session=session,
-        node_names=[item.node for item in working_nodes],
-    )
-    _, disk_overcommit_ratio = get_overcommit_ratios_fn(session)
+    if context is not None:
+        strategy = placement_policy.normalize_strategy(placement_strategy or context.strategy)
+        priorities = node_priorities or dict(context.priorities)
+        tuning = context.tuning
+        storage_pools_by_node, has_managed_storage = context_storage_pool_state(
+            context,
+            node_names=[item.node for item in working_nodes],
+        )
+        disk_overcommit_ratio = context.disk_overcommit_ratio
+    else:
+        strategy = placement_policy.normalize_strategy(
+            placement_strategy or placement_policy.get_placement_strategy(session)
+        )
+        priorities = node_priorities or get_node_priorities_fn(session)
+        tuning = get_placement_tuning_fn(session=session)
+        storage_pools_by_node, has_managed_storage = build_storage_pool_state_fn(
+            session=session,
+            node_names=[item.node for item in working_nodes],
+        )
+        _, disk_overcommit_ratio = get_overcommit_ratios_fn(session)
     required_cpu = advisor_service._effective_cpu_cores(request, effective_resource_type)
     required_memory = advisor_service._effective_memory_bytes(request, effective_resource_type)
     required_disk = request.disk_gb * GIB
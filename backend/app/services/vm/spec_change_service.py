@@ -23,6 +23,7 @@ from app.schemas import (
     SpecChangeRequestsPublic,
 )
 from app.services.proxmox import proxmox_service
+from app.services.proxmox.gpu_usage_index import gpu_usage_index
 from app.services.user import audit_service
 
 logger = logging.getLogger(__name__)
@@ -288,6 +289,8 @@ def _apply_spec_changes(*, db_request) -> list[str]:
             proxmox_service.update_config(
                 node, db_request.vmid, resource_type, **config_params
             )
+            if resource_type == "qemu":
+                gpu_usage_index.refresh_vm(node, db_request.vmid)
 
         if db_request.requested_disk is not None:
             disk_increase = db_request.requested_disk - (
@@ -1,17 +1,40 @@
+"""申請時段可用性評估（精靈的每小時日曆）。
+
+- 預約只在事件邊界改變容量：以 ``CapacityTimeline.segment_key`` 與該小時的
+  需求係數分組，相同組合的時段只算一次 placement 與節點快照。
+- 已過與政策封鎖的時段共用同一份 baseline 節點快照。
+- 每小時需求分布與待審核壓力在 SQL 端彙總，不載入完整 VMRequest。
+- 結果依（申請規格、叢集快照世代、申請與設定版本）快取
+  ``VM_REQUEST_AVAILABILITY_CACHE_TTL`` 秒；版本只需一次 SQL，命中時不呼叫
+  Proxmox 也不跑評估查詢。
+"""
+
 from __future__ import annotations
 
-from collections import Counter
+import threading
+import time as monotonic_time
+from collections import Counter, OrderedDict
 from datetime import UTC, date, datetime, time, timedelta
 from typing import cast
 from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
-from sqlmodel import Session, select
+from sqlalchemy import literal_column
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlmodel import Session, func, select
 
 from app.ai.pve_advisor import recommendation_service as advisor_service
 from app.ai.pve_advisor.schemas import PlacementRequest
 from app.core.authorizers import require_vm_request_access
+from app.core.config import settings
 from app.exceptions import BadRequestError, NotFoundError
-from app.models import UserRole, VMRequest, VMRequestStatus
+from app.models import (
+    ProxmoxConfig,
+    ProxmoxNode,
+    ProxmoxStorage,
+    UserRole,
+    VMRequest,
+    VMRequestStatus,
+)
 from app.repositories import vm_request as vm_request_repo
 from app.schemas.vm_request import (
     VMRequestAvailabilityDay,
@@ -158,7 +181,33 @@ def _build_availability_response(
     allowed_start, allowed_end = _ALL_DAY_POLICY_WINDOW
 
     placement_request = _to_placement_request(source_request)
+
+    now_local = datetime.now(tz)
+    start_anchor = now_local.replace(minute=0, second=0, microsecond=0)
+    if now_local.minute or now_local.second or now_local.microsecond:
+        start_anchor += timedelta(hours=1)
+    day_anchor = datetime.combine(now_local.date(), time.min, tzinfo=tz)
+
+    # 快取 key 在任何 Proxmox 呼叫與評估查詢之前決定：叢集快照世代 + 一次
+    # SQL 取得的申請 / 設定版本。版本先於資料讀取，資料較新時只會多一次 miss。
+    cluster_generation = advisor_service._cluster_state_generation()
+    cache_key_base = (
+        placement_request.model_dump_json(),
+        role.value,
+        stack_label,
+        tz.key,
+        days,
+        start_anchor.isoformat(),
+        _state_version(session),
+    )
+    if cluster_generation is not None:
+        cached = _cache_get((*cache_key_base, cluster_generation))
+        if cached is not None:
+            return cached
+
     baseline_nodes, baseline_resources = advisor_service._load_cluster_state()
+    if cluster_generation is None:
+        cluster_generation = advisor_service._cluster_state_generation()
     cpu_overcommit_ratio, disk_overcommit_ratio = (
         vm_request_placement_service.get_overcommit_ratios(session)
     )
@@ -180,17 +229,36 @@ def _build_availability_response(
     placement_strategy = vm_request_placement_service.get_placement_strategy(session)
     node_priorities = vm_request_placement_service.get_node_priorities(session)
 
-    now_local = datetime.now(tz)
-    start_anchor = now_local.replace(minute=0, second=0, microsecond=0)
-    if now_local.minute or now_local.second or now_local.microsecond:
-        start_anchor += timedelta(hours=1)
-    day_anchor = datetime.combine(now_local.date(), time.min, tzinfo=tz)
-
     reserved_requests = vm_request_repo.get_approved_vm_requests_overlapping_window(
         session=session,
         window_start=start_anchor,
         window_end=start_anchor + timedelta(days=days),
     )
+    capacity_timeline = vm_request_placement_service._build_capacity_timeline(
+        reserved_requests=reserved_requests,
+    )
+    placement_context = vm_request_placement_service._build_placement_context(
+        session=session,
+        strategy=placement_strategy,
+        priorities=node_priorities,
+    )
+
+    idle_snapshots: list[VMRequestAvailabilityNodeSnapshot] | None = None
+
+    def baseline_snapshots() -> list[VMRequestAvailabilityNodeSnapshot]:
+        nonlocal idle_snapshots
+        if idle_snapshots is None:
+            idle_snapshots = _build_slot_node_snapshots(
+                adjusted_nodes=baseline_capacities,
+                plan=None,
+                node_priorities=node_priorities,
+                resource_stack_by_node=resource_stack_by_node,
+                stack_label=stack_label,
+            )
+        return idle_snapshots
+
+    # (預約區段, 需求係數) -> (plan, 節點快照)；同組合的時段結果相同
+    evaluations: dict[tuple, tuple] = {}
 
     slots: list[VMRequestAvailabilitySlot] = []
     per_day: dict[date, list[VMRequestAvailabilitySlot]] = {}
@@ -222,34 +290,43 @@ def _build_availability_response(
                     reasons=["此時段已過，請選擇目前時間之後的時段。"],
                     recommended_nodes=[],
                     placement_strategy=placement_strategy,
-                    node_snapshots=_build_slot_node_snapshots(
-                        adjusted_nodes=baseline_capacities,
-                        plan=None,
-                        node_priorities=node_priorities,
-                        resource_stack_by_node=resource_stack_by_node,
-                        stack_label=stack_label,
-                    ),
+                    node_snapshots=baseline_snapshots(),
                 )
             elif within_policy:
-                reserved_adjusted_nodes = vm_request_placement_service._apply_reserved_requests_to_capacities(
-                    baseline_capacities=baseline_capacities,
-                    reserved_requests=reserved_requests,
-                    at_time=slot_start,
-                )
-                adjusted_nodes = _adjust_node_capacities_for_slot(
-                    baseline_capacities=reserved_adjusted_nodes,
-                    demand_ratio=demand_ratio,
-                    pending_pressure=pending_pressure,
-                )
-                plan = vm_request_placement_service.build_plan(
-                    session=session,
-                    request=placement_request,
-                    node_capacities=adjusted_nodes,
-                    effective_resource_type=effective_resource_type,
-                    resource_type_reason=resource_type_reason,
-                    placement_strategy=placement_strategy,
-                    node_priorities=node_priorities,
-                )
+                evaluation_key = (capacity_timeline.segment_key(slot_start), demand_ratio)
+                evaluation = evaluations.get(evaluation_key)
+                if evaluation is None:
+                    reserved_adjusted_nodes = capacity_timeline.capacities_at(
+                        baseline_capacities,
+                        slot_start,
+                    )
+                    adjusted_nodes = _adjust_node_capacities_for_slot(
+                        baseline_capacities=reserved_adjusted_nodes,
+                        demand_ratio=demand_ratio,
+                        pending_pressure=pending_pressure,
+                    )
+                    plan = vm_request_placement_service.build_plan(
+                        session=session,
+                        request=placement_request,
+                        node_capacities=adjusted_nodes,
+                        effective_resource_type=effective_resource_type,
+                        resource_type_reason=resource_type_reason,
+                        placement_strategy=placement_strategy,
+                        node_priorities=node_priorities,
+                        context=placement_context,
+                    )
+                    evaluation = (
+                        plan,
+                        _build_slot_node_snapshots(
+                            adjusted_nodes=adjusted_nodes,
+                            plan=plan,
+                            node_priorities=node_priorities,
+                            resource_stack_by_node=resource_stack_by_node,
+                            stack_label=stack_label,
+                        ),
+                    )
+                    evaluations[evaluation_key] = evaluation
+                plan, node_snapshots = evaluation
                 slot = _slot_from_plan(
                     plan=plan,
                     slot_start=slot_start,
@@ -258,10 +335,7 @@ def _build_availability_response(
                     role=role,
                     demand_ratio=demand_ratio,
                     pending_pressure=pending_pressure,
-                    adjusted_nodes=adjusted_nodes,
-                    node_priorities=node_priorities,
-                    resource_stack_by_node=resource_stack_by_node,
-                    stack_label=stack_label,
+                    node_snapshots=node_snapshots,
                     placement_strategy=placement_strategy,
                 )
             else:
@@ -278,13 +352,7 @@ def _build_availability_response(
                     reasons=[_policy_block_summary(role=role, allowed_start=allowed_start, allowed_end=allowed_end)],
                     recommended_nodes=[],
                     placement_strategy=placement_strategy,
-                    node_snapshots=_build_slot_node_snapshots(
-                        adjusted_nodes=baseline_capacities,
-                        plan=None,
-                        node_priorities=node_priorities,
-                        resource_stack_by_node=resource_stack_by_node,
-                        stack_label=stack_label,
-                    ),
+                    node_snapshots=baseline_snapshots(),
                 )
 
             slots.append(slot)
@@ -308,11 +376,128 @@ def _build_availability_response(
         ),
     )
 
-    return VMRequestAvailabilityResponse(
+    response = VMRequestAvailabilityResponse(
         summary=summary,
         recommended_slots=recommended_slots,
         days=days_summary,
     )
+    if cluster_generation is not None:
+        # 叢集快照未快取（source cache 關閉）時每次都是即時資料，不快取結果
+        _cache_put((*cache_key_base, cluster_generation), response)
+    return response
+
+
+# ─── 結果快取 ──────────────────────────────────────────────────────────────────
+
+_cache_lock = threading.Lock()
+_response_cache: OrderedDict[tuple, tuple[float, VMRequestAvailabilityResponse]] = OrderedDict()
+
+
+def _fingerprint(*columns, order_by):
+    # 整張表在 DB 端壓成一個 md5，只回傳一個字串
+    return func.md5(
+        func.coalesce(
+            func.string_agg(
+                func.concat_ws("|", *columns),
+                aggregate_order_by(literal_column("','"), order_by),
+            ),
+            "",
+        )
+    )
+
+
+def _state_version(session: Session) -> tuple:
+    """會影響評估結果的申請與設定版本，一次 round-trip 取得。
+
+    - 申請筆數與最新建立時間：每小時需求分布
+    - 待審核 / 進行中申請的規格、節點與時段：待審核壓力與預約容量
+    - placement 設定、節點優先序與 storage 狀態
+    """
+    open_requests = VMRequest.status.in_(  # type: ignore[attr-defined]
+        (
+            VMRequestStatus.pending,
+            VMRequestStatus.approved,
+            VMRequestStatus.provisioning,
+            VMRequestStatus.running,
+        )
+    )
+    return tuple(
+        session.exec(
+            select(
+                select(func.count()).select_from(VMRequest).scalar_subquery(),
+                select(func.max(VMRequest.created_at)).scalar_subquery(),
+                select(
+                    _fingerprint(
+                        VMRequest.id,
+                        VMRequest.status,
+                        VMRequest.resource_type,
+                        VMRequest.cores,
+                        VMRequest.memory,
+                        VMRequest.disk_size,
+                        VMRequest.rootfs_size,
+                        VMRequest.desired_node,
+                        VMRequest.assigned_node,
+                        VMRequest.start_at,
+                        VMRequest.end_at,
+                        VMRequest.reviewed_at,
+                        order_by=VMRequest.id,
+                    )
+                )
+                .where(open_requests)
+                .scalar_subquery(),
+                select(func.max(ProxmoxConfig.updated_at)).scalar_subquery(),
+                select(
+                    _fingerprint(ProxmoxNode.name, ProxmoxNode.priority, order_by=ProxmoxNode.id)
+                ).scalar_subquery(),
+                select(
+                    _fingerprint(
+                        ProxmoxStorage.node_name,
+                        ProxmoxStorage.storage,
+                        ProxmoxStorage.total_gb,
+                        ProxmoxStorage.avail_gb,
+                        ProxmoxStorage.active,
+                        ProxmoxStorage.enabled,
+                        ProxmoxStorage.can_vm,
+                        ProxmoxStorage.can_lxc,
+                        ProxmoxStorage.is_shared,
+                        ProxmoxStorage.speed_tier,
+                        ProxmoxStorage.user_priority,
+                        order_by=ProxmoxStorage.id,
+                    )
+                ).scalar_subquery(),
+            )
+        ).one()
+    )
+
+
+def _cache_get(key: tuple) -> VMRequestAvailabilityResponse | None:
+    now = monotonic_time.monotonic()
+    with _cache_lock:
+        entry = _response_cache.get(key)
+        if entry is None:
+            return None
+        expires_at, response = entry
+        if expires_at <= now:
+            del _response_cache[key]
+            return None
+        _response_cache.move_to_end(key)
+        return response
+
+
+def _cache_put(key: tuple, response: VMRequestAvailabilityResponse) -> None:
+    ttl = settings.VM_REQUEST_AVAILABILITY_CACHE_TTL
+    if ttl <= 0:
+        return
+    with _cache_lock:
+        _response_cache[key] = (monotonic_time.monotonic() + ttl, response)
+        _response_cache.move_to_end(key)
+        while len(_response_cache) > max(settings.VM_REQUEST_AVAILABILITY_CACHE_MAX_ENTRIES, 1):
+            _response_cache.popitem(last=False)
+
+
+def clear_availability_cache() -> None:
+    with _cache_lock:
+        _response_cache.clear()
 
 
 def _normalize_datetime(value: datetime | None) -> datetime | None:
@@ -368,19 +553,15 @@ def _validate_policy_window(
 
 def _load_hourly_demand_profile(*, session: Session, timezone: ZoneInfo) -> dict[int, float]:
     recent_window_start = datetime.now(UTC) - timedelta(days=30)
-    rows = list(
-        session.exec(
-            select(VMRequest).where(VMRequest.created_at >= recent_window_start)  # type: ignore[operator]
-        ).all()
+    local_hour = func.extract(
+        "hour", func.timezone(timezone.key, VMRequest.created_at)
     )
-    counts = Counter()
-    for row in rows:
-        created_at = row.created_at
-        if created_at is None:
-            continue
-        if created_at.tzinfo is None:
-            created_at = created_at.replace(tzinfo=UTC)
-        counts[created_at.astimezone(timezone).hour] += 1
+    rows = session.exec(
+        select(local_hour, func.count())
+        .where(VMRequest.created_at >= recent_window_start)  # type: ignore[operator]
+        .group_by(local_hour)
+    ).all()
+    counts = Counter({int(hour): int(count) for hour, count in rows if hour is not None})
 
     peak = max(counts.values(), default=0)
     if peak <= 0:
@@ -396,24 +577,36 @@ def _pending_pressure_ratio(
     session: Session,
     baseline_capacities,
 ) -> float:
-    pending_requests = list(
-        session.exec(
-            select(VMRequest).where(VMRequest.status == VMRequestStatus.pending)
-        ).all()
-    )
-    if not pending_requests or not baseline_capacities:
+    if not baseline_capacities:
+        return 0.0
+    pending_count, requested_cpu, requested_mem_mb, requested_disk_gb = session.exec(
+        select(
+            func.count(),
+            func.coalesce(func.sum(func.greatest(func.coalesce(VMRequest.cores, 0), 0)), 0),
+            func.coalesce(func.sum(func.greatest(func.coalesce(VMRequest.memory, 0), 0)), 0),
+            func.coalesce(
+                func.sum(
+                    func.greatest(
+                        func.coalesce(
+                            func.nullif(VMRequest.disk_size, 0), VMRequest.rootfs_size, 0
+                        ),
+                        0,
+                    )
+                ),
+                0,
+            ),
+        ).where(VMRequest.status == VMRequestStatus.pending)
+    ).one()
+    if not pending_count:
         return 0.0
 
     total_alloc_cpu = sum(max(item.allocatable_cpu_cores, 0.0) for item in baseline_capacities)
     total_alloc_mem = sum(max(item.allocatable_memory_bytes, 0) for item in baseline_capacities)
     total_alloc_disk = sum(max(item.allocatable_disk_bytes, 0) for item in baseline_capacities)
 
-    requested_cpu = sum(max(float(item.cores or 0), 0.0) for item in pending_requests)
-    requested_mem = sum(max(int(item.memory or 0), 0) * 1024 * 1024 for item in pending_requests)
-    requested_disk = sum(
-        max(int(item.disk_size or item.rootfs_size or 0), 0) * 1024**3
-        for item in pending_requests
-    )
+    requested_cpu = float(requested_cpu)
+    requested_mem = int(requested_mem_mb) * 1024 * 1024
+    requested_disk = int(requested_disk_gb) * 1024**3
 
     ratios = [
         (requested_cpu / total_alloc_cpu) if total_alloc_cpu > 0 else 0.0,
@@ -458,10 +651,7 @@ def _slot_from_plan(
     role: UserRole,
     demand_ratio: float,
     pending_pressure: float,
-    adjusted_nodes,
-    node_priorities: dict[str, int],
-    resource_stack_by_node: dict[str, Counter[str]],
-    stack_label: str,
+    node_snapshots: list[VMRequestAvailabilityNodeSnapshot],
     placement_strategy: str,
 ) -> VMRequestAvailabilitySlot:
     reasons = list(plan.rationale or plan.warnings or [])
@@ -501,13 +691,7 @@ def _slot_from_plan(
         recommended_nodes=recommended_nodes[:3],
         target_node=plan.recommended_node,
         placement_strategy=placement_strategy,
-        node_snapshots=_build_slot_node_snapshots(
-            adjusted_nodes=adjusted_nodes,
-            plan=plan,
-            node_priorities=node_priorities,
-            resource_stack_by_node=resource_stack_by_node,
-            stack_label=stack_label,
-        ),
+        node_snapshots=node_snapshots,
     )
 
 
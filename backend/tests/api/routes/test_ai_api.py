@@ -4,9 +4,12 @@ from fastapi.testclient import TestClient
 from sqlmodel import Session
 
 from app.core.config import settings
+from app.core.security import hash_api_key
 from app.features.ai.config import settings as ai_api_settings
+from app.models import AIAPICredential
 from app.repositories import user as user_repo
 from app.schemas import UserCreate
+from app.services.llm_gateway.api_key_cache import api_key_auth_cache
 from tests.utils.user import user_authentication_headers
 from tests.utils.utils import random_lower_string
 
@@ -219,3 +222,52 @@ def test_ai_api_credentials_list_all_requires_admin(
         headers=user_headers,
     )
     assert response.status_code == 403
+
+
+def test_ai_api_key_auth_uses_digest_and_is_invalidated_on_rotate_and_delete(
+    client: TestClient,
+    superuser_token_headers: dict[str, str],
+    db: Session,
+) -> None:
+    user_headers = _create_test_user_headers(client, db, "ai-api-key-auth@example.com")
+    _create_and_approve_ai_api_request(
+        client=client,
+        user_headers=user_headers,
+        superuser_token_headers=superuser_token_headers,
+        purpose="Use AI API to test key authentication caching.",
+        api_key_name="auth-cache",
+    )
+    credential = client.get(
+        f"{settings.API_V1_STR}/ai-api/credentials/my", headers=user_headers
+    ).json()["data"][0]
+    usage_url = f"{settings.API_V1_STR}/ai-proxy/usage/my"
+
+    def _status(api_key: str) -> int:
+        return client.get(usage_url, headers={"Authorization": f"Bearer {api_key}"}).status_code
+
+    # 舊憑證沒有 digest：第一次驗證以解密比對並補寫
+    stored = db.get(AIAPICredential, uuid.UUID(credential["id"]))
+    assert stored.api_key_digest == hash_api_key(credential["api_key"])
+    stored.api_key_digest = None
+    db.add(stored)
+    db.commit()
+    api_key_auth_cache.clear()
+
+    assert _status(credential["api_key"]) == 200
+    db.refresh(stored)
+    assert stored.api_key_digest == hash_api_key(credential["api_key"])
+    assert _status(credential["api_key"]) == 200  # 由快取服務
+    assert _status(credential["api_key"] + "x") == 401
+
+    rotated = client.post(
+        f"{settings.API_V1_STR}/ai-api/credentials/{credential['id']}/rotate",
+        headers=user_headers,
+    ).json()
+    assert _status(credential["api_key"]) == 401
+    assert _status(rotated["api_key"]) == 200
+
+    deleted = client.delete(
+        f"{settings.API_V1_STR}/ai-api/credentials/{rotated['id']}", headers=user_headers
+    )
+    assert deleted.status_code == 200
+    assert _status(rotated["api_key"]) == 401
@@ -18,6 +18,7 @@ collect_ignore = ["test_ai_api.py"]
 
 from app.core.config import settings
 from app.core.db import engine, init_db
+from app.infrastructure.proxmox import invalidate_cluster_resources
 from app.main import app
 from app.models import (
     AIAPICredential,
@@ -171,6 +172,14 @@ def _cleanup_test_data(session: Session) -> None:
     session.commit()
 
 
+@pytest.fixture(autouse=True)
+def _fresh_cluster_resource_cache() -> Generator[None, None, None]:
+    """Keep cluster resource snapshots from leaking between tests that fake PVE."""
+    invalidate_cluster_resources()
+    yield
+    invalidate_cluster_resources()
+
+
 @pytest.fixture(scope="session", autouse=True)
 def _seed_first_superuser() -> None:
     """Ensure FIRST_SUPERUSER exists and its password matches settings.
@@ -0,0 +1,133 @@
+"""Tests for the reserved-window capacity timeline in app.domain.placement.timeline.
+
+Every instant and window query is checked against a brute-force scan of the
+same reservations.
+"""
+
+from __future__ import annotations
+
+import random
+from datetime import UTC, datetime, timedelta
+
+from app.ai.pve_advisor.schemas import NodeCapacity
+from app.domain.placement.timeline import CapacityTimeline, Reservation
+
+GIB = 1024**3
+T0 = datetime(2026, 3, 2, 8, tzinfo=UTC)
+
+
+def _node(name: str) -> NodeCapacity:
+    return NodeCapacity(
+        node=name,
+        status="online",
+        candidate=True,
+        total_cpu_cores=32,
+        allocatable_cpu_cores=24,
+        total_memory_bytes=128 * GIB,
+        allocatable_memory_bytes=96 * GIB,
+        total_disk_bytes=2000 * GIB,
+        allocatable_disk_bytes=1000 * GIB,
+    )
+
+
+def _at(hours: float) -> datetime:
+    return T0 + timedelta(minutes=int(hours * 60))
+
+
+def _reserved_at(reservations: list[Reservation], node: str, moment: datetime):
+    active = [
+        item
+        for item in reservations
+        if item.node == node and item.start_at <= moment < item.end_at
+    ]
+    return (
+        sum(item.cpu_cores for item in active),
+        sum(item.memory_bytes for item in active),
+        sum(item.disk_bytes for item in active),
+    )
+
+
+def test_queries_match_brute_force_scan() -> None:
+    rng = random.Random(11)
+    reservations = []
+    for _ in range(40):
+        start = rng.randint(0, 60) / 2
+        reservations.append(
+            Reservation(
+                node=rng.choice(["pve-a", "pve-b"]),
+                start_at=_at(start),
+                end_at=_at(start + rng.randint(1, 12) / 2),
+                cpu_cores=float(rng.randint(1, 4)),
+                memory_bytes=rng.randint(1, 8) * GIB,
+                disk_bytes=rng.randint(10, 50) * GIB,
+            )
+        )
+    timeline = CapacityTimeline(reservations)
+
+    for node in ("pve-a", "pve-b", "pve-c"):
+        for step in range(80):
+            moment = _at(step / 2 - 1)
+            assert timeline.reserved_at(node, moment) == _reserved_at(
+                reservations, node, moment
+            )
+        for _ in range(50):
+            start = rng.randint(-2, 70) / 2
+            end = start + rng.randint(1, 16) / 2
+            moments = [_at(start)] + [
+                item.start_at
+                for item in reservations
+                if item.node == node and _at(start) < item.start_at < _at(end)
+            ]
+            usages = [_reserved_at(reservations, node, moment) for moment in moments]
+            peak = tuple(max(usage[index] for usage in usages) for index in range(3))
+            assert timeline.peak_reserved(node, _at(start), _at(end)) == peak
+
+
+def test_headroom_is_clamped_and_window_catches_mid_window_reservation() -> None:
+    node = _node("pve-a")
+    timeline = CapacityTimeline(
+        [
+            Reservation("pve-a", _at(1.5), _at(1.75), 30.0, 4 * GIB, 10 * GIB),
+            Reservation("pve-a", _at(3), _at(3), 8.0, GIB, GIB),
+        ]
+    )
+
+    assert timeline.free_at(node, _at(1)) == (24.0, 96 * GIB, 1000 * GIB)
+    assert timeline.free_at(node, _at(1.5)) == (0.0, 92 * GIB, 990 * GIB)
+    assert timeline.min_headroom(node, _at(1), _at(2)) == (0.0, 92 * GIB, 990 * GIB)
+    assert timeline.min_headroom(node, _at(1.75), _at(4)) == (
+        24.0,
+        96 * GIB,
+        1000 * GIB,
+    )
+
+
+def test_capacities_at_only_touches_nodes_with_active_reservations() -> None:
+    baseline = [_node("pve-a"), _node("pve-b")]
+    timeline = CapacityTimeline(
+        [Reservation("pve-a", _at(0), _at(2), 24.0, GIB, GIB)]
+    )
+
+    adjusted = timeline.capacities_at(baseline, _at(1))
+
+    assert adjusted[0].allocatable_cpu_cores == 0.0
+    assert adjusted[0].candidate is False
+    assert adjusted[1] == baseline[1]
+    assert baseline[0].allocatable_cpu_cores == 24
+
+
+def test_segment_key_changes_only_at_reservation_events() -> None:
+    timeline = CapacityTimeline(
+        [
+            Reservation("pve-a", _at(1), _at(3), 2.0, GIB, GIB),
+            Reservation("pve-b", _at(2), _at(5), 2.0, GIB, GIB),
+        ]
+    )
+
+    keys = [timeline.segment_key(_at(hour)) for hour in (0, 0.5, 1, 1.5, 2, 3, 4, 5, 6)]
+
+    assert keys[0] == keys[1]
+    assert keys[2] == keys[3] != keys[1]
+    assert keys[5] == keys[6] and keys[7] == keys[8]
+    assert len(set(keys)) == 5
+    assert CapacityTimeline([]).segment_key(_at(1)) == ()
@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from app.domain.scheduling import ScheduledTask, run_polling_scheduler
+from app.services.scheduling import recurrence_scheduler
+
+
+async def _run_for(seconds: float, tasks: list[ScheduledTask]) -> None:
+    stop_event = asyncio.Event()
+    runner = asyncio.create_task(
+        run_polling_scheduler(stop_event=stop_event, interval_seconds=60, tasks=tasks)
+    )
+    await asyncio.sleep(seconds)
+    stop_event.set()
+    await asyncio.wait_for(runner, timeout=2)
+
+
+@pytest.mark.asyncio
+async def test_slow_task_does_not_delay_other_tasks() -> None:
+    runs: list[str] = []
+
+    await _run_for(
+        0.3,
+        [
+            ScheduledTask(name="boot_wave", handler=lambda: time.sleep(0.5)),
+            ScheduledTask(
+                name="auto_stops",
+                handler=lambda: runs.append("auto_stops"),
+                interval_seconds=0.05,
+            ),
+        ],
+    )
+
+    assert len(runs) >= 4
+
+
+@pytest.mark.asyncio
+async def test_tasks_in_one_lane_never_overlap() -> None:
+    active = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def handler() -> None:
+        nonlocal active, peak
+        with lock:
+            active += 1
+            peak = max(peak, active)
+        time.sleep(0.05)
+        with lock:
+            active -= 1
+
+    await _run_for(
+        0.3,
+        [
+            ScheduledTask(name=f"task{i}", handler=handler, interval_seconds=0.01, lane="requests")
+            for i in range(3)
+        ],
+    )
+
+    assert peak == 1
+
+
+@pytest.mark.asyncio
+async def test_timed_out_run_keeps_its_lane_until_it_finishes() -> None:
+    slow_runs: list[tuple[float, float]] = []
+    lane_runs: list[float] = []
+
+    async def slow() -> None:
+        started = time.monotonic()
+        await asyncio.sleep(0.2)
+        slow_runs.append((started, time.monotonic()))
+
+    await _run_for(
+        0.4,
+        [
+            ScheduledTask(
+                name="rebalance",
+                handler=slow,
+                interval_seconds=0.02,
+                timeout_seconds=0.05,
+                lane="requests",
+            ),
+            ScheduledTask(
+                name="stops",
+                handler=lambda: lane_runs.append(time.monotonic()),
+                interval_seconds=0.02,
+                lane="requests",
+            ),
+        ],
+    )
+
+    # The timed-out run is not restarted and holds the lane until it returns.
+    assert len(slow_runs) >= 1
+    started, finished = slow_runs[0]
+    assert not [t for t in lane_runs if started < t < finished]
+    assert [t for t in lane_runs if t >= finished]
+
+
+@pytest.mark.asyncio
+async def test_scheduled_boot_waits_between_batches_without_blocking(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    targets = [SimpleNamespace(vmid=i) for i in range(5)]
+    policy = SimpleNamespace(boot_batch_size=2, boot_batch_interval_seconds=10)
+    booted: list[list[int]] = []
+    sleeps: list[float] = []
+
+    async def fake_sleep(seconds: float) -> None:
+        sleeps.append(seconds)
+
+    monkeypatch.setattr(
+        recurrence_scheduler, "_load_boot_targets", lambda: (targets, policy, None)
+    )
+    monkeypatch.setattr(
+        recurrence_scheduler,
+        "_boot_batch",
+        lambda batch, _grace: booted.append([r.vmid for r in batch]),
+    )
+    monkeypatch.setattr(recurrence_scheduler.asyncio, "sleep", fake_sleep)
+
+    await recurrence_scheduler.process_scheduled_boot()
+
+    assert booted == [[0, 1], [2, 3], [4]]
+    assert sleeps == [10, 10]
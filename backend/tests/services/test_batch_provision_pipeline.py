@@ -0,0 +1,156 @@
+"""Tests for the concurrent batch provisioning queue in batch_provision_service."""
+
+from __future__ import annotations
+
+import json
+import threading
+import time
+import uuid
+from datetime import UTC, datetime
+
+import pytest
+from pydantic import ValidationError
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.exceptions import BadRequestError, ProxmoxError
+from app.models.batch_provision import BatchProvisionJobStatus, BatchProvisionTaskStatus
+from app.repositories import batch_provision as bp_repo
+from app.repositories import group as group_repo
+from app.repositories import user as user_repo
+from app.schemas import UserCreate, VMCreateRequest
+from app.services.vm import batch_provision_service
+
+
+def _job(db: Session, members: int) -> uuid.UUID:
+    user = user_repo.create_user(
+        session=db,
+        user_create=UserCreate(
+            email=f"user-batch-{datetime.now(UTC).timestamp()}@example.com",
+            password="strongpass123",
+        ),
+    )
+    db.commit()
+    group = group_repo.create_group(
+        session=db, name=f"batch-{uuid.uuid4().hex[:8]}", description=None, owner_id=user.id
+    )
+    job = bp_repo.create_job(
+        session=db,
+        group_id=group.id,
+        initiated_by=user.id,
+        resource_type="qemu",
+        hostname_prefix="lab",
+        template_params=json.dumps({"template_id": 9000, "storage": "fast"}),
+        member_user_ids=[user.id] * members,
+    )
+    return job.id
+
+
+@pytest.fixture
+def pipeline(monkeypatch: pytest.MonkeyPatch) -> dict:
+    monkeypatch.setattr(settings, "BATCH_PROVISION_MAX_CONCURRENCY", 6)
+    monkeypatch.setattr(settings, "BATCH_PROVISION_PER_NODE_LIMIT", 3)
+    monkeypatch.setattr(settings, "BATCH_PROVISION_PER_STORAGE_LIMIT", 2)
+    monkeypatch.setattr(settings, "BATCH_PROVISION_MAX_ATTEMPTS", 3)
+    monkeypatch.setattr(settings, "BATCH_PROVISION_RETRY_BACKOFF_SECONDS", 0.0)
+    node = f"pve-{uuid.uuid4().hex[:6]}"
+    monkeypatch.setattr(
+        batch_provision_service,
+        "_placement_keys",
+        lambda resource_type, params: (node, f"{node}/{params['storage']}"),
+    )
+    state = {"active": 0, "peak": 0, "calls": {}, "lock": threading.Lock()}
+    return state
+
+
+def _fake_provision(state: dict, fail: dict[str, Exception] | None = None):
+    def provision(*, hostname: str, **_kwargs) -> int:
+        with state["lock"]:
+            state["active"] += 1
+            state["peak"] = max(state["peak"], state["active"])
+            calls = state["calls"][hostname] = state["calls"].get(hostname, 0) + 1
+        try:
+            time.sleep(0.05)
+            if fail and hostname in fail and calls < 3:
+                raise fail[hostname]
+            return 5000 + int(hostname.rsplit("-", 1)[1])
+        finally:
+            with state["lock"]:
+                state["active"] -= 1
+
+    return provision
+
+
+def test_members_overlap_within_storage_limit(
+    db: Session, pipeline: dict, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    job_id = _job(db, members=6)
+    monkeypatch.setattr(batch_provision_service, "_provision_one", _fake_provision(pipeline))
+
+    batch_provision_service._run_queue(job_id)
+
+    db.expire_all()
+    job = bp_repo.get_job(session=db, job_id=job_id)
+    assert job is not None
+    assert job.status == BatchProvisionJobStatus.completed
+    assert (job.done, job.failed_count) == (6, 0)
+    assert job.started_at is not None and job.throughput_per_minute > 0
+    assert pipeline["peak"] == 2
+    tasks = bp_repo.get_job_tasks(session=db, job_id=job_id)
+    assert sorted(task.vmid for task in tasks) == [5001, 5002, 5003, 5004, 5005, 5006]
+
+
+def test_failures_are_retried_and_bad_requests_are_not(
+    db: Session, pipeline: dict, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    job_id = _job(db, members=3)
+    monkeypatch.setattr(
+        batch_provision_service,
+        "_provision_one",
+        _fake_provision(
+            pipeline,
+            fail={"lab-1": ProxmoxError("clone lock timeout"), "lab-2": BadRequestError("bad spec")},
+        ),
+    )
+
+    batch_provision_service._run_queue(job_id)
+
+    db.expire_all()
+    tasks = {task.member_index: task for task in bp_repo.get_job_tasks(session=db, job_id=job_id)}
+    assert tasks[1].status == BatchProvisionTaskStatus.completed
+    assert (tasks[1].attempts, tasks[1].error) == (3, None)
+    assert tasks[2].status == BatchProvisionTaskStatus.failed
+    assert (tasks[2].attempts, tasks[2].error) == (1, "bad spec")
+    assert tasks[3].attempts == 1
+    job = bp_repo.get_job(session=db, job_id=job_id)
+    assert job is not None and (job.done, job.failed_count) == (2, 1)
+
+
+def test_permanent_errors_fail_after_one_attempt(
+    db: Session, pipeline: dict, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    try:
+        VMCreateRequest.model_validate({})
+    except ValidationError as exc:
+        validation_error = exc
+    job_id = _job(db, members=3)
+    monkeypatch.setattr(
+        batch_provision_service,
+        "_provision_one",
+        _fake_provision(
+            pipeline,
+            fail={
+                "lab-1": validation_error,
+                "lab-2": BadRequestError("no free IP"),
+                "lab-3": ConnectionError("connection reset"),
+            },
+        ),
+    )
+
+    batch_provision_service._run_queue(job_id)
+
+    db.expire_all()
+    tasks = {task.member_index: task for task in bp_repo.get_job_tasks(session=db, job_id=job_id)}
+    assert (tasks[1].status, tasks[1].attempts) == (BatchProvisionTaskStatus.failed, 1)
+    assert (tasks[2].status, tasks[2].attempts) == (BatchProvisionTaskStatus.failed, 1)
+    assert (tasks[3].status, tasks[3].attempts) == (BatchProvisionTaskStatus.completed, 3)
@@ -0,0 +1,199 @@
+"""Tests for the fleet-wide block-subnet sync job in firewall_sync_service."""
+
+from __future__ import annotations
+
+import json
+import threading
+import time
+import uuid
+from datetime import UTC, datetime, timedelta
+
+import pytest
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, col, select
+
+from app.core.db import engine
+from app.models import FirewallSyncJob, FirewallSyncJobStatus, User
+from app.repositories import firewall_sync_job as sync_repo
+from app.repositories import resource as resource_repo
+from app.services.jobs import jobs_service
+from app.services.network import firewall_service, firewall_sync_service
+from app.services.proxmox import proxmox_service
+
+BASE_VMID = 880000
+TARGETS = ["10.10.0.0/16", "192.168.50.0/24"]
+
+
+@pytest.fixture
+def fleet(db: Session, monkeypatch: pytest.MonkeyPatch):
+    owner = db.exec(select(User)).first()
+    for offset in range(6):
+        resource_repo.delete_resource(session=db, vmid=BASE_VMID + offset)
+        resource_repo.create_resource(
+            session=db, vmid=BASE_VMID + offset, user_id=owner.id, environment_type="lab"
+        )
+    resource_repo.set_block_rules_fingerprint(
+        session=db,
+        vmids=[BASE_VMID, BASE_VMID + 1],
+        fingerprint=firewall_sync_service.block_rules_fingerprint(list(reversed(TARGETS))),
+    )
+    db.commit()
+
+    pve_rows = [
+        {"vmid": BASE_VMID + offset, "node": "pve-a" if offset < 4 else "pve-b", "type": "qemu"}
+        for offset in range(6)
+    ]
+    monkeypatch.setattr(proxmox_service, "list_all_resources", lambda: pve_rows)
+
+    applied: list[tuple[str, int]] = []
+    lock = threading.Lock()
+
+    def apply(node, vmid, resource_type, targets):
+        assert targets == TARGETS
+        with lock:
+            applied.append((node, vmid))
+        if vmid == BASE_VMID + 5:
+            return {"created": [], "errors": [{"vmid": vmid, "error": "pve timeout"}]}
+        return {"created": list(targets), "errors": []}
+
+    monkeypatch.setattr(firewall_service, "_apply_extra_block_rules", apply)
+    yield owner, applied
+    for offset in range(6):
+        resource_repo.delete_resource(session=db, vmid=BASE_VMID + offset)
+
+
+def test_sync_skips_matching_fingerprints_and_reports_per_node(db: Session, fleet) -> None:
+    owner, applied = fleet
+    job = sync_repo.create_job(session=db, initiated_by=owner.id, targets=TARGETS)
+
+    firewall_sync_service.run_block_rule_sync(job.id)
+
+    db.refresh(job)
+    assert sorted(vmid for _node, vmid in applied) == [BASE_VMID + i for i in range(2, 6)]
+    assert job.status == FirewallSyncJobStatus.completed
+    assert (job.total, job.done, job.skipped, job.failed_count) == (6, 6, 2, 1)
+
+    summary = json.loads(job.summary)
+    assert summary["created"] == 6
+    assert summary["errors"] == [{"vmid": BASE_VMID + 5, "error": "pve timeout"}]
+    assert {node: (s["vms"], s["skipped"], s["failed"]) for node, s in summary["nodes"].items()} == {
+        "pve-a": (2, 2, 0),
+        "pve-b": (2, 0, 1),
+    }
+
+    fingerprints = resource_repo.get_block_rules_fingerprints(
+        session=db, vmids=[BASE_VMID + i for i in range(6)]
+    )
+    expected = firewall_sync_service.block_rules_fingerprint(TARGETS)
+    assert [fingerprints[BASE_VMID + i] == expected for i in range(6)] == [True] * 5 + [False]
+
+    # 第二次只剩失敗的 VM 需要重做
+    applied.clear()
+    rerun = sync_repo.create_job(session=db, initiated_by=owner.id, targets=TARGETS)
+    firewall_sync_service.run_block_rule_sync(rerun.id)
+    assert applied == [("pve-b", BASE_VMID + 5)]
+
+
+def test_sync_job_is_listed_in_jobs_api(db: Session, fleet) -> None:
+    owner, _applied = fleet
+    job = sync_repo.create_job(session=db, initiated_by=owner.id, targets=TARGETS)
+    firewall_sync_service.run_block_rule_sync(job.id)
+    db.refresh(job)
+
+    detail = jobs_service.get_job_detail(
+        session=db, user=owner, job_id=f"firewall_sync:{job.id}"
+    )
+    assert detail.item.status.value == "completed"
+    assert detail.item.progress == 100
+    assert detail.extra["targets"] == TARGETS
+    assert set(detail.extra["summary"]["nodes"]) == {"pve-a", "pve-b"}
+    assert detail.item.updated_at >= datetime(2026, 1, 1, tzinfo=UTC)
+
+
+def _other_worker_job(owner: User) -> tuple[Session, uuid.UUID]:
+    """模擬另一個 worker 行程：租用並開始執行一個工作。"""
+    with Session(engine) as session:
+        job_id = sync_repo.create_job(
+            session=session, initiated_by=owner.id, targets=TARGETS
+        ).id
+    lease = Session(engine)
+    sync_repo.lease_job(session=lease, job_id=job_id)
+    with Session(engine) as session:
+        job = sync_repo.get_job(session=session, job_id=job_id)
+        assert sync_repo.claim_job(session=session, job=job)
+    return lease, job_id
+
+
+def test_recovery_fails_only_jobs_without_a_live_worker(db: Session, fleet) -> None:
+    owner, _applied = fleet
+    lease, live_id = _other_worker_job(owner)
+    try:
+        orphan = sync_repo.create_job(session=db, initiated_by=owner.id, targets=TARGETS)
+        stale = sync_repo.create_job(session=db, initiated_by=owner.id, targets=TARGETS)
+        stale.created_at -= timedelta(minutes=5)
+        db.add(stale)
+        db.commit()
+        # 唯一索引不允許第二個 running；以重啟前殘留的狀態模擬
+        with pytest.raises(IntegrityError):
+            db.exec(
+                update(FirewallSyncJob)
+                .where(FirewallSyncJob.id == orphan.id)
+                .values(status=FirewallSyncJobStatus.running)
+            )
+        db.rollback()
+
+        assert firewall_sync_service.recover_interrupted_jobs() == 1
+        statuses = {
+            job.id: job.status
+            for job in db.exec(
+                select(FirewallSyncJob).where(
+                    col(FirewallSyncJob.id).in_([live_id, orphan.id, stale.id])
+                )
+            )
+        }
+        assert statuses == {
+            live_id: FirewallSyncJobStatus.running,
+            orphan.id: FirewallSyncJobStatus.pending,
+            stale.id: FirewallSyncJobStatus.failed,
+        }
+    finally:
+        lease.close()
+
+    # 持有租約的行程結束後，殘留的 running 工作被判定為中斷
+    assert firewall_sync_service.recover_interrupted_jobs() == 1
+    live = db.get(FirewallSyncJob, live_id)
+    db.refresh(live)
+    assert live.status == FirewallSyncJobStatus.failed
+    assert live.error == "Interrupted by a server restart"
+
+
+def test_job_waits_for_a_sync_running_in_another_worker(
+    db: Session, fleet, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    owner, applied = fleet
+    monkeypatch.setattr(firewall_sync_service, "_CLAIM_RETRY_SECONDS", 0.05)
+    lease, live_id = _other_worker_job(owner)
+    queued = sync_repo.create_job(session=db, initiated_by=owner.id, targets=TARGETS)
+    runner = threading.Thread(target=firewall_sync_service.run_block_rule_sync, args=(queued.id,))
+    try:
+        runner.start()
+        time.sleep(0.3)
+        assert applied == []
+        db.refresh(queued)
+        assert queued.status == FirewallSyncJobStatus.pending
+
+        with Session(engine) as session:
+            live = sync_repo.get_job(session=session, job_id=live_id)
+            sync_repo.finish_job(
+                session=session, job=live, status=FirewallSyncJobStatus.completed
+            )
+    finally:
+        lease.close()
+    runner.join(timeout=10)
+
+    assert not runner.is_alive()
+    db.refresh(queued)
+    assert queued.status == FirewallSyncJobStatus.completed
+    assert len(applied) == 4
+    assert db.get(FirewallSyncJob, live_id).status == FirewallSyncJobStatus.completed
@@ -0,0 +1,103 @@
+"""Tests for the batched firewall topology builder in firewall_service."""
+
+from __future__ import annotations
+
+import pytest
+
+from app.services.network import firewall_service as fw
+from app.services.proxmox import proxmox_service
+
+
+class _FakeFirewall:
+    def __init__(self, rules: list[dict], digest: str, calls: dict[str, int]) -> None:
+        self.rules_data = rules
+        self.digest = digest
+        self.calls = calls
+        self.options = self
+        self.rules = _Rules(self)
+
+    def get(self) -> dict:
+        self.calls["options"] += 1
+        return {"enable": 1, "digest": self.digest}
+
+
+class _Rules:
+    def __init__(self, firewall: _FakeFirewall) -> None:
+        self.firewall = firewall
+
+    def get(self) -> list[dict]:
+        self.firewall.calls["rules"] += 1
+        return [dict(rule, digest=self.firewall.digest) for rule in self.firewall.rules_data]
+
+
+@pytest.fixture
+def fake_cluster(monkeypatch: pytest.MonkeyPatch):
+    calls = {"options": 0, "rules": 0, "snapshots": 0}
+    firewalls = {
+        101: _FakeFirewall(
+            [
+                {"comment": "campus-cloud:gateway:default"},
+                {"comment": "campus-cloud:101->102:22/tcp"},
+                {"comment": "manual rule"},
+            ],
+            "d101-a",
+            calls,
+        ),
+        102: _FakeFirewall(
+            [{"comment": "campus-cloud:gateway->102:80/tcp"}], "d102-a", calls
+        ),
+    }
+    resources = [
+        {"vmid": 101, "node": "pve1", "type": "qemu", "status": "running", "name": "a"},
+        {"vmid": 102, "node": "pve2", "type": "lxc", "status": "stopped", "name": "b"},
+    ]
+
+    def list_all_resources() -> list[dict]:
+        calls["snapshots"] += 1
+        return [dict(r) for r in resources]
+
+    monkeypatch.setattr(proxmox_service, "list_all_resources", list_all_resources)
+    monkeypatch.setattr(fw, "_firewall_api", lambda node, vmid, rtype: firewalls[vmid])
+    monkeypatch.setattr(fw, "_parsed_rules_cache", {})
+    return firewalls, calls
+
+
+def test_connections_come_from_one_snapshot_and_digest_cache(fake_cluster) -> None:
+    firewalls, calls = fake_cluster
+
+    edges = fw.get_connections_from_rules([101, 102, 999])
+    assert [(e.source_vmid, e.target_vmid, [p.port for p in e.ports]) for e in edges] == [
+        (101, None, []),
+        (101, 102, [22]),
+        (None, 102, [80]),
+    ]
+    assert calls == {"options": 2, "rules": 2, "snapshots": 1}
+
+    # 規則未變：只查 options（digest），不重抓規則
+    assert fw.get_connections_from_rules([101, 102]) == edges
+    assert calls["rules"] == 2
+
+    firewalls[102].rules_data = []
+    firewalls[102].digest = "d102-b"
+    edges = fw.get_connections_from_rules([101, 102])
+    assert [(e.source_vmid, e.target_vmid) for e in edges] == [(101, None), (101, 102)]
+    assert calls["rules"] == 3
+
+
+def test_state_fetch_skips_ip_lookup_for_stopped_guests(
+    fake_cluster, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    looked_up: list[int] = []
+
+    def get_ip_address(node, vmid, resource_type):
+        looked_up.append(vmid)
+        return "10.0.0.11"
+
+    monkeypatch.setattr(proxmox_service, "get_ip_address", get_ip_address)
+
+    states = fw._fetch_firewall_states(fw._snapshot_resources([101, 102]), with_ip=True)
+
+    assert looked_up == [101]
+    assert states[101].ip_address == "10.0.0.11"
+    assert states[102].ip_address is None
+    assert all(state.firewall_enabled for state in states.values())
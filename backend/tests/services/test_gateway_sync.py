@@ -0,0 +1,227 @@
+"""Tests for the debounced gateway config sync coordinator."""
+
+from __future__ import annotations
+
+import contextlib
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.network import nat_service
+from app.services.network.gateway_sync import GatewaySyncCoordinator
+
+
+class _FakeGateway:
+    """Stands in for the gateway VM; ``content`` is what the DB would render."""
+
+    def __init__(self) -> None:
+        self.content = "rules-v1"
+        self.remote: str | None = None
+        self.writes: list[str] = []
+        self.fail = False
+
+    def sync(self, _session, force: bool) -> None:
+        if self.fail:
+            raise RuntimeError("gateway unreachable")
+        if force or self.remote != self.content:
+            self.remote = self.content
+            self.writes.append(self.content)
+
+
+def _coordinator(now: list[float], gateway: _FakeGateway) -> GatewaySyncCoordinator:
+    coordinator = GatewaySyncCoordinator(
+        session_factory=contextlib.nullcontext,
+        debounce=lambda: 1.0,
+        max_delay=lambda: 5.0,
+        retry_delay=lambda: 10.0,
+        clock=lambda: now[0],
+        background=False,
+    )
+    coordinator.register("haproxy", gateway.sync)
+    return coordinator
+
+
+def test_burst_of_changes_is_written_once_after_debounce() -> None:
+    now, gateway = [0.0], _FakeGateway()
+    coordinator = _coordinator(now, gateway)
+
+    for step in range(20):
+        now[0] = step * 0.1
+        gateway.content = f"rules-v{step}"
+        coordinator.mark_dirty("haproxy")
+
+    assert coordinator.run_due() == []
+    now[0] = 2.95
+    assert coordinator.run_due() == ["haproxy"]
+    assert gateway.writes == ["rules-v19"]
+    assert not coordinator.is_dirty("haproxy")
+
+
+def test_max_delay_bounds_a_continuous_stream_of_changes() -> None:
+    now, gateway = [0.0], _FakeGateway()
+    coordinator = _coordinator(now, gateway)
+
+    for step in range(12):
+        now[0] = step * 0.5
+        coordinator.mark_dirty("haproxy")
+        coordinator.run_due()
+
+    assert gateway.writes == ["rules-v1"]
+    assert coordinator.due_at("haproxy") == pytest.approx(6.5)
+
+
+def test_unchanged_content_skips_write_and_force_rewrites() -> None:
+    now, gateway = [0.0], _FakeGateway()
+    coordinator = _coordinator(now, gateway)
+
+    coordinator.mark_dirty("haproxy")
+    coordinator.flush("haproxy")
+    coordinator.mark_dirty("haproxy")
+    coordinator.flush("haproxy")
+    assert gateway.writes == ["rules-v1"]
+
+    coordinator.flush("haproxy", force=True)
+    assert gateway.writes == ["rules-v1", "rules-v1"]
+
+
+def test_flush_raises_and_background_retries_with_backoff() -> None:
+    now, gateway = [0.0], _FakeGateway()
+    coordinator = _coordinator(now, gateway)
+    gateway.fail = True
+
+    coordinator.mark_dirty("haproxy")
+    with pytest.raises(RuntimeError):
+        coordinator.flush("haproxy")
+    assert coordinator.is_dirty("haproxy")
+    assert coordinator.due_at("haproxy") == pytest.approx(10.0)
+
+    now[0] = 10.0
+    assert coordinator.run_due() == ["haproxy"]
+    assert coordinator.due_at("haproxy") == pytest.approx(30.0)
+
+    gateway.fail = False
+    now[0] = 30.0
+    assert coordinator.run_due() == ["haproxy"]
+    assert gateway.writes == ["rules-v1"]
+    assert coordinator.due_at("haproxy") is None
+
+
+def test_flush_waits_for_a_sync_that_started_before_the_change() -> None:
+    gateway = _FakeGateway()
+    started, release = threading.Event(), threading.Event()
+    reads: list[str] = []
+
+    def slow_sync(_session, force):
+        content = gateway.content
+        reads.append(content)
+        if len(reads) == 1:
+            started.set()
+            release.wait(5)
+        if force or gateway.remote != content:
+            gateway.remote = content
+            gateway.writes.append(content)
+
+    coordinator = GatewaySyncCoordinator(
+        session_factory=contextlib.nullcontext,
+        debounce=lambda: 0.0,
+        background=False,
+    )
+    coordinator.register("traefik", slow_sync)
+    coordinator.mark_dirty("traefik")
+    worker = threading.Thread(target=coordinator.run_due)
+    worker.start()
+    started.wait(5)
+
+    gateway.content = "rules-v2"
+    coordinator.mark_dirty("traefik")
+    threading.Timer(0.05, release.set).start()
+    coordinator.flush("traefik", timeout=5)
+    worker.join(5)
+
+    assert reads == ["rules-v1", "rules-v2"]
+    assert gateway.writes == ["rules-v1", "rules-v2"]
+
+
+def test_workers_sharing_a_gateway_never_skip_a_stale_remote() -> None:
+    gateway = _FakeGateway()
+    worker_a = _coordinator([0.0], gateway)
+    worker_b = _coordinator([0.0], gateway)
+
+    worker_a.flush("haproxy", force=True)
+    gateway.content = "rules-v2"  # worker B adds a rule
+    worker_b.mark_dirty("haproxy")
+    worker_b.flush("haproxy")
+    gateway.content = "rules-v1"  # worker A deletes it again
+    worker_a.mark_dirty("haproxy")
+    worker_a.flush("haproxy")
+
+    assert gateway.remote == "rules-v1"
+    assert gateway.writes == ["rules-v1", "rules-v2", "rules-v1"]
+
+
+class _FakeSsh:
+    def __init__(self, files: dict[str, str]) -> None:
+        self.files = files
+        self.commands: list[str] = []
+
+    @contextlib.contextmanager
+    def client(self, *_args, **_kwargs):
+        yield self
+
+    def read(self, _client, path: str) -> bytes | None:
+        content = self.files.get(path)
+        return None if content is None else content.encode()
+
+    def write(self, _client, path: str, content: bytes) -> None:
+        self.files[path] = content.decode()
+
+    def exec(self, _client, command: str) -> tuple[int, str, str]:
+        self.commands.append(command)
+        return 0, "", ""
+
+
+def test_haproxy_sync_compares_against_the_managed_block_on_the_gateway(monkeypatch) -> None:
+    from app.infrastructure import ssh
+    from app.repositories import gateway_config as gw_repo
+    from app.repositories import nat_rule as nat_repo
+    from app.services.network.gateway_service import SERVICE_CONFIG_PATHS
+
+    config = SimpleNamespace(
+        host="10.0.0.1", ssh_port=22, ssh_user="root", encrypted_private_key="x"
+    )
+    rules = [
+        SimpleNamespace(
+            vmid=101, external_port=2201, internal_port=22, protocol="tcp", vm_ip="10.0.0.5"
+        )
+    ]
+    path = SERVICE_CONFIG_PATHS["haproxy"]
+    fake = _FakeSsh({path: "global\n"})
+    monkeypatch.setattr(gw_repo, "get_gateway_config", lambda _s: config)
+    monkeypatch.setattr(gw_repo, "get_decrypted_private_key", lambda _c: "key")
+    monkeypatch.setattr(nat_repo, "list_rules", lambda _s: rules)
+    monkeypatch.setattr(ssh, "pooled_key_client", fake.client)
+    monkeypatch.setattr(ssh, "sftp_read_file", fake.read)
+    monkeypatch.setattr(ssh, "sftp_write_file", fake.write)
+    monkeypatch.setattr(ssh, "exec_command", fake.exec)
+
+    def deployed() -> str:
+        # 模擬 haproxy -c && mv：把暫存檔搬到正式路徑
+        fake.files[path] = fake.files.pop(path + ".campus-cloud.tmp", fake.files[path])
+        return fake.files[path]
+
+    nat_service._sync_haproxy(None)
+    assert "10.0.0.5:22" in deployed()
+    assert len(fake.commands) == 1
+
+    nat_service._sync_haproxy(None)
+    assert len(fake.commands) == 1
+
+    # 其他 worker 刪除規則後，gateway 上的 block 與 DB 不同，一定重寫
+    rules.clear()
+    nat_service._sync_haproxy(None)
+    assert "10.0.0.5:22" not in deployed()
+    assert len(fake.commands) == 2
+
+    nat_service._sync_haproxy(None, force=True)
+    assert len(fake.commands) == 3
@@ -0,0 +1,150 @@
+"""Tests for the incrementally maintained, database-backed GPU usage index."""
+
+from __future__ import annotations
+
+from collections.abc import Iterator
+
+import pytest
+from sqlmodel import Session, delete
+
+from app.core.db import engine
+from app.models import GPUUsageEntry, GPUUsageIndexState
+from app.services.proxmox.gpu_usage_index import GPUUsageIndex, parse_gpu_usage
+
+
+def _clear() -> None:
+    with Session(engine) as session:
+        session.exec(delete(GPUUsageEntry))
+        session.exec(delete(GPUUsageIndexState))
+        session.commit()
+
+
+@pytest.fixture(autouse=True)
+def _empty_index() -> Iterator[None]:
+    _clear()
+    yield
+    _clear()
+
+
+class _FakeCluster:
+    def __init__(self) -> None:
+        self.guests = [
+            {"vmid": 101, "node": "pve1", "type": "qemu", "name": "a", "status": "running"},
+            {"vmid": 102, "node": "pve1", "type": "qemu", "name": "b", "status": "stopped"},
+            {"vmid": 200, "node": "pve2", "type": "lxc", "name": "ct", "status": "running"},
+        ]
+        self.configs = {
+            101: {"digest": "d101", "hostpci0": "mapping=a100,mdev=nvidia-1"},
+            102: {"digest": "d102", "cores": 2},
+        }
+        self.fetches: list[int] = []
+
+    def fetch_config(self, node: str, vmid: int) -> dict:
+        self.fetches.append(vmid)
+        return dict(self.configs[vmid])
+
+    def list_guests(self) -> list[dict]:
+        return [dict(g) for g in self.guests]
+
+    def index(self) -> GPUUsageIndex:
+        return GPUUsageIndex(
+            fetch_config=self.fetch_config,
+            list_guests=self.list_guests,
+            session_factory=lambda: Session(engine),
+            concurrency=lambda: 4,
+            background=False,
+        )
+
+
+def _usage(index: GPUUsageIndex) -> dict[str, list[tuple[int, str, str]]]:
+    return {
+        mid: [(u.vmid, u.status, u.mdev_type) for u in users]
+        for mid, users in index.usage_map().items()
+    }
+
+
+def test_parse_gpu_usage_reads_mapping_slots() -> None:
+    assert parse_gpu_usage(
+        {"hostpci0": "0000:01:00.0", "hostpci3": "mapping=rtx,pcie=1", "hostpci15": "mapping=a100,mdev=grid-8q"}
+    ) == (("rtx", ""), ("a100", "grid-8q"))
+
+
+def test_index_builds_once_and_serves_reads_without_config_calls() -> None:
+    cluster = _FakeCluster()
+    index = cluster.index()
+
+    assert _usage(index) == {"a100": [(101, "running", "nvidia-1")]}
+    assert sorted(cluster.fetches) == [101, 102]
+
+    # 狀態與名稱來自快照，不需重抓 config
+    cluster.guests[0]["status"] = "stopped"
+    assert _usage(index) == {"a100": [(101, "stopped", "nvidia-1")]}
+    assert len(cluster.fetches) == 2
+
+
+def test_local_updates_and_digest_reconcile() -> None:
+    cluster = _FakeCluster()
+    index = cluster.index()
+    index.usage_map()
+
+    cluster.configs[102] = {"digest": "d102-b", "hostpci0": "mapping=a100"}
+    index.refresh_vm("pve1", 102)
+    assert [vmid for vmid, *_ in _usage(index)["a100"]] == [101, 102]
+
+    index.remove_vm(101)
+    cluster.guests = [g for g in cluster.guests if g["vmid"] != 101]
+    assert [vmid for vmid, *_ in _usage(index)["a100"]] == [102]
+
+    # 外部修改：digest 改變的才重新解析，消失的 VM 被移除
+    cluster.guests.append({"vmid": 103, "node": "pve2", "type": "qemu", "name": "c"})
+    cluster.configs[103] = {"digest": "d103", "hostpci0": "mapping=rtx"}
+    cluster.configs[102] = {"digest": "d102-c"}
+    stats = index.reconcile()
+    assert stats == {"fetched": 2, "changed": 2, "removed": 0, "failed": 0}
+    assert _usage(index) == {"rtx": [(103, "", "")]}
+
+    assert index.reconcile()["changed"] == 0
+
+
+def test_reconcile_does_not_overwrite_newer_local_update() -> None:
+    cluster = _FakeCluster()
+    index = cluster.index()
+    index.usage_map()
+
+    stale = {"digest": "d101", "hostpci0": "mapping=a100"}
+
+    def fetch_then_local_write(node: str, vmid: int) -> dict:
+        if vmid == 101:
+            index.record_config(101, "pve1", {"digest": "d101-new"})
+            return stale
+        return cluster.fetch_config(node, vmid)
+
+    index._fetch_config = fetch_then_local_write
+    index.reconcile()
+    assert _usage(index) == {}
+
+
+def test_workers_share_one_build_and_see_each_others_updates() -> None:
+    cluster = _FakeCluster()
+    worker_a, worker_b = cluster.index(), cluster.index()
+
+    assert _usage(worker_a) == {"a100": [(101, "running", "nvidia-1")]}
+    assert _usage(worker_b) == {"a100": [(101, "running", "nvidia-1")]}
+    assert sorted(cluster.fetches) == [101, 102]
+
+    # worker A 剛把 GPU 配給 102，worker B 的可用量檢查立即看得到
+    cluster.configs[102] = {"digest": "d102-b", "hostpci0": "mapping=a100"}
+    worker_a.refresh_vm("pve1", 102)
+    assert [vmid for vmid, *_ in _usage(worker_b)["a100"]] == [101, 102]
+
+
+def test_background_pass_runs_in_one_worker_per_interval() -> None:
+    cluster = _FakeCluster()
+    worker_a, worker_b = cluster.index(), cluster.index()
+    worker_a.usage_map()
+    cluster.fetches.clear()
+
+    assert worker_a._reconcile_if_stale(max_age=300, wait=False) is None
+    assert worker_b._reconcile_if_stale(max_age=0, wait=False) is not None
+    assert worker_a._reconcile_if_stale(max_age=300, wait=False) is None
+    assert sorted(cluster.fetches) == [101, 102]
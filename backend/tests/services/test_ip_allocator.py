@@ -0,0 +1,93 @@
+"""Tests for the bitmap-backed IP allocator in ip_management_service.
+
+DB tests run in a session that is rolled back, so the shared subnet
+config singleton is never committed.
+"""
+
+from __future__ import annotations
+
+import ipaddress
+from collections.abc import Iterator
+
+import pytest
+from sqlmodel import Session, delete, select
+
+from app.core.db import engine
+from app.exceptions import ConflictError
+from app.models.ip_allocation import IpAllocation
+from app.models.subnet_config import SubnetConfig
+from app.services.network import ip_management_service as ipm
+
+
+def test_bitmap_marks_network_broadcast_and_padding_used() -> None:
+    bitmap = ipm._AllocationBitmap.for_network(ipaddress.IPv4Network("10.0.0.0/29"))
+    assert bitmap.bits == bytearray([0b1000_0001])
+    assert bitmap.next_free(0) == (1, 0)
+
+    bitmap = ipm._AllocationBitmap.for_network(ipaddress.IPv4Network("10.0.0.0/31"))
+    assert bitmap.bits == bytearray([0b1111_1100])
+
+
+def test_bitmap_next_free_skips_full_bytes_from_hint() -> None:
+    bitmap = ipm._AllocationBitmap.for_network(ipaddress.IPv4Network("10.0.0.0/24"))
+    for offset in range(1, 20):
+        bitmap.set(offset)
+    assert bitmap.next_free(0) == (20, 2)
+    bitmap.clear(5)
+    assert bitmap.next_free(0) == (5, 0)
+    assert bitmap.next_free(2) == (20, 2)
+
+
+@pytest.fixture
+def subnet_session() -> Iterator[Session]:
+    with Session(engine) as session:
+        session.exec(delete(IpAllocation))
+        session.exec(delete(SubnetConfig))
+        session.flush()
+        config = SubnetConfig(
+            id=1,
+            cidr="10.20.0.0/28",
+            gateway="10.20.0.1",
+            bridge_name="vmbr1",
+            gateway_vm_ip="10.20.0.2",
+        )
+        session.add(config)
+        session.flush()
+        ipm._reserve_system_ips(session, config)
+        try:
+            yield session
+        finally:
+            session.rollback()
+
+
+def test_allocate_ips_in_one_transaction_and_reuse_released(subnet_session: Session) -> None:
+    session = subnet_session
+    ips = ipm.allocate_ips(session, [(900001, "vm"), (900002, "vm"), (900003, "lxc")])
+    assert ips == ["10.20.0.3", "10.20.0.4", "10.20.0.5"]
+    assert ipm.allocate_ip(session, 900004, "vm") == "10.20.0.6"
+
+    assert ipm.release_ip(session, 900002) == "10.20.0.4"
+    assert ipm.allocate_ip(session, 900005, "vm") == "10.20.0.4"
+
+    rows = session.exec(select(IpAllocation.ip_address, IpAllocation.vmid)).all()
+    assert ("10.20.0.4", 900005) in rows
+    assert ipm.get_ip_stats(session) == {"total": 14, "used": 6, "available": 8}
+
+
+def test_allocator_recovers_from_stale_bitmap(subnet_session: Session) -> None:
+    session = subnet_session
+    ipm.allocate_ip(session, 900001, "vm")  # 10.20.0.3, builds the bitmap
+
+    # 繞過 service 直接寫入：bitmap 不知道 .4 已被佔用
+    session.add(IpAllocation(ip_address="10.20.0.4", purpose="reserved"))
+    session.flush()
+    assert ipm.allocate_ip(session, 900002, "vm") == "10.20.0.5"
+
+    # 繞過 service 直接刪除：bitmap 以為滿了，重建後找回空位
+    ipm.allocate_ips(session, [(900100 + i, "vm") for i in range(9)])
+    session.exec(delete(IpAllocation).where(IpAllocation.vmid == 900001))
+    session.flush()
+    assert ipm.allocate_ip(session, 900003, "vm") == "10.20.0.3"
+
+    with pytest.raises(ConflictError):
+        ipm.allocate_ip(session, 900004, "vm")
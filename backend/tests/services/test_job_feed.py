@@ -0,0 +1,120 @@
+"""Tests for the job change feed and the incremental /ws/jobs view."""
+
+from __future__ import annotations
+
+import json
+import uuid
+from datetime import UTC, datetime, timedelta
+
+from fastapi.testclient import TestClient
+from sqlmodel import Session, select
+
+from app.api.websocket.jobs import _JobsView
+from app.core.config import settings
+from app.models import ScriptDeployLog, User
+from app.schemas.jobs import JobItem, JobKind, JobStatus
+from app.services.jobs import job_feed
+
+
+def _deploy_log(owner: uuid.UUID) -> ScriptDeployLog:
+    return ScriptDeployLog(
+        task_id=f"feed-{uuid.uuid4().hex}",
+        user_id=owner,
+        template_slug="jellyfin",
+        status="running",
+    )
+
+
+async def test_commit_reaches_owner_and_admin_only(db: Session) -> None:
+    owner, stranger = uuid.uuid4(), uuid.uuid4()
+    owner_sub = job_feed.subscribe(user_id=owner, is_admin=False)
+    stranger_sub = job_feed.subscribe(user_id=stranger, is_admin=False)
+    admin_sub = job_feed.subscribe(user_id=uuid.uuid4(), is_admin=True)
+    try:
+        log = _deploy_log(owner)
+        db.add(log)
+        db.commit()
+        job_id = f"script_deploy:{log.task_id}"
+
+        assert job_id in (await owner_sub.next(timeout=5) or set())
+        assert job_id in (await admin_sub.next(timeout=5) or set())
+        assert job_id not in (await stranger_sub.next(timeout=0.2) or set())
+    finally:
+        for sub in (owner_sub, stranger_sub, admin_sub):
+            sub.close()
+        db.delete(log)
+        db.commit()
+
+
+async def test_rolled_back_changes_are_not_published(db: Session) -> None:
+    owner = uuid.uuid4()
+    sub = job_feed.subscribe(user_id=owner, is_admin=False)
+    try:
+        db.add(_deploy_log(owner))
+        db.flush()
+        db.rollback()
+
+        assert await sub.next(timeout=0.3) == set()
+    finally:
+        sub.close()
+    assert await sub.next(timeout=0) is None
+
+
+def test_websocket_sends_snapshot_then_patch(
+    client: TestClient, normal_user_token_headers: dict[str, str], db: Session
+) -> None:
+    token = normal_user_token_headers["Authorization"].split()[1]
+    user = db.exec(select(User).where(User.email == settings.EMAIL_TEST_USER)).one()
+
+    with client.websocket_connect(f"/ws/jobs?token={token}") as ws:
+        assert ws.receive_json()["type"] == "snapshot"
+
+        log = _deploy_log(user.id)
+        db.add(log)
+        db.commit()
+        patch = ws.receive_json()
+
+    assert patch["type"] == "patch"
+    assert [item["id"] for item in patch["upsert"]] == [f"script_deploy:{log.task_id}"]
+    assert patch["order"][0] == f"script_deploy:{log.task_id}"
+    db.delete(log)
+    db.commit()
+
+
+def _item(index: int, status: JobStatus, *, minutes_ago: int) -> JobItem:
+    at = datetime(2026, 1, 1, tzinfo=UTC) - timedelta(minutes=minutes_ago)
+    return JobItem(
+        id=f"deletion:{index}",
+        kind=JobKind.deletion,
+        title=f"刪除 {index}",
+        status=status,
+        created_at=at,
+        updated_at=at,
+    )
+
+
+def test_view_sends_only_changed_rows_and_page_evictions() -> None:
+    view = _JobsView(
+        [
+            _item(1, JobStatus.running, minutes_ago=1),
+            _item(2, JobStatus.completed, minutes_ago=2),
+            _item(3, JobStatus.completed, minutes_ago=3),
+        ],
+        limit=2,
+    )
+    snapshot = json.loads(view.snapshot())
+    assert [item["id"] for item in snapshot["items"]] == ["deletion:1", "deletion:2"]
+    assert (snapshot["total"], snapshot["active_count"]) == (3, 1)
+
+    assert view.apply({"deletion:3": _item(3, JobStatus.completed, minutes_ago=3)}) is None
+
+    patch = json.loads(view.apply({"deletion:4": _item(4, JobStatus.running, minutes_ago=0)}))
+    assert [item["id"] for item in patch["upsert"]] == ["deletion:4"]
+    assert patch["remove"] == ["deletion:2"]
+    assert patch["order"] == ["deletion:4", "deletion:1"]
+    assert (patch["total"], patch["active_count"]) == (4, 2)
+
+    patch = json.loads(view.apply({"deletion:4": None}))
+    assert patch["upsert"] == [_item(2, JobStatus.completed, minutes_ago=2).model_dump(mode="json")]
+    assert patch["remove"] == ["deletion:4"]
+    assert (patch["total"], patch["active_count"]) == (3, 1)
@@ -0,0 +1,135 @@
+"""Tests for the UNION ALL job index and keyset pagination in jobs_service.
+
+Rows are created in a session that is rolled back, so nothing is committed.
+"""
+
+from __future__ import annotations
+
+import uuid
+from collections.abc import Iterator
+from datetime import UTC, datetime, timedelta
+
+import pytest
+from sqlmodel import Session
+
+from app.core.db import engine
+from app.models import (
+    DeletionRequest,
+    DeletionRequestStatus,
+    SpecChangeRequest,
+    SpecChangeRequestStatus,
+    SpecChangeType,
+    User,
+)
+from app.schemas.jobs import JobKind, JobStatus
+from app.services.jobs import jobs_service
+from tests.utils.utils import random_email
+
+
+@pytest.fixture
+def owner_jobs() -> Iterator[tuple[Session, User, list[str]]]:
+    with Session(engine) as session:
+        owner = User(email=random_email(), hashed_password="x")
+        session.add(owner)
+        session.flush()
+
+        now = datetime.now(UTC)
+        deletion_states = [
+            DeletionRequestStatus.pending,
+            DeletionRequestStatus.running,
+            DeletionRequestStatus.completed,
+            DeletionRequestStatus.failed,
+        ]
+        for i, status in enumerate(deletion_states):
+            session.add(DeletionRequest(
+                user_id=owner.id,
+                vmid=870000 + i,
+                status=status,
+                created_at=now - timedelta(hours=i * 2),
+            ))
+        for i, status in enumerate([SpecChangeRequestStatus.pending, SpecChangeRequestStatus.approved]):
+            session.add(SpecChangeRequest(
+                user_id=owner.id,
+                vmid=870100 + i,
+                change_type=SpecChangeType.cpu,
+                reason="test",
+                status=status,
+                created_at=now - timedelta(hours=i * 2 + 1),
+            ))
+        # 同一時間的兩筆，排序依 id 決勝
+        tie = now - timedelta(hours=9)
+        for vmid in (870200, 870201):
+            session.add(DeletionRequest(user_id=owner.id, vmid=vmid, created_at=tie))
+        # 超出歷史視窗
+        session.add(DeletionRequest(
+            user_id=owner.id, vmid=870300, created_at=now - timedelta(days=40)
+        ))
+        session.flush()
+
+        expected = [
+            item.id
+            for item in jobs_service.list_recent_window(session=session, user=owner)
+        ]
+        try:
+            yield session, owner, expected
+        finally:
+            session.rollback()
+
+
+def test_cursor_pages_match_full_ordering(owner_jobs) -> None:
+    session, owner, expected = owner_jobs
+    assert len(expected) == 8
+
+    seen: list[str] = []
+    cursor = None
+    while True:
+        page = jobs_service.list_jobs(session=session, user=owner, limit=3, cursor=cursor)
+        assert page.total == 8
+        assert page.active_count == 5
+        seen.extend(item.id for item in page.items)
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+    assert seen == expected
+
+    by_offset = jobs_service.list_jobs(session=session, user=owner, limit=3, offset=3)
+    assert [item.id for item in by_offset.items] == expected[3:6]
+
+
+def test_offset_is_ignored_when_cursor_is_given(owner_jobs) -> None:
+    session, owner, expected = owner_jobs
+
+    first = jobs_service.list_jobs(session=session, user=owner, limit=3)
+    second = jobs_service.list_jobs(
+        session=session, user=owner, limit=3, offset=3, cursor=first.next_cursor
+    )
+
+    assert [item.id for item in second.items] == expected[3:6]
+
+
+def test_status_and_kind_filters_run_in_sql(owner_jobs) -> None:
+    session, owner, _expected = owner_jobs
+
+    failed = jobs_service.list_jobs(
+        session=session, user=owner, statuses=[JobStatus.failed, JobStatus.completed]
+    )
+    assert sorted(item.status for item in failed.items) == ["completed", "completed", "failed"]
+    assert failed.total == 3
+    assert failed.active_count == 5
+
+    active = jobs_service.list_jobs(
+        session=session, user=owner, kinds=[JobKind.spec_change], active_only=True
+    )
+    assert [item.kind for item in active.items] == [JobKind.spec_change]
+    assert (active.total, active.active_count) == (1, 1)
+
+    others = jobs_service.list_jobs(
+        session=session, user=User(id=uuid.uuid4(), email="x@example.com", hashed_password="x")
+    )
+    assert (others.items, others.total) == ([], 0)
+
+
+def test_invalid_cursor_is_rejected(owner_jobs) -> None:
+    session, owner, _expected = owner_jobs
+    with pytest.raises(jobs_service.InvalidJobCursorError):
+        jobs_service.list_jobs(session=session, user=owner, cursor="not-a-cursor")
@@ -0,0 +1,198 @@
+"""Tests for the incremental assignment evaluator used by placement search.
+
+Every incremental ``score`` / ``apply`` result must equal a full replay of the
+same assignment map, including the float tie-breakers of the objective tuple.
+"""
+
+from __future__ import annotations
+
+import random
+import uuid
+
+from app.ai.pve_advisor.schemas import NodeCapacity
+from app.domain.placement.models import (
+    PlacementContext,
+    PlacementTuning,
+    StorageSnapshot,
+)
+from app.models import VMRequest
+from app.services.vm.placement_evaluator import (
+    INFEASIBLE_OBJECTIVE,
+    IncrementalAssignmentEvaluator,
+)
+
+GIB = 1024**3
+
+
+def _tuning() -> PlacementTuning:
+    return PlacementTuning(
+        migration_cost=0.15,
+        peak_cpu_margin=1.1,
+        peak_memory_margin=1.05,
+        loadavg_warn_per_core=0.8,
+        loadavg_max_per_core=1.5,
+        loadavg_penalty_weight=0.9,
+        disk_contention_warn_share=0.7,
+        disk_contention_high_share=0.9,
+        disk_penalty_weight=0.75,
+        search_max_relocations=2,
+        search_depth=3,
+    )
+
+
+def _node(name: str, *, cores: float = 16, memory_gib: int = 64) -> NodeCapacity:
+    return NodeCapacity(
+        node=name,
+        status="online",
+        candidate=True,
+        guest_soft_limit=100,
+        total_cpu_cores=cores,
+        allocatable_cpu_cores=cores,
+        total_memory_bytes=memory_gib * GIB,
+        allocatable_memory_bytes=memory_gib * GIB,
+        total_disk_bytes=1000 * GIB,
+        allocatable_disk_bytes=1000 * GIB,
+    )
+
+
+def _request(*, cores: int, memory: int, actual_node: str | None = None) -> VMRequest:
+    return VMRequest(
+        id=uuid.uuid4(),
+        user_id=uuid.uuid4(),
+        reason="evaluator",
+        resource_type="vm",
+        hostname="evaluator-vm",
+        cores=cores,
+        memory=memory,
+        password="encrypted",
+        storage="local-lvm",
+        environment_type="Test",
+        disk_size=20,
+        vmid=100 if actual_node else None,
+        actual_node=actual_node,
+    )
+
+
+def _storage(
+    node_name: str,
+    storage: str,
+    *,
+    avail_gb: float,
+    shared: bool = False,
+) -> StorageSnapshot:
+    return StorageSnapshot(
+        node_name=node_name,
+        storage=storage,
+        total_gb=400.0,
+        avail_gb=avail_gb,
+        active=True,
+        enabled=True,
+        can_vm=True,
+        can_lxc=True,
+        is_shared=shared,
+        speed_tier="ssd",
+        user_priority=5,
+    )
+
+
+def _evaluator(
+    requests: list[VMRequest],
+    nodes: list[NodeCapacity],
+    storages: tuple[StorageSnapshot, ...] = (),
+    **kwargs,
+) -> IncrementalAssignmentEvaluator:
+    context = PlacementContext(
+        strategy="priority_dominant_share",
+        tuning=_tuning(),
+        cpu_overcommit_ratio=1.0,
+        disk_overcommit_ratio=1.5,
+        priorities={node.node: index + 1 for index, node in enumerate(nodes)},
+        storages=storages,
+    )
+    return IncrementalAssignmentEvaluator(
+        context=context,
+        ordered_requests=requests,
+        baseline_nodes=nodes,
+        **kwargs,
+    )
+
+
+def _assert_incremental_matches_full_replay(
+    storages: tuple[StorageSnapshot, ...],
+) -> None:
+    rng = random.Random(7)
+    nodes = [_node("pve-a"), _node("pve-b", cores=12), _node("pve-c", memory_gib=48)]
+    names = [item.node for item in nodes]
+    requests = [
+        _request(
+            cores=rng.randint(1, 4),
+            memory=rng.choice([1024, 2048, 4096]),
+            actual_node=rng.choice([None, *names]),
+        )
+        for _ in range(10)
+    ]
+    incremental = _evaluator(requests, nodes, storages)
+    incremental.load({item.id: rng.choice(names) for item in requests})
+
+    for step in range(60):
+        changes = {
+            item.id: rng.choice(names) for item in rng.sample(requests, k=rng.choice([1, 2]))
+        }
+        trial = incremental.assignments
+        trial.update(changes)
+        expected = _evaluator(requests, nodes, storages).load(trial)
+
+        assert incremental.score(changes) == expected
+        if step % 4 == 0:
+            assert incremental.apply(changes) == expected
+            assert incremental.assignments == trial
+
+
+def test_incremental_score_matches_full_replay_without_storage() -> None:
+    _assert_incremental_matches_full_replay(())
+
+
+def test_incremental_score_matches_full_replay_with_shared_storage() -> None:
+    _assert_incremental_matches_full_replay(
+        (
+            _storage("pve-a", "local-a", avail_gb=60.0),
+            _storage("pve-a", "ceph", avail_gb=120.0, shared=True),
+            _storage("pve-b", "local-b", avail_gb=200.0),
+            _storage("pve-b", "ceph", avail_gb=120.0, shared=True),
+            _storage("pve-c", "local-c", avail_gb=80.0),
+        )
+    )
+
+
+def test_score_does_not_change_current_state() -> None:
+    requests = [_request(cores=2, memory=2048), _request(cores=2, memory=2048)]
+    evaluator = _evaluator(requests, [_node("pve-a"), _node("pve-b")])
+    initial = {requests[0].id: "pve-a", requests[1].id: "pve-a"}
+    baseline = evaluator.load(initial)
+
+    moved = evaluator.score({requests[1].id: "pve-b"})
+
+    assert moved.objective < baseline.objective
+    assert evaluator.assignments == initial
+    assert evaluator.score({}) == baseline
+
+
+def test_missing_or_disallowed_target_is_infeasible() -> None:
+    requests = [_request(cores=2, memory=2048), _request(cores=2, memory=2048)]
+    evaluator = _evaluator(
+        requests,
+        [_node("pve-a"), _node("pve-b")],
+        allowed_target_nodes_by_request={requests[0].id: {"pve-a"}},
+    )
+
+    assert evaluator.load({requests[0].id: "pve-a"}).objective == INFEASIBLE_OBJECTIVE
+    assert evaluator.score({requests[1].id: "pve-b"}).feasible is True
+    assert evaluator.score({requests[0].id: "pve-b"}).feasible is False
+
+
+def test_capacity_overflow_on_one_node_is_infeasible() -> None:
+    requests = [_request(cores=6, memory=2048), _request(cores=6, memory=2048)]
+    evaluator = _evaluator(requests, [_node("pve-a", cores=8), _node("pve-b", cores=8)])
+
+    assert evaluator.load({requests[0].id: "pve-a", requests[1].id: "pve-b"}).feasible
+    assert evaluator.score({requests[1].id: "pve-a"}).feasible is False
@@ -0,0 +1,117 @@
+"""Tests for reservation preview candidate evaluation."""
+
+from __future__ import annotations
+
+import pickle
+import uuid
+from types import MappingProxyType
+
+import pytest
+
+from app.core.config import settings
+from app.domain.placement.models import (
+    AssignmentEvaluation,
+    CohortRequest,
+    PlacementContext,
+    PlacementTuning,
+    PreviewCohort,
+    RequestRequirements,
+)
+from app.services.vm import placement_preview, placement_support
+
+PREVIEW_ID = uuid.uuid4()
+
+
+def _cohort() -> PreviewCohort:
+    requirements = RequestRequirements(
+        resource_type="vm",
+        effective_resource_type="vm",
+        cpu_cores=2,
+        memory_bytes=2048,
+        disk_bytes=0,
+        disk_gb=0,
+        gpu_required=0,
+        reserved_cpu_cores=2,
+        reserved_memory_bytes=2048,
+        reserved_disk_bytes=0,
+    )
+    context = PlacementContext(
+        strategy="priority_dominant_share",
+        tuning=PlacementTuning(0.15, 1.1, 1.05, 0.8, 1.5, 0.9, 0.7, 0.9, 0.75, 2, 3),
+        cpu_overcommit_ratio=1.0,
+        disk_overcommit_ratio=1.0,
+        priorities=MappingProxyType({"pve-a": 1, "pve-b": 2}),
+        storages=(),
+        requirements=MappingProxyType({PREVIEW_ID: requirements}),
+    )
+    return PreviewCohort(
+        context=context,
+        requests=(CohortRequest(PREVIEW_ID, None, None, None),),
+        baseline_nodes=(),
+        preview_request_id=PREVIEW_ID,
+    )
+
+
+@pytest.fixture
+def bounds(monkeypatch: pytest.MonkeyPatch) -> dict[str, tuple[float, float]]:
+    values = {
+        "pve-a": (0.2, 1.0),
+        "pve-b": (0.3, 1.0),
+        "pve-c": (0.4, 1.0),
+        "pve-d": (0.9, 1.0),
+    }
+    monkeypatch.setattr(
+        placement_support,
+        "preview_objective_lower_bound",
+        lambda *, candidate_node, **_: values[candidate_node],
+    )
+    monkeypatch.setattr(settings, "PLACEMENT_PREVIEW_WORKERS", 1)
+    return values
+
+
+def _solver(solved: list[str]):
+    def solve(cohort: PreviewCohort, node: str) -> AssignmentEvaluation | None:
+        solved.append(node)
+        if node == "pve-c":
+            return None
+        score = {"pve-a": 0.5, "pve-b": 0.6, "pve-d": 0.95}[node]
+        return AssignmentEvaluation(feasible=True, objective=(score, 2.0, 0, 0, 0, 0))
+
+    return solve
+
+
+def test_stops_once_bound_cannot_beat_runner_up(bounds) -> None:
+    solved: list[str] = []
+
+    results = placement_preview.evaluate_preview_candidates(
+        cohort=_cohort(),
+        candidate_nodes=["pve-d", "pve-c", "pve-b", "pve-a"],
+        solve_candidate_fn=_solver(solved),
+    )
+
+    assert solved == ["pve-a", "pve-b", "pve-c"]
+    assert set(results) == {"pve-a", "pve-b"}
+
+
+def test_without_pruning_every_candidate_is_solved(bounds) -> None:
+    solved: list[str] = []
+
+    results = placement_preview.evaluate_preview_candidates(
+        cohort=_cohort(),
+        candidate_nodes=["pve-a", "pve-b", "pve-c", "pve-d"],
+        solve_candidate_fn=_solver(solved),
+        prune=False,
+    )
+
+    assert sorted(solved) == ["pve-a", "pve-b", "pve-c", "pve-d"]
+    assert set(results) == {"pve-a", "pve-b", "pve-d"}
+
+
+def test_preview_cohort_round_trips_through_pickle() -> None:
+    cohort = _cohort()
+
+    restored = pickle.loads(pickle.dumps(cohort))
+
+    assert restored == cohort
+    assert isinstance(restored.context.priorities, MappingProxyType)
+    assert restored.context.requirements[PREVIEW_ID].cpu_cores == 2
@@ -161,3 +161,22 @@ def test_build_daily_rule_rejects_invalid_time() -> None:
         build_daily_rule(-1, 0)
     with pytest.raises(ValueError):
         build_daily_rule(9, 60)
+
+
+def test_rule_is_parsed_once_and_reanchored_per_call() -> None:
+    from app.services.scheduling.recurrence import _parse_rule  # noqa: PLC0415
+
+    rule = "FREQ=WEEKLY;BYDAY=MO;BYHOUR=8;BYMINUTE=30"
+    _parse_rule.cache_clear()
+    first = compute_next_window(
+        rule=rule, duration_minutes=60, timezone="UTC",
+        after=datetime(2026, 4, 26, tzinfo=UTC),
+    )
+    second = compute_next_window(
+        rule=rule, duration_minutes=60, timezone="UTC",
+        after=datetime(2026, 5, 5, tzinfo=UTC),
+    )
+    assert first is not None and second is not None
+    assert first[0] == datetime(2026, 4, 27, 8, 30, tzinfo=UTC)
+    assert second[0] == datetime(2026, 5, 11, 8, 30, tzinfo=UTC)
+    assert _parse_rule.cache_info().misses == 1
@@ -0,0 +1,95 @@
+"""process_recurrence_windows only touches rows whose window rolled over."""
+
+from __future__ import annotations
+
+from collections.abc import Iterator
+from datetime import UTC, datetime, timedelta
+
+import pytest
+from sqlmodel import Session, delete
+
+from app.models import VMRequest, VMRequestStatus
+from app.services.scheduling import recurrence_scheduler
+from tests.utils.user import create_random_user
+
+_WEEKLY = "FREQ=WEEKLY;BYDAY=MO;BYHOUR=8;BYMINUTE=0"
+
+
+@pytest.fixture
+def recurring(db: Session) -> Iterator[dict[str, VMRequest]]:
+    user = create_random_user(db)
+    now = datetime.now(UTC)
+
+    def make(name: str, rule: str, **fields) -> VMRequest:
+        request = VMRequest(
+            user_id=user.id,
+            reason="recurrence window test",
+            resource_type="lxc",
+            hostname=f"rw-{name}",
+            cores=1,
+            memory=512,
+            password="x",
+            storage="local-lvm",
+            environment_type="Recurrence Test",
+            status=VMRequestStatus.approved,
+            recurrence_rule=rule,
+            recurrence_duration_minutes=90,
+            schedule_timezone="UTC",
+            created_at=now,
+            **fields,
+        )
+        db.add(request)
+        return request
+
+    rows = {
+        "new_a": make("new-a", _WEEKLY),
+        "new_b": make("new-b", _WEEKLY),
+        "rolled": make(
+            "rolled", _WEEKLY,
+            next_window_start=now - timedelta(hours=3),
+            next_window_end=now - timedelta(hours=1),
+        ),
+        "current": make(
+            "current", _WEEKLY,
+            next_window_start=now - timedelta(minutes=30),
+            next_window_end=now + timedelta(minutes=60),
+        ),
+        "ended": make("ended", "FREQ=DAILY;UNTIL=20200101T000000Z"),
+    }
+    db.commit()
+    yield rows
+    db.exec(delete(VMRequest).where(VMRequest.user_id == user.id))
+    db.commit()
+
+
+def test_only_due_rows_are_computed_once_per_rule(
+    db: Session,
+    recurring: dict[str, VMRequest],
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    calls: list[str] = []
+    real = recurrence_scheduler.compute_next_window
+
+    def counting(**kwargs):
+        calls.append(kwargs["rule"])
+        return real(**kwargs)
+
+    monkeypatch.setattr(recurrence_scheduler, "compute_next_window", counting)
+    current_end = recurring["current"].next_window_end
+
+    recurrence_scheduler.process_recurrence_windows()
+
+    assert sorted(calls) == sorted([_WEEKLY, "FREQ=DAILY;UNTIL=20200101T000000Z"])
+    for row in recurring.values():
+        db.refresh(row)
+    expected = recurring["new_a"].next_window_start
+    assert expected is not None and expected.weekday() == 0
+    assert recurring["new_b"].next_window_start == expected
+    assert recurring["rolled"].next_window_start == expected
+    assert recurring["current"].next_window_end == current_end
+    assert recurring["ended"].next_window_end is None
+    assert recurring["ended"].recurrence_exhausted_at is not None
+
+    calls.clear()
+    recurrence_scheduler.process_recurrence_windows()
+    assert calls == []
@@ -0,0 +1,191 @@
+"""Tests for the bulk resource listing path in resource_service."""
+
+from __future__ import annotations
+
+import threading
+import time
+from datetime import UTC, datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.core.db import engine
+from app.repositories import resource as resource_repo
+from app.repositories import user as user_repo
+from app.schemas import UserCreate
+from app.services.resource import resource_service
+
+BASE_VMID = 870000
+
+
+def _seed(db: Session, offsets_and_ips: dict[int, tuple[str | None, timedelta | None]]):
+    user = user_repo.create_user(
+        session=db,
+        user_create=UserCreate(
+            email=f"user-listing-{datetime.now(UTC).timestamp()}@example.com",
+            password="strongpass123",
+        ),
+    )
+    db.commit()
+    now = datetime.now(UTC)
+    for offset, (ip, age) in offsets_and_ips.items():
+        resource_repo.delete_resource(session=db, vmid=BASE_VMID + offset)
+        row = resource_repo.create_resource(
+            session=db,
+            vmid=BASE_VMID + offset,
+            user_id=user.id,
+            environment_type="lab",
+        )
+        row.ip_address = ip
+        row.ip_address_cached_at = now - age if age is not None else None
+        db.add(row)
+    db.commit()
+    return user
+
+
+def _pve_row(offset: int, status: str = "running") -> dict:
+    return {
+        "vmid": BASE_VMID + offset,
+        "name": f"vm-{offset}",
+        "node": "pve-a",
+        "type": "qemu",
+        "status": status,
+        "pool": "CampusCloud",
+    }
+
+
+@pytest.fixture
+def lookups(monkeypatch: pytest.MonkeyPatch) -> list[int]:
+    monkeypatch.setattr(settings, "RESOURCE_IP_CACHE_TTL", 300)
+    monkeypatch.setattr(settings, "RESOURCE_IP_LOOKUP_TIMEOUT", 0.5)
+    monkeypatch.setattr(resource_service, "_ip_lookup_misses", {})
+    monkeypatch.setattr(resource_service, "_ip_lookups_inflight", {})
+    return []
+
+
+def test_list_all_probes_only_stale_running_guests_and_batches_writes(
+    db: Session, lookups: list[int], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    _seed(
+        db,
+        {
+            1: ("10.0.0.1", timedelta(seconds=10)),  # fresh cache
+            2: ("10.0.0.2", timedelta(hours=2)),  # stale cache
+            3: (None, None),  # never seen
+            4: ("10.0.0.4", timedelta(hours=2)),  # stopped
+        },
+    )
+    rows = [_pve_row(1), _pve_row(2), _pve_row(3), _pve_row(4, status="stopped")]
+    monkeypatch.setattr(resource_service.proxmox_service, "list_all_resources", lambda: rows)
+    lock = threading.Lock()
+
+    def get_ip(_node: str, vmid: int, _rtype: str) -> str:
+        with lock:
+            lookups.append(vmid)
+        return f"10.1.0.{vmid - BASE_VMID}"
+
+    monkeypatch.setattr(resource_service.proxmox_service, "get_ip_address", get_ip)
+    statements: list[str] = []
+
+    def record(_conn, _cursor, statement, *_args) -> None:
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        result = resource_service.list_all(session=db)
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+    by_vmid = {item.vmid: item.ip_address for item in result}
+    assert by_vmid == {
+        BASE_VMID + 1: "10.0.0.1",
+        BASE_VMID + 2: "10.1.0.2",
+        BASE_VMID + 3: "10.1.0.3",
+        BASE_VMID + 4: "10.0.0.4",
+    }
+    assert sorted(lookups) == [BASE_VMID + 2, BASE_VMID + 3]
+    assert sum(s.lstrip().upper().startswith("SELECT") for s in statements) == 1
+    assert sum(s.lstrip().upper().startswith("UPDATE") for s in statements) == 1
+
+    db.expire_all()
+    cached = resource_repo.get_resources_by_vmids(
+        session=db, vmids=[BASE_VMID + 2, BASE_VMID + 3]
+    )
+    assert {vmid: row.ip_address for vmid, row in cached.items()} == {
+        BASE_VMID + 2: "10.1.0.2",
+        BASE_VMID + 3: "10.1.0.3",
+    }
+    assert all(row.ip_address_cached_at is not None for row in cached.values())
+
+
+def test_slow_and_failed_lookups_fall_back_to_cache_and_are_not_retried(
+    db: Session, lookups: list[int], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    user = _seed(
+        db,
+        {
+            11: ("10.0.0.11", timedelta(hours=2)),
+            12: ("10.0.0.12", timedelta(hours=2)),
+        },
+    )
+    rows = [_pve_row(11), _pve_row(12)]
+    monkeypatch.setattr(resource_service.proxmox_service, "list_all_resources", lambda: rows)
+
+    def get_ip(_node: str, vmid: int, _rtype: str) -> str | None:
+        lookups.append(vmid)
+        if vmid == BASE_VMID + 11:
+            time.sleep(2)
+            return "10.9.9.9"
+        return None
+
+    monkeypatch.setattr(resource_service.proxmox_service, "get_ip_address", get_ip)
+
+    started = time.monotonic()
+    result = resource_service.list_by_user(session=db, user_id=user.id)
+    assert time.monotonic() - started < 1.5
+    assert {item.vmid: item.ip_address for item in result} == {
+        BASE_VMID + 11: "10.0.0.11",
+        BASE_VMID + 12: "10.0.0.12",
+    }
+
+    resource_service.list_by_user(session=db, user_id=user.id)
+    assert lookups.count(BASE_VMID + 12) == 1
+
+
+def test_hung_lookup_is_reused_and_its_late_result_is_cached(
+    db: Session, lookups: list[int], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    user = _seed(db, {21: ("10.0.0.21", timedelta(hours=2))})
+    rows = [_pve_row(21)]
+    monkeypatch.setattr(resource_service.proxmox_service, "list_all_resources", lambda: rows)
+    monkeypatch.setattr(settings, "RESOURCE_IP_LOOKUP_TIMEOUT", 0.2)
+    release = threading.Event()
+
+    def get_ip(_node: str, vmid: int, _rtype: str) -> str:
+        lookups.append(vmid)
+        release.wait(5)
+        return "10.9.9.21"
+
+    monkeypatch.setattr(resource_service.proxmox_service, "get_ip_address", get_ip)
+
+    first = resource_service.list_by_user(session=db, user_id=user.id)
+    assert first[0].ip_address == "10.0.0.21"
+    assert BASE_VMID + 21 in resource_service._ip_lookup_misses
+
+    # 即使 miss 已過期，仍在執行中的查詢會被沿用而不是重新送出
+    resource_service._ip_lookup_misses.clear()
+    resource_service.list_by_user(session=db, user_id=user.id)
+    assert lookups == [BASE_VMID + 21]
+
+    release.set()
+    deadline = time.monotonic() + 5
+    while True:
+        db.expire_all()
+        cached = resource_repo.get_resource_by_vmid(session=db, vmid=BASE_VMID + 21)
+        if cached.ip_address == "10.9.9.21" or time.monotonic() > deadline:
+            break
+        time.sleep(0.02)
+    assert cached.ip_address == "10.9.9.21"
+    assert BASE_VMID + 21 not in resource_service._ip_lookup_misses
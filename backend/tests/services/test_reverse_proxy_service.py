@@ -43,7 +43,11 @@ def test_apply_reverse_proxy_rule_creates_cloudflare_dns_record(
     created_rule: dict[str, object] = {}
 
     monkeypatch.setattr(rp_repo, "is_domain_taken", lambda *_args, **_kwargs: False)
-    monkeypatch.setattr(reverse_proxy_service, "_sync_traefik", lambda _session: None)
+    monkeypatch.setattr(
+        reverse_proxy_service,
+        "_sync_traefik",
+        lambda _session, _force=False: None,
+    )
     monkeypatch.setattr(
         reverse_proxy_service,
         "ensure_reverse_proxy_ready",
@@ -0,0 +1,182 @@
+"""Scheduled boot / auto-stop resolve state in bulk and fan power calls out per node."""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+from collections.abc import Iterator
+from datetime import UTC, datetime, timedelta
+
+import pytest
+from sqlmodel import Session, delete, select
+
+from app.models import AuditLog, Resource, User, VMRequest, VMRequestStatus
+from app.services.proxmox import proxmox_service
+from app.services.scheduling import recurrence_scheduler
+from tests.utils.user import create_random_user
+
+_VMIDS = (71001, 71002, 71003, 71004)
+
+
+class _Cluster:
+    def __init__(self, vms: dict[int, tuple[str, str]]) -> None:
+        self.vms = vms  # vmid -> (node, status)
+        self.reads = 0
+        self.calls: list[tuple[str, int, str]] = []
+        self.fail_shutdown: set[int] = set()
+        self._lock = threading.Lock()
+
+    def list_all_resources(self) -> list[dict]:
+        self.reads += 1
+        return [
+            {"vmid": vmid, "node": node, "type": "qemu", "status": status}
+            for vmid, (node, status) in self.vms.items()
+        ]
+
+    def control(self, node: str, vmid: int, resource_type: str, action: str) -> None:
+        with self._lock:
+            self.calls.append((node, vmid, action))
+        if action == "shutdown" and vmid in self.fail_shutdown:
+            raise RuntimeError("guest agent not responding")
+
+
+@pytest.fixture
+def owner(db: Session) -> Iterator[User]:
+    user = create_random_user(db)
+    yield user
+    db.exec(delete(AuditLog).where(AuditLog.vmid.in_(_VMIDS)))  # type: ignore[attr-defined]
+    db.exec(delete(VMRequest).where(VMRequest.user_id == user.id))
+    db.exec(delete(Resource).where(Resource.user_id == user.id))
+    db.commit()
+
+
+@pytest.fixture
+def cluster(monkeypatch: pytest.MonkeyPatch) -> _Cluster:
+    fake = _Cluster({})
+    monkeypatch.setattr(proxmox_service, "list_all_resources", fake.list_all_resources)
+    monkeypatch.setattr(proxmox_service, "control", fake.control)
+    return fake
+
+
+def _audit(db: Session) -> dict[int, str]:
+    db.expire_all()
+    rows = db.exec(select(AuditLog).where(AuditLog.vmid.in_(_VMIDS))).all()  # type: ignore[attr-defined]
+    return {row.vmid: str(row.action.value) for row in rows}
+
+
+def test_auto_stops_use_one_cluster_read_and_one_write(
+    db: Session, owner: User, cluster: _Cluster
+) -> None:
+    now = datetime.now(UTC)
+    for vmid in _VMIDS:
+        db.add(
+            Resource(
+                vmid=vmid,
+                user_id=owner.id,
+                environment_type="Auto-stop Test",
+                created_at=now,
+                auto_stop_at=now - timedelta(minutes=1),
+                auto_stop_reason="window_grace",
+            )
+        )
+    db.commit()
+    cluster.vms = {
+        71001: ("pve1", "running"),
+        71002: ("pve2", "running"),
+        71003: ("pve1", "stopped"),
+    }
+    cluster.fail_shutdown = {71002}
+
+    recurrence_scheduler.process_auto_stops()
+
+    assert cluster.reads == 1
+    assert sorted(cluster.calls) == [
+        ("pve1", 71001, "shutdown"),
+        ("pve2", 71002, "shutdown"),
+        ("pve2", 71002, "stop"),
+    ]
+    db.expire_all()
+    for vmid in _VMIDS:
+        assert db.get(Resource, vmid).auto_stop_at is None
+    assert _audit(db) == {71001: "resource_shutdown", 71002: "resource_stop"}
+
+
+def test_auto_stops_keep_schedules_when_cluster_unreachable(
+    db: Session, owner: User, cluster: _Cluster, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    def unreachable() -> list[dict]:
+        raise ConnectionError("pve down")
+
+    monkeypatch.setattr(proxmox_service, "list_all_resources", unreachable)
+    now = datetime.now(UTC)
+    db.add(
+        Resource(
+            vmid=71001,
+            user_id=owner.id,
+            environment_type="Auto-stop Test",
+            created_at=now,
+            auto_stop_at=now - timedelta(minutes=1),
+            auto_stop_reason="practice_quota",
+        )
+    )
+    db.commit()
+
+    recurrence_scheduler.process_auto_stops()
+
+    db.expire_all()
+    assert db.get(Resource, 71001).auto_stop_at is not None
+    assert cluster.calls == []
+
+
+def test_scheduled_boot_starts_stopped_vms_and_records_grace_stops(
+    db: Session, owner: User, cluster: _Cluster
+) -> None:
+    now = datetime.now(UTC)
+    window_end = now + timedelta(minutes=92)
+    for vmid in (71001, 71002, 71003):
+        db.add(
+            Resource(vmid=vmid, user_id=owner.id, environment_type="Boot Test", created_at=now)
+        )
+        db.add(
+            VMRequest(
+                user_id=owner.id,
+                reason="scheduled boot test",
+                resource_type="vm",
+                hostname=f"boot-{vmid}",
+                cores=1,
+                memory=512,
+                password="x",
+                storage="local-lvm",
+                environment_type="Boot Test",
+                status=VMRequestStatus.approved,
+                vmid=vmid,
+                assigned_node="stale-node",
+                recurrence_rule="FREQ=DAILY",
+                recurrence_duration_minutes=90,
+                next_window_start=now + timedelta(minutes=2),
+                next_window_end=window_end,
+                created_at=now,
+            )
+        )
+    db.commit()
+    cluster.vms = {
+        71001: ("pve1", "stopped"),
+        71002: ("pve2", "stopped"),
+        71003: ("pve1", "running"),  # 已手動開機：只補寫 grace stop
+    }
+
+    asyncio.run(recurrence_scheduler.process_scheduled_boot())
+
+    assert cluster.reads == 1
+    assert sorted(cluster.calls) == [("pve1", 71001, "start"), ("pve2", 71002, "start")]
+    db.expire_all()
+    for vmid in (71001, 71002, 71003):
+        resource = db.get(Resource, vmid)
+        assert resource.auto_stop_reason == "window_grace"
+        assert resource.auto_stop_at > window_end
+    assert _audit(db) == {71001: "resource_start", 71002: "resource_start"}
+
+    # 下一個 tick：grace stop 已寫入，不會重複開機
+    cluster.calls.clear()
+    asyncio.run(recurrence_scheduler.process_scheduled_boot())
+    assert cluster.calls == []
@@ -0,0 +1,164 @@
+"""Tests for the AI usage write-behind buffer."""
+
+from __future__ import annotations
+
+import uuid
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+from sqlalchemy.exc import OperationalError
+from sqlmodel import Session, delete, func, select
+
+from app.core.db import engine
+from app.models import AITemplateCallLog, User
+from app.services.llm_gateway.usage_buffer import UsageWriteBuffer
+
+
+class _Database:
+    """Session factory whose connection can be taken down."""
+
+    def __init__(self) -> None:
+        self.down = False
+        self.sessions = 0
+
+    def __call__(self) -> Session:
+        self.sessions += 1
+        if self.down:
+            raise OperationalError("connect", {}, Exception("db down"))
+        return Session(engine)
+
+
+@pytest.fixture
+def owner(db: Session) -> Iterator[User]:
+    user = db.exec(select(User)).first()
+    yield user
+    with Session(engine) as session:
+        session.exec(delete(AITemplateCallLog).where(AITemplateCallLog.model_name == "buffer-test"))
+        session.commit()
+
+
+def _row(user_id: uuid.UUID, **overrides) -> AITemplateCallLog:
+    fields = {"user_id": user_id, "call_type": "chat", "model_name": "buffer-test", "status": "success"}
+    return AITemplateCallLog(**{**fields, **overrides})
+
+
+def _stored() -> int:
+    with Session(engine) as session:
+        return session.exec(
+            select(func.count()).select_from(AITemplateCallLog).where(
+                AITemplateCallLog.model_name == "buffer-test"
+            )
+        ).one()
+
+
+def _spool_files(tmp_path: Path) -> list[str]:
+    return sorted(p.name for p in tmp_path.iterdir() if not p.name.endswith(".lock"))
+
+
+def _buffer(database: _Database, tmp_path: Path, **kwargs) -> UsageWriteBuffer:
+    return UsageWriteBuffer(
+        session_factory=database,
+        batch_size=lambda: 50,
+        spool_path=lambda: str(tmp_path / "spool.jsonl"),
+        background=False,
+        **kwargs,
+    )
+
+
+def test_rows_are_written_in_one_batch_on_flush(owner: User, tmp_path: Path) -> None:
+    database = _Database()
+    buffer = _buffer(database, tmp_path)
+    for _ in range(5):
+        buffer.submit(_row(owner.id))
+
+    assert buffer.depth() == 5
+    assert _stored() == 0
+    assert buffer.flush() == 5
+    assert database.sessions == 1
+    assert _stored() == 5
+
+
+def test_outage_spools_rows_and_next_flush_replays_them(owner: User, tmp_path: Path) -> None:
+    database = _Database()
+    buffer = _buffer(database, tmp_path, max_queue=lambda: 3)
+    database.down = True
+    for _ in range(4):  # 第 4 筆超出佇列上限，直接寫入 spool
+        buffer.submit(_row(owner.id))
+    assert buffer.flush() == 0
+    assert len((tmp_path / "spool.jsonl").read_text().splitlines()) == 4
+
+    database.down = False
+    buffer.submit(_row(owner.id))
+    assert buffer.flush() == 5
+    assert not _spool_files(tmp_path)
+    assert _stored() == 5
+
+    # 重放同一批資料不會重複寫入
+    buffer._spool([_row(owner.id, id=uuid.uuid4())] * 2)
+    assert buffer.flush() == 2
+    assert _stored() == 6
+
+
+def test_rows_violating_constraints_are_dropped_individually(owner: User, tmp_path: Path) -> None:
+    buffer = _buffer(_Database(), tmp_path)
+    buffer.submit(_row(owner.id))
+    buffer.submit(_row(uuid.uuid4()))  # 不存在的使用者
+    buffer.submit(_row(owner.id))
+
+    buffer.flush()
+    assert _stored() == 2
+    assert not _spool_files(tmp_path)
+
+
+def test_close_writes_remaining_rows(owner: User, tmp_path: Path) -> None:
+    buffer = UsageWriteBuffer(
+        session_factory=_Database(),
+        flush_interval=lambda: 60.0,
+        spool_path=lambda: str(tmp_path / "spool.jsonl"),
+    )
+    buffer.submit(_row(owner.id))
+    buffer.submit(_row(owner.id))
+    buffer.close(timeout=5.0)
+
+    assert _stored() == 2
+    buffer.submit(_row(owner.id))
+    assert (tmp_path / "spool.jsonl").exists()
+
+
+def test_only_one_process_replays_a_shared_spool(owner: User, tmp_path: Path) -> None:
+    from app.services.llm_gateway import usage_buffer
+
+    database = _Database()
+    worker_a, worker_b = _buffer(database, tmp_path), _buffer(database, tmp_path)
+    worker_a._spool([_row(owner.id), _row(owner.id)])
+    worker_b._spool([_row(owner.id)])
+    spool = str(tmp_path / "spool.jsonl")
+
+    # 另一個行程持有重放鎖時不重放，也不拋錯
+    with usage_buffer._file_lock(f"{spool}.replay.lock"):
+        assert worker_b.flush() == 0
+    assert _spool_files(tmp_path) == ["spool.jsonl"]
+
+    assert worker_a.flush() == 3
+    assert worker_b.flush() == 0
+    assert _stored() == 3
+    assert not _spool_files(tmp_path)
+
+
+def test_replay_file_removed_by_another_process_is_ignored(
+    owner: User, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    database = _Database()
+    buffer = _buffer(database, tmp_path)
+    buffer._spool([_row(owner.id)])
+    real_write = buffer._write
+
+    def write_then_lose_file(rows):
+        ok = real_write(rows)
+        (tmp_path / "spool.jsonl.replay").unlink()
+        return ok
+
+    monkeypatch.setattr(buffer, "_write", write_then_lose_file)
+    assert buffer.flush() == 1
+    assert _stored() == 1
@@ -0,0 +1,188 @@
+"""Tests for slot grouping and result caching in vm_request_availability_service."""
+
+from __future__ import annotations
+
+from datetime import UTC, datetime
+from zoneinfo import ZoneInfo
+
+import pytest
+from sqlmodel import Session
+
+from app.ai.pve_advisor.schemas import NodeCapacity
+from app.models import UserRole
+from app.schemas.vm_request import VMRequestAvailabilityRequest
+from app.services.vm import vm_request_availability_service as availability
+from app.services.vm import vm_request_placement_service
+
+
+def _capacities() -> list[NodeCapacity]:
+    return [
+        NodeCapacity(
+            node=name,
+            status="online",
+            candidate=True,
+            running_resources=1,
+            guest_soft_limit=16,
+            guest_pressure_ratio=0.1,
+            guest_overloaded=False,
+            cpu_ratio=0.1,
+            memory_ratio=0.1,
+            disk_ratio=0.1,
+            total_cpu_cores=16,
+            allocatable_cpu_cores=12,
+            total_memory_bytes=64 * 1024**3,
+            allocatable_memory_bytes=48 * 1024**3,
+            total_disk_bytes=1000 * 1024**3,
+            allocatable_disk_bytes=800 * 1024**3,
+        )
+        for name in ("pve-a", "pve-b")
+    ]
+
+
+@pytest.fixture
+def cluster_generation(monkeypatch: pytest.MonkeyPatch) -> list[int]:
+    generation = [1]
+    monkeypatch.setattr(
+        availability.advisor_service, "_cluster_state_generation", lambda: generation[0]
+    )
+    return generation
+
+
+@pytest.fixture
+def counted_plans(monkeypatch: pytest.MonkeyPatch, cluster_generation: list[int]) -> list[dict]:
+    advisor = availability.advisor_service
+    monkeypatch.setattr(advisor, "_load_cluster_state", lambda: ([], []))
+    monkeypatch.setattr(advisor, "_build_node_capacities", lambda **kwargs: _capacities())
+    monkeypatch.setattr(
+        availability, "_load_hourly_demand_profile", lambda **kwargs: {9: 1.0, 10: 0.5}
+    )
+    monkeypatch.setattr(availability, "_pending_pressure_ratio", lambda **kwargs: 0.0)
+    monkeypatch.setattr(
+        availability.vm_request_repo,
+        "get_approved_vm_requests_overlapping_window",
+        lambda **kwargs: [],
+    )
+
+    calls: list[dict] = []
+    real_build_plan = vm_request_placement_service.build_plan
+
+    def build_plan(**kwargs):
+        calls.append(kwargs)
+        return real_build_plan(**kwargs)
+
+    monkeypatch.setattr(vm_request_placement_service, "build_plan", build_plan)
+    availability.clear_availability_cache()
+    yield calls
+    availability.clear_availability_cache()
+
+
+def _assess(db: Session, **overrides) -> object:
+    fields = {
+        "resource_type": "lxc",
+        "cores": 2,
+        "memory": 2048,
+        "rootfs_size": 12,
+        "days": 3,
+        "timezone": "Asia/Taipei",
+    }
+    request_in = VMRequestAvailabilityRequest(**{**fields, **overrides})
+    return availability._build_availability_response(
+        session=db, source_request=request_in, role=UserRole.student, stack_label="req"
+    )
+
+
+def test_slots_with_same_reservations_and_demand_share_one_plan(
+    db: Session, counted_plans: list[dict]
+) -> None:
+    response = _assess(db)
+
+    # 沒有預約：只有三種需求係數（0、0.5、1.0）
+    assert len(counted_plans) <= 3
+    assert all(call["context"] is not None for call in counted_plans)
+    slots = [slot for day in response.days for slot in day.slots]
+    assert len(slots) == 72
+    future = [slot for slot in slots if slot.label != "已結束"]
+    assert future and all(slot.node_snapshots for slot in future)
+
+
+def test_repeated_form_is_served_from_cache(db: Session, counted_plans: list[dict]) -> None:
+    first = _assess(db)
+    calls = len(counted_plans)
+
+    assert _assess(db) is first
+    assert len(counted_plans) == calls
+
+    _assess(db, cores=4)
+    assert len(counted_plans) > calls
+
+
+def test_cache_hit_skips_cluster_and_evaluation_loads(
+    db: Session,
+    counted_plans: list[dict],
+    cluster_generation: list[int],
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    first = _assess(db)
+    loads: list[str] = []
+    monkeypatch.setattr(
+        availability.advisor_service, "_load_cluster_state", lambda: loads.append("pve") or ([], [])
+    )
+    monkeypatch.setattr(
+        availability,
+        "_load_hourly_demand_profile",
+        lambda **kwargs: loads.append("demand") or {9: 1.0, 10: 0.5},
+    )
+
+    assert _assess(db) is first
+    assert loads == []
+
+    # 叢集快照重新載入後，即使內容相同也重新評估
+    cluster_generation[0] += 1
+    assert _assess(db) is not first
+    assert loads == ["pve", "demand"]
+
+
+def test_state_version_changes_with_open_requests(db: Session) -> None:
+    from app.models import VMRequest, VMRequestStatus
+    from tests.utils.user import create_random_user
+
+    before = availability._state_version(db)
+    assert availability._state_version(db) == before
+
+    user = create_random_user(db)
+    request = VMRequest(
+        user_id=user.id,
+        reason="availability cache version",
+        resource_type="lxc",
+        hostname="avail-version",
+        cores=1,
+        memory=512,
+        password="x",
+        storage="local-lvm",
+        environment_type="Test",
+        status=VMRequestStatus.pending,
+        created_at=datetime.now(UTC),
+    )
+    db.add(request)
+    db.commit()
+    try:
+        pending = availability._state_version(db)
+        assert pending != before
+
+        request.cores = 4
+        db.add(request)
+        db.commit()
+        assert availability._state_version(db) != pending
+    finally:
+        db.delete(request)
+        db.delete(user)
+        db.commit()
+
+
+def test_hourly_demand_profile_is_normalized(db: Session) -> None:
+    profile = availability._load_hourly_demand_profile(
+        session=db, timezone=ZoneInfo("Asia/Taipei")
+    )
+    assert sorted(profile) == list(range(24))
+    assert all(0.0 <= ratio <= 1.0 for ratio in profile.values())
+    assert max(profile.values()) in (0.0, 1.0)
@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import Counter
+
+import pytest
+
+from app.ai.pve_log.config import settings
+from app.ai.pve_log.snapshot import SnapshotService
+
+
+class _Endpoint:
+    def __init__(self, api: _FakeProxmox, parts: tuple[str, ...]) -> None:
+        self._api = api
+        self._parts = parts
+
+    def __getattr__(self, name: str) -> _Endpoint:
+        return _Endpoint(self._api, (*self._parts, name))
+
+    def __call__(self, *args) -> _Endpoint:
+        return _Endpoint(self._api, (*self._parts, *(str(a) for a in args)))
+
+    def get(self, **_params):
+        return self._api.handle("/".join(self._parts))
+
+
+class _FakeProxmox:
+    def __init__(self, delay: float = 0.0) -> None:
+        self.delay = delay
+        self.calls: Counter[str] = Counter()
+        self._lock = threading.Lock()
+        self.resources = [
+            {"vmid": 101, "type": "qemu", "node": "pve1", "status": "running", "name": "web", "maxmem": 1024},
+            {"vmid": 102, "type": "qemu", "node": "pve1", "status": "stopped", "name": "db", "maxmem": 2048},
+            {"vmid": 201, "type": "lxc", "node": "pve1", "status": "running", "name": "ct", "maxmem": 512},
+            {"vmid": 900, "type": "qemu", "node": "pve1", "status": "stopped", "template": 1},
+        ]
+
+    def __getattr__(self, name: str) -> _Endpoint:
+        return _Endpoint(self, (name,))
+
+    def handle(self, path: str):
+        with self._lock:
+            self.calls[path] += 1
+        if path == "cluster/resources":
+            time.sleep(self.delay)
+            return [dict(r) for r in self.resources]
+        if path == "cluster/status":
+            return [{"type": "cluster", "name": "campus", "nodes": 1, "quorate": 1}]
+        if path == "nodes":
+            return [{"node": "pve1", "status": "online"}]
+        if path.endswith("/storage"):
+            return []
+        if path.endswith("/status/current"):
+            return {"status": "running"}
+        if path.endswith("/config"):
+            vmid = int(path.split("/")[3])
+            return {"name": f"vm{vmid}", "hostname": f"ct{vmid}", "cores": 2}
+        if path.endswith("/interfaces"):
+            return [{"name": "eth0", "inet": "10.0.0.5/24"}]
+        raise AssertionError(path)
+
+    def detail_calls(self) -> list[str]:
+        return sorted(p for p in self.calls if p.endswith(("/config", "/interfaces")))
+
+
+@pytest.fixture(autouse=True)
+def _collect_everything(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, "collector_fetch_config", True)
+    monkeypatch.setattr(settings, "collector_fetch_lxc_interfaces", True)
+
+
+def test_concurrent_readers_share_one_collection() -> None:
+    api = _FakeProxmox(delay=0.2)
+    service = SnapshotService(get_client=lambda: api, max_age=lambda: 60.0)
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(service.get())) for _ in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert api.calls["cluster/resources"] == 1
+    assert len({id(s) for s in results}) == 1
+    snapshot = results[0]
+    assert [r.vmid for r in snapshot.resources] == [101, 102, 201]
+    assert sorted(c.vmid for c in snapshot.resource_configs) == [101, 102, 201]
+    assert [i.vmid for i in snapshot.network_interfaces] == [201]
+
+    # 快取期限內不碰 API
+    assert service.get() is snapshot
+    assert api.calls["cluster/resources"] == 1
+
+
+def test_details_are_refetched_only_for_changed_guests() -> None:
+    api = _FakeProxmox()
+    now = [0.0]
+    service = SnapshotService(
+        get_client=lambda: api,
+        max_age=lambda: 0.0,
+        detail_max_age=lambda: 600.0,
+        clock=lambda: now[0],
+    )
+    service.get()
+    assert len(api.detail_calls()) == 4
+
+    api.calls.clear()
+    service.get()
+    assert api.calls["cluster/resources"] == 1
+    assert api.calls["nodes/pve1/qemu/101/status/current"] == 1
+    assert api.detail_calls() == []
+
+    api.calls.clear()
+    api.resources[2]["status"] = "stopped"  # LXC 201 停止
+    api.resources[0]["maxmem"] = 4096  # VM 101 調整記憶體
+    del api.resources[1]  # VM 102 刪除
+    snapshot = service.get()
+    assert api.detail_calls() == ["nodes/pve1/lxc/201/config", "nodes/pve1/qemu/101/config"]
+    assert sorted(c.vmid for c in snapshot.resource_configs) == [101, 201]
+    assert snapshot.network_interfaces == []
+
+    api.calls.clear()
+    now[0] = 601.0
+    service.get()
+    assert api.detail_calls() == ["nodes/pve1/lxc/201/config", "nodes/pve1/qemu/101/config"]
@@ -0,0 +1,152 @@
+"""Tests for the pooled async Proxmox client in app.infrastructure.proxmox.async_client.
+
+PVE is faked with ``httpx.MockTransport``; hosts and the node-online callback
+are injected so no database is needed.
+"""
+
+from __future__ import annotations
+
+import asyncio
+
+import httpx
+import pytest
+
+from app.exceptions import ProxmoxError
+from app.infrastructure.proxmox.async_client import AsyncProxmoxClient, _Host
+from app.infrastructure.proxmox.resource_cache import ClusterResourceCache
+from app.infrastructure.proxmox.settings import PROXMOX_TICKET_TTL, ProxmoxSettings
+
+CFG = ProxmoxSettings(
+    host="pve-config",
+    user="root@pam",
+    password="secret",
+    verify_ssl=False,
+    iso_storage="local",
+    data_storage="local-lvm",
+    api_timeout=5,
+    task_check_interval=1,
+    pool_name="CampusCloud",
+)
+HOSTS = [_Host("pve-1", name="pve-1", node_id=1), _Host("pve-2", name="pve-2", node_id=2)]
+
+
+class _FakePve:
+    def __init__(self, *, down: set[str] | None = None) -> None:
+        self.down = down or set()
+        self.logins: list[str] = []
+        self.requests: list[httpx.Request] = []
+        self.expired: set[str] = set()
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        if request.url.host in self.down:
+            raise httpx.ConnectError("connection refused", request=request)
+        if request.url.path.endswith("/access/ticket"):
+            ticket = f"ticket-{len(self.logins)}"
+            self.logins.append(request.url.host)
+            return httpx.Response(
+                200,
+                json={"data": {"ticket": ticket, "CSRFPreventionToken": "csrf"}},
+            )
+        self.requests.append(request)
+        cookie = request.headers["Cookie"].removeprefix("PVEAuthCookie=")
+        if cookie in self.expired:
+            return httpx.Response(401)
+        return httpx.Response(200, json={"data": {"path": request.url.path}})
+
+
+def _client(pve: _FakePve, clock=None, marks=None) -> AsyncProxmoxClient:
+    return AsyncProxmoxClient(
+        CFG,
+        load_hosts=lambda _cfg: list(HOSTS),
+        mark_online=lambda node_id, online: (marks if marks is not None else []).append(
+            (node_id, online)
+        ),
+        transport=httpx.MockTransport(pve),
+        clock=clock or (lambda: 0.0),
+    )
+
+
+async def test_ticket_is_reused_and_writes_carry_csrf() -> None:
+    pve = _FakePve()
+    client = _client(pve)
+
+    await asyncio.gather(*(client.get("nodes") for _ in range(5)))
+    await client.post("nodes/pve-1/qemu/101/status/start")
+
+    assert pve.logins == ["pve-1"]
+    assert all(r.headers["Cookie"] == "PVEAuthCookie=ticket-0" for r in pve.requests)
+    assert "CSRFPreventionToken" not in pve.requests[0].headers
+    assert pve.requests[-1].headers["CSRFPreventionToken"] == "csrf"
+    await client.aclose()
+
+
+async def test_fails_over_in_ha_order_and_reports_node_state() -> None:
+    pve = _FakePve(down={"pve-1"})
+    marks: list[tuple[int, bool]] = []
+    client = _client(pve, marks=marks)
+
+    data = await client.get("version")
+
+    assert data == {"path": "/api2/json/version"}
+    assert client.active_host == "pve-2"
+    assert pve.requests[0].url.host == "pve-2"
+    assert marks == [(1, False), (2, True)]
+    await client.aclose()
+
+
+async def test_connect_failure_mid_session_moves_to_next_host() -> None:
+    pve = _FakePve()
+    client = _client(pve)
+    await client.get("version")
+
+    pve.down.add("pve-1")
+    await client.get("version")
+
+    assert client.active_host == "pve-2"
+    assert pve.logins == ["pve-1", "pve-2"]
+    await client.aclose()
+
+
+async def test_reauthenticates_on_401_and_after_ttl() -> None:
+    now = [0.0]
+    pve = _FakePve()
+    client = _client(pve, clock=lambda: now[0])
+    await client.get("version")
+
+    pve.expired.add("ticket-0")
+    await client.get("version")
+    assert len(pve.logins) == 2
+
+    now[0] += PROXMOX_TICKET_TTL
+    await client.get("version")
+    assert len(pve.logins) == 3
+    await client.aclose()
+
+
+async def test_all_hosts_down_raises_proxmox_error() -> None:
+    client = _client(_FakePve(down={"pve-1", "pve-2"}))
+
+    with pytest.raises(ProxmoxError, match="All Proxmox nodes are unavailable"):
+        await client.get("version")
+    await client.aclose()
+
+
+async def test_async_cache_refresh_is_shared_with_sync_readers() -> None:
+    calls: list[int] = []
+
+    async def fetch() -> list[dict]:
+        calls.append(1)
+        await asyncio.sleep(0)
+        return [{"vmid": 101, "pool": "CampusCloud"}]
+
+    cache = ClusterResourceCache(
+        fetch=lambda: pytest.fail("sync fetch should not run"),
+        ttl_seconds=lambda: 5.0,
+        clock=lambda: 100.0,
+    )
+
+    snapshots = await asyncio.gather(*(cache.get_async(fetch) for _ in range(8)))
+
+    assert calls == [1]
+    assert all(item is snapshots[0] for item in snapshots)
+    assert cache.get() is snapshots[0]
@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from app.exceptions import ProxmoxError
+from app.infrastructure.proxmox import client as proxmox_client
+from app.infrastructure.proxmox.health import NodeHealthMonitor
+
+NODES = [
+    SimpleNamespace(id=1, name="pve1", host="10.0.0.1", port=8006),
+    SimpleNamespace(id=2, name="pve2", host="10.0.0.2", port=8006),
+    SimpleNamespace(id=3, name="pve3", host="10.0.0.3", port=None),
+]
+
+
+class _Cluster:
+    def __init__(self, down: set[str], delay: float = 0.0) -> None:
+        self.down = down
+        self.delay = delay
+        self.probes: list[str] = []
+        self.saved: list[dict[int, bool]] = []
+        self._lock = threading.Lock()
+
+    def probe(self, host: str, port: int) -> bool:
+        assert port == 8006
+        time.sleep(self.delay)
+        with self._lock:
+            self.probes.append(host)
+        return host not in self.down
+
+    def monitor(self) -> NodeHealthMonitor:
+        return NodeHealthMonitor(
+            load_nodes=lambda: list(NODES),
+            probe=self.probe,
+            save_statuses=self.saved.append,
+            concurrency=lambda: 8,
+        )
+
+
+def test_round_probes_concurrently_and_saves_in_one_batch() -> None:
+    cluster = _Cluster(down={"10.0.0.1"}, delay=0.2)
+    monitor = cluster.monitor()
+
+    started = time.perf_counter()
+    ranked = monitor.ranked_nodes()
+    assert time.perf_counter() - started < 0.5
+
+    assert [(n.name, n.online) for n in ranked] == [
+        ("pve2", True),
+        ("pve3", True),
+        ("pve1", False),
+    ]
+    assert cluster.saved == [{1: False, 2: True, 3: True}]
+
+    # 之後的讀取不碰網路
+    monitor.ranked_nodes()
+    assert len(cluster.probes) == 3
+
+
+def test_reports_reorder_without_probing_and_invalidate_reprobes() -> None:
+    cluster = _Cluster(down=set())
+    monitor = cluster.monitor()
+    monitor.ranked_nodes()
+
+    monitor.report(1, False)
+    monitor.report(1, False)  # 狀態未變不重寫
+    assert [n.name for n in monitor.ranked_nodes()] == ["pve2", "pve3", "pve1"]
+    assert cluster.saved[1:] == [{1: False}]
+    assert len(cluster.probes) == 3
+
+    monitor.invalidate()
+    assert [n.name for n in monitor.ranked_nodes()] == ["pve1", "pve2", "pve3"]
+    assert len(cluster.probes) == 6
+
+
+def test_get_proxmox_api_skips_nodes_known_down(monkeypatch: pytest.MonkeyPatch) -> None:
+    cluster = _Cluster(down={"10.0.0.1"})
+    monitor = cluster.monitor()
+    connects: list[str] = []
+
+    def try_connect(host, cfg):
+        connects.append(host)
+        if host == "10.0.0.2":
+            raise ConnectionError("login refused")
+        return f"client@{host}"
+
+    monkeypatch.setattr(proxmox_client, "node_health_monitor", monitor)
+    monkeypatch.setattr(proxmox_client, "try_connect", try_connect)
+    monkeypatch.setattr(proxmox_client, "get_proxmox_settings", lambda: None)
+    monkeypatch.setattr(proxmox_client, "invalidate_async_proxmox_client", lambda: None)
+    monkeypatch.setattr(proxmox_client, "invalidate_cluster_resources", lambda: None)
+    proxmox_client.invalidate_proxmox_client()
+    try:
+        assert proxmox_client.get_proxmox_api() == "client@10.0.0.3"
+        assert connects == ["10.0.0.2", "10.0.0.3"]
+        assert [n.name for n in monitor.ranked_nodes()] == ["pve3", "pve1", "pve2"]
+
+        proxmox_client.invalidate_proxmox_client()
+        cluster.down = {"10.0.0.1", "10.0.0.2", "10.0.0.3"}
+        with pytest.raises(ProxmoxError):
+            proxmox_client.get_proxmox_api()
+    finally:
+        proxmox_client.invalidate_proxmox_client()
@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import threading
+import time
+
+import pytest
+
+from app.exceptions import NotFoundError
+from app.infrastructure.proxmox import operations
+from app.infrastructure.proxmox.resource_cache import (
+    ClusterResourceCache,
+    ClusterResourceSnapshot,
+)
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _cache(fetch, clock=None) -> ClusterResourceCache:
+    return ClusterResourceCache(
+        fetch=fetch,
+        ttl_seconds=lambda: 5.0,
+        clock=clock or _Clock(),
+    )
+
+
+def test_snapshot_is_reused_until_ttl_expires() -> None:
+    calls: list[int] = []
+    clock = _Clock()
+    cache = _cache(lambda: calls.append(1) or [{"vmid": 101, "pool": "p"}], clock)
+
+    first = cache.get()
+    clock.now += 4.9
+    assert cache.get() is first
+    clock.now += 0.2
+    assert cache.get() is not first
+
+    assert len(calls) == 2
+    assert first.by_vmid[101] == {"vmid": 101, "pool": "p"}
+    assert cache.stats() == {"hits": 1, "misses": 2, "hit_ratio": 1 / 3}
+
+
+def test_concurrent_misses_share_one_fetch() -> None:
+    calls: list[int] = []
+    release = threading.Event()
+
+    def fetch():
+        calls.append(1)
+        release.wait(timeout=5)
+        return [{"vmid": 101}]
+
+    cache = _cache(fetch)
+    results: list[ClusterResourceSnapshot] = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.1)
+    release.set()
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert len(calls) == 1
+    assert len(results) == 8
+    assert all(item is results[0] for item in results)
+
+
+def test_fetch_failure_reaches_waiters_and_is_not_cached() -> None:
+    outcomes = iter([RuntimeError("pve down"), [{"vmid": 7}]])
+
+    def fetch():
+        outcome = next(outcomes)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    cache = _cache(fetch)
+
+    with pytest.raises(RuntimeError, match="pve down"):
+        cache.get()
+    assert 7 in cache.get().by_vmid
+
+
+def test_invalidation_during_fetch_discards_the_result() -> None:
+    cache: ClusterResourceCache
+    calls: list[int] = []
+
+    def fetch():
+        calls.append(1)
+        if len(calls) == 1:
+            cache.invalidate()
+        return [{"vmid": len(calls)}]
+
+    cache = _cache(fetch)
+
+    assert 1 in cache.get().by_vmid
+    assert 2 in cache.get().by_vmid
+    assert 2 in cache.get().by_vmid
+    assert len(calls) == 2
+
+
+def test_operations_lookup_by_vmid_and_invalidate_after_delete(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    fetches: list[int] = []
+    resources = [
+        {"vmid": 100, "type": "qemu", "pool": "CampusCloud"},
+        {"vmid": 101, "type": "lxc", "pool": "CampusCloud"},
+        {"vmid": 102, "type": "lxc", "pool": "OtherPool"},
+    ]
+    cache = _cache(lambda: fetches.append(1) or resources)
+    monkeypatch.setattr(operations, "get_cluster_resources", cache.get)
+    monkeypatch.setattr(operations, "invalidate_cluster_resources", cache.invalidate)
+    monkeypatch.setattr(
+        operations,
+        "get_proxmox_settings",
+        lambda: type("Cfg", (), {"pool_name": "CampusCloud"})(),
+    )
+    monkeypatch.setattr(operations, "basic_blocking_task_status", lambda *_, **__: None)
+
+    class _Api:
+        def delete(self, **_):
+            return "UPID:delete"
+
+    monkeypatch.setattr(operations, "_resource_api", lambda *_: _Api())
+
+    assert operations.find_resource(100)["type"] == "qemu"
+    assert operations.find_lxc(101)["vmid"] == 101
+    with pytest.raises(NotFoundError):
+        operations.find_lxc(100)
+    with pytest.raises(NotFoundError):
+        operations.find_resource(102)
+    operations.find_resource(100)["pool"] = "mutated"
+    assert operations.find_resource(100)["pool"] == "CampusCloud"
+    assert len(fetches) == 1
+
+    operations.delete_resource("pve-a", 100, "qemu")
+    operations.find_resource(101)
+
+    assert len(fetches) == 2
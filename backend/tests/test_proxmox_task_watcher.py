@@ -0,0 +1,164 @@
+"""Tests for the shared PVE task watcher in app.infrastructure.proxmox.task_watcher."""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.exceptions import ProxmoxError
+from app.infrastructure.proxmox import client as proxmox_client
+from app.infrastructure.proxmox.task_watcher import TaskWatcher, upid_start_time
+
+START = 0x66000000
+
+
+def _upid(node: str, index: int) -> str:
+    return f"UPID:{node}:0000{index:04X}:00000001:{START + index:08X}:qmclone:{100 + index}:root@pam:"
+
+
+class _FakePve:
+    """Tasks finish after ``rounds`` listings of their node."""
+
+    def __init__(self, *, rounds: int = 2, failing: set[str] | None = None) -> None:
+        self.rounds = rounds
+        self.failing = failing or set()
+        self.listings: dict[str, int] = {}
+        self.status_reads = 0
+        self.known: dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def nodes(self, node: str):
+        return _FakeNode(self, node)
+
+    def row(self, node: str, upid: str) -> dict:
+        row = {"upid": upid, "node": node, "starttime": upid_start_time(upid)}
+        if self.listings.get(node, 0) >= self.rounds:
+            row["endtime"] = row["starttime"] + 5
+            row["status"] = "migration aborted" if upid in self.failing else "OK"
+        return row
+
+
+class _FakeNode:
+    def __init__(self, pve: _FakePve, node: str) -> None:
+        self._pve = pve
+        self._node = node
+        self.tasks = _FakeTasks(pve, node)
+
+
+class _FakeTasks:
+    def __init__(self, pve: _FakePve, node: str) -> None:
+        self._pve = pve
+        self._node = node
+
+    def get(self, *, source: str, since: int, limit: int) -> list[dict]:
+        assert source == "all"
+        with self._pve._lock:
+            self._pve.listings[self._node] = self._pve.listings.get(self._node, 0) + 1
+        return [
+            self._pve.row(self._node, upid)
+            for upid, node in self._pve.known.items()
+            if node == self._node and upid_start_time(upid) > since
+        ]
+
+    def __call__(self, upid: str):
+        pve = self._pve
+
+        class _Task:
+            class status:  # noqa: N801 - mirrors the proxmoxer attribute
+                @staticmethod
+                def get() -> dict:
+                    pve.status_reads += 1
+                    return {"status": "stopped", "exitstatus": "OK", "upid": upid}
+
+            class log:  # noqa: N801
+                @staticmethod
+                def get() -> list[dict]:
+                    return [{"t": "ERROR: target storage full"}]
+
+        return _Task()
+
+
+def _watcher(pve: _FakePve) -> TaskWatcher:
+    return TaskWatcher(
+        api=lambda: pve,
+        log_tail=lambda proxmox, **kwargs: proxmox_client._task_log_tail(proxmox, **kwargs),
+    )
+
+
+def test_one_listing_per_node_per_interval_for_all_tasks() -> None:
+    pve = _FakePve(rounds=3)
+    watcher = _watcher(pve)
+    upids = [(_upid(node, index), node) for node in ("pve-a", "pve-b") for index in range(10)]
+    pve.known.update(dict(upids))
+
+    futures = [watcher.watch(node, upid, interval=0.01) for upid, node in upids]
+    results = [future.result(timeout=5) for future in futures]
+
+    assert all(item["exitstatus"] == "OK" for item in results)
+    assert pve.listings == {"pve-a": 3, "pve-b": 3}
+    assert pve.status_reads == 0
+
+
+def test_failed_task_raises_with_log_tail_and_progress_ends_with_none() -> None:
+    upid = _upid("pve-a", 1)
+    pve = _FakePve(failing={upid})
+    pve.known[upid] = "pve-a"
+    updates: list[dict | None] = []
+
+    future = _watcher(pve).watch("pve-a", upid, interval=0.01, on_update=updates.append)
+
+    with pytest.raises(ProxmoxError, match="target storage full"):
+        future.result(timeout=5)
+    assert [item["status"] for item in updates[:-1]] == ["running", "stopped"]
+    assert updates[-1] is None
+
+
+def test_unlisted_upid_falls_back_to_direct_status() -> None:
+    pve = _FakePve()
+
+    result = _watcher(pve).watch("pve-a", _upid("pve-a", 3), interval=0.01).result(timeout=5)
+
+    assert result["exitstatus"] == "OK"
+    assert pve.status_reads == 1
+
+
+def test_short_watch_added_during_a_long_wait_is_polled_promptly() -> None:
+    pve = _FakePve()
+    slow, fast = _upid("pve-a", 1), _upid("pve-b", 2)
+    pve.known.update({slow: "pve-a", fast: "pve-b"})
+    watcher = _watcher(pve)
+
+    slow_future = watcher.watch("pve-a", slow, interval=60)
+    deadline = time.monotonic() + 5
+    while pve.listings.get("pve-a", 0) < 1 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    time.sleep(0.05)  # let the thread settle into its 60s wait
+
+    assert watcher.watch("pve-b", fast, interval=0.01).result(timeout=2)["exitstatus"] == "OK"
+    assert slow_future.result(timeout=2)["exitstatus"] == "OK"
+
+
+async def test_async_wait_runs_progress_callback_on_the_loop(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    pve = _FakePve()
+    upid = _upid("pve-b", 2)
+    pve.known[upid] = "pve-b"
+    monkeypatch.setattr(proxmox_client, "get_proxmox_api", lambda: pve)
+    loop_thread = threading.get_ident()
+    seen: list[tuple[str, int]] = []
+
+    result = await proxmox_client.wait_for_task_status(
+        "pve-b",
+        upid,
+        check_interval=0,
+        progress_callback=lambda data: seen.append((data["status"], threading.get_ident())),
+    )
+    await asyncio.sleep(0)
+
+    assert result["exitstatus"] == "OK"
+    assert seen[-1] == ("stopped", loop_thread)
+    assert {thread for _, thread in seen} == {loop_thread}
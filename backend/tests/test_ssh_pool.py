@@ -0,0 +1,122 @@
+"""Tests for the keyed SSH connection pool in app.infrastructure.ssh.pool."""
+
+from __future__ import annotations
+
+import pytest
+
+from app.infrastructure.ssh.pool import SSHConnectionPool
+
+
+class _FakeTransport:
+    def __init__(self) -> None:
+        self.active = True
+        self.keepalive: int | None = None
+        self.probes = 0
+
+    def is_active(self) -> bool:
+        return self.active
+
+    def set_keepalive(self, interval: int) -> None:
+        self.keepalive = interval
+
+    def open_session(self, timeout: float | None = None):
+        self.probes += 1
+        if not self.active:
+            raise EOFError("transport closed")
+        return self
+
+    def close(self) -> None:
+        pass
+
+
+class _FakeClient:
+    def __init__(self, host: str) -> None:
+        self.host = host
+        self.transport = _FakeTransport()
+        self.closed = False
+
+    def get_transport(self) -> _FakeTransport:
+        return self.transport
+
+    def close(self) -> None:
+        self.closed = True
+        self.transport.active = False
+
+
+def _pool(now: list[float], created: list[_FakeClient], *, max_idle: int = 2) -> SSHConnectionPool:
+    def connect(host, port, username, private_key_pem, **_kwargs) -> _FakeClient:
+        client = _FakeClient(host)
+        created.append(client)
+        return client
+
+    return SSHConnectionPool(
+        connect=connect,
+        max_idle_per_key=lambda: max_idle,
+        idle_timeout=lambda: 300.0,
+        healthcheck_after=lambda: 30.0,
+        keepalive_interval=lambda: 15,
+        clock=lambda: now[0],
+    )
+
+
+def test_sequential_syncs_share_one_connection_per_key() -> None:
+    now, created = [0.0], []
+    pool = _pool(now, created)
+
+    for _ in range(5):
+        with pool.connection("gw", 22, "root", "KEY-A") as client:
+            assert client is created[0]
+    with pool.connection("gw", 22, "root", "KEY-B"):
+        pass
+
+    assert len(created) == 2
+    assert created[0].transport.keepalive == 15
+    assert created[0].transport.probes == 0
+    pool.close_all()
+    assert all(client.closed for client in created)
+
+
+def test_idle_connection_is_probed_and_dead_one_replaced() -> None:
+    now, created = [0.0], []
+    pool = _pool(now, created)
+    with pool.connection("gw", 22, "root", "KEY"):
+        pass
+
+    now[0] = 60.0
+    with pool.connection("gw", 22, "root", "KEY") as client:
+        assert client is created[0]
+    assert created[0].transport.probes == 1
+
+    created[0].transport.active = False
+    with pool.connection("gw", 22, "root", "KEY") as client:
+        assert client is created[1]
+    assert created[0].closed
+
+
+def test_connection_errors_discard_but_command_errors_keep() -> None:
+    now, created = [0.0], []
+    pool = _pool(now, created)
+
+    with pytest.raises(ValueError), pool.connection("gw", 22, "root", "KEY"):
+        raise ValueError("haproxy -c rejected the config")
+    assert pool.idle_count() == 1 and not created[0].closed
+
+    with pytest.raises(EOFError), pool.connection("gw", 22, "root", "KEY"):
+        raise EOFError("socket closed")
+    assert pool.idle_count() == 0 and created[0].closed
+
+
+def test_idle_cap_and_timeout_evict_connections() -> None:
+    now, created = [0.0], []
+    pool = _pool(now, created, max_idle=1)
+
+    with pool.connection("gw", 22, "root", "KEY"), pool.connection("gw", 22, "root", "KEY"):
+        pass
+    assert len(created) == 2
+    assert pool.idle_count() == 1
+    assert sum(client.closed for client in created) == 1
+
+    now[0] = 301.0
+    assert pool.evict_idle() == 1
+    assert pool.idle_count() == 0
+    assert all(client.closed for client in created)
@@ -45,6 +45,7 @@ const KIND_LABEL: Record<JobKind, string> = {
   vm_request: "開機申請",
   spec_change: "規格變更",
   deletion: "刪除",
+  firewall_sync: "防火牆同步",
 }
 
 function fmtTime(iso: string) {
@@ -8,6 +8,7 @@ export type JobKind =
   | "vm_request"
   | "spec_change"
   | "deletion"
+  | "firewall_sync"
 
 export type JobStatus =
   | "pending"
@@ -37,6 +38,7 @@ export type JobsListResponse = {
   items: JobItem[]
   total: number
   active_count: number
+  next_cursor?: string | null
 }
 
 export type JobsListQuery = {
@@ -46,6 +48,7 @@ export type JobsListQuery = {
   limit?: number
   offset?: number
   history_days?: number
+  cursor?: string
 }
 
 export type JobDetail = {
@@ -70,6 +73,7 @@ export const JobsAPI = {
         limit: params.limit ?? 50,
         offset: params.offset ?? 0,
         history_days: params.history_days ?? 30,
+        cursor: params.cursor,
       },
       errors: { 422: "Validation Error" },
     })
@@ -98,6 +102,35 @@ export const JobsAPI = {
 
 export type JobsSubscriber = (snapshot: JobsListResponse) => void
 
+type JobsSocketMessage =
+  | ({ type: "snapshot" } & JobsListResponse)
+  | {
+      type: "patch"
+      upsert: JobItem[]
+      remove: string[]
+      order: string[]
+      total: number
+      active_count: number
+    }
+
+/** 套用伺服器送來的快照 / 差異，回傳合併後的完整清單。 */
+function applyJobsMessage(
+  current: Map<string, JobItem>,
+  msg: JobsSocketMessage,
+): JobsListResponse {
+  if (msg.type === "snapshot") {
+    current.clear()
+    for (const item of msg.items) current.set(item.id, item)
+    return { items: msg.items, total: msg.total, active_count: msg.active_count }
+  }
+  for (const id of msg.remove) current.delete(id)
+  for (const item of msg.upsert) current.set(item.id, item)
+  const items = msg.order
+    .map((id) => current.get(id))
+    .filter((item): item is JobItem => item !== undefined)
+  return { items, total: msg.total, active_count: msg.active_count }
+}
+
 export function connectJobsWebSocket(
   token: string,
   onSnapshot: JobsSubscriber,
@@ -120,10 +153,12 @@ export function connectJobsWebSocket(
       schedule()
       return
     }
+    // 每條連線從新的 snapshot 開始累積
+    const current = new Map<string, JobItem>()
     ws.onmessage = (evt) => {
       try {
-        const data = JSON.parse(evt.data) as JobsListResponse
-        onSnapshot(data)
+        const msg = JSON.parse(evt.data) as JobsSocketMessage
+        onSnapshot(applyJobsMessage(current, msg))
       } catch {
         // ignore parse error
       }